@@ -80,36 +80,43 @@ __description__ = "Comprehensive trip management system for educational institut
 __license__ = "MIT"
 
 # Package-level imports - Make core classes available at package level
-# This allows users to import directly from the package root
-try:
+# This allows users to import directly from the package root.
+# The modules are imported on first access (PEP 562), so importing the
+# package (e.g. to start the GUI) does not load every model and the
+# database driver up front.
+_LAZY_IMPORTS = {
     # Core entity classes - The main business objects
-    from .student import Student
-    from .activity import Activity
-    from .expense import Expense
-    from .feedback import Feedback
-    from .statistics import Statistics
-    from .group import Group
-    
+    'Student': '.student',          # Student entity and user management
+    'Activity': '.activity',        # Activity management and scheduling
+    'Expense': '.expense',          # Financial transaction handling
+    'Feedback': '.feedback',        # Student feedback system
+    'Statistics': '.statistics',    # Analytics and reporting
+    'Group': '.group',              # Student grouping functionality
     # Database connection - Essential for all operations
-    from .db_connection import DbConnection
-    
-    # Set what's available when someone does "from PythonExpenseApp import *"
-    __all__ = [
-        'Student',      # Student entity and user management
-        'Activity',     # Activity management and scheduling
-        'Expense',      # Financial transaction handling
-        'Feedback',     # Student feedback system
-        'Statistics',   # Analytics and reporting
-        'Group',        # Student grouping functionality
-        'DbConnection', # Database connectivity
-    ]
-    
-except ImportError as e:
-    # Handle import errors gracefully - some modules might not be available
-    # during development or if dependencies are missing
-    import warnings
-    warnings.warn(f"Could not import all modules: {e}", ImportWarning)
-    __all__ = []
+    'DbConnection': '.db_connection',  # Database connectivity
+}
+
+# Set what's available when someone does "from PythonExpenseApp import *"
+__all__ = list(_LAZY_IMPORTS)
+
+def __getattr__(name):
+    """
+    Import a core class the first time it is accessed from the package root.
+
+    Args:
+        name (str): Attribute requested (e.g. "Student")
+    Returns:
+        The requested class
+    Raises:
+        AttributeError: If the name is not a lazily exported class
+    """
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value  # Cache it: later accesses skip __getattr__
+    return value
 
 # Package configuration constants
 # These can be imported and used throughout the application
@@ -288,13 +295,14 @@ def _debug_package_status():
     This function is useful during development to verify that
     all modules are loading correctly.
     """
+    import sys
     print(f"=== {Config.APP_TITLE} Package Status ===")
     print(f"Version: {__version__}")
     print(f"Available modules: {len(__all__)}")
     for module_name in __all__:
         try:
-            # Try to access each exported item
-            item = globals().get(module_name)
+            # Try to access each exported item (this imports the lazy ones)
+            item = getattr(sys.modules[__name__], module_name, None)
             if item:
                 print(f"  ✓ {module_name}: {type(item).__name__}")
             else:
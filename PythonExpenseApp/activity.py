@@ -15,6 +15,10 @@
 
 # Import the database connection module for all database operations
 from PythonExpenseApp.db_connection import DbConnection
+# Import the session for the identity map and the deferred writes
+from PythonExpenseApp.session import Session
+# Import the rollups updated by the enrollment transaction
+from PythonExpenseApp.rollups import Rollups
 # Import datetime for handling date/time operations
 from datetime import datetime
 
@@ -36,6 +40,30 @@ class Activity:
         activity_feedback (list): List of feedback entries (loaded from DB)
     """
 
+    # Row layout of from_row, shared with the compact listings (roster.ActivityRoster)
+    ALL_ACTIVITIES_QUERY = """SELECT id, name, day, start_time, finish_time, location, 
+                          max_participants, duration, description
+                   FROM activities 
+                   ORDER BY day, start_time"""
+
+    # Queries shared with the async variants (async_models.AsyncActivity)
+    PARTICIPANTS_QUERY = """SELECT s.id, s.name, s.surname
+                   FROM students s
+                   JOIN student_activities sa ON s.id = sa.student_id
+                   WHERE sa.activity_id = %s
+                   ORDER BY s.surname, s.name"""
+    RATING_COUNTS_QUERY = """SELECT rating, COUNT(*) as count
+                   FROM feedback 
+                   WHERE activity_id = %s
+                   GROUP BY rating
+                   ORDER BY rating"""
+    RECENT_FEEDBACK_QUERY = """SELECT f.rating, f.comment, f.created_at, s.name, s.surname
+                   FROM feedback f
+                   JOIN students s ON f.student_id = s.id
+                   WHERE f.activity_id = %s
+                   ORDER BY f.created_at DESC
+                   LIMIT 50"""
+
     def __init__(self, name, day, start, finish, location, maxpart=None, duration=None, description=None):
         """
         Initialize a new Activity instance with the provided parameters.
@@ -115,20 +143,22 @@ class Activity:
         :return: list of tuples (student_id, first_name, last_name)
         - Returns empty list if no participants or database error.
         - Joins student_activities and students tables.
+        - Inside a Session the list is read once and shared by every caller.
         """
         # Check if activity exists in database
         if not self.id:
             return []
-            
-        # Complex query joining students and enrollment tables
-        query = """SELECT s.id, s.name, s.surname
-                   FROM students s
-                   JOIN student_activities sa ON s.id = sa.student_id
-                   WHERE sa.activity_id = %s
-                   ORDER BY s.surname, s.name"""
         
+        session = Session.current()
+        if session is not None:
+            return session.memo(('participants', self.id), self._load_participant_list)
+        return self._load_participant_list()
+
+    def _load_participant_list(self):
+        """Query the participant list (see get_participant_list)."""
+        # Complex query joining students and enrollment tables
         # Execute query and return results
-        success, result = DbConnection.execute_query(query, (self.id,), fetch_all=True)
+        success, result = DbConnection.execute_query(self.PARTICIPANTS_QUERY, (self.id,), fetch_all=True)
         if success:
             return result  # List of tuples: (id, name, surname)
         return []
@@ -160,16 +190,21 @@ class Activity:
             return None
             
         # Query to get count of each rating value (1-5 stars)
-        query = """SELECT rating, COUNT(*) as count
-                   FROM feedback 
-                   WHERE activity_id = %s
-                   GROUP BY rating
-                   ORDER BY rating"""
-        
-        success, rating_counts = DbConnection.execute_query(query, (self.id,), fetch_all=True)
+        success, rating_counts = DbConnection.execute_query(self.RATING_COUNTS_QUERY, (self.id,), fetch_all=True)
         if not success:
             return None
-        
+        return self.summarize_ratings(rating_counts)
+
+    @staticmethod
+    def summarize_ratings(rating_counts):
+        """
+        Compute the rating statistics from the number of ratings of each value.
+        Average and median are derived from the distribution, so no further
+        query is needed.
+
+        :param rating_counts: list of tuples (rating, count) - Result of RATING_COUNTS_QUERY.
+        :return: dict or None - Rating stats, None if there are no ratings.
+        """
         # Initialize rating distribution with all possible ratings (1-5)
         rating_distribution = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0} # Default distribution - all zero
         total_ratings = 0
@@ -184,24 +219,18 @@ class Activity:
             return None
         
         # Calculate average rating
-        query = """SELECT AVG(rating) as avg_rating
-                   FROM feedback 
-                   WHERE activity_id = %s"""
-        
-        success, avg_result = DbConnection.execute_query(query, (self.id,), fetch_one=True) # Fetch average rating
-        average_rating = float(avg_result[0]) if avg_result and avg_result[0] else 0
-        
-        # Calculate median rating (approximate method using SQL)
-        # This gets the middle value when ratings are sorted
-        query = """SELECT rating
-                   FROM feedback 
-                   WHERE activity_id = %s
-                   ORDER BY rating
-                   LIMIT 1 OFFSET %s"""
+        average_rating = sum(rating * count for rating, count in rating_distribution.items()) / total_ratings
         
+        # Calculate median rating: the value at position total_ratings // 2
+        # when ratings are sorted
         median_offset = total_ratings // 2  # Middle position for median
-        success, median_result = DbConnection.execute_query(query, (self.id, median_offset), fetch_one=True) # Use OFFSET to get median
-        median_rating = float(median_result[0]) if median_result else 0 # Ensure median is a float
+        seen = 0
+        median_rating = 0.0
+        for rating in sorted(rating_distribution):
+            seen += rating_distribution[rating]
+            if seen > median_offset:
+                median_rating = float(rating) # Ensure median is a float
+                break
         
         # Return comprehensive rating statistics
         return {
@@ -237,14 +266,7 @@ class Activity:
         
         # Get recent feedback with student information
         # This query joins feedback with students to get names
-        query = """SELECT f.rating, f.comment, f.created_at, s.name, s.surname
-                   FROM feedback f
-                   JOIN students s ON f.student_id = s.id
-                   WHERE f.activity_id = %s
-                   ORDER BY f.created_at DESC
-                   LIMIT 50"""
-        
-        success, recent_feedback = DbConnection.execute_query(query, (self.id,), fetch_all=True) #  Fetch last 50 feedback entries
+        success, recent_feedback = DbConnection.execute_query(self.RECENT_FEEDBACK_QUERY, (self.id,), fetch_all=True) #  Fetch last 50 feedback entries
         if not success:
             recent_feedback = []
         
@@ -264,24 +286,12 @@ class Activity:
         - Returns empty list if no activities or database error.
         """
         # Query to get all activities in chronological order
-        query = """SELECT id, name, day, start_time, finish_time, location, 
-                          max_participants, duration, description
-                   FROM activities 
-                   ORDER BY day, start_time"""
-        
-        success, result = DbConnection.execute_query(query, fetch_all=True)
+        success, result = DbConnection.execute_query(Activity.ALL_ACTIVITIES_QUERY, fetch_all=True)
         if not success:
             return []
         
         # Convert database rows to Activity objects
-        activities = []
-        for row in result:
-            # Create Activity object with data from database
-            activity = Activity(row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8]) # row[0] is the ID
-            activity.id = row[0]  # Set the database ID
-            activities.append(activity) # Append to list
-        
-        return activities
+        return [Activity.from_row(row) for row in result]
 
     @staticmethod
     def get_activity_by_id(activity_id):
@@ -291,6 +301,12 @@ class Activity:
         :param activity_id: int - The unique database ID of the activity to retrieve
         :return: Activity or None - Activity object if found, None if not found or error
         """
+        session = Session.current()
+        if session is not None:
+            activity = session.get(Activity, activity_id)
+            if activity is not None:
+                return activity  # Already loaded in this session
+        
         # Query to get specific activity by ID
         query = """SELECT id, name, day, start_time, finish_time, location, 
                           max_participants, duration, description
@@ -302,17 +318,31 @@ class Activity:
             return None
         
         # Create Activity object from database row
-        activity = Activity(result[1], result[2], result[3], result[4], result[5], 
-                           result[6], result[7], result[8])
-        activity.id = result[0]  # Set the database ID
-        return activity
+        return Activity.from_row(result)
 
-    def save_to_database(self):
+    @staticmethod
+    def from_row(row):
         """
-        Save this activity to the database.
+        Build an Activity from a row (id, name, day, start_time, finish_time, location,
+        max_participants, duration, description).
 
-        :return: bool - True if saved successfully, False if error occurred.
-        - Sets self.id to the new database ID if successful.
+        :param row: tuple - Database row.
+        :return: Activity - Inside a Session, the instance already loaded for the same id.
+        """
+        session = Session.current()
+        if session is not None:
+            existing = session.get(Activity, row[0])
+            if existing is not None:
+                return existing
+        activity = Activity(row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[8]) # row[0] is the ID
+        activity.id = row[0]  # Set the database ID
+        return session.identity(activity) if session is not None else activity
+
+    def insert_statement(self):
+        """
+        Build the INSERT statement of this activity (used by save_to_database and Session.commit).
+
+        :return: tuple - (query, params)
         """
         # SQL INSERT query for new activity
         query = """INSERT INTO activities (name, day, start_time, finish_time, location, 
@@ -322,6 +352,22 @@ class Activity:
         # Parameters tuple matching the query placeholders
         params = (self.name, self.day, self.start, self.finish, self.location,
                  self.maxpart, self.duration, self.description)
+        return query, params
+
+    def save_to_database(self):
+        """
+        Save this activity to the database.
+
+        :return: bool - True if saved (or scheduled) successfully, False if error occurred.
+        - Sets self.id to the new database ID if successful.
+        - Inside a Session the insert is deferred to Session.commit (which sets the ID).
+        """
+        session = Session.current()
+        if session is not None:
+            session.add(self)  # Written with the other pending changes at commit
+            return True
+        
+        query, params = self.insert_statement()
         
         # Execute the INSERT query
         success, result = DbConnection.execute_query(query, params)
@@ -330,6 +376,56 @@ class Activity:
             return True
         return False
 
+    @staticmethod
+    def enroll_student(student_id, activity_id):
+        """
+        Enroll a student in an activity, checking time conflicts, duplicates and capacity.
+
+        The checks and the insert run in one transaction (DbConnection.run_transaction)
+        that locks the activity row, so two students cannot take the last place at the
+        same time; deadlocks and lock wait timeouts are retried.
+
+        :param student_id: int - The student to enroll.
+        :param activity_id: int - The activity.
+        :return: tuple (bool, str, str) - (success, status, message), status is one of
+                 'subscribed', 'conflict', 'already_subscribed', 'full', 'not_found', 'error'.
+        """
+        def work(cursor):
+            # Lock the activity: concurrent enrollments in it wait here
+            cursor.execute("""SELECT day, start_time, finish_time, max_participants
+                              FROM activities WHERE id = %s FOR UPDATE""", (activity_id,))
+            activity = cursor.fetchone()
+            if not activity:
+                return False, 'not_found', "The activity no longer exists."
+            day, start_time, finish_time, max_participants = activity
+
+            # Time conflicts with the activities of the same day
+            cursor.execute("""SELECT a.id, a.name, a.start_time, a.finish_time FROM student_activities sa
+                              JOIN activities a ON sa.activity_id = a.id
+                              WHERE sa.student_id = %s AND a.day = %s""", (student_id, day))
+            same_day = cursor.fetchall()
+            if any(row[0] == activity_id for row in same_day):
+                return False, 'already_subscribed', "You are already subscribed to this activity."
+            for _, name, existing_start, existing_finish in same_day:
+                if not (finish_time <= existing_start or start_time >= existing_finish):
+                    return False, 'conflict', f"You are already subscribed to '{name}' at this time."
+
+            # Capacity (None = unlimited)
+            if max_participants is not None:
+                cursor.execute("SELECT COUNT(*) FROM student_activities WHERE activity_id = %s", (activity_id,))
+                if cursor.fetchone()[0] >= max_participants:
+                    return False, 'full', "This activity is already full."
+
+            cursor.execute("INSERT INTO student_activities (student_id, activity_id) VALUES (%s, %s)",
+                           (student_id, activity_id))
+            Rollups.record(cursor, 'enrollments', 'id', [cursor.lastrowid])
+            return True, 'subscribed', "You have been subscribed to the activity."
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            return False, 'error', f"Could not subscribe: {result}"
+        return result
+
     def is_full(self):
         """
         Check if this activity has reached its participant capacity.
@@ -0,0 +1,236 @@
+# ===================================================================
+# ARCHIVAL - MOVE SETTLED DEBTS AND OLD EXPENSES OUT OF THE LIVE TABLES
+# ===================================================================
+# debts and expenses only grow: mark_debt_as_paid flips paid = TRUE and
+# every unpaid-debt query keeps skipping the settled rows. The archival
+# pipeline moves them to archive tables with the same columns:
+#
+# - debts_archive: paid debts (any age)
+# - expenses_archive: expenses dated before a cutoff (or the end of the
+#   trip) that no live debt refers to any more. debts.expense_id cascades
+#   on delete, so an expense stays live while one of its debts is unpaid.
+# - debt_pair_summary: one row per (payer, debtor) with the number, total
+#   and dates of their archived debts, so settled history between two
+#   students is one row instead of many
+#
+# Rows are moved in small batches, one short transaction each, walking
+# the ids upwards: the candidates of a batch are read without locks, then
+# locked by primary key and checked again (SELECT ... FOR UPDATE), copied,
+# summarised and deleted. Only the rows being moved are ever locked, so
+# the application keeps writing while the archival runs.
+#
+# The history views expenses_history and debts_history (UNION ALL of the
+# live and archive tables) are what the history queries read (expense
+# listings, expense totals, rollup backfills), so archiving never changes
+# their results.
+#
+# Archived rows keep their ids. MySQL 8 persists the AUTO_INCREMENT
+# counters, so the ids of the live tables are never reused.
+#
+# KEY RESPONSIBILITIES:
+# 1. Archive paid debts and old expenses in small online batches
+# 2. Maintain the per-pair summary of the archived debts
+# 3. Read the settled history between students
+#
+# USAGE:
+#   Archival().run(expenses_before=date(2025, 6, 14))   # {'debts': 812, 'expenses': 96, 'batches': 4}
+#   Archival().run(after_trip=True)                      # Expenses up to the last activity day
+#   Archival.pair_summaries(student_id)
+#
+#   python -m PythonExpenseApp.archival --after-trip --batch-size 500 --pause 0.1
+# ===================================================================
+
+import argparse  # Command line options
+import datetime  # Cutoff dates
+import time  # Pause between batches
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class Archival:
+    """
+    Batched, online archival of paid debts and old expenses.
+
+    ATTRIBUTES:
+        batch_size (int): Rows moved per transaction
+        pause (float): Seconds to sleep between batches (lets other transactions through)
+        stats (dict): debts, expenses, batches of the last run
+    """
+
+    BATCH_SIZE = 500
+
+    DEBT_COLUMNS = ("id, payer_id, debtor_id, amount, description, expense_id, paid, "
+                    "date_created, date_paid, created_at, updated_at")
+    EXPENSE_COLUMNS = "id, amount, description, date, id_giver, id_receiver, id_activity, created_at"
+
+    # Candidates of a batch (ids after the previous batch), then the same rows locked and checked again
+    PAID_DEBTS_QUERY = """SELECT id FROM debts WHERE paid = TRUE AND id > %s
+                          ORDER BY id LIMIT %s"""
+    LOCK_DEBTS_QUERY = "SELECT id FROM debts WHERE id IN ({ids}) AND paid = TRUE FOR UPDATE"
+    OLD_EXPENSES_QUERY = """SELECT e.id FROM expenses e
+                            WHERE e.id > %s AND e.date < %s
+                              AND NOT EXISTS (SELECT 1 FROM debts d WHERE d.expense_id = e.id)
+                            ORDER BY e.id LIMIT %s"""
+    LOCK_EXPENSES_QUERY = """SELECT e.id FROM expenses e
+                             WHERE e.id IN ({ids}) AND e.date < %s
+                               AND NOT EXISTS (SELECT 1 FROM debts d WHERE d.expense_id = e.id)
+                             FOR UPDATE"""
+    # The batch totals come from a derived table: VALUES() in the update is deprecated since MySQL 8.0.20
+    SUMMARY_QUERY = """INSERT INTO debt_pair_summary (payer_id, debtor_id, debts, total, first_created, last_paid)
+                       SELECT * FROM (
+                           SELECT payer_id, debtor_id, COUNT(*) AS debts, SUM(amount) AS total,
+                                  MIN(date_created) AS first_created, MAX(date_paid) AS last_paid
+                           FROM debts WHERE id IN ({ids})
+                           GROUP BY payer_id, debtor_id) AS src
+                       ON DUPLICATE KEY UPDATE debts = debt_pair_summary.debts + src.debts,
+                           total = debt_pair_summary.total + src.total,
+                           first_created = LEAST(debt_pair_summary.first_created, src.first_created),
+                           last_paid = GREATEST(COALESCE(debt_pair_summary.last_paid, src.last_paid),
+                                                COALESCE(src.last_paid, debt_pair_summary.last_paid))"""
+
+    def __init__(self, batch_size=None, pause=0.0):
+        """
+        :param batch_size: int, optional - Rows moved per transaction (default: BATCH_SIZE).
+        :param pause: float - Seconds between batches.
+        """
+        self.batch_size = batch_size or self.BATCH_SIZE
+        self.pause = pause
+        self.stats = {'debts': 0, 'expenses': 0, 'batches': 0}
+
+    # ---------------------------------------------------------------
+    # BATCHES
+
+    @staticmethod
+    def _lock(cursor, query, candidates, *params):
+        """Lock the candidates that still qualify; returns their ids and placeholders."""
+        cursor.execute(query.format(ids=', '.join(['%s'] * len(candidates))), (*candidates, *params))
+        ids = [row[0] for row in cursor.fetchall()]
+        return ids, ', '.join(['%s'] * len(ids))
+
+    def _archive_debts(self, cursor, after):
+        """Move one batch of paid debts; returns (candidates read, rows moved, last id)."""
+        cursor.execute(self.PAID_DEBTS_QUERY, (after, self.batch_size))
+        candidates = [row[0] for row in cursor.fetchall()]
+        if not candidates:
+            return 0, 0, after
+        ids, placeholders = self._lock(cursor, self.LOCK_DEBTS_QUERY, candidates)
+        if not ids:
+            return len(candidates), 0, candidates[-1]
+        cursor.execute(f"""INSERT INTO debts_archive ({self.DEBT_COLUMNS})
+                           SELECT {self.DEBT_COLUMNS} FROM debts WHERE id IN ({placeholders})""", ids)
+        cursor.execute(self.SUMMARY_QUERY.format(ids=placeholders), ids)
+        cursor.execute(f"DELETE FROM debts WHERE id IN ({placeholders})", ids)
+        return len(candidates), len(ids), candidates[-1]
+
+    def _archive_expenses(self, cursor, after, before):
+        """Move one batch of expenses dated before the cutoff; returns (candidates read, rows moved, last id)."""
+        cursor.execute(self.OLD_EXPENSES_QUERY, (after, before, self.batch_size))
+        candidates = [row[0] for row in cursor.fetchall()]
+        if not candidates:
+            return 0, 0, after
+        ids, placeholders = self._lock(cursor, self.LOCK_EXPENSES_QUERY, candidates, before)
+        if not ids:
+            return len(candidates), 0, candidates[-1]
+        cursor.execute(f"""INSERT INTO expenses_archive ({self.EXPENSE_COLUMNS})
+                           SELECT {self.EXPENSE_COLUMNS} FROM expenses WHERE id IN ({placeholders})""", ids)
+        cursor.execute(f"DELETE FROM expenses WHERE id IN ({placeholders})", ids)
+        return len(candidates), len(ids), candidates[-1]
+
+    def _drain(self, key, batch):
+        """Run batch(cursor, after) in its own transaction, walking the ids, until no candidate is left."""
+        after = 0
+        while True:
+            success, result = DbConnection.run_transaction(lambda cursor: batch(cursor, after))
+            if not success:
+                raise RuntimeError(result)
+            read, moved, after = result
+            self.stats[key] += moved
+            self.stats['batches'] += 1 if moved else 0
+            if read < self.batch_size:
+                return
+            if self.pause:
+                time.sleep(self.pause)
+
+    def run(self, expenses_before=None, after_trip=False):
+        """
+        Archive every paid debt, then the expenses dated before the cutoff.
+
+        :param expenses_before: date, optional - Expenses dated before this day are archived.
+        :param after_trip: bool - Use the day after the last activity as the cutoff
+                           (only once that day has passed).
+        :return: tuple (bool, dict or str) - (success, stats or error message)
+        """
+        self.stats = {'debts': 0, 'expenses': 0, 'batches': 0}
+        try:
+            if after_trip and expenses_before is None:
+                expenses_before = self.trip_cutoff()
+            self._drain('debts', self._archive_debts)
+            if expenses_before is not None:
+                self._drain('expenses', lambda cursor, after: self._archive_expenses(cursor, after, expenses_before))
+        except RuntimeError as e:
+            print(f"Error archiving: {e}")
+            return False, str(e)
+        return True, dict(self.stats)
+
+    @staticmethod
+    def trip_cutoff():
+        """
+        :return: date or None - The day after the last activity, if it is already past.
+        """
+        success, result = DbConnection.execute_query("SELECT MAX(day) FROM activities", fetch_one=True)
+        if not success:
+            raise RuntimeError(result)
+        if not result or result[0] is None:
+            return None
+        last_day = result[0]
+        if isinstance(last_day, str):
+            last_day = datetime.date.fromisoformat(last_day[:10])
+        if isinstance(last_day, datetime.datetime):
+            last_day = last_day.date()
+        cutoff = last_day + datetime.timedelta(days=1)
+        return cutoff if cutoff <= datetime.date.today() else None
+
+    # ---------------------------------------------------------------
+    # HISTORY
+
+    @staticmethod
+    def pair_summaries(student_id=None):
+        """
+        Settled history between students, one row per (payer, debtor) pair.
+
+        :param student_id: int, optional - Only the pairs this student belongs to.
+        :return: list - (payer_id, debtor_id, debts, total, first_created, last_paid); empty on error.
+        """
+        query = """SELECT payer_id, debtor_id, debts, total, first_created, last_paid
+                   FROM debt_pair_summary"""
+        params = ()
+        if student_id is not None:
+            query += " WHERE payer_id = %s OR debtor_id = %s"
+            params = (student_id, student_id)
+        success, rows = DbConnection.execute_query(query + " ORDER BY total DESC", params, fetch_all=True)
+        if not success:
+            print(f"Error reading debt summaries: {rows}")
+            return []
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive paid debts and old expenses in small batches.")
+    parser.add_argument("--before", type=datetime.date.fromisoformat, default=None, metavar="YYYY-MM-DD",
+                        help="archive the expenses dated before this day")
+    parser.add_argument("--after-trip", action="store_true",
+                        help="archive the expenses up to the last activity day, once the trip is over")
+    parser.add_argument("--batch-size", type=int, default=Archival.BATCH_SIZE,
+                        help=f"rows moved per transaction (default: {Archival.BATCH_SIZE})")
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds to wait between batches")
+    args = parser.parse_args(argv)
+
+    success, result = Archival(args.batch_size, args.pause).run(args.before, args.after_trip)
+    if success:
+        print(f"Archived {result['debts']} debts and {result['expenses']} expenses "
+              f"in {result['batches']} batches")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,109 @@
+# ===================================================================
+# ASYNC DB CONNECTION - ASYNCIO FACADE OVER THE CONNECTION POOL
+# ===================================================================
+# DbConnection is blocking: every query holds the calling thread until
+# MySQL answers. AsyncDbConnection exposes the same operations as
+# coroutines, so composite views can await several independent queries
+# at once (asyncio.gather) and a service can serve many users from one
+# event loop.
+#
+# KEY RESPONSIBILITIES:
+# 1. Run DbConnection calls on a bounded executor, never more at once
+#    than the pool has connections (mysql.connector pools raise instead of
+#    waiting when exhausted)
+# 2. Keep the (success, result) contract of DbConnection
+# 3. Run any blocking model function off the event loop (run)
+#
+# mysql.connector has no asyncio API, so the queries run on worker
+# threads; the coroutine interface is what callers depend on, and a
+# native async driver can replace the executor behind it.
+#
+# USAGE:
+#   success, rows = await AsyncDbConnection.execute_query(query, params, fetch_all=True)
+#   students, activities = await asyncio.gather(
+#       AsyncDbConnection.execute_query(q1, fetch_all=True),
+#       AsyncDbConnection.execute_query(q2, fetch_all=True))
+# ===================================================================
+
+import asyncio  # Event loop integration
+import functools  # Arguments of executor calls
+import threading  # Lazy executor creation
+from concurrent.futures import ThreadPoolExecutor  # Bounded worker threads
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class AsyncDbConnection:
+    """
+    Coroutine versions of the DbConnection operations.
+
+    The executor is shared by the whole process and created on first use.
+    """
+
+    # Worker threads (None = the size of the DbConnection pool)
+    MAX_WORKERS = None
+
+    _executor = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def executor(cls):
+        """
+        Return the shared executor, creating it on first use.
+
+        :return: ThreadPoolExecutor
+        """
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=cls.MAX_WORKERS or DbConnection.get_pool_size(),
+                        thread_name_prefix='async-db')
+        return cls._executor
+
+    @classmethod
+    async def run(cls, function, *args, **kwargs):
+        """
+        Run a blocking function (a query, a model method) on the executor.
+
+        :param function: callable - Blocking function.
+        :return: The function result.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(cls.executor(), functools.partial(function, *args, **kwargs))
+
+    @classmethod
+    async def execute_query(cls, query, params=None, fetch_one=False, fetch_all=False):
+        """
+        Execute a SQL query (see DbConnection.execute_query).
+
+        :return: tuple - (success, result or error message)
+        """
+        return await cls.run(DbConnection.execute_query, query, params,
+                             fetch_one=fetch_one, fetch_all=fetch_all)
+
+    @classmethod
+    async def execute_transaction(cls, queries_with_params):
+        """
+        Execute several queries in one transaction (see DbConnection.execute_transaction).
+
+        :return: tuple - (success, message)
+        """
+        return await cls.run(DbConnection.execute_transaction, queries_with_params)
+
+    @classmethod
+    async def test_connection(cls):
+        """
+        Test database connectivity (see DbConnection.test_connection).
+
+        :return: tuple - (success, message)
+        """
+        return await cls.run(DbConnection.test_connection)
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """Stop the executor (a new one is created if the facade is used again)."""
+        with cls._lock:
+            executor, cls._executor = cls._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,260 @@
+# ===================================================================
+# ASYNC MODELS - COROUTINE VARIANTS OF THE MODEL QUERIES
+# ===================================================================
+# The model classes (Student, Activity, Expense, Feedback, Statistics,
+# DailyProgram) run their queries one after the other on the calling
+# thread. The classes below expose the same operations as coroutines on
+# top of AsyncDbConnection:
+#
+# - single queries simply run off the event loop
+# - composite operations (activity details, statistics, feedback
+#   eligibility) start their independent sub-queries together with
+#   asyncio.gather, so they take one round trip instead of several
+#
+# The SQL and the result processing are shared with the synchronous
+# models (class constants and helpers such as Activity.summarize_ratings),
+# so both variants always return the same data.
+#
+# USAGE:
+#   details = await AsyncActivity.get_comprehensive_details(activity_id)
+#   stats, details = await asyncio.gather(AsyncStatistics.fetch_statistics_from_database(),
+#                                         AsyncActivity.get_comprehensive_details(activity_id))
+# ===================================================================
+
+import asyncio  # Concurrent sub-queries
+
+from PythonExpenseApp.async_db import AsyncDbConnection
+from PythonExpenseApp.activity import Activity
+from PythonExpenseApp.daily_program import DailyProgram
+from PythonExpenseApp.expense import Expense
+from PythonExpenseApp.feedback import Feedback
+from PythonExpenseApp.statistics import Statistics
+from PythonExpenseApp.student import Student
+
+
+def _student_with_id(student_id):
+    """A Student carrying only its id, enough for the per-student queries."""
+    student = Student.__new__(Student)
+    student.id = student_id
+    return student
+
+
+class AsyncStudent:
+    """Coroutine variants of the Student queries."""
+
+    @staticmethod
+    async def get_all_students():
+        """:return: list - Student objects (see Student.get_all_students)."""
+        return await AsyncDbConnection.run(Student.get_all_students)
+
+    @staticmethod
+    async def get_student_by_id(student_id):
+        """:return: Student or None (see Student.get_student_by_id)."""
+        return await AsyncDbConnection.run(Student.get_student_by_id, student_id)
+
+    @staticmethod
+    async def get_participated_activities(student_id):
+        """:return: list - Tuples (activity_id, name, day, start_time, finish_time, location)."""
+        return await AsyncDbConnection.run(_student_with_id(student_id).get_participated_activities)
+
+    @staticmethod
+    async def can_leave_feedback_for_activity(student_id, activity_id):
+        """
+        Both checks of Student.can_leave_feedback_for_activity, run concurrently.
+
+        :return: bool - True if the student participated and has not left feedback yet.
+        """
+        student = _student_with_id(student_id)
+        participated, given = await asyncio.gather(
+            AsyncDbConnection.run(student.has_participated_in_activity, activity_id),
+            AsyncDbConnection.run(student.has_given_feedback_for_activity, activity_id))
+        return participated and not given
+
+
+class AsyncActivity:
+    """Coroutine variants of the Activity queries."""
+
+    @staticmethod
+    async def get_all_activities():
+        """:return: list - Activity objects (see Activity.get_all_activities)."""
+        return await AsyncDbConnection.run(Activity.get_all_activities)
+
+    @staticmethod
+    async def get_activity_by_id(activity_id):
+        """:return: Activity or None (see Activity.get_activity_by_id)."""
+        return await AsyncDbConnection.run(Activity.get_activity_by_id, activity_id)
+
+    @staticmethod
+    async def get_participant_list(activity_id):
+        """:return: list - Tuples (student_id, name, surname), empty on error."""
+        success, result = await AsyncDbConnection.execute_query(
+            Activity.PARTICIPANTS_QUERY, (activity_id,), fetch_all=True)
+        return result if success else []
+
+    @staticmethod
+    async def get_rating_details(activity_id):
+        """:return: dict or None - Rating statistics (see Activity.summarize_ratings)."""
+        success, rating_counts = await AsyncDbConnection.execute_query(
+            Activity.RATING_COUNTS_QUERY, (activity_id,), fetch_all=True)
+        return Activity.summarize_ratings(rating_counts) if success else None
+
+    @staticmethod
+    async def get_recent_feedback(activity_id):
+        """:return: list - Last 50 feedback (rating, comment, created_at, name, surname)."""
+        success, result = await AsyncDbConnection.execute_query(
+            Activity.RECENT_FEEDBACK_QUERY, (activity_id,), fetch_all=True)
+        return result if success else []
+
+    @staticmethod
+    async def get_comprehensive_details(activity_id):
+        """
+        Same data as Activity.get_comprehensive_details, with the participants, the
+        ratings and the recent feedback loaded concurrently.
+
+        :param activity_id: int - The activity ID.
+        :return: dict - Keys 'participation', 'ratings', 'recent_feedback'
+        """
+        if not activity_id:
+            return None
+        participant_list, ratings_data, recent_feedback = await asyncio.gather(
+            AsyncActivity.get_participant_list(activity_id),
+            AsyncActivity.get_rating_details(activity_id),
+            AsyncActivity.get_recent_feedback(activity_id))
+        return {
+            'participation': {
+                'current_participants': len(participant_list),
+                'participant_list': participant_list
+            },
+            'ratings': ratings_data,
+            'recent_feedback': recent_feedback
+        }
+
+
+class AsyncFeedback:
+    """Coroutine variants of the Feedback queries."""
+
+    @staticmethod
+    async def can_student_leave_feedback(student_id, activity_id):
+        """
+        Feedback.can_student_leave_feedback with both checks run concurrently.
+
+        :return: tuple (bool, str) - (Eligibility, Message explaining result)
+        """
+        params = (student_id, activity_id)
+        (participated_ok, participated), (existing_ok, existing) = await asyncio.gather(
+            AsyncDbConnection.execute_query(Feedback.PARTICIPATION_QUERY, params, fetch_one=True),
+            AsyncDbConnection.execute_query(Feedback.EXISTING_FEEDBACK_QUERY, params, fetch_one=True))
+        if not participated_ok or not participated or participated[0] == 0:
+            return False, "You must participate in an activity before leaving feedback."
+        if not existing_ok:
+            return False, "Error checking existing feedback."
+        if existing[0] > 0:
+            return False, "You have already left feedback for this activity."
+        return True, "You can leave feedback for this activity."
+
+    @staticmethod
+    async def get_feedback_for_activity(activity_id):
+        """:return: list - See Feedback.get_feedback_for_activity."""
+        return await AsyncDbConnection.run(Feedback.get_feedback_for_activity, activity_id)
+
+    @staticmethod
+    async def get_feedback_by_student(student_id):
+        """:return: list - See Feedback.get_feedback_by_student."""
+        return await AsyncDbConnection.run(Feedback.get_feedback_by_student, student_id)
+
+    @staticmethod
+    async def get_average_rating_for_activity(activity_id):
+        """:return: tuple (average, count) - See Feedback.get_average_rating_for_activity."""
+        return await AsyncDbConnection.run(Feedback.get_average_rating_for_activity, activity_id)
+
+    @staticmethod
+    async def save(feedback):
+        """:return: tuple (bool, str) - See Feedback.save_to_database."""
+        return await AsyncDbConnection.run(feedback.save_to_database)
+
+
+class AsyncExpense:
+    """Coroutine variants of the Expense queries."""
+
+    @staticmethod
+    async def get_all_expenses():
+        """:return: list - Expense objects (see Expense.get_all_expenses)."""
+        return await AsyncDbConnection.run(Expense.get_all_expenses)
+
+    @staticmethod
+    async def get_expenses_by_student(student_id):
+        """:return: list - Expense objects (see Expense.get_expenses_by_student)."""
+        return await AsyncDbConnection.run(Expense.get_expenses_by_student, student_id)
+
+    @staticmethod
+    async def get_total_expenses():
+        """:return: float - See Expense.get_total_expenses."""
+        return await AsyncDbConnection.run(Expense.get_total_expenses)
+
+    @staticmethod
+    async def mark_debt_as_paid(debt_id):
+        """:return: bool - See Expense.mark_debt_as_paid."""
+        return await AsyncDbConnection.run(Expense.mark_debt_as_paid, debt_id)
+
+    @staticmethod
+    async def save_with_debts(expense, participant_ids, split_method="equal", custom_amounts=None):
+        """
+        Save an expense and create its debt records (the second step needs the expense id).
+
+        :return: tuple (success, message)
+        """
+        success, message = await AsyncDbConnection.run(expense.save_to_database)
+        if not success:
+            return success, message
+        return await AsyncDbConnection.run(expense.create_debt_records, participant_ids,
+                                           split_method, custom_amounts)
+
+
+class AsyncStatistics:
+    """Coroutine variants of the Statistics queries, every query of a report run concurrently."""
+
+    @staticmethod
+    async def fetch_statistics_from_database():
+        """:return: dict - Same keys as Statistics.fetch_statistics_from_database."""
+        queries = Statistics.SUMMARY_QUERIES
+        results = await asyncio.gather(*(
+            AsyncDbConnection.execute_query(query, fetch_one=fetch_one, fetch_all=not fetch_one)
+            for _, query, fetch_one, _ in queries))
+        stats = {}
+        for (key, _, fetch_one, convert), (success, result) in zip(queries, results):
+            Statistics._store(stats, key, success, result, fetch_one, convert)
+        return stats
+
+    @staticmethod
+    async def get_student_statistics(student_id):
+        """:return: dict - Same keys as Statistics.get_student_statistics."""
+        queries = Statistics.STUDENT_QUERIES
+        results = await asyncio.gather(*(
+            AsyncDbConnection.execute_query(query, (student_id,) * query.count('%s'), fetch_one=True)
+            for _, query, _ in queries))
+        stats = {}
+        for (key, _, convert), (success, result) in zip(queries, results):
+            Statistics._store(stats, key, success, result, True, convert)
+        return stats
+
+
+class AsyncDailyProgram:
+    """Builds DailyProgram objects off the event loop."""
+
+    @staticmethod
+    async def load(program_date=None):
+        """
+        :param program_date: str or date, optional - See DailyProgram.
+        :return: DailyProgram - Loaded with the activities of the date.
+        """
+        return await AsyncDbConnection.run(DailyProgram, program_date)
+
+    @staticmethod
+    async def load_many(program_dates):
+        """
+        Load several days concurrently (e.g. the whole trip).
+
+        :param program_dates: iterable - Dates (str or date).
+        :return: list - DailyProgram objects in the same order.
+        """
+        return await asyncio.gather(*(AsyncDailyProgram.load(day) for day in program_dates))
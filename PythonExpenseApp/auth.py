@@ -0,0 +1,548 @@
+# ===================================================================
+# AUTH - PASSWORD HASHING, LOGIN AND SESSION TOKENS
+# ===================================================================
+# The students table used to store the passwords in clear text and the
+# login compared them as strings. Passwords are now stored as salted KDF
+# hashes:
+#
+#   scrypt$<n>$<r>$<p>$<salt>$<hash>           (hashlib.scrypt, default)
+#   pbkdf2_sha256$<iterations>$<salt>$<hash>    (when scrypt is not available)
+#
+# salt and hash are base64. The cost is tunable (TRIP_MANAGER_KDF, see
+# PasswordHasher.from_environment and `--calibrate`): a hash costs tens
+# of milliseconds of CPU on purpose, so when a whole class logs in at the
+# start of a trip day the checks must not pile up on the Tk thread, nor
+# hold a database connection while they run. They run on a dedicated pool
+# of KDF_WORKERS threads (hashlib releases the GIL while hashing), and
+# the database is only used before and after the hash check.
+#
+# Rows still holding a plain text password (or a hash with an older cost)
+# keep working: after a successful login the password is hashed with the
+# current settings and written back (compare-and-set on the old value),
+# so the table migrates itself as the students log in.
+#
+# A successful login also returns a session token, signed with HMAC-SHA256
+# by the side that checks the passwords (the desktop app, or the service
+# in thin-client mode):
+#
+#   <user id>.<role>.<expiry>.<password fingerprint>.<signature>
+#
+# The client keeps the token in a local file; on the next launch resume()
+# checks the signature and the expiry and reads the user by id, without
+# running the KDF. The fingerprint is derived from the stored hash, so
+# changing the password (or the rehash of a login) invalidates the tokens
+# issued before. In thin-client mode the token also authenticates every
+# service call: the service takes the caller's id and role from it.
+#
+# KEY RESPONSIBILITIES:
+# 1. Hash and verify passwords with a tunable KDF on a bounded thread pool
+# 2. Rehash plain text and outdated rows on login
+# 3. Issue and check signed session tokens, and keep the local token file
+#
+# USAGE:
+#   Auth.login(email, password)     # ((id, name, surname, email, special_needs, role, class, age), token) or None
+#   Auth.resume(token)              # Same result, no KDF; None if the token is no longer valid
+#   Auth.check_session(token)       # (id, role) of a token still matching the stored user, or None
+#   Auth.hash_password(password)    # Value to store in students.password
+#
+#   python -m PythonExpenseApp.auth --calibrate --target-ms 100
+# ===================================================================
+
+import argparse  # Command line options
+import base64  # Salt and hash encoding
+import contextlib  # No-op database gate
+import hashlib  # scrypt / PBKDF2 / HMAC digest
+import hmac  # Constant-time comparison and token signatures
+import logging  # Invalid TRIP_MANAGER_KDF
+import os  # Salts, secret key, CPU count, environment
+import threading  # Lazy creation of the pool and of the key
+import time  # Token expiry, calibration
+from concurrent.futures import ThreadPoolExecutor  # KDF worker pool
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class PasswordHasher:
+    """
+    Salted KDF hashing with a fixed cost.
+
+    ATTRIBUTES:
+        algorithm (str): 'scrypt' or 'pbkdf2_sha256'
+        n, r, p (int): scrypt cost parameters
+        iterations (int): PBKDF2 iterations
+    """
+
+    SCRYPT = 'scrypt'
+    PBKDF2 = 'pbkdf2_sha256'
+
+    # Default cost: about 50 ms and 16 MiB per scrypt hash on a laptop
+    SCRYPT_N = 2 ** 14
+    SCRYPT_R = 8
+    SCRYPT_P = 1
+    PBKDF2_ITERATIONS = 600_000
+
+    SALT_BYTES = 16
+    HASH_BYTES = 32
+
+    def __init__(self, algorithm=None, n=None, r=None, p=None, iterations=None):
+        """
+        :param algorithm: str, optional - SCRYPT or PBKDF2 (default: scrypt when hashlib has it).
+        :param n: int, optional - scrypt CPU/memory cost (power of 2).
+        :param r: int, optional - scrypt block size.
+        :param p: int, optional - scrypt parallelism.
+        :param iterations: int, optional - PBKDF2 iterations.
+        """
+        if algorithm is None:
+            algorithm = self.SCRYPT if hasattr(hashlib, 'scrypt') else self.PBKDF2
+        if algorithm not in (self.SCRYPT, self.PBKDF2):
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.n = n or self.SCRYPT_N
+        self.r = r or self.SCRYPT_R
+        self.p = p or self.SCRYPT_P
+        self.iterations = iterations or self.PBKDF2_ITERATIONS
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Build the hasher from TRIP_MANAGER_KDF, "scrypt:<n>:<r>:<p>" or "pbkdf2:<iterations>"
+        (default cost when the variable is not set).
+
+        :return: PasswordHasher
+        :raises ValueError: If the setting is malformed or names an unknown algorithm.
+        """
+        setting = os.environ.get('TRIP_MANAGER_KDF', '').strip()
+        if not setting:
+            return cls()
+        name, *costs = setting.split(':')
+        costs = [int(cost) for cost in costs]
+        if name == cls.SCRYPT and len(costs) <= 3:
+            return cls(cls.SCRYPT, *costs)
+        if name in ('pbkdf2', cls.PBKDF2) and len(costs) <= 1:
+            return cls(cls.PBKDF2, iterations=costs[0] if costs else None)
+        if name in (cls.SCRYPT, 'pbkdf2', cls.PBKDF2):
+            raise ValueError(f"Too many costs in TRIP_MANAGER_KDF: {setting}")
+        raise ValueError(f"Unknown password hash algorithm in TRIP_MANAGER_KDF: {name}")
+
+    def setting(self):
+        """:return: str - The TRIP_MANAGER_KDF value of this hasher."""
+        if self.algorithm == self.SCRYPT:
+            return f"scrypt:{self.n}:{self.r}:{self.p}"
+        return f"pbkdf2:{self.iterations}"
+
+    @staticmethod
+    def _b64(data):
+        return base64.b64encode(data).decode('ascii')
+
+    @staticmethod
+    def _derive(algorithm, password, salt, costs):
+        """Run the KDF (the expensive part)."""
+        if algorithm == PasswordHasher.SCRYPT:
+            n, r, p = costs
+            return hashlib.scrypt(password.encode('utf-8'), salt=salt, n=n, r=r, p=p,
+                                  maxmem=256 * n * r * p, dklen=PasswordHasher.HASH_BYTES)
+        iterations, = costs
+        return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations,
+                                   dklen=PasswordHasher.HASH_BYTES)
+
+    def hash(self, password):
+        """
+        Hash a password with a new random salt.
+
+        :param password: str - Clear text password.
+        :return: str - Encoded hash (see the module header).
+        """
+        salt = os.urandom(self.SALT_BYTES)
+        if self.algorithm == self.SCRYPT:
+            costs = (self.n, self.r, self.p)
+        else:
+            costs = (self.iterations,)
+        digest = self._derive(self.algorithm, password, salt, costs)
+        return '$'.join([self.algorithm, *map(str, costs), self._b64(salt), self._b64(digest)])
+
+    @staticmethod
+    def parse(stored):
+        """
+        Split an encoded hash.
+
+        :param stored: str - Value of students.password.
+        :return: tuple (algorithm, costs, salt, digest), or None for a plain text password.
+        """
+        parts = (stored or '').split('$')
+        expected = {PasswordHasher.SCRYPT: 6, PasswordHasher.PBKDF2: 4}.get(parts[0])
+        if expected is None or len(parts) != expected:
+            return None
+        try:
+            costs = tuple(int(cost) for cost in parts[1:-2])
+            return parts[0], costs, base64.b64decode(parts[-2]), base64.b64decode(parts[-1])
+        except ValueError:
+            return None
+
+    def verify(self, password, stored):
+        """
+        Check a password against a stored hash (or a plain text password not migrated yet).
+
+        :param password: str - Password entered by the user.
+        :param stored: str - Value of students.password.
+        :return: bool
+        """
+        parsed = self.parse(stored)
+        if parsed is None:
+            return hmac.compare_digest(password.encode('utf-8'), (stored or '').encode('utf-8'))
+        algorithm, costs, salt, digest = parsed
+        return hmac.compare_digest(self._derive(algorithm, password, salt, costs), digest)
+
+    def needs_rehash(self, stored):
+        """
+        :param stored: str - Value of students.password.
+        :return: bool - True for plain text, another algorithm or another cost than this hasher's.
+        """
+        parsed = self.parse(stored)
+        if parsed is None or parsed[0] != self.algorithm:
+            return True
+        if self.algorithm == self.SCRYPT:
+            return parsed[1] != (self.n, self.r, self.p)
+        return parsed[1] != (self.iterations,)
+
+
+class SessionTokens:
+    """
+    Signed session tokens and the local token file (all methods are static).
+
+    The signing key is read from TRIP_MANAGER_SESSION_KEY (hex) or from
+    KEY_FILE, which is created with a random key on first use.
+    """
+
+    # Lifetime of a token: one trip day
+    TTL_SECONDS = 12 * 3600
+
+    SESSION_DIR = os.path.join(os.path.expanduser('~'), '.trip_manager')
+    KEY_FILE = os.path.join(SESSION_DIR, 'session.key')
+    TOKEN_FILE = os.path.join(SESSION_DIR, 'session.token')
+
+    _key = None
+    _key_lock = threading.Lock()
+
+    @staticmethod
+    def _write_private(path, data):
+        """Write a file only the current user can read."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, 'wb') as handle:
+            handle.write(data)
+
+    @classmethod
+    def key(cls):
+        """:return: bytes - The signing key (created on first use)."""
+        if cls._key is None:
+            with cls._key_lock:
+                if cls._key is None:
+                    setting = os.environ.get('TRIP_MANAGER_SESSION_KEY')
+                    if setting:
+                        cls._key = bytes.fromhex(setting)
+                    elif os.path.exists(cls.KEY_FILE):
+                        with open(cls.KEY_FILE, 'rb') as handle:
+                            cls._key = handle.read()
+                    else:
+                        cls._key = os.urandom(32)
+                        cls._write_private(cls.KEY_FILE, cls._key)
+        return cls._key
+
+    @classmethod
+    def _sign(cls, payload):
+        return hmac.new(cls.key(), payload.encode('ascii'), hashlib.sha256).hexdigest()
+
+    @classmethod
+    def fingerprint(cls, stored):
+        """:return: str - Short keyed digest of the stored password hash."""
+        return hmac.new(cls.key(), (stored or '').encode('utf-8'), hashlib.sha256).hexdigest()[:16]
+
+    @classmethod
+    def issue(cls, user_id, stored, role='student', ttl=None):
+        """
+        :param user_id: int - Id of the student.
+        :param stored: str - Current value of students.password.
+        :param role: str - students.role ('student' or 'teacher'), checked by the service.
+        :param ttl: int, optional - Lifetime in seconds (default: TTL_SECONDS).
+        :return: str - Signed token.
+        """
+        expires = int(time.time()) + (ttl or cls.TTL_SECONDS)
+        payload = f"{int(user_id)}.{role}.{expires}.{cls.fingerprint(stored)}"
+        return f"{payload}.{cls._sign(payload)}"
+
+    @classmethod
+    def check(cls, token):
+        """
+        Check the signature and the expiry of a token.
+
+        :param token: str - Token returned by issue().
+        :return: tuple (user_id, role, fingerprint), or None if the token is invalid or expired.
+        """
+        parts = (token or '').split('.')
+        if len(parts) != 5:
+            return None
+        payload = '.'.join(parts[:4])
+        if not hmac.compare_digest(cls._sign(payload), parts[4]):
+            return None
+        try:
+            user_id, expires = int(parts[0]), int(parts[2])
+        except ValueError:
+            return None
+        if expires < time.time():
+            return None
+        return user_id, parts[1], parts[3]
+
+    @classmethod
+    def save(cls, token):
+        """Keep the token of the logged in user for the next launch."""
+        try:
+            cls._write_private(cls.TOKEN_FILE, token.encode('ascii'))
+        except OSError as e:
+            print(f"Could not save the session token: {e}")
+
+    @classmethod
+    def load(cls):
+        """:return: str or None - The saved token."""
+        try:
+            with open(cls.TOKEN_FILE, 'r', encoding='ascii') as handle:
+                return handle.read().strip() or None
+        except OSError:
+            return None
+
+    @classmethod
+    def forget(cls):
+        """Delete the saved token (rejected token, or the user did not want to stay signed in)."""
+        try:
+            os.remove(cls.TOKEN_FILE)
+        except OSError:
+            pass
+
+
+class Auth:
+    """Login with hashed passwords and session tokens (all methods are static)."""
+
+    # Threads running the KDF: the hashes are CPU bound, more threads than cores only add latency
+    KDF_WORKERS = os.cpu_count() or 2
+
+    USER_QUERY = """SELECT id, name, surname, email, password, special_needs, role, class, age
+                    FROM students WHERE {column} = %s"""
+    REHASH_QUERY = "UPDATE students SET password = %s WHERE id = %s AND password = %s"
+
+    # Resolved from TRIP_MANAGER_KDF on first use (see current_hasher)
+    hasher = None
+
+    _executor = None
+    _executor_lock = threading.Lock()
+    # Held around each database call; the service sets it to its pool slots so that
+    # a login does not keep a connection slot while the KDF runs
+    _database_gate = contextlib.nullcontext()
+    # Hash verified when the email does not exist, so the answer takes as long as a wrong password
+    _dummy_hash = None
+
+    @classmethod
+    def configure(cls, hasher=None, workers=None):
+        """
+        Change the hash cost and/or the size of the KDF pool.
+
+        :param hasher: PasswordHasher, optional - Hasher of the new passwords and rehashes.
+        :param workers: int, optional - Threads of the KDF pool.
+        """
+        with cls._executor_lock:
+            if hasher is not None:
+                cls.hasher = hasher
+                cls._dummy_hash = None
+            if workers is not None:
+                cls.KDF_WORKERS = workers
+                if cls._executor is not None:
+                    cls._executor.shutdown(wait=False)
+                    cls._executor = None
+
+    @classmethod
+    def current_hasher(cls):
+        """
+        The hasher of the new passwords and rehashes, read from TRIP_MANAGER_KDF the first
+        time; an invalid setting falls back to the default cost with a warning.
+
+        :return: PasswordHasher
+        """
+        if cls.hasher is None:
+            with cls._executor_lock:
+                if cls.hasher is None:
+                    try:
+                        cls.hasher = PasswordHasher.from_environment()
+                    except ValueError as e:
+                        cls.hasher = PasswordHasher()
+                        logging.warning(f"Invalid TRIP_MANAGER_KDF ({e}), using {cls.hasher.setting()}")
+        return cls.hasher
+
+    @classmethod
+    def use_database_gate(cls, gate):
+        """
+        :param gate: context manager - Held around every database call of the logins
+                     (e.g. the BoundedSemaphore of the service's pool slots).
+        """
+        cls._database_gate = gate
+
+    @classmethod
+    def _kdf(cls, function, *args):
+        """Run a KDF call on the KDF pool and wait for its result."""
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.KDF_WORKERS,
+                                                       thread_name_prefix='kdf')
+        return cls._executor.submit(function, *args).result()
+
+    @classmethod
+    def hash_password(cls, password):
+        """
+        :param password: str - Clear text password.
+        :return: str - Value to store in students.password.
+        """
+        return cls._kdf(cls.current_hasher().hash, password)
+
+    @classmethod
+    def verify(cls, password, stored):
+        """
+        :param password: str - Password entered by the user.
+        :param stored: str - Value of students.password.
+        :return: bool
+        """
+        return cls._kdf(cls.current_hasher().verify, password, stored)
+
+    @classmethod
+    def _query(cls, query, params, fetch_one=False):
+        with cls._database_gate:
+            success, result = DbConnection.execute_query(query, params, fetch_one=fetch_one)
+        if not success:
+            raise ConnectionError(f"Could not check the credentials: {result}")
+        return result
+
+    @classmethod
+    def _user(cls, column, value):
+        return cls._query(cls.USER_QUERY.format(column=column), (value,), fetch_one=True)
+
+    @classmethod
+    def _rehash(cls, user_id, password, stored):
+        """
+        Store the password hashed with the current settings, unless it changed meanwhile.
+
+        :return: str - The value of students.password after the update.
+        """
+        rehashed = cls.hash_password(password)
+        if cls._query(cls.REHASH_QUERY, (rehashed, user_id, stored)):
+            return rehashed
+        # Another login rehashed it first: the token is bound to the stored value
+        row = cls._user('id', user_id)
+        return row[4] if row else stored
+
+    @classmethod
+    def login(cls, email, password):
+        """
+        Check the credentials of a student. Safe to call from any thread: the KDF runs
+        on the KDF pool. Plain text and outdated hashes are rehashed on success.
+
+        :param email: str - Email entered in the login form.
+        :param password: str - Password entered in the login form.
+        :return: tuple (row, token) or None - row is (id, name, surname, email, special_needs,
+                 role, class, age); None if the email does not exist or the password is wrong.
+        :raises ConnectionError: If the database cannot be read.
+        """
+        row = cls._user('email', email)
+        if not row:
+            if cls._dummy_hash is None:
+                cls._dummy_hash = cls.hash_password(os.urandom(8).hex())
+            cls.verify(password, cls._dummy_hash)
+            return None
+        stored = row[4]
+        if not cls.verify(password, stored):
+            return None
+        if cls.current_hasher().needs_rehash(stored):
+            stored = cls._rehash(row[0], password, stored)
+        return row[:4] + row[5:], SessionTokens.issue(row[0], stored, row[6])
+
+    @classmethod
+    def check_session(cls, token):
+        """
+        Check a session token against the stored user: besides the signature and the
+        expiry, the password must not have changed and the role must be the same.
+
+        :param token: str - Session token.
+        :return: tuple (user_id, role) or None if the token is no longer valid.
+        :raises ConnectionError: If the database cannot be read.
+        """
+        checked = SessionTokens.check(token)
+        if checked is None:
+            return None
+        user_id, role, fingerprint = checked
+        row = cls._user('id', user_id)
+        if not row or row[6] != role or not hmac.compare_digest(SessionTokens.fingerprint(row[4]), fingerprint):
+            return None
+        return user_id, role
+
+    @classmethod
+    def resume(cls, token):
+        """
+        Log in again with a token issued by login() (no KDF: one read by primary key).
+
+        :param token: str - Session token.
+        :return: tuple (row, token) or None - Same row as login() and a renewed token;
+                 None if the token is invalid, expired, or the password changed since.
+        :raises ConnectionError: If the database cannot be read.
+        """
+        checked = SessionTokens.check(token)
+        if checked is None:
+            return None
+        user_id, _, fingerprint = checked
+        row = cls._user('id', user_id)
+        if not row or not hmac.compare_digest(SessionTokens.fingerprint(row[4]), fingerprint):
+            return None
+        return row[:4] + row[5:], SessionTokens.issue(row[0], row[4], row[6])  # Role read again
+
+
+def calibrate(target_ms, algorithm=None):
+    """
+    Find the highest cost whose hash takes at most target_ms on this machine.
+
+    :param target_ms: float - Time budget of one hash.
+    :param algorithm: str, optional - PasswordHasher.SCRYPT or PasswordHasher.PBKDF2.
+    :return: tuple (PasswordHasher, float) - The hasher and the time of one hash in ms.
+    """
+    def timed(hasher):
+        start = time.perf_counter()
+        hasher.hash('calibration')
+        return (time.perf_counter() - start) * 1000
+
+    best = PasswordHasher(algorithm)
+    if best.algorithm == PasswordHasher.SCRYPT:
+        best.n = 2 ** 10
+        candidate = lambda hasher: PasswordHasher(hasher.algorithm, n=hasher.n * 2, r=hasher.r, p=hasher.p)
+    else:
+        best.iterations = 50_000
+        candidate = lambda hasher: PasswordHasher(hasher.algorithm, iterations=hasher.iterations * 2)
+    elapsed = timed(best)
+    while True:
+        bigger = candidate(best)
+        bigger_ms = timed(bigger)
+        if bigger_ms > target_ms:
+            return best, elapsed
+        best, elapsed = bigger, bigger_ms
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Password hashing settings.")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="print the TRIP_MANAGER_KDF value that fits the time budget on this machine")
+    parser.add_argument("--target-ms", type=float, default=100.0, help="time budget of one hash (default: 100)")
+    parser.add_argument("--algorithm", choices=(PasswordHasher.SCRYPT, PasswordHasher.PBKDF2), default=None)
+    args = parser.parse_args(argv)
+    if not args.calibrate:
+        print(f"TRIP_MANAGER_KDF={Auth.current_hasher().setting()}  (KDF workers: {Auth.KDF_WORKERS})")
+        return 0
+    hasher, elapsed = calibrate(args.target_ms, args.algorithm)
+    print(f"TRIP_MANAGER_KDF={hasher.setting()}  ({elapsed:.0f} ms per hash)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -110,17 +110,8 @@ class DailyProgram:
             # Convert each database row into an Activity object
             for row in result:
                 # Create an Activity object using data from the current row
-                activity = Activity(
-                    name=row[1],           # Activity name (index 1 in the row tuple)
-                    day=row[2],            # Activity date
-                    start=row[3],          # Start hour
-                    finish=row[4],         # Finish hour
-                    location=row[5],       # Location
-                    maxpart=row[6],        # Max participants
-                    duration=row[7],       # Duration in hours
-                    description=row[8]     # Detailed description
-                )
-                activity.id = row[0]       # Set the database ID for the Activity object
+                # (inside a Session, the instance already loaded for the same id)
+                activity = Activity.from_row(row)
                 self.activities.append(activity) # Add the new Activity object to the list
             
             # Print a success message to the console
@@ -273,12 +264,8 @@ class DailyProgram:
             
             # Convert each database row to an Activity object
             for row in result:
-                activity = Activity(
-                    name=row[1], day=row[2], start=row[3], finish=row[4],
-                    location=row[5], maxpart=row[6], duration=row[7], description=row[8]
-                )
-                activity.id = row[0] # Set the database ID
-                student_activities_list.append(activity)
+                # Same instances as self.activities inside a Session (identity map)
+                student_activities_list.append(Activity.from_row(row))
         
         # Cache the result
         self.student_schedules[student_id] = student_activities_list
@@ -7,6 +7,17 @@
 -- ===================================================================
 
 -- Drop existing tables in correct order (respecting foreign key constraints)
+DROP VIEW IF EXISTS debts_history;
+DROP VIEW IF EXISTS expenses_history;
+DROP TABLE IF EXISTS settlement_debts;
+DROP TABLE IF EXISTS settlements;
+DROP TABLE IF EXISTS debt_balances;
+DROP TABLE IF EXISTS debt_pair_summary;
+DROP TABLE IF EXISTS debts_archive;
+DROP TABLE IF EXISTS expenses_archive;
+DROP TABLE IF EXISTS rollup_daily;
+DROP TABLE IF EXISTS rollup_hourly;
+DROP TABLE IF EXISTS activity_neighbors;
 DROP TABLE IF EXISTS student_groups;
 DROP TABLE IF EXISTS `groups`;
 DROP TABLE IF EXISTS feedback;
@@ -150,6 +161,134 @@ CREATE TABLE student_groups (
     INDEX idx_student_group (student_id)
 );
 
+-- Precomputed activity similarity (top-k neighbours, see recommendations.py)
+CREATE TABLE activity_neighbors (
+    activity_id INT NOT NULL,
+    neighbor_id INT NOT NULL,
+    score DOUBLE NOT NULL,
+    PRIMARY KEY (activity_id, neighbor_id),
+    FOREIGN KEY (activity_id) REFERENCES activities(id) ON DELETE CASCADE,
+    FOREIGN KEY (neighbor_id) REFERENCES activities(id) ON DELETE CASCADE
+);
+
+-- Hourly and daily aggregates for trend charts (see rollups.py, rebuilt with
+-- python -m PythonExpenseApp.rollups --backfill)
+CREATE TABLE rollup_hourly (
+    metric VARCHAR(20) NOT NULL,
+    bucket DATETIME NOT NULL,
+    class VARCHAR(20) NOT NULL DEFAULT '',
+    activity_id INT NOT NULL DEFAULT 0,
+    events INT NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, bucket, class, activity_id)
+);
+
+CREATE TABLE rollup_daily (
+    metric VARCHAR(20) NOT NULL,
+    bucket DATE NOT NULL,
+    class VARCHAR(20) NOT NULL DEFAULT '',
+    activity_id INT NOT NULL DEFAULT 0,
+    events INT NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (metric, bucket, class, activity_id)
+);
+
+-- Archived expenses and paid debts (same columns and ids, see archival.py)
+CREATE TABLE expenses_archive (
+    id INT PRIMARY KEY,
+    amount DECIMAL(10,2) NOT NULL,
+    description TEXT NOT NULL,
+    date DATE NOT NULL,
+    id_giver INT,
+    id_receiver INT,
+    id_activity INT,
+    created_at TIMESTAMP NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_archive_date (date),
+    INDEX idx_archive_giver (id_giver, date),
+    INDEX idx_archive_receiver (id_receiver, date),
+    INDEX idx_archive_activity (id_activity, date)
+);
+
+CREATE TABLE debts_archive (
+    id INT PRIMARY KEY,
+    payer_id INT NOT NULL,
+    debtor_id INT NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    description TEXT,
+    expense_id INT,
+    paid BOOLEAN DEFAULT TRUE,
+    date_created DATE NOT NULL,
+    date_paid DATE DEFAULT NULL,
+    created_at TIMESTAMP NULL,
+    updated_at TIMESTAMP NULL,
+    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_archive_payer (payer_id, date_created),
+    INDEX idx_archive_debtor (debtor_id, date_created),
+    INDEX idx_archive_expense (expense_id),
+    INDEX idx_archive_date_created (date_created)
+);
+
+-- Archived debts summarised per (payer, debtor) pair
+CREATE TABLE debt_pair_summary (
+    payer_id INT NOT NULL,
+    debtor_id INT NOT NULL,
+    debts INT NOT NULL DEFAULT 0,
+    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    first_created DATE,
+    last_paid DATE,
+    PRIMARY KEY (payer_id, debtor_id),
+    INDEX idx_summary_debtor (debtor_id)
+);
+
+-- Unpaid debts summarised per (payer, debtor) pair, kept in step by the debt
+-- transactions (see debt_balances.py) and read by the Debt Tracker
+CREATE TABLE debt_balances (
+    payer_id INT NOT NULL,
+    debtor_id INT NOT NULL,
+    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+    debts INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (payer_id, debtor_id),
+    INDEX idx_balance_debtor (debtor_id)
+);
+
+-- Debts paid back together (Expense.settle_between / settle_all_for);
+-- payer_id is the student who was owed the money, as in debts
+CREATE TABLE settlements (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    payer_id INT NOT NULL,
+    debtor_id INT NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    debts INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (payer_id) REFERENCES students(id) ON DELETE CASCADE,
+    FOREIGN KEY (debtor_id) REFERENCES students(id) ON DELETE CASCADE,
+    INDEX idx_settlement_pair (payer_id, debtor_id),
+    INDEX idx_settlement_debtor (debtor_id)
+);
+
+-- Debt rows paid by each settlement (no foreign key: paid debts are archived with their ids)
+CREATE TABLE settlement_debts (
+    settlement_id INT NOT NULL,
+    debt_id INT NOT NULL,
+    amount DECIMAL(10,2) NOT NULL,
+    PRIMARY KEY (settlement_id, debt_id),
+    FOREIGN KEY (settlement_id) REFERENCES settlements(id) ON DELETE CASCADE
+);
+
+-- Live and archived rows together, read by the history queries
+CREATE VIEW expenses_history AS
+    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses
+    UNION ALL
+    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses_archive;
+
+CREATE VIEW debts_history AS
+    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid,
+           date_created, date_paid, created_at, updated_at FROM debts
+    UNION ALL
+    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid,
+           date_created, date_paid, created_at, updated_at FROM debts_archive;
+
 -- ===================================================================
 -- SAMPLE DATA INSERTION
 -- ===================================================================
@@ -400,6 +539,12 @@ INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id, paid, d
 (21, 7, 5.63, 'Share of additional food tour samples', 6, TRUE, '2024-03-19'),
 (21, 11, 5.63, 'Share of additional food tour samples', 6, FALSE, '2024-03-19');
 
+-- Balances of the sample debts (the application keeps them up to date afterwards)
+INSERT INTO debt_balances (payer_id, debtor_id, total, debts)
+SELECT payer_id, debtor_id, SUM(amount), COUNT(*)
+FROM debts WHERE paid = FALSE
+GROUP BY payer_id, debtor_id;
+
 -- Insert sample feedback with realistic ratings and comments
 INSERT INTO feedback (student_id, activity_id, rating, comment) VALUES
 -- Historic Center Walking Tour feedback
@@ -579,6 +724,14 @@ CREATE INDEX idx_debts_paid_amount ON debts(paid, amount);
 CREATE INDEX idx_expenses_date_amount ON expenses(date, amount);
 CREATE INDEX idx_students_class_role ON students(class, role);
 
+-- Keyset pages of the expense and debt history (Expense.get_expense_page / get_debt_page):
+-- InnoDB appends the primary key, so each index is ordered by (column, date, id)
+CREATE INDEX idx_expenses_giver_date ON expenses(id_giver, date);
+CREATE INDEX idx_expenses_receiver_date ON expenses(id_receiver, date);
+CREATE INDEX idx_expenses_activity_date ON expenses(id_activity, date);
+CREATE INDEX idx_debts_payer_date ON debts(payer_id, date_created);
+CREATE INDEX idx_debts_debtor_date ON debts(debtor_id, date_created);
+
 -- ===================================================================
 -- DATABASE SUMMARY
 -- ===================================================================
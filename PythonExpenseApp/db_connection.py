@@ -2,6 +2,158 @@ import mysql.connector # Importing mysql.connector for MySQL database connection
 from mysql.connector import pooling # Importing pooling for connection pooling - a way to manage multiple connections efficiently
 import threading # Importing threading for thread-safe operations - necessary for multi-threaded applications 
 import logging # Importing logging for logging database operations - a way to track events that happen during execution
+import re # Importing re to recognise read-only queries (routed to the read replicas)
+import time # Importing time for the read-your-writes window and the replica retry delay
+import itertools # Importing itertools for the round robin between read replicas
+import random # Importing random for the jitter of the transaction retry delays
+import contextvars # Importing contextvars for the session that owns a write (read-your-writes)
+from contextlib import contextmanager # Importing contextmanager for DbConnection.session
+from collections import OrderedDict # Importing OrderedDict for the LRU of prepared statements
+
+# Pure SELECT statements (optionally parenthesised) can be served by a read replica
+_READ_QUERY = re.compile(r'^\s*\(?\s*SELECT\b', re.IGNORECASE)
+# ...unless they lock rows or write their result somewhere
+_LOCKING_READ = re.compile(r'\bFOR\s+(UPDATE|SHARE)\b|\bLOCK\s+IN\s+SHARE\s+MODE\b|\bINTO\s+(OUTFILE|DUMPFILE|@)',
+                           re.IGNORECASE)
+
+# MySQL error raised when a prepared statement no longer exists on the server
+_ER_UNKNOWN_STMT_HANDLER = 1243
+
+
+class _StatementCache:
+    """
+    LRU of the server-side prepared statements of one MySQL connection, keyed by SQL text.
+    Stored on the connection itself, so it survives the borrows from the pool and dies
+    with the connection; a new connection_id (reconnect) starts a new cache.
+    """
+
+    def __init__(self, connection, connection_id, size):
+        self.connection = connection          # Real (unpooled) MySQL connection
+        self.connection_id = connection_id    # Server thread id the statements belong to
+        self.size = size                      # Maximum number of statements kept
+        self.statements = OrderedDict()       # SQL text -> (query object, prepared cursor)
+
+    def cursor_for(self, query):
+        """Return (query, prepared cursor) for the SQL text, preparing it on a miss."""
+        entry = self.statements.get(query)
+        if entry is not None:
+            self.statements.move_to_end(query)
+            DbConnection._statement_stats['hits'] += 1
+            return entry
+        # The cursor prepares the statement on its first execute and re-prepares when it
+        # receives another string object: the same object is always passed back to it
+        entry = (query, self.connection.cursor(prepared=True))
+        self.statements[query] = entry
+        DbConnection._statement_stats['prepares'] += 1
+        if len(self.statements) > self.size:
+            _, (_, evicted) = self.statements.popitem(last=False)
+            self._close(evicted)
+            DbConnection._statement_stats['evictions'] += 1
+        return entry
+
+    def clear(self):
+        """Forget every statement (closing them on the server when still possible)."""
+        for _, cursor in self.statements.values():
+            self._close(cursor)
+        self.statements.clear()
+
+    @staticmethod
+    def _close(cursor):
+        try:
+            cursor.close()  # Deallocates the statement on the server
+        except Exception:
+            pass  # Connection already gone: the statement went with it
+
+
+class _StatementCursor:
+    """
+    Cursor used by execute_query and run_transaction. Parameterised statements run on the
+    prepared statements of the connection (when it has a _StatementCache), everything else
+    (DDL, statements without parameters, executemany) on a plain cursor.
+    """
+
+    def __init__(self, connection, cache):
+        self._connection = connection
+        self._cache = cache      # _StatementCache, or None (cache disabled, SQLite pools)
+        self._plain = None       # Plain cursor, created on first use
+        self._current = None     # Cursor of the last statement (fetch*, lastrowid, rowcount)
+
+    def execute(self, query, params=()):
+        self._finish()
+        if params and self._cache is not None:
+            statement, cursor = self._cache.cursor_for(query)
+            try:
+                cursor.execute(statement, tuple(params))
+            except mysql.connector.Error as e:
+                if getattr(e, 'errno', None) == _ER_UNKNOWN_STMT_HANDLER:
+                    self._cache.clear()  # The server dropped the statements: prepare again next time
+                    DbConnection._statement_stats['invalidations'] += 1
+                raise
+        else:
+            cursor = self._plain_cursor()
+            cursor.execute(query, params or ())
+        self._current = cursor
+
+    def executemany(self, query, seq_of_params):
+        self._finish()
+        cursor = self._plain_cursor()  # mysql.connector batches INSERTs into one statement
+        cursor.executemany(query, seq_of_params)
+        self._current = cursor
+
+    def fetchone(self):
+        return self._current.fetchone()
+
+    def fetchall(self):
+        return self._current.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._current.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._current.rowcount
+
+    def close(self):
+        self._finish()
+        if self._plain is not None:
+            self._plain.close()
+
+    def _plain_cursor(self):
+        if self._plain is None:
+            self._plain = self._connection.cursor()
+        return self._plain
+
+    def _finish(self):
+        # Cached prepared cursors stay open: read what is left of their result instead of closing them
+        if self._current is not None and self._current is not self._plain:
+            if getattr(self._cache.connection, 'unread_result', False):
+                self._current.fetchall()
+        self._current = None
+
+
+class _PooledConnection:
+    """
+    Pooled connection handed out when the pool does not reset sessions (prepared statement
+    cache enabled): close() ends the open transaction, so the next borrower does not
+    continue the read snapshot of the previous one.
+    """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        try:
+            if self._connection.in_transaction:
+                self._connection.rollback()
+        except Exception as e:
+            logging.warning(f"Could not end the transaction of a released connection: {e}")
+        finally:
+            self._connection.close()  # Returns connection to pool
+
 
 class DbConnection:
     # Class-level variable for the MySQL connection pool (shared by all instances)
@@ -28,6 +180,45 @@ class DbConnection:
         'pool_reset_session': True          # Reset session state when connection is returned to pool
     }
 
+    # Server-side prepared statements kept per pooled connection (0 = disabled).
+    # The parameterised statements of execute_query and run_transaction reuse them, so the
+    # server parses each hot statement once per connection instead of at every call.
+    # Resetting the session would deallocate them: while enabled the pool does not reset
+    # sessions and released connections roll back their open transaction instead.
+    PREPARED_STATEMENT_CACHE_SIZE = 32
+    _rollback_on_release = False            # Set when the pool is created without session reset
+    # Prepared statement counters (approximate, for diagnostics only)
+    _statement_stats = {'hits': 0, 'prepares': 0, 'evictions': 0, 'invalidations': 0}
+
+    # Read replicas: each entry overrides keys of _config (e.g. {'host': 'replica1', 'port': 3307}).
+    # With no replicas every query goes to the primary, as before.
+    _replicas = []
+    _replica_pools = {}                     # Replica index -> connection pool (created on first read)
+    _replica_down_until = {}                # Replica index -> time.monotonic() until which it is skipped
+    _replica_turn = itertools.count()       # Round robin between the replicas
+
+    # Seconds during which a session that wrote reads from the primary (covers the replication lag)
+    READ_YOUR_WRITES_SECONDS = 5.0
+    # Seconds an unreachable replica is skipped before being tried again
+    REPLICA_RETRY_SECONDS = 30.0
+
+    # Session owning the current writes (None = the whole process, e.g. the desktop app)
+    _session = contextvars.ContextVar('db_session', default=None)
+    _last_write = {}                        # Session key -> time.monotonic() of its last write
+    # Routing counters (approximate, for diagnostics only)
+    _routing_stats = {'replica_reads': 0, 'primary_reads': 0, 'replica_fallbacks': 0, 'writes': 0}
+
+    # Transient InnoDB errors after which a transaction is rolled back and replayed:
+    # 1213 = deadlock (the whole transaction is rolled back by the server),
+    # 1205 = lock wait timeout (only the statement is rolled back, run_transaction rolls back the rest)
+    RETRYABLE_ERRNOS = {1213: 'deadlocks', 1205: 'lock_wait_timeouts'}
+    TRANSACTION_MAX_ATTEMPTS = 5            # Attempts before giving up (first run included)
+    RETRY_BASE_DELAY = 0.05                 # Seconds, doubled at every retry
+    RETRY_MAX_DELAY = 1.0                   # Upper bound of a single delay
+    # Transaction counters (approximate, for diagnostics only)
+    _transaction_stats = {'transactions': 0, 'committed': 0, 'failed': 0, 'retries': 0,
+                          'exhausted': 0, 'deadlocks': 0, 'lock_wait_timeouts': 0}
+
     @classmethod
     def initialize_pool(cls): # Initialize the MySQL connection pool.
         """
@@ -41,7 +232,7 @@ class DbConnection:
                 if cls._connection_pool is None:
                     try:
                         # Combine config with pool config for pool creation
-                        pool_config = {**cls._config, **cls._pool_config}
+                        pool_config = cls._mysql_pool_config()
                         cls._connection_pool = pooling.MySQLConnectionPool(**pool_config)
                         logging.info("Database connection pool initialized successfully.")
                         print("Database connection pool initialized.")
@@ -51,12 +242,26 @@ class DbConnection:
                         raise
 
     @classmethod
-    def connect(cls):
+    def connect(cls, read_only=False):
         """
         Get a connection from the connection pool.
         Initializes the pool if it does not exist.
         Returns a MySQLConnection object if successful, or None if connection fails.
+
+        Args:
+            read_only (bool): The caller only runs SELECT statements on the connection, so it
+                may come from a read replica (unless the session wrote in the last
+                READ_YOUR_WRITES_SECONDS). Falls back to the primary when no replica answers.
         """
+        if read_only and cls._replicas:
+            if not cls._recently_wrote():
+                connection = cls._connect_replica()
+                if connection:
+                    cls._routing_stats['replica_reads'] += 1
+                    return _PooledConnection(connection) if cls._rollback_on_release else connection
+                cls._routing_stats['replica_fallbacks'] += 1
+            cls._routing_stats['primary_reads'] += 1
+
         try:
             # Initialize pool if not already done
             if cls._connection_pool is None:
@@ -67,7 +272,7 @@ class DbConnection:
             
             # Test the connection
             if connection.is_connected():
-                return connection
+                return _PooledConnection(connection) if cls._rollback_on_release else connection
             else:
                 logging.warning("Retrieved invalid connection from pool")
                 return None
@@ -104,11 +309,12 @@ class DbConnection:
         cursor = None
         
         try:
-            connection = cls.connect()
+            # Pure SELECT statements may be served by a read replica
+            connection = cls.connect(read_only=(fetch_one or fetch_all) and cls.is_read_query(query))
             if not connection:
                 return False, "Could not establish database connection"
             
-            cursor = connection.cursor()
+            cursor = cls.statement_cursor(connection)
             cursor.execute(query, params or ())  # Fixed missing closing parenthesis
             
             # Handle different query types
@@ -121,6 +327,7 @@ class DbConnection:
             else:
                 # For INSERT, UPDATE, DELETE queries
                 connection.commit()
+                cls.record_write()
                 return True, cursor.lastrowid if cursor.lastrowid else cursor.rowcount
                 
         except mysql.connector.Error as e:
@@ -143,7 +350,8 @@ class DbConnection:
     def execute_transaction(cls, queries_with_params):
         """
         Execute multiple SQL queries in a single transaction.
-        Rolls back all queries if any query fails.
+        Rolls back all queries if any query fails; deadlocks and lock wait timeouts
+        are retried (see run_transaction).
         Returns a tuple (success, results or error message).
 
         Args:
@@ -154,40 +362,92 @@ class DbConnection:
                 - success (bool): True if all queries executed successfully, False otherwise.
                 - result: List of lastrowid/rowcount for each query, or error message.
         """
-        connection = None
-        cursor = None
-        
-        try:
-            connection = cls.connect()
-            if not connection:
-                return False, "Could not establish database connection"
-            
-            cursor = connection.cursor()
-            
-            # Execute all queries in transaction
+        def work(cursor):
             results = []
             for query, params in queries_with_params:
-                cursor.execute(query, params or ())  # Fixed missing closing parenthesis
+                cursor.execute(query, params or ())
                 results.append(cursor.lastrowid if cursor.lastrowid else cursor.rowcount)
-            
-            connection.commit()
-            return True, results
-            
-        except mysql.connector.Error as e:
-            if connection:
-                connection.rollback()
-            logging.error(f"Transaction error: {e}")
-            return False, str(e)
-        except Exception as e:
-            if connection:
-                connection.rollback()
-            logging.error(f"Unexpected transaction error: {e}")
-            return False, str(e)
+            return results
+
+        return cls.run_transaction(work)
+
+    @classmethod # Run a unit of work in a transaction, replaying it on deadlocks and lock wait timeouts.
+    def run_transaction(cls, work, max_attempts=None):
+        """
+        Run work(cursor) in a transaction and commit it.
+        On a deadlock (1213) or a lock wait timeout (1205) the transaction is rolled back and
+        work is called again with a fresh cursor, after a jittered exponential backoff
+        (random delay up to RETRY_BASE_DELAY * 2**retry, capped at RETRY_MAX_DELAY).
+        Any other error rolls back and is returned without retrying: a failed commit may
+        have been applied, so only errors that guarantee the rollback are replayed.
+
+        Because it can run more than once, work must do all its reads and writes through the
+        cursor it receives and compute everything else from its arguments and those reads
+        (no side effects outside the transaction, no state kept between calls).
+        Callable from any thread; the retry delays block the caller, so GUI code should run
+        it through BackgroundWorker.
+
+        Args:
+            work (callable): Function receiving a cursor; its return value is returned on success.
+                It may return a rejection (e.g. a failed business check) and nothing is written.
+            max_attempts (int): Attempts before giving up (default: TRANSACTION_MAX_ATTEMPTS).
+
+        Returns:
+            tuple: (success, result/error_message)
+        """
+        max_attempts = max_attempts or cls.TRANSACTION_MAX_ATTEMPTS
+        cls._transaction_stats['transactions'] += 1
+        connection = cls.connect()
+        if not connection:
+            cls._transaction_stats['failed'] += 1
+            return False, "Could not establish database connection"
+
+        try:
+            for attempt in range(1, max_attempts + 1):
+                cursor = None
+                try:
+                    cursor = cls.statement_cursor(connection)
+                    result = work(cursor)
+                    connection.commit()
+                    cls.record_write()
+                    cls._transaction_stats['committed'] += 1
+                    return True, result
+                except mysql.connector.Error as e:
+                    connection.rollback()
+                    kind = cls.RETRYABLE_ERRNOS.get(getattr(e, 'errno', None))
+                    if kind is None:
+                        logging.error(f"Transaction error: {e}")
+                        cls._transaction_stats['failed'] += 1
+                        return False, str(e)
+                    cls._transaction_stats[kind] += 1
+                    if attempt == max_attempts:
+                        logging.error(f"Transaction failed after {attempt} attempts: {e}")
+                        cls._transaction_stats['exhausted'] += 1
+                        return False, str(e)
+                    delay = random.uniform(0, min(cls.RETRY_MAX_DELAY, cls.RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+                    logging.warning(f"Transaction attempt {attempt} rolled back ({e}), retrying in {delay:.3f}s")
+                    cls._transaction_stats['retries'] += 1
+                    time.sleep(delay)
+                except Exception as e:
+                    connection.rollback()
+                    logging.error(f"Unexpected transaction error: {e}")
+                    cls._transaction_stats['failed'] += 1
+                    return False, str(e)
+                finally:
+                    if cursor:
+                        cursor.close()
         finally:
-            if cursor:
-                cursor.close()
-            if connection:
-                connection.close()
+            connection.close()
+
+    @classmethod # Transaction and retry counters.
+    def get_transaction_stats(cls):
+        """
+        Return the counters of run_transaction (retries, deadlocks, lock wait timeouts, ...).
+
+        Returns:
+            dict: transactions, committed, failed, retries, exhausted, deadlocks, lock_wait_timeouts
+        """
+        return dict(cls._transaction_stats)
 
     @classmethod # Test database connectivity by executing a simple SELECT statement.
     def test_connection(cls):
@@ -297,7 +557,11 @@ class DbConnection:
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (id_giver) REFERENCES students(id) ON DELETE SET NULL,
                     FOREIGN KEY (id_receiver) REFERENCES students(id) ON DELETE SET NULL,
-                    FOREIGN KEY (id_activity) REFERENCES activities(id) ON DELETE SET NULL
+                    FOREIGN KEY (id_activity) REFERENCES activities(id) ON DELETE SET NULL,
+                    INDEX idx_date (date),
+                    INDEX idx_expenses_giver_date (id_giver, date),
+                    INDEX idx_expenses_receiver_date (id_receiver, date),
+                    INDEX idx_expenses_activity_date (id_activity, date)
                 )
             """,
             'debts': """
@@ -315,7 +579,10 @@ class DbConnection:
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                     FOREIGN KEY (payer_id) REFERENCES students(id) ON DELETE CASCADE,
                     FOREIGN KEY (debtor_id) REFERENCES students(id) ON DELETE CASCADE,
-                    FOREIGN KEY (expense_id) REFERENCES expenses(id) ON DELETE CASCADE
+                    FOREIGN KEY (expense_id) REFERENCES expenses(id) ON DELETE CASCADE,
+                    INDEX idx_date_created (date_created),
+                    INDEX idx_debts_payer_date (payer_id, date_created),
+                    INDEX idx_debts_debtor_date (debtor_id, date_created)
                 )
             """,
             'feedback': """
@@ -350,6 +617,134 @@ class DbConnection:
                     FOREIGN KEY (student_id) REFERENCES students(id) ON DELETE CASCADE,
                     UNIQUE KEY unique_student_group (student_id, group_id)
                 )
+            """,
+            'activity_neighbors': """
+                CREATE TABLE IF NOT EXISTS activity_neighbors (
+                    activity_id INT NOT NULL,
+                    neighbor_id INT NOT NULL,
+                    score DOUBLE NOT NULL,
+                    PRIMARY KEY (activity_id, neighbor_id),
+                    FOREIGN KEY (activity_id) REFERENCES activities(id) ON DELETE CASCADE,
+                    FOREIGN KEY (neighbor_id) REFERENCES activities(id) ON DELETE CASCADE
+                )
+            """,
+            'rollup_hourly': """
+                CREATE TABLE IF NOT EXISTS rollup_hourly (
+                    metric VARCHAR(20) NOT NULL,
+                    bucket DATETIME NOT NULL,
+                    class VARCHAR(20) NOT NULL DEFAULT '',
+                    activity_id INT NOT NULL DEFAULT 0,
+                    events INT NOT NULL DEFAULT 0,
+                    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, bucket, class, activity_id)
+                )
+            """,
+            'rollup_daily': """
+                CREATE TABLE IF NOT EXISTS rollup_daily (
+                    metric VARCHAR(20) NOT NULL,
+                    bucket DATE NOT NULL,
+                    class VARCHAR(20) NOT NULL DEFAULT '',
+                    activity_id INT NOT NULL DEFAULT 0,
+                    events INT NOT NULL DEFAULT 0,
+                    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+                    PRIMARY KEY (metric, bucket, class, activity_id)
+                )
+            """,
+            'expenses_archive': """
+                CREATE TABLE IF NOT EXISTS expenses_archive (
+                    id INT PRIMARY KEY,
+                    amount DECIMAL(10,2) NOT NULL,
+                    description TEXT NOT NULL,
+                    date DATE NOT NULL,
+                    id_giver INT,
+                    id_receiver INT,
+                    id_activity INT,
+                    created_at TIMESTAMP NULL,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_archive_date (date),
+                    INDEX idx_archive_giver (id_giver, date),
+                    INDEX idx_archive_receiver (id_receiver, date),
+                    INDEX idx_archive_activity (id_activity, date)
+                )
+            """,
+            'debts_archive': """
+                CREATE TABLE IF NOT EXISTS debts_archive (
+                    id INT PRIMARY KEY,
+                    payer_id INT NOT NULL,
+                    debtor_id INT NOT NULL,
+                    amount DECIMAL(10,2) NOT NULL,
+                    description TEXT,
+                    expense_id INT,
+                    paid BOOLEAN DEFAULT TRUE,
+                    date_created DATE NOT NULL,
+                    date_paid DATE DEFAULT NULL,
+                    created_at TIMESTAMP NULL,
+                    updated_at TIMESTAMP NULL,
+                    archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    INDEX idx_archive_payer (payer_id, date_created),
+                    INDEX idx_archive_debtor (debtor_id, date_created),
+                    INDEX idx_archive_expense (expense_id),
+                    INDEX idx_archive_date_created (date_created)
+                )
+            """,
+            'debt_pair_summary': """
+                CREATE TABLE IF NOT EXISTS debt_pair_summary (
+                    payer_id INT NOT NULL,
+                    debtor_id INT NOT NULL,
+                    debts INT NOT NULL DEFAULT 0,
+                    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    first_created DATE,
+                    last_paid DATE,
+                    PRIMARY KEY (payer_id, debtor_id),
+                    INDEX idx_summary_debtor (debtor_id)
+                )
+            """,
+            'debt_balances': """
+                CREATE TABLE IF NOT EXISTS debt_balances (
+                    payer_id INT NOT NULL,
+                    debtor_id INT NOT NULL,
+                    total DECIMAL(12,2) NOT NULL DEFAULT 0,
+                    debts INT NOT NULL DEFAULT 0,
+                    PRIMARY KEY (payer_id, debtor_id),
+                    INDEX idx_balance_debtor (debtor_id)
+                )
+            """,
+            'settlements': """
+                CREATE TABLE IF NOT EXISTS settlements (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    payer_id INT NOT NULL,
+                    debtor_id INT NOT NULL,
+                    amount DECIMAL(10,2) NOT NULL,
+                    debts INT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (payer_id) REFERENCES students(id) ON DELETE CASCADE,
+                    FOREIGN KEY (debtor_id) REFERENCES students(id) ON DELETE CASCADE,
+                    INDEX idx_settlement_pair (payer_id, debtor_id),
+                    INDEX idx_settlement_debtor (debtor_id)
+                )
+            """,
+            'settlement_debts': """
+                CREATE TABLE IF NOT EXISTS settlement_debts (
+                    settlement_id INT NOT NULL,
+                    debt_id INT NOT NULL,
+                    amount DECIMAL(10,2) NOT NULL,
+                    PRIMARY KEY (settlement_id, debt_id),
+                    FOREIGN KEY (settlement_id) REFERENCES settlements(id) ON DELETE CASCADE
+                )
+            """,
+            'expenses_history': """
+                CREATE OR REPLACE VIEW expenses_history AS
+                    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses
+                    UNION ALL
+                    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses_archive
+            """,
+            'debts_history': """
+                CREATE OR REPLACE VIEW debts_history AS
+                    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid,
+                           date_created, date_paid, created_at, updated_at FROM debts
+                    UNION ALL
+                    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid,
+                           date_created, date_paid, created_at, updated_at FROM debts_archive
             """
         }
         
@@ -374,6 +769,7 @@ class DbConnection:
                 # Note: mysql.connector pooling doesn't have a direct close_all method
                 # The pool will be garbage collected
                 cls._connection_pool = None
+                cls._replica_pools = {}
                 logging.info("Database connection pool closed.")
                 print("Database connection pool closed.")
             except Exception as e:
@@ -386,6 +782,203 @@ class DbConnection:
         cls._config.update(kwargs)
         # Reset pool to use new config
         cls._connection_pool = None
+        cls._replica_pools = {}
+
+    @classmethod # Update the connection pool configuration (e.g. pool_size for the service mode).
+    def update_pool_config(cls, **kwargs):
+        """Update connection pool configuration"""
+        cls._pool_config.update(kwargs)
+        # Reset pool to use new config
+        cls._connection_pool = None
+        cls._replica_pools = {}
+
+    @classmethod # Number of connections of the pool.
+    def get_pool_size(cls):
+        """Return the maximum number of connections of the pool"""
+        return cls._pool_config['pool_size']
+
+    @classmethod # Build the arguments of a MySQL connection pool.
+    def _mysql_pool_config(cls, overrides=None):
+        """
+        Combine _config, _pool_config and the given overrides (e.g. a replica host).
+        Disables the session reset while the prepared statement cache is enabled.
+        """
+        pool_config = {**cls._config, **cls._pool_config, **(overrides or {})}
+        if cls.PREPARED_STATEMENT_CACHE_SIZE:
+            pool_config['pool_reset_session'] = False  # A reset would deallocate the prepared statements
+        cls._rollback_on_release = not pool_config['pool_reset_session']
+        return pool_config
+
+    @classmethod # Cursor using the prepared statements cached on the connection.
+    def statement_cursor(cls, connection):
+        """
+        Return a cursor running parameterised statements on the server-side prepared
+        statements of the connection (an LRU of PREPARED_STATEMENT_CACHE_SIZE statements
+        keyed by SQL text, reused across borrows and discarded on reconnect).
+        Falls back to plain statements when the cache is disabled or the connection does
+        not support prepared statements (e.g. SQLite pools).
+
+        Args:
+            connection: Connection returned by connect().
+
+        Returns:
+            _StatementCursor: Cursor with execute/executemany/fetchone/fetchall/lastrowid/rowcount/close.
+        """
+        size = cls.PREPARED_STATEMENT_CACHE_SIZE
+        raw = getattr(connection, '_cnx', connection)  # Pooled connections wrap the real one
+        connection_id = getattr(raw, 'connection_id', None) if size else None
+        if connection_id is None:
+            return _StatementCursor(connection, None)
+        cache = getattr(raw, '_prepared_statements', None)
+        if cache is None or cache.connection_id != connection_id:
+            if cache is not None:
+                cache.statements.clear()  # Reconnected: the old statements died with the old session
+                cls._statement_stats['invalidations'] += 1
+            cache = _StatementCache(raw, connection_id, size)
+            raw._prepared_statements = cache
+        return _StatementCursor(connection, cache)
+
+    @classmethod # Prepared statement counters.
+    def get_statement_cache_stats(cls):
+        """
+        Return the counters of the prepared statement cache.
+
+        Returns:
+            dict: hits, prepares, evictions, invalidations, cache_size
+        """
+        return dict(cls._statement_stats, cache_size=cls.PREPARED_STATEMENT_CACHE_SIZE)
+
+    @classmethod # Set the read replicas used for SELECT statements.
+    def configure_replicas(cls, replicas):
+        """
+        Set the read replicas. Each entry is a dict overriding keys of _config (usually
+        'host' and 'port'); an empty list sends every query to the primary again.
+
+        Args:
+            replicas (list): List of config dicts, one per replica.
+        """
+        with cls._lock:
+            cls._replicas = [dict(replica) for replica in replicas]
+            cls._replica_pools = {}
+            cls._replica_down_until = {}
+
+    @classmethod # Use pools created elsewhere (e.g. SQLite pools for local testing).
+    def use_pools(cls, primary_pool, replica_pools=()):
+        """
+        Use already created pools instead of building MySQL pools from _config.
+        Any object with a get_connection() method works (see sqlite_pool.SqlitePool).
+
+        Args:
+            primary_pool: Pool receiving the writes and the fallback reads.
+            replica_pools (iterable): Pools serving the read-only queries.
+        """
+        replica_pools = list(replica_pools)
+        with cls._lock:
+            cls._connection_pool = primary_pool
+            cls._rollback_on_release = False
+            cls._replicas = [{} for _ in replica_pools]
+            cls._replica_pools = dict(enumerate(replica_pools))
+            cls._replica_down_until = {}
+
+    @classmethod # Check whether a query can be served by a read replica.
+    def is_read_query(cls, query):
+        """
+        Return True for pure SELECT statements (no locking reads, no SELECT ... INTO).
+
+        Args:
+            query (str): SQL query.
+        """
+        return bool(_READ_QUERY.match(query)) and not _LOCKING_READ.search(query)
+
+    @classmethod # Scope the read-your-writes window to a session (e.g. a user of the service).
+    @contextmanager
+    def session(cls, key):
+        """
+        Attribute the writes and reads of the block to a session, so that a write only
+        sends the reads of the same session to the primary. Outside a session the whole
+        process shares one window.
+
+        Args:
+            key: Hashable session identifier (e.g. the user id).
+        """
+        token = cls._session.set(key)
+        try:
+            yield
+        finally:
+            cls._session.reset(token)
+
+    @classmethod # Remember that the current session wrote (reads go to the primary for a while).
+    def record_write(cls):
+        """
+        Start the read-your-writes window of the current session.
+        Called after every commit of execute_query/execute_transaction; code committing on a
+        connection obtained with connect() should call it after its own commit.
+        """
+        now = time.monotonic()
+        cls._routing_stats['writes'] += 1
+        if len(cls._last_write) > 1024:  # Forget the sessions whose window has expired
+            cls._last_write = {key: at for key, at in cls._last_write.items()
+                               if now - at < cls.READ_YOUR_WRITES_SECONDS}
+        cls._last_write[cls._session.get()] = now
+
+    @classmethod # Check the read-your-writes window of the current session.
+    def _recently_wrote(cls):
+        """Return True if the current session wrote in the last READ_YOUR_WRITES_SECONDS."""
+        last_write = cls._last_write.get(cls._session.get())
+        return last_write is not None and time.monotonic() - last_write < cls.READ_YOUR_WRITES_SECONDS
+
+    @classmethod # Get (creating it on first use) the pool of a replica.
+    def _replica_pool(cls, index):
+        """Return the connection pool of the replica at index."""
+        pool = cls._replica_pools.get(index)
+        if pool is None:
+            with cls._lock:
+                pool = cls._replica_pools.get(index)
+                if pool is None:
+                    pool_config = cls._mysql_pool_config(cls._replicas[index])
+                    pool_config['pool_name'] = f"{cls._pool_config['pool_name']}_replica{index}"
+                    pool = pooling.MySQLConnectionPool(**pool_config)
+                    cls._replica_pools[index] = pool
+                    logging.info(f"Read replica {index} pool initialized.")
+        return pool
+
+    @classmethod # Get a connection from the next available replica.
+    def _connect_replica(cls):
+        """
+        Get a connection from the replicas in round robin, skipping the ones that failed
+        in the last REPLICA_RETRY_SECONDS.
+        Returns a connection, or None if no replica answers.
+        """
+        count = len(cls._replicas)
+        start = next(cls._replica_turn)
+        now = time.monotonic()
+        for offset in range(count):
+            index = (start + offset) % count
+            if cls._replica_down_until.get(index, 0) > now:
+                continue
+            try:
+                connection = cls._replica_pool(index).get_connection()
+                if connection.is_connected():
+                    return connection
+                connection.close()
+            except mysql.connector.PoolError:
+                continue  # Pool exhausted: the replica is busy, not down
+            except Exception as e:
+                logging.warning(f"Read replica {index} unavailable: {e}")
+            cls._replica_down_until[index] = now + cls.REPLICA_RETRY_SECONDS
+        return None
+
+    @classmethod # Read/write routing counters.
+    def get_routing_stats(cls):
+        """
+        Return the routing counters and the replica state.
+
+        Returns:
+            dict: replicas, replicas_down, replica_reads, primary_reads, replica_fallbacks, writes
+        """
+        now = time.monotonic()
+        return dict(cls._routing_stats, replicas=len(cls._replicas),
+                    replicas_down=sum(1 for until in cls._replica_down_until.values() if until > now))
 
 # Initialize logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
\ No newline at end of file
@@ -0,0 +1,186 @@
+# ===================================================================
+# DEBT BALANCES - UNPAID TOTALS PER (PAYER, DEBTOR) PAIR
+# ===================================================================
+# The Debt Tracker shows, for one student, who owes them money and whom
+# they owe, with totals. Summing the unpaid rows of debts for every
+# refresh reads all the debts of the student, paid ones included. The
+# debt_balances table keeps one row per pair instead:
+#
+#   payer_id   student who is owed the money (payer of the expense)
+#   debtor_id  student who owes it
+#   total      sum of the unpaid debts of the pair
+#   debts      number of unpaid debts of the pair
+#
+# The write paths (Expense) call added() after inserting debts and paid()
+# after marking debts as paid, with the cursor of their own transaction,
+# so the balances are committed or rolled back with the debts. A debt
+# paid in part (Expense.settle_between) is split into a paid row and an
+# unpaid remainder: partly_paid() lowers the total but not the count.
+# Pairs that are settled keep a row with debts = 0, so they are filtered
+# out by the readers.
+#
+# rebuild() recomputes the table from the unpaid debts (first installation,
+# debts written with plain SQL); run it while nobody is writing.
+#
+# KEY RESPONSIBILITIES:
+# 1. Keep the unpaid total and count of every pair in step with debts
+# 2. Rebuild the balances from the debts table
+# 3. Read both directions of a student's balances in one query
+#
+# USAGE:
+#   DebtBalances.added(cursor, 'expense', [expense_id])   # Inside a write transaction
+#   DebtBalances.paid(cursor, [debt_id])
+#   DebtBalances.for_student(student_id)                  # [(direction, id, name, surname, total, debts)]
+#
+#   python -m PythonExpenseApp.debt_balances --rebuild
+# ===================================================================
+
+import argparse  # Command line options
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class DebtBalances:
+    """Per-pair unpaid debt totals, maintained by the debt write transactions (all methods are static)."""
+
+    # Columns of debts the rows to apply can be selected by
+    FILTERS = {'id': 'id', 'expense': 'expense_id'}
+
+    # Direction flags of for_student rows
+    OWED_TO_STUDENT = 0  # The counterparty owes the student
+    STUDENT_OWES = 1  # The student owes the counterparty
+
+    # The changes come from a derived table: VALUES() in the update is deprecated since MySQL 8.0.20
+    UPSERT = """INSERT INTO debt_balances (payer_id, debtor_id, total, debts)
+                SELECT * FROM (
+                    SELECT payer_id, debtor_id, %s * SUM(amount) AS total, %s * COUNT(*) AS debts
+                    FROM debts WHERE {column} IN ({placeholders})
+                    GROUP BY payer_id, debtor_id) AS src
+                ON DUPLICATE KEY UPDATE total = debt_balances.total + src.total,
+                                        debts = debt_balances.debts + src.debts"""
+
+    @staticmethod
+    def _apply(cursor, by, values, sign, count_sign):
+        values = [value for value in values if value is not None]
+        if not values:
+            return
+        query = DebtBalances.UPSERT.format(column=DebtBalances.FILTERS[by],
+                                           placeholders=', '.join(['%s'] * len(values)))
+        cursor.execute(query, (sign, count_sign, *values))
+
+    @staticmethod
+    def added(cursor, by, values):
+        """
+        Add debts a transaction just inserted (unpaid) to the balances of their pairs.
+
+        :param cursor: Cursor of the write transaction.
+        :param by: str - 'id' (debt ids) or 'expense' (every debt of these expenses).
+        :param values: iterable - Debt or expense ids.
+        :return: None
+        """
+        DebtBalances._apply(cursor, by, values, 1, 1)
+
+    @staticmethod
+    def paid(cursor, debt_ids):
+        """
+        Remove debts a transaction just marked as paid from the balances of their pairs.
+
+        :param cursor: Cursor of the write transaction.
+        :param debt_ids: iterable - Ids of the debts paid in full.
+        :return: None
+        """
+        DebtBalances._apply(cursor, 'id', debt_ids, -1, -1)
+
+    @staticmethod
+    def partly_paid(cursor, part_ids):
+        """
+        Remove the paid part of split debts from the balances (the unpaid remainder still counts).
+
+        :param cursor: Cursor of the write transaction.
+        :param part_ids: iterable - Ids of the paid rows split from a debt.
+        :return: None
+        """
+        DebtBalances._apply(cursor, 'id', part_ids, -1, 0)
+
+    @staticmethod
+    def rebuild():
+        """
+        Recompute every balance from the unpaid debts, in one transaction.
+
+        :return: tuple (bool, str) - (success, message)
+        """
+        def work(cursor):
+            cursor.execute("DELETE FROM debt_balances")
+            cursor.execute("""INSERT INTO debt_balances (payer_id, debtor_id, total, debts)
+                              SELECT payer_id, debtor_id, SUM(amount), COUNT(*)
+                              FROM debts WHERE paid = FALSE
+                              GROUP BY payer_id, debtor_id""")
+            return cursor.rowcount
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            print(f"Error rebuilding debt balances: {result}")
+            return False, f"Rebuild failed: {result}"
+        return True, f"Rebuilt the balances of {result} pairs"
+
+    @staticmethod
+    def query(student_id=None):
+        """
+        Build the query returning both directions of the balances in one result.
+
+        Without a student, every debtor (direction OWED_TO_STUDENT) and every
+        payer (direction STUDENT_OWES) is listed with the totals of all pairs.
+
+        :param student_id: int, optional - Only the pairs of this student.
+        :return: tuple (str, tuple) - (query, params); rows are (direction, student_id,
+                 name, surname, total, debts), largest totals first in each direction.
+        """
+        owed_filter = owes_filter = ""
+        params = ()
+        if student_id is not None:
+            owed_filter, owes_filter = " AND b.payer_id = %s", " AND b.debtor_id = %s"
+            params = (student_id, student_id)
+        query = f"""SELECT x.direction, s.id, s.name, s.surname, x.total, x.debts
+                    FROM (SELECT {DebtBalances.OWED_TO_STUDENT} AS direction, b.debtor_id AS student_id,
+                                 SUM(b.total) AS total, SUM(b.debts) AS debts
+                          FROM debt_balances b WHERE b.debts > 0{owed_filter}
+                          GROUP BY b.debtor_id
+                          UNION ALL
+                          SELECT {DebtBalances.STUDENT_OWES}, b.payer_id,
+                                 SUM(b.total), SUM(b.debts)
+                          FROM debt_balances b WHERE b.debts > 0{owes_filter}
+                          GROUP BY b.payer_id) x
+                    JOIN students s ON s.id = x.student_id
+                    ORDER BY x.direction, x.total DESC"""
+        return query, params
+
+    @staticmethod
+    def for_student(student_id=None):
+        """
+        Read both directions of a student's balances (or of everyone) with one query.
+
+        :param student_id: int, optional - Only the pairs of this student.
+        :return: list - (direction, student_id, name, surname, total, debts); empty on error.
+        """
+        query, params = DebtBalances.query(student_id)
+        success, rows = DbConnection.execute_query(query, params, fetch_all=True)
+        if not success:
+            print(f"Error reading debt balances: {rows}")
+            return []
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the per-pair unpaid debt balances.")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the balances from the debts table")
+    args = parser.parse_args(argv)
+    if not args.rebuild:
+        parser.print_help()
+        return 0
+    success, message = DebtBalances.rebuild()
+    print(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,313 @@
+# ===================================================================
+# ENROLLMENT ANALYTICS - IN-MEMORY STUDENT x ACTIVITY MATRIX
+# ===================================================================
+# Statistics and the teacher dashboard answer every question with its own
+# SQL aggregate. Cross-cutting questions (which activities are taken
+# together, how full each day / hour is, which class chose what) would
+# need dozens of queries. EnrollmentMatrix loads student_activities once
+# as a sparse student x activity matrix in coordinate form (two aligned
+# index arrays, one entry per enrollment) together with metadata arrays
+# aligned with its rows (class of each student) and columns (day, start,
+# finish, capacity of each activity), and computes the reports below with
+# vectorized NumPy operations:
+#
+# - co_enrollment: activity pairs most often taken by the same students
+# - utilization_by_day / utilization_by_hour: enrollments against capacity
+# - class_activity_crosstab: enrollments of each class in each activity
+#
+# refresh() appends the enrollments inserted since the last load (rows
+# with a higher student_activities.id); when enrollments were deleted it
+# reloads everything.
+#
+# NumPy is imported on first use: the rest of the application does not
+# need it.
+#
+# KEY RESPONSIBILITIES:
+# 1. Load enrollments and metadata in three queries
+# 2. Keep the matrix current with incremental refreshes
+# 3. Compute the reports without further queries
+#
+# USAGE:
+#   matrix = EnrollmentMatrix().load()
+#   matrix.co_enrollment(top=10)         # [(name_a, name_b, together, jaccard), ...]
+#   matrix.utilization_by_day()
+#   matrix.refresh()                     # Later: only the new enrollments are read
+# ===================================================================
+
+from PythonExpenseApp.db_connection import DbConnection
+
+_numpy = None  # numpy module after the first import
+
+
+def _require_numpy():
+    """
+    Import NumPy on first use.
+
+    :return: module - numpy
+    :raises RuntimeError: If NumPy is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Enrollment analytics need NumPy (pip install numpy)")
+        _numpy = numpy
+    return _numpy
+
+
+class EnrollmentMatrix:
+    """
+    Sparse student x activity enrollment matrix with aligned metadata.
+
+    ATTRIBUTES:
+        student_ids (ndarray): Database id of each row
+        student_class (ndarray): Index in class_names of each row (-1 = no class)
+        class_names (list): Distinct classes
+        activity_ids (ndarray): Database id of each column
+        activity_names (list): Name of each column
+        activity_day (ndarray): Index in days of each column
+        days (list): Distinct activity days, in order
+        activity_start, activity_finish (ndarray): Times of each column (minutes from midnight, e.g. 570 = 9:30)
+        activity_capacity (ndarray): max_participants of each column (-1 = unlimited)
+        rows, cols (ndarray): Row and column index of each enrollment
+        last_enrollment_id (int): Highest student_activities.id loaded
+    """
+
+    STUDENTS_QUERY = "SELECT id, class FROM students WHERE role = 'student'{filter} ORDER BY id"
+    ACTIVITIES_QUERY = """SELECT id, name, day, start_time, finish_time, max_participants
+                   FROM activities{filter} ORDER BY day, start_time, id"""
+    ENROLLMENTS_QUERY = """SELECT id, student_id, activity_id FROM student_activities
+                   WHERE id > %s ORDER BY id"""
+
+    def __init__(self):
+        _require_numpy()
+        self._reset()
+
+    def _reset(self):
+        numpy = _numpy
+        self.student_ids = numpy.zeros(0, dtype=numpy.int64)
+        self.student_class = numpy.zeros(0, dtype=numpy.int32)
+        self.class_names = []
+        self.activity_ids = numpy.zeros(0, dtype=numpy.int64)
+        self.activity_names = []
+        self.activity_day = numpy.zeros(0, dtype=numpy.int32)
+        self.days = []
+        self.activity_start = numpy.zeros(0, dtype=numpy.int32)
+        self.activity_finish = numpy.zeros(0, dtype=numpy.int32)
+        self.activity_capacity = numpy.zeros(0, dtype=numpy.int32)
+        self.rows = numpy.zeros(0, dtype=numpy.int32)
+        self.cols = numpy.zeros(0, dtype=numpy.int32)
+        self.last_enrollment_id = 0
+        self._student_index = {}  # Student id -> row
+        self._activity_index = {}  # Activity id -> column
+        self._skipped = 0  # Enrollments of students / activities not in the matrix
+
+    # ---------------------------------------------------------------
+    # LOADING
+
+    @staticmethod
+    def _query(query, params=None):
+        success, result = DbConnection.execute_query(query, params, fetch_all=True)
+        if not success:
+            raise RuntimeError(f"Error loading enrollment analytics: {result}")
+        return result
+
+    def load(self):
+        """
+        Load every student, activity and enrollment (three queries).
+
+        :return: EnrollmentMatrix - self, for chaining.
+        :raises RuntimeError: If a query fails.
+        """
+        self._reset()
+        self._add_students(self._query(self.STUDENTS_QUERY.format(filter='')))
+        self._add_activities(self._query(self.ACTIVITIES_QUERY.format(filter='')))
+        self._add_enrollments(self._query(self.ENROLLMENTS_QUERY, (0,)))
+        return self
+
+    def refresh(self):
+        """
+        Read the enrollments inserted since the last load/refresh (and the students or
+        activities they refer to that are not loaded yet). If enrollments were deleted
+        in the meantime the whole matrix is reloaded. Changes to existing students or
+        activities (class, capacity, times) need load().
+
+        :return: int - New enrollments read, or -1 if the matrix was reloaded.
+        :raises RuntimeError: If a query fails.
+        """
+        new_rows = self._query(self.ENROLLMENTS_QUERY, (self.last_enrollment_id,))
+        self._add_missing(new_rows)
+        added = self._add_enrollments(new_rows)
+        total = self._query("SELECT COUNT(*) FROM student_activities")[0][0]
+        if total != len(self.rows) + self._skipped:
+            self.load()  # Some enrollments were removed: the coordinates are stale
+            return -1
+        return added
+
+    def _add_missing(self, enrollment_rows):
+        """Load the students and activities referenced by new enrollments and not loaded yet."""
+        students = {student_id for _, student_id, _ in enrollment_rows} - self._student_index.keys()
+        activities = {activity_id for _, _, activity_id in enrollment_rows} - self._activity_index.keys()
+        for ids, query, add in ((students, self.STUDENTS_QUERY, self._add_students),
+                                (activities, self.ACTIVITIES_QUERY, self._add_activities)):
+            if ids:
+                placeholders = ', '.join(['%s'] * len(ids))
+                condition = f" AND id IN ({placeholders})" if query is self.STUDENTS_QUERY else \
+                    f" WHERE id IN ({placeholders})"
+                add(self._query(query.format(filter=condition), tuple(ids)))
+
+    def _add_students(self, rows):
+        numpy = _numpy
+        codes = {name: code for code, name in enumerate(self.class_names)}
+        classes = []
+        for student_id, class_ in rows:
+            self._student_index[student_id] = len(self._student_index)
+            if class_ is None:
+                classes.append(-1)
+                continue
+            if class_ not in codes:
+                codes[class_] = len(self.class_names)
+                self.class_names.append(class_)
+            classes.append(codes[class_])
+        self.student_ids = numpy.concatenate([self.student_ids, numpy.array([row[0] for row in rows], dtype=numpy.int64)])
+        self.student_class = numpy.concatenate([self.student_class, numpy.array(classes, dtype=numpy.int32)])
+
+    def _add_activities(self, rows):
+        numpy = _numpy
+        days = {day: code for code, day in enumerate(self.days)}
+        day_codes = []
+        for activity_id, name, day, _, _, _ in rows:
+            self._activity_index[activity_id] = len(self._activity_index)
+            self.activity_names.append(name)
+            if day not in days:
+                days[day] = len(self.days)
+                self.days.append(day)
+            day_codes.append(days[day])
+        self.activity_ids = numpy.concatenate([self.activity_ids, numpy.array([row[0] for row in rows], dtype=numpy.int64)])
+        self.activity_day = numpy.concatenate([self.activity_day, numpy.array(day_codes, dtype=numpy.int32)])
+        self.activity_start = numpy.concatenate([self.activity_start, numpy.array([row[3] for row in rows], dtype=numpy.int32)])
+        self.activity_finish = numpy.concatenate([self.activity_finish, numpy.array([row[4] for row in rows], dtype=numpy.int32)])
+        self.activity_capacity = numpy.concatenate([self.activity_capacity, numpy.array(
+            [-1 if row[5] is None else row[5] for row in rows], dtype=numpy.int32)])
+
+    def _add_enrollments(self, rows):
+        """Append enrollments (id, student_id, activity_id); rows of unknown ids are skipped."""
+        numpy = _numpy
+        if not rows:
+            return 0
+        self.last_enrollment_id = max(self.last_enrollment_id, rows[-1][0])
+        pairs = [(self._student_index[student_id], self._activity_index[activity_id])
+                 for _, student_id, activity_id in rows
+                 if student_id in self._student_index and activity_id in self._activity_index]
+        self._skipped += len(rows) - len(pairs)
+        if pairs:
+            new = numpy.array(pairs, dtype=numpy.int32)
+            self.rows = numpy.concatenate([self.rows, new[:, 0]])
+            self.cols = numpy.concatenate([self.cols, new[:, 1]])
+        return len(pairs)
+
+    # ---------------------------------------------------------------
+    # REPORTS
+
+    def activity_counts(self):
+        """:return: ndarray - Enrollments of each column."""
+        return _numpy.bincount(self.cols, minlength=len(self.activity_ids))
+
+    def co_enrollment(self, top=20, min_together=2):
+        """
+        Activity pairs most often chosen by the same students.
+
+        :param top: int - Pairs returned.
+        :param min_together: int - Minimum number of shared students.
+        :return: list - (name_a, name_b, students together, Jaccard index), most shared first.
+        """
+        numpy = _numpy
+        activity_count = len(self.activity_ids)
+        if len(self.rows) < 2:
+            return []
+        order = numpy.lexsort((self.cols, self.rows))  # Enrollments grouped by student
+        rows, cols = self.rows[order], self.cols[order]
+        pair_codes = []
+        for offset in range(1, int(numpy.bincount(rows).max())):
+            same_student = rows[offset:] == rows[:-offset]  # Entries `offset` apart of the same student
+            pair_codes.append(cols[:-offset][same_student].astype(numpy.int64) * activity_count
+                              + cols[offset:][same_student])
+        if not pair_codes:
+            return []
+        codes, together = numpy.unique(numpy.concatenate(pair_codes), return_counts=True)
+        keep = together >= min_together
+        codes, together = codes[keep], together[keep]
+        best = numpy.argsort(-together, kind='stable')[:top]
+        counts = self.activity_counts()
+        result = []
+        for code, shared in zip(codes[best].tolist(), together[best].tolist()):
+            a, b = divmod(code, activity_count)
+            union = int(counts[a] + counts[b]) - shared
+            result.append((self.activity_names[a], self.activity_names[b], shared, round(shared / union, 3)))
+        return result
+
+    def utilization_by_day(self):
+        """
+        Enrollments and capacity of each day. Activities without max_participants count
+        in the enrollments but not in the utilization.
+
+        :return: list - (day, activities, enrollments, capacity, utilization %) in day order.
+        """
+        numpy = _numpy
+        day_count = len(self.days)
+        counts = self.activity_counts()
+        bounded = self.activity_capacity >= 0
+        activities = numpy.bincount(self.activity_day, minlength=day_count)
+        enrolled = numpy.bincount(self.activity_day, weights=counts, minlength=day_count)
+        capacity = numpy.bincount(self.activity_day[bounded], weights=self.activity_capacity[bounded],
+                                  minlength=day_count)
+        enrolled_bounded = numpy.bincount(self.activity_day[bounded], weights=counts[bounded], minlength=day_count)
+        order = sorted(range(day_count), key=lambda code: self.days[code])
+        return [(self.days[code], int(activities[code]), int(enrolled[code]), int(capacity[code]),
+                 round(100.0 * float(enrolled_bounded[code]) / float(capacity[code]), 1) if capacity[code] else None)
+                for code in order]
+
+    def utilization_by_hour(self):
+        """
+        Students busy in an activity during each hour of the day, over the whole trip
+        (an activity from 9:30 to 11:30, i.e. minutes 570 to 690, counts in hours 9, 10 and 11).
+
+        :return: list - (hour, activities running, students busy) for the hours with activities.
+        """
+        numpy = _numpy
+        counts = self.activity_counts()
+        first = numpy.clip(self.activity_start // 60, 0, 24)
+        last = numpy.clip((self.activity_finish + 59) // 60, 0, 24)  # First hour after the activity
+        activities, students = numpy.zeros(25, dtype=numpy.int64), numpy.zeros(25, dtype=numpy.int64)
+        for totals, weights in ((activities, 1), (students, counts)):
+            numpy.add.at(totals, first, weights)  # Difference arrays: +at the start, -after the end
+            numpy.add.at(totals, last, -numpy.asarray(weights))
+        activities, students = numpy.cumsum(activities)[:24], numpy.cumsum(students)[:24]
+        return [(hour, int(activities[hour]), int(students[hour])) for hour in range(24) if activities[hour]]
+
+    def class_activity_crosstab(self, top_per_class=None):
+        """
+        Enrollments of each class in each activity.
+
+        :param top_per_class: int, optional - Keep only the most chosen activities of each class.
+        :return: dict - Class -> list of (activity name, enrollments), most chosen first.
+        """
+        numpy = _numpy
+        classes = self.student_class[self.rows]
+        with_class = classes >= 0
+        activity_count = len(self.activity_ids)
+        codes, counts = numpy.unique(classes[with_class].astype(numpy.int64) * activity_count
+                                     + self.cols[with_class], return_counts=True)
+        crosstab = {}
+        for code, count in sorted(zip(codes.tolist(), counts.tolist()), key=lambda item: -item[1]):
+            class_code, column = divmod(code, activity_count)
+            entries = crosstab.setdefault(self.class_names[class_code], [])
+            if top_per_class is None or len(entries) < top_per_class:
+                entries.append((self.activity_names[column], count))
+        return dict(sorted(crosstab.items()))
+
+    def stats(self):
+        """:return: dict - Size of the matrix."""
+        return {'students': len(self.student_ids), 'activities': len(self.activity_ids),
+                'enrollments': len(self.rows), 'last_enrollment_id': self.last_enrollment_id}
@@ -15,8 +15,14 @@
 
 # Import database connection module for all database operations
 from PythonExpenseApp.db_connection import DbConnection
+# Import the rollups updated by every expense and debt transaction
+from PythonExpenseApp.rollups import Rollups
+# Import the per-pair unpaid balances read by the Debt Tracker
+from PythonExpenseApp.debt_balances import DebtBalances
 # Import datetime for handling date/time operations and timestamps
 from datetime import datetime
+# Import Decimal for exact money amounts when settling debts
+from decimal import Decimal
 
 class Expense:
     """
@@ -146,7 +152,8 @@ class Expense:
             tuple: (success, message) indicating if debt records were created successfully
             
         DATABASE OPERATIONS:
-            Inserts multiple records into the debts table, one for each participant
+            Inserts multiple records into the debts table, one for each participant,
+            and adds them to the rollups and the debt balances, in one transaction
             
         BUSINESS LOGIC:
             - The payer (id_giver) doesn't owe money to themselves
@@ -213,7 +220,16 @@ class Expense:
         
         # Execute all debt record insertions in a transaction
         if debt_records:
-            success, result = DbConnection.execute_transaction(debt_records)
+            def work(cursor):
+                debt_ids = []
+                for query, params in debt_records:
+                    cursor.execute(query, params)
+                    debt_ids.append(cursor.lastrowid)
+                Rollups.record(cursor, 'debts', 'id', debt_ids)
+                DebtBalances.added(cursor, 'id', debt_ids)
+                return debt_ids
+            
+            success, result = DbConnection.run_transaction(work)
             if success:
                 return True, f"Created {len(debt_records)} debt records successfully"
             else:
@@ -233,6 +249,7 @@ class Expense:
             
         DATABASE OPERATION:
             INSERT into expenses table with all expense properties
+            (and its rollups, in the same transaction)
             
         VALIDATION:
             - Amount must be positive
@@ -272,8 +289,14 @@ class Expense:
             self.id_activity      # Related activity (optional)
         )
         
-        # Execute the INSERT query
-        success, result = DbConnection.execute_query(query, params)
+        # Execute the INSERT query and update the rollups in one transaction
+        def work(cursor):
+            cursor.execute(query, params)
+            expense_id = cursor.lastrowid
+            Rollups.record(cursor, 'expenses', 'id', [expense_id])
+            return expense_id
+        
+        success, result = DbConnection.run_transaction(work)
         if success:
             self.id = result                        # Store the new database ID
             self.created_at = datetime.now()        # Record creation timestamp
@@ -281,6 +304,155 @@ class Expense:
         else:
             return False, f"Failed to save expense: {result}"
 
+    @staticmethod
+    def record_split_expense(payer_id, participant_ids, amount, description):
+        """
+        Record an expense paid by one student and split equally among participants.
+        
+        The expense and one debt per participant are inserted in a single
+        transaction through DbConnection.run_transaction, so a deadlock or a
+        lock wait timeout (frequent when many students enter expenses at the
+        same time) is retried instead of being shown as an error.
+        
+        PARAMETERS:
+            payer_id (int): Student who paid (the creditor of every debt)
+            participant_ids (list): Students sharing the cost (one debt each)
+            amount (float): Total amount paid
+            description (str): What the money was spent on
+            
+        RETURNS:
+            tuple: (success, per_person amount or error message)
+            
+        DATABASE OPERATIONS:
+            One INSERT into expenses and one INSERT into debts per participant,
+            all dated today (CURDATE()), the rollups of both and the debt balances
+            
+        USAGE:
+            success, per_person = Expense.record_split_expense(1, [2, 3, 4], 30.0, "Dinner")
+        """
+        if amount <= 0:
+            return False, "Expense amount must be positive"
+        if not description or description.strip() == "":
+            return False, "Expense description is required"
+        if not participant_ids:
+            return False, "No participants provided for debt splitting"
+        
+        per_person = amount / len(participant_ids)
+        
+        def work(cursor):
+            # Replayed from the start on a deadlock: the expense id is read again every time
+            cursor.execute("""INSERT INTO expenses (amount, description, date, id_giver, id_receiver, id_activity)
+                              VALUES (%s, %s, CURDATE(), %s, NULL, NULL)""",
+                           (amount, description, payer_id))
+            expense_id = cursor.lastrowid
+            cursor.executemany("""INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id, date_created)
+                                  VALUES (%s, %s, %s, %s, %s, CURDATE())""",
+                               [(payer_id, participant_id, per_person, description, expense_id)
+                                for participant_id in participant_ids])
+            Rollups.record(cursor, 'expenses', 'id', [expense_id])
+            Rollups.record(cursor, 'debts', 'expense', [expense_id])
+            DebtBalances.added(cursor, 'expense', [expense_id])
+            return per_person
+        
+        return DbConnection.run_transaction(work)
+
+    # Students of each kind of audience (the parameter is the group id, class name or activity id)
+    AUDIENCE_MEMBERS = {
+        'group': "SELECT student_id FROM student_groups WHERE group_id = %s",
+        'class': "SELECT id AS student_id FROM students WHERE class = %s AND role = 'student'",
+        'activity': "SELECT student_id FROM student_activities WHERE activity_id = %s",
+    }
+
+    @staticmethod
+    def record_audience_expense(payer_id, audience, audience_id, amount, description,
+                                weights=None, exclude_ids=()):
+        """
+        Record an expense shared by a whole group, class or activity.
+        
+        The members are resolved by the database: the debts of every member
+        (except the payer, who pays their own share) are written by a single
+        INSERT ... SELECT, so the number of statements does not depend on the
+        number of members. Everything runs in one transaction with
+        DbConnection.run_transaction (deadlocks are retried).
+        
+        PARAMETERS:
+            payer_id (int): Student who paid (the creditor of every debt)
+            audience (str): 'group', 'class' or 'activity' (see AUDIENCE_MEMBERS)
+            audience_id (int/str): Group id, class name or activity id
+            amount (float): Total amount paid
+            description (str): What the money was spent on
+            weights (dict): Optional student id -> weight (default weight 1),
+                e.g. {12: 2} for a member paying a double share
+            exclude_ids (iterable): Members who do not share this expense
+            
+        RETURNS:
+            tuple: (success, dict or error message); the dict has 'participants'
+            (members sharing the cost, payer included), 'debts' (rows inserted)
+            and 'per_person' (share of weight 1)
+            
+        DATABASE OPERATIONS:
+            One SELECT (member count and total weight), one INSERT into expenses
+            and one INSERT ... SELECT into debts (plus rollups and debt balances)
+            
+        USAGE:
+            success, result = Expense.record_audience_expense(1, 'group', 7, 240.0, "Group dinner")
+            success, result = Expense.record_audience_expense(1, 'class', '4A', 90.0, "Bus",
+                                                              weights={5: 2}, exclude_ids=[9])
+        """
+        members_query = Expense.AUDIENCE_MEMBERS.get(audience)
+        if members_query is None:
+            return False, f"Unknown audience '{audience}'"
+        if amount <= 0:
+            return False, "Expense amount must be positive"
+        if not description or description.strip() == "":
+            return False, "Expense description is required"
+        
+        # Members minus the exclusions, and the weight of each one
+        exclude_ids = list(dict.fromkeys(exclude_ids or ()))
+        members = f"SELECT m.student_id FROM ({members_query}) m"
+        member_params = [audience_id]
+        if exclude_ids:
+            members += f" WHERE m.student_id NOT IN ({', '.join(['%s'] * len(exclude_ids))})"
+            member_params += exclude_ids
+        weights = {student_id: float(weight) for student_id, weight in (weights or {}).items()}
+        if any(weight < 0 for weight in weights.values()):
+            return False, "Weights cannot be negative"
+        if weights:
+            weight_sql = f"CASE a.student_id {' '.join(['WHEN %s THEN %s'] * len(weights))} ELSE 1 END"
+            weight_params = [value for item in weights.items() for value in item]
+        else:
+            weight_sql, weight_params = "1", []
+        activity_id = audience_id if audience == 'activity' else None
+        
+        def work(cursor):
+            cursor.execute(f"SELECT COUNT(*), SUM({weight_sql}) FROM ({members}) a",
+                           (*weight_params, *member_params))
+            participants, total_weight = cursor.fetchone()
+            if not participants or not total_weight:
+                return False, f"No students to share the expense with in this {audience}"
+            per_unit = amount / float(total_weight)
+            
+            cursor.execute("""INSERT INTO expenses (amount, description, date, id_giver, id_receiver, id_activity)
+                              VALUES (%s, %s, CURDATE(), %s, NULL, %s)""",
+                           (amount, description, payer_id, activity_id))
+            expense_id = cursor.lastrowid
+            cursor.execute(f"""INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id, date_created)
+                               SELECT %s, a.student_id, ROUND(%s * {weight_sql}, 2), %s, %s, CURDATE()
+                               FROM ({members}) a
+                               WHERE a.student_id <> %s AND {weight_sql} > 0""",
+                           (payer_id, per_unit, *weight_params, description, expense_id,
+                            *member_params, payer_id, *weight_params))
+            debts = cursor.rowcount
+            Rollups.record(cursor, 'expenses', 'id', [expense_id])
+            Rollups.record(cursor, 'debts', 'expense', [expense_id])
+            DebtBalances.added(cursor, 'expense', [expense_id])
+            return True, {'participants': participants, 'debts': debts, 'per_person': per_unit}
+        
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            return False, result
+        return result
+
     @staticmethod
     def get_all_expenses():
         """
@@ -294,7 +466,8 @@ class Expense:
             Empty list if no expenses or database error
             
         DATABASE QUERY:
-            Selects all expenses ordered by date (most recent first)
+            Selects all expenses, live and archived (expenses_history view),
+            ordered by date (most recent first)
             
         USAGE:
             expenses = Expense.get_all_expenses()
@@ -304,7 +477,7 @@ class Expense:
         # Query to get all expenses ordered by date
         query = """SELECT id, amount, description, date, id_giver, id_receiver, 
                           id_activity, created_at
-                   FROM expenses 
+                   FROM expenses_history 
                    ORDER BY date DESC, created_at DESC"""
         
         success, result = DbConnection.execute_query(query, fetch_all=True)
@@ -346,7 +519,7 @@ class Expense:
         # Query for expenses involving the specified student
         query = """SELECT id, amount, description, date, id_giver, id_receiver, 
                           id_activity, created_at
-                   FROM expenses 
+                   FROM expenses_history 
                    WHERE id_giver = %s OR id_receiver = %s
                    ORDER BY date DESC, created_at DESC"""
         
@@ -364,6 +537,145 @@ class Expense:
         
         return expenses
 
+    # Rows per history page (get_expense_page / get_debt_page) and the largest page a caller may ask for
+    HISTORY_PAGE_SIZE = 50
+    MAX_HISTORY_PAGE_SIZE = 500
+
+    EXPENSE_HISTORY_COLUMNS = "id, amount, description, date, id_giver, id_receiver, id_activity, created_at"
+    DEBT_HISTORY_COLUMNS = ("id, payer_id, debtor_id, amount, description, expense_id, paid, "
+                            "date_created, date_paid")
+
+    @staticmethod
+    def _history_page(tables, columns, date_column, student_columns, student_id,
+                      conditions, params, after, limit):
+        """
+        Read one keyset page of the live and archived rows, newest first, ordered by (date, id).
+
+        Every table (and, with a student, every student column) is its own branch with
+        ORDER BY ... LIMIT, so each branch reads at most limit + 1 index entries after the
+        cursor and the cost of a page does not depend on the length of the history. The
+        branches are merged by the outer ORDER BY.
+
+        :param tables: tuple - Live and archive table.
+        :param columns: str - Selected columns, id first.
+        :param date_column: str - Date the pages are ordered by.
+        :param student_columns: tuple - Columns matched against student_id (e.g. giver, receiver).
+        :param student_id: int or None - Only rows of this student.
+        :param conditions: list - Extra conditions of every branch.
+        :param params: list - Parameters of the extra conditions.
+        :param after: tuple (date, id) or None - Cursor returned with the previous page.
+        :param limit: int - Rows per page.
+        :return: tuple (list, tuple or None) - (rows, cursor of the next page or None at the end).
+        """
+        limit = max(1, min(int(limit or Expense.HISTORY_PAGE_SIZE), Expense.MAX_HISTORY_PAGE_SIZE))
+        # (column, column of an earlier branch): a row matching both is returned by the earlier branch only
+        matches = [(None, None)]
+        if student_id is not None:
+            matches = [(column, student_columns[position - 1] if position else None)
+                       for position, column in enumerate(student_columns)]
+
+        branches, branch_params = [], []
+        for table in tables:
+            for column, earlier in matches:
+                where, where_params = list(conditions), list(params)
+                if column is not None:
+                    where.append(f"{column} = %s")
+                    where_params.append(student_id)
+                if earlier is not None:
+                    where.append(f"({earlier} IS NULL OR {earlier} <> %s)")
+                    where_params.append(student_id)
+                if after is not None:
+                    after_date, after_id = after
+                    # Written as a range on the date so the (student, date) indexes are used
+                    where.append(f"{date_column} <= %s AND ({date_column} < %s OR id < %s)")
+                    where_params.extend((after_date, after_date, after_id))
+                where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+                branches.append(f"""SELECT * FROM (SELECT {columns} FROM {table}{where_sql}
+                                    ORDER BY {date_column} DESC, id DESC LIMIT %s) AS page_{len(branches)}""")
+                branch_params.extend((*where_params, limit + 1))
+
+        query = f"{' UNION ALL '.join(branches)} ORDER BY {date_column} DESC, id DESC LIMIT %s"
+        success, rows = DbConnection.execute_query(query, (*branch_params, limit + 1), fetch_all=True)
+        if not success:
+            print(f"Error loading history page: {rows}")
+            return [], None
+
+        date_index = [column.strip() for column in columns.split(',')].index(date_column)
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, (rows[-1][date_index], rows[-1][0])
+
+    @staticmethod
+    def get_expense_page(student_id=None, start_date=None, end_date=None, activity_id=None,
+                         after=None, limit=None):
+        """
+        Get one page of the expense history (live and archived), newest first.
+
+        Pages are keyset-paginated on (date, id): pass the cursor returned with a page
+        to get the next one. Expenses added while browsing never shift the pages.
+
+        PARAMETERS:
+            student_id (int): Only expenses paid or received by this student (optional)
+            start_date (date): First day included (optional)
+            end_date (date): Last day included (optional)
+            activity_id (int): Only expenses of this activity (optional)
+            after (tuple): (date, id) cursor of the previous page, None for the first page
+            limit (int): Expenses per page (default HISTORY_PAGE_SIZE)
+
+        RETURNS:
+            tuple: (rows, next_cursor) - rows are (id, amount, description, date, id_giver,
+                   id_receiver, id_activity, created_at); next_cursor is None on the last page
+
+        USAGE:
+            rows, cursor = Expense.get_expense_page(student_id)
+            more, cursor = Expense.get_expense_page(student_id, after=cursor)
+        """
+        conditions, params = [], []
+        for condition, value in (("date >= %s", start_date), ("date <= %s", end_date),
+                                 ("id_activity = %s", activity_id)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        return Expense._history_page(('expenses', 'expenses_archive'), Expense.EXPENSE_HISTORY_COLUMNS,
+                                     'date', ('id_giver', 'id_receiver'), student_id,
+                                     conditions, params, after, limit)
+
+    @staticmethod
+    def get_debt_page(student_id=None, start_date=None, end_date=None, activity_id=None,
+                      paid=None, after=None, limit=None):
+        """
+        Get one page of the debt history (live and archived), newest first.
+
+        Same keyset pagination as get_expense_page, on (date_created, id).
+
+        PARAMETERS:
+            student_id (int): Only debts this student is owed or owes (optional)
+            start_date (date): First creation day included (optional)
+            end_date (date): Last creation day included (optional)
+            activity_id (int): Only debts of expenses of this activity (optional)
+            paid (bool): Only paid (True) or unpaid (False) debts (optional)
+            after (tuple): (date_created, id) cursor of the previous page, None for the first page
+            limit (int): Debts per page (default HISTORY_PAGE_SIZE)
+
+        RETURNS:
+            tuple: (rows, next_cursor) - rows are (id, payer_id, debtor_id, amount, description,
+                   expense_id, paid, date_created, date_paid); next_cursor is None on the last page
+        """
+        conditions, params = [], []
+        for condition, value in (("date_created >= %s", start_date), ("date_created <= %s", end_date),
+                                 ("paid = %s", paid)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        if activity_id is not None:
+            conditions.append("expense_id IN (SELECT id FROM expenses_history WHERE id_activity = %s)")
+            params.append(activity_id)
+        tables = ('debts',) if paid is False else ('debts', 'debts_archive')  # Only paid debts are archived
+        return Expense._history_page(tables, Expense.DEBT_HISTORY_COLUMNS,
+                                     'date_created', ('payer_id', 'debtor_id'), student_id,
+                                     conditions, params, after, limit)
+
     @staticmethod
     def get_total_expenses():
         """
@@ -381,7 +693,7 @@ class Expense:
             total = Expense.get_total_expenses()
             print(f"Total trip expenses: ${total:.2f}")
         """
-        query = "SELECT SUM(amount) FROM expenses"
+        query = "SELECT SUM(amount) FROM expenses_history"
         success, result = DbConnection.execute_query(query, fetch_one=True)
         
         if success and result and result[0]:
@@ -390,10 +702,16 @@ class Expense:
 
     @staticmethod
     def mark_debt_as_paid(debt_id):
-        """Mark a specific debt as paid"""
-        query = """UPDATE debts SET paid=TRUE, date_paid=CURDATE() WHERE id=%s"""
+        """Mark a specific debt as paid (counted once in the debts_paid rollups and the debt balances)"""
+        query = """UPDATE debts SET paid=TRUE, date_paid=CURDATE() WHERE id=%s AND paid=FALSE"""
         
-        success, result = DbConnection.execute_query(query, (debt_id,))
+        def work(cursor):
+            cursor.execute(query, (debt_id,))
+            if cursor.rowcount:  # Already paid debts are left as they are
+                Rollups.record(cursor, 'debts_paid', 'id', [debt_id])
+                DebtBalances.paid(cursor, [debt_id])
+        
+        success, result = DbConnection.run_transaction(work)
         if success:
             print(f"Debt {debt_id} marked as paid")
             return True
@@ -401,6 +719,164 @@ class Expense:
             print(f"Error marking debt as paid: {result}")
             return False
 
+    @staticmethod
+    def _plan_settlement(debts, up_to_amount=None):
+        """
+        Choose the debts a payment settles, oldest first.
+
+        :param debts: list - (id, amount) of the unpaid debts of one pair, oldest first.
+        :param up_to_amount: Decimal or None - Money paid (None settles everything).
+        :return: tuple (list, tuple or None) - (ids paid in full, (id, amount paid) of the
+                 debt paid in part or None).
+        """
+        full_ids, remaining = [], up_to_amount
+        for debt_id, amount in debts:
+            amount = Decimal(str(amount))
+            if remaining is None or amount <= remaining:
+                full_ids.append(debt_id)
+                if remaining is not None:
+                    remaining -= amount
+                continue
+            if remaining > 0:
+                return full_ids, (debt_id, remaining)
+            break
+        return full_ids, None
+
+    @staticmethod
+    def _write_settlements(cursor, plans):
+        """
+        Write planned settlements inside a transaction: one UPDATE marks every debt paid
+        in full, a debt paid in part is split into a paid row and an unpaid remainder,
+        and each pair gets a settlements row listing the debts it paid.
+
+        :param cursor: Cursor of the settlement transaction.
+        :param plans: list - (payer_id, debtor_id, {debt id: amount}, full ids, partial) per pair.
+        :return: list - (settlement_id, payer_id, debtor_id, amount, debts) per pair.
+        """
+        full_ids = [debt_id for _, _, _, ids, _ in plans for debt_id in ids]
+        if full_ids:
+            cursor.execute(f"""UPDATE debts SET paid=TRUE, date_paid=CURDATE()
+                               WHERE id IN ({', '.join(['%s'] * len(full_ids))})""", full_ids)
+            DebtBalances.paid(cursor, full_ids)
+        settlements, paid_ids = [], list(full_ids)
+        for payer_id, debtor_id, amounts, ids, partial in plans:
+            lines = [(debt_id, amounts[debt_id]) for debt_id in ids]
+            if partial is not None:
+                # The paid part becomes its own row (same expense and dates), the debt keeps the rest
+                debt_id, paid = partial
+                cursor.execute("""INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id, paid,
+                                                     date_created, date_paid, created_at)
+                                  SELECT payer_id, debtor_id, %s, description, expense_id, TRUE,
+                                         date_created, CURDATE(), created_at
+                                  FROM debts WHERE id = %s""", (paid, debt_id))
+                part_id = cursor.lastrowid
+                cursor.execute("UPDATE debts SET amount = amount - %s WHERE id = %s", (paid, debt_id))
+                DebtBalances.partly_paid(cursor, [part_id])
+                # The new row is a debts event too; its amount moves out of the original row's total
+                Rollups.record(cursor, 'debts', 'id', [part_id])
+                Rollups.adjust(cursor, 'debts', 'id', [debt_id], -paid)
+                lines.append((part_id, paid))
+                paid_ids.append(part_id)
+            total = sum(amount for _, amount in lines)
+            cursor.execute("""INSERT INTO settlements (payer_id, debtor_id, amount, debts)
+                              VALUES (%s, %s, %s, %s)""", (payer_id, debtor_id, total, len(lines)))
+            settlement_id = cursor.lastrowid
+            cursor.executemany("""INSERT INTO settlement_debts (settlement_id, debt_id, amount)
+                                  VALUES (%s, %s, %s)""",
+                               [(settlement_id, debt_id, amount) for debt_id, amount in lines])
+            settlements.append((settlement_id, payer_id, debtor_id, float(total), len(lines)))
+        Rollups.record(cursor, 'debts_paid', 'id', paid_ids)
+        return settlements
+
+    @staticmethod
+    def settle_between(payer_id, debtor_id, up_to_amount=None):
+        """
+        Settle what one student owes another in a single transaction.
+
+        The unpaid debts of the pair are locked oldest first (date, then id)
+        and paid in that order: every debt the amount covers is marked paid
+        by one UPDATE; the first debt it only partly covers is split into a
+        paid row and an unpaid remainder. The payment is recorded in the
+        settlements table.
+
+        PARAMETERS:
+            payer_id (int): Student who is owed the money (payer of the expenses)
+            debtor_id (int): Student who pays back
+            up_to_amount (float): Money paid back (optional, default: everything owed)
+
+        RETURNS:
+            tuple: (success, dict or error message); the dict has 'settlements'
+            ((settlement_id, payer_id, debtor_id, amount, debts) rows), 'debts'
+            (rows paid) and 'amount' (money settled)
+
+        USAGE:
+            success, result = Expense.settle_between(1, 4)          # Everything 4 owes 1
+            success, result = Expense.settle_between(1, 4, 25.0)    # 25 euro, oldest debts first
+        """
+        if up_to_amount is not None:
+            up_to_amount = Decimal(str(up_to_amount)).quantize(Decimal('0.01'))
+            if up_to_amount <= 0:
+                return False, "Settlement amount must be positive"
+
+        def work(cursor):
+            cursor.execute("""SELECT id, amount FROM debts
+                              WHERE payer_id = %s AND debtor_id = %s AND paid = FALSE
+                              ORDER BY date_created, id FOR UPDATE""", (payer_id, debtor_id))
+            debts = cursor.fetchall()
+            full_ids, partial = Expense._plan_settlement(debts, up_to_amount)
+            if not full_ids and partial is None:
+                return False, "No unpaid debts to settle"
+            amounts = {debt_id: Decimal(str(amount)) for debt_id, amount in debts}
+            return True, Expense._write_settlements(cursor, [(payer_id, debtor_id, amounts, full_ids, partial)])
+
+        return Expense._settlement_result(DbConnection.run_transaction(work))
+
+    @staticmethod
+    def settle_all_for(student_id):
+        """
+        Settle every unpaid debt of a student, towards everyone, in a single transaction.
+
+        One UPDATE marks all the debts paid; one settlements row is recorded
+        per student paid back.
+
+        PARAMETERS:
+            student_id (int): Student who pays back all their debts
+
+        RETURNS:
+            tuple: (success, dict or error message), as settle_between
+
+        USAGE:
+            success, result = Expense.settle_all_for(4)
+        """
+        def work(cursor):
+            cursor.execute("""SELECT id, payer_id, amount FROM debts
+                              WHERE debtor_id = %s AND paid = FALSE
+                              ORDER BY payer_id, date_created, id FOR UPDATE""", (student_id,))
+            by_payer = {}
+            for debt_id, payer_id, amount in cursor.fetchall():
+                by_payer.setdefault(payer_id, {})[debt_id] = Decimal(str(amount))
+            if not by_payer:
+                return False, "No unpaid debts to settle"
+            plans = [(payer_id, student_id, amounts, list(amounts), None)
+                     for payer_id, amounts in by_payer.items()]
+            return True, Expense._write_settlements(cursor, plans)
+
+        return Expense._settlement_result(DbConnection.run_transaction(work))
+
+    @staticmethod
+    def _settlement_result(outcome):
+        """Turn the outcome of a settlement transaction into (success, summary or message)"""
+        success, result = outcome
+        if not success:
+            print(f"Error settling debts: {result}")
+            return False, f"Failed to settle debts: {result}"
+        settled, settlements = result
+        if not settled:
+            return False, settlements
+        return True, {'settlements': settlements,
+                      'debts': sum(row[4] for row in settlements),
+                      'amount': round(sum(row[3] for row in settlements), 2)}
+
     def __str__(self):
         """
         Return a string representation of this expense.
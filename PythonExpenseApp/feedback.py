@@ -1,6 +1,13 @@
 from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.rollups import Rollups
 
 class Feedback:
+    # Eligibility queries (shared with async_models.AsyncFeedback)
+    PARTICIPATION_QUERY = """SELECT COUNT(*) FROM student_activities 
+                                WHERE student_id = %s AND activity_id = %s"""
+    EXISTING_FEEDBACK_QUERY = """SELECT COUNT(*) FROM feedback 
+                           WHERE student_id = %s AND activity_id = %s"""
+
     def __init__(self, student_id, activity_id, rating, comment):
         """
         Initializes a new Feedback object with the given student, activity, rating, and comment.
@@ -74,18 +81,12 @@ class Feedback:
         :return: tuple (bool, str) - (Eligibility, Message explaining result)
         """
         # Check if student participated in the activity
-        participation_query = """SELECT COUNT(*) FROM student_activities 
-                                WHERE student_id = %s AND activity_id = %s"""
-        
-        success, result = DbConnection.execute_query(participation_query, (student_id, activity_id), fetch_one=True)
+        success, result = DbConnection.execute_query(Feedback.PARTICIPATION_QUERY, (student_id, activity_id), fetch_one=True)
         if not success or not result or result[0] == 0:
             return False, "You must participate in an activity before leaving feedback."
         
         # Check if student has already given feedback
-        feedback_query = """SELECT COUNT(*) FROM feedback 
-                           WHERE student_id = %s AND activity_id = %s"""
-        
-        success, result = DbConnection.execute_query(feedback_query, (student_id, activity_id), fetch_one=True)
+        success, result = DbConnection.execute_query(Feedback.EXISTING_FEEDBACK_QUERY, (student_id, activity_id), fetch_one=True)
         if not success:
             return False, "Error checking existing feedback."
         
@@ -125,7 +126,13 @@ class Feedback:
         
         params = (self.student_id, self.activity_id, self.rating, self.comment)
         
-        success, result = DbConnection.execute_query(query, params)
+        def work(cursor):
+            cursor.execute(query, params)
+            feedback_id = cursor.lastrowid
+            Rollups.record(cursor, 'feedback', 'id', [feedback_id])  # Same transaction as the insert
+            return feedback_id
+        
+        success, result = DbConnection.run_transaction(work)
         if success:
             self.id = result
             print(f"Feedback saved to database with ID {self.id}")
@@ -2,6 +2,12 @@ from PythonExpenseApp.db_connection import DbConnection
 import mysql.connector
 
 class Group:
+    # Insert skipping existing memberships. Not INSERT IGNORE: mysql.connector only batches
+    # executemany into one multi-row statement for plain INSERT ... VALUES (and IGNORE would
+    # also hide foreign key errors). Unchanged rows count 0 in rowcount.
+    ADD_MEMBER_QUERY = """INSERT INTO student_groups (group_id, student_id) VALUES (%s, %s)
+                   ON DUPLICATE KEY UPDATE group_id = group_id"""
+
     def __init__(self, name, common_activity, dietary_needs):
         """
         Initializes a new Group object with the given name, common activity, and dietary needs.
@@ -125,6 +131,107 @@ class Group:
             print(f"Error adding member to group: {result}")
             return False
 
+    def add_members_to_database(self, student_ids):
+        """
+        Add many members to the group with one multi-row INSERT.
+        Students already in the group are skipped.
+
+        :param student_ids: iterable - IDs of the students to add.
+        :return: tuple (bool, int or str) - (success, rows added or error message)
+        """
+        if not self.id:
+            return False, "Group must be saved to database first"
+        rows = [(self.id, student_id) for student_id in dict.fromkeys(student_ids)]
+        if not rows:
+            return True, 0
+
+        def work(cursor):
+            # mysql.connector sends executemany of this INSERT as one multi-row statement
+            cursor.executemany(Group.ADD_MEMBER_QUERY, rows)
+            return cursor.rowcount
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            print(f"Error adding members to group: {result}")
+        return success, result
+
+    def remove_members_from_database(self, student_ids):
+        """
+        Remove many members from the group with one DELETE.
+
+        :param student_ids: iterable - IDs of the students to remove.
+        :return: tuple (bool, int or str) - (success, rows removed or error message)
+        """
+        if not self.id:
+            return False, "Group must be saved to database first"
+        student_ids = list(dict.fromkeys(student_ids))
+        if not student_ids:
+            return True, 0
+
+        def work(cursor):
+            cursor.execute(f"""DELETE FROM student_groups
+                               WHERE group_id = %s AND student_id IN ({', '.join(['%s'] * len(student_ids))})""",
+                           (self.id, *student_ids))
+            return cursor.rowcount
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            print(f"Error removing members from group: {result}")
+        return success, result
+
+    @staticmethod
+    def move_members(student_ids, from_group_id, to_group_id):
+        """
+        Move students from one group to another in a single transaction: either every
+        student changes group or nothing is written. Only current members of the
+        source group are moved.
+
+        :param student_ids: iterable - IDs of the students to move.
+        :param from_group_id: int - Source group.
+        :param to_group_id: int - Destination group.
+        :return: tuple (bool, int or str) - (success, students moved or error message)
+        """
+        student_ids = list(dict.fromkeys(student_ids))
+        if from_group_id == to_group_id:
+            return False, "Source and destination group are the same"
+        if not student_ids:
+            return True, 0
+        placeholders = ', '.join(['%s'] * len(student_ids))
+
+        def work(cursor):
+            # Lock the memberships being moved, so two moves of the same students serialize
+            cursor.execute(f"""SELECT student_id FROM student_groups
+                               WHERE group_id = %s AND student_id IN ({placeholders})
+                               FOR UPDATE""",
+                           (from_group_id, *student_ids))
+            members = [row[0] for row in cursor.fetchall()]
+            if not members:
+                return 0
+            cursor.execute(f"""DELETE FROM student_groups
+                               WHERE group_id = %s AND student_id IN ({', '.join(['%s'] * len(members))})""",
+                           (from_group_id, *members))
+            cursor.executemany(Group.ADD_MEMBER_QUERY,
+                               [(to_group_id, student_id) for student_id in members])
+            return len(members)
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            print(f"Error moving group members: {result}")
+        return success, result
+
+    @staticmethod
+    def from_row(row):
+        """
+        Build a Group from a row (id, name, common_activity, dietary_needs, created_at).
+
+        :param row: tuple - Database row.
+        :return: Group
+        """
+        group = Group(row[1], row[2], row[3]) # name, common_activity, dietary_needs
+        group.id = row[0]
+        group.created_at = row[4]
+        return group
+
     @staticmethod
     def get_all_groups():
         """Get all groups from database"""
@@ -135,14 +242,36 @@ class Group:
             print(f"Error retrieving groups: {result}")
             return []
             
-        groups = []
+        return [Group.from_row(row) for row in result]
+
+    @staticmethod
+    def get_groups_with_members():
+        """
+        Get all groups with their member IDs in one query (no query per group).
+        Each Group has members set to the list of its student IDs, so
+        len(group.members) is the member count.
+
+        :return: list - Group objects ordered by name, empty on error.
+        """
+        # One row per membership (one row with a NULL student for empty groups)
+        query = """SELECT g.id, g.name, g.common_activity, g.dietary_needs, g.created_at, sg.student_id
+                   FROM `groups` g
+                   LEFT JOIN student_groups sg ON sg.group_id = g.id
+                   ORDER BY g.name, g.id, sg.student_id"""
+        
+        success, result = DbConnection.execute_query(query, fetch_all=True)
+        if not success:
+            print(f"Error retrieving groups: {result}")
+            return []
+        
+        groups = {}
         for row in result:
-            group = Group(row[1], row[2], row[3]) # name, common_activity, dietary_needs
-            group.id = row[0]
-            group.created_at = row[4]
-            groups.append(group)
-            
-        return groups
+            group = groups.get(row[0])
+            if group is None:
+                group = groups[row[0]] = Group.from_row(row)
+            if row[5] is not None:
+                group.members.append(row[5])
+        return list(groups.values())
 
     def get_members_from_database(self):
         """Get all members of this group from database"""
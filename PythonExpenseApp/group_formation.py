@@ -0,0 +1,346 @@
+# ===================================================================
+# GROUP FORMATION - AUTOMATIC SIZE-BOUNDED STUDENT GROUPS
+# ===================================================================
+# Splits the students (of each class, by default) into groups of at most
+# group_size members, so that members share as many enrolled activities
+# (student_activities) as possible and students with the same special /
+# dietary needs (students.special_needs) end up together.
+#
+# Every student is a feature vector: one column per activity (1 if
+# enrolled) plus one column per distinct need (NEEDS_WEIGHT if it has it).
+# The groups are formed by a balanced partition heuristic, a k-means with
+# capacities:
+#
+#   1. start from the students sorted by need and activities, cut into
+#      k = ceil(n / group_size) consecutive chunks
+#   2. score every student against every group centroid (dot product:
+#      activities shared with an average member + need affinity)
+#   3. reassign the students, most confident first, each to its best
+#      group that still has room (at most ceil(n / k) members)
+#   4. repeat 2-3 until nothing moves (or MAX_ITERATIONS)
+#
+# With NumPy installed the scores are one matrix product per iteration;
+# without it a sparse version (inverted index activity -> groups) is used.
+#
+# KEY RESPONSIBILITIES:
+# 1. Load the students, their needs and enrollments (one query each)
+# 2. Form the groups (NumPy if available, pure Python otherwise)
+# 3. Persist them in one transaction, memberships with a bulk insert
+#
+# USAGE:
+#   formation = GroupFormation(group_size=8).load()
+#   groups = formation.form()          # Group objects, members = student ids
+#   success, message = formation.save(groups)
+# ===================================================================
+
+import math  # Number of groups
+from collections import Counter  # Common activity / needs of a group
+
+from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.group import Group
+
+_numpy = None  # numpy module after the first load, False if not installed
+
+
+def load_numpy():
+    """
+    Import NumPy on first use (later calls reuse the module).
+
+    :return: module or None - numpy, or None if it is not installed.
+    """
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False  # Do not try again on every formation
+    return _numpy or None
+
+
+class GroupFormation:
+    """
+    Forms size-bounded groups of students from their enrollments and needs.
+
+    ATTRIBUTES:
+        group_size (int): Maximum members per group
+        per_class (bool): Form the groups of each class separately
+        students (list): Tuples (id, class, special_needs)
+        enrollments (dict): Student id -> set of activity ids
+        activity_names (dict): Activity id -> name (for the common activity)
+        stats (dict): Result of the last form(): groups, iterations, backend, shared activities
+    """
+
+    # Weight of a shared need relative to one shared activity
+    NEEDS_WEIGHT = 3.0
+    # Upper bound on the reassignment rounds
+    MAX_ITERATIONS = 10
+
+    STUDENTS_QUERY = """SELECT id, class, special_needs
+                   FROM students
+                   WHERE role = 'student'
+                   ORDER BY class, id"""
+    ENROLLMENTS_QUERY = """SELECT sa.student_id, sa.activity_id
+                   FROM student_activities sa
+                   JOIN students s ON s.id = sa.student_id
+                   WHERE s.role = 'student'"""
+    ACTIVITY_NAMES_QUERY = "SELECT id, name FROM activities"
+
+    def __init__(self, group_size=8, per_class=True, use_numpy=True):
+        """
+        :param group_size: int - Maximum members per group (at least 2).
+        :param per_class: bool - Never mix students of different classes.
+        :param use_numpy: bool - Use NumPy when installed (False forces the pure Python version).
+        """
+        if group_size < 2:
+            raise ValueError("group_size must be at least 2")
+        self.group_size = group_size
+        self.per_class = per_class
+        self.use_numpy = use_numpy
+        self.students = []
+        self._needs = {}  # Student id -> special_needs
+        self.enrollments = {}
+        self.activity_names = {}
+        self.stats = {}
+
+    def load(self):
+        """
+        Load the students, their enrollments and the activity names.
+
+        :return: GroupFormation - self, for chaining.
+        :raises RuntimeError: If a query fails.
+        """
+        results = []
+        for query in (self.STUDENTS_QUERY, self.ENROLLMENTS_QUERY, self.ACTIVITY_NAMES_QUERY):
+            success, result = DbConnection.execute_query(query, fetch_all=True)
+            if not success:
+                raise RuntimeError(f"Error loading group formation data: {result}")
+            results.append(result)
+        students, enrollments, activity_names = results
+        return self.use_data(students, enrollments, dict(activity_names))
+
+    def use_data(self, students, enrollments, activity_names=None):
+        """
+        Use data loaded elsewhere (e.g. generated rows).
+
+        :param students: iterable - Tuples (id, class, special_needs).
+        :param enrollments: iterable - Tuples (student_id, activity_id).
+        :param activity_names: dict, optional - Activity id -> name.
+        :return: GroupFormation - self, for chaining.
+        """
+        self.students = [tuple(row) for row in students]
+        self._needs = {student_id: needs for student_id, _, needs in self.students}
+        self.enrollments = {}
+        for student_id, activity_id in enrollments:
+            self.enrollments.setdefault(student_id, set()).add(activity_id)
+        self.activity_names = activity_names or {}
+        return self
+
+    # ---------------------------------------------------------------
+    # FORMATION
+
+    def form(self):
+        """
+        Form the groups of the loaded students.
+
+        :return: list - Unsaved Group objects: members is the list of student ids,
+                 common_activity the activity most members share, dietary_needs the
+                 need most members have (None if nobody in the group has one).
+        """
+        numpy = load_numpy() if self.use_numpy else None
+        partitions = {}
+        for student_id, class_, needs in self.students:
+            partitions.setdefault(class_ if self.per_class else None, []).append(
+                (student_id, (needs or '').strip().lower()))
+
+        groups, iterations, shared = [], 0, 0
+        for class_, members in partitions.items():
+            assignment, rounds = self._partition(members, numpy)
+            iterations = max(iterations, rounds)
+            for number, indexes in enumerate(assignment, start=1):
+                group = self._describe(class_, number, [members[index][0] for index in indexes])
+                shared += self._shared_pairs(group.members)
+                groups.append(group)
+
+        self.stats = {
+            'students': len(self.students),
+            'groups': len(groups),
+            'iterations': iterations,
+            'backend': 'numpy' if numpy else 'python',
+            'shared_activities_per_pair': self._pair_average(groups, shared),
+        }
+        return groups
+
+    def _partition(self, members, numpy):
+        """
+        Split one partition of students into balanced groups.
+
+        :param members: list - Tuples (student_id, normalized needs).
+        :param numpy: module or None
+        :return: tuple - (list of lists of member indexes, rounds run)
+        """
+        count = len(members)
+        group_count = max(1, math.ceil(count / self.group_size))
+        capacity = math.ceil(count / group_count)
+
+        # Features of each student: its activities and its need (if any)
+        features = [[(('activity', activity_id), 1.0) for activity_id in sorted(self.enrollments.get(student_id, ()))]
+                    + ([(('needs', needs), self.NEEDS_WEIGHT)] if needs else [])
+                    for student_id, needs in members]
+
+        # Initial balanced assignment: similar students are next to each other once sorted
+        order = sorted(range(count), key=lambda index: (members[index][1], [f for f, _ in features[index]]))
+        assignment = [0] * count
+        for position, index in enumerate(order):
+            assignment[index] = position * group_count // count
+
+        scorer = self._numpy_scorer(features, group_count, numpy) if numpy else self._python_scorer(features, group_count)
+        rounds = 0
+        for rounds in range(1, self.MAX_ITERATIONS + 1):
+            confidence, preferences = scorer(assignment)
+            loads = [0] * group_count
+            new_assignment = [0] * count
+            for index in sorted(range(count), key=lambda i: -confidence[i]):
+                for group in preferences(index, loads):
+                    if loads[group] < capacity:
+                        loads[group] += 1
+                        new_assignment[index] = group
+                        break
+            if new_assignment == assignment:
+                break
+            assignment = new_assignment
+
+        groups = [[] for _ in range(group_count)]
+        for index, group in enumerate(assignment):
+            groups[group].append(index)
+        return [group for group in groups if group], rounds
+
+    @staticmethod
+    def _numpy_scorer(features, group_count, numpy):
+        """
+        Dense scoring: F (students x features) @ centroids.T, one product per round.
+
+        :return: callable(assignment) -> (confidence list, preferences(index, loads))
+        """
+        columns = {}
+        for student_features in features:
+            for feature, _ in student_features:
+                columns.setdefault(feature, len(columns))
+        matrix = numpy.zeros((len(features), max(1, len(columns))), dtype=numpy.float32)
+        for row, student_features in enumerate(features):
+            for feature, weight in student_features:
+                matrix[row, columns[feature]] = weight
+
+        def scorer(assignment):
+            labels = numpy.asarray(assignment)
+            membership = numpy.zeros((group_count, len(features)), dtype=numpy.float32)
+            membership[labels, numpy.arange(len(features))] = 1.0
+            sizes = numpy.maximum(membership.sum(axis=1, keepdims=True), 1.0)
+            scores = matrix @ ((membership @ matrix) / sizes).T  # students x groups
+            ranking = numpy.argsort(-scores, axis=1, kind='stable')
+            confidence = scores.max(axis=1).tolist()
+            return confidence, lambda index, loads: iter(ranking[index])
+
+        return scorer
+
+    @staticmethod
+    def _python_scorer(features, group_count):
+        """
+        Sparse scoring: only the groups sharing a feature with the student are scored;
+        the others follow, least loaded first.
+
+        :return: callable(assignment) -> (confidence list, preferences(index, loads))
+        """
+        def scorer(assignment):
+            sizes = Counter(assignment)
+            inverted = {}  # feature -> {group: centroid weight}
+            for index, group in enumerate(assignment):
+                for feature, weight in features[index]:
+                    by_group = inverted.setdefault(feature, {})
+                    by_group[group] = by_group.get(group, 0.0) + weight / sizes[group]
+            ranked, confidence = [], []
+            for student_features in features:
+                scores = {}
+                for feature, weight in student_features:
+                    for group, centroid_weight in inverted[feature].items():
+                        scores[group] = scores.get(group, 0.0) + weight * centroid_weight
+                ranking = sorted(scores, key=lambda group: (-scores[group], group))
+                ranked.append(ranking)
+                confidence.append(scores[ranking[0]] if ranking else 0.0)
+
+            def preferences(index, loads):
+                yield from ranked[index]
+                yield from sorted(range(group_count), key=lambda group: loads[group])
+
+            return confidence, preferences
+
+        return scorer
+
+    def _describe(self, class_, number, student_ids):
+        """
+        Build the Group of a list of members.
+
+        :return: Group - Unsaved, members = student ids.
+        """
+        activities = Counter(activity_id for student_id in student_ids
+                             for activity_id in self.enrollments.get(student_id, ()))
+        needs = Counter()
+        for student_id in student_ids:
+            student_needs = (self._needs.get(student_id) or '').strip()
+            if student_needs:
+                needs[student_needs] += 1
+        common = activities.most_common(1)
+        common_activity = None
+        if common and common[0][1] > 1:  # Shared by at least two members
+            common_activity = self.activity_names.get(common[0][0], f"Activity {common[0][0]}")
+        name = f"{class_} Group {number}" if class_ else f"Group {number}"
+        group = Group(name, common_activity, needs.most_common(1)[0][0] if needs else None)
+        group.members = list(student_ids)
+        return group
+
+    def _shared_pairs(self, student_ids):
+        """:return: int - Activities shared, summed over every pair of members."""
+        counts = Counter(activity_id for student_id in student_ids
+                         for activity_id in self.enrollments.get(student_id, ()))
+        return sum(count * (count - 1) // 2 for count in counts.values())
+
+    @staticmethod
+    def _pair_average(groups, shared):
+        pairs = sum(len(group.members) * (len(group.members) - 1) // 2 for group in groups)
+        return round(shared / pairs, 3) if pairs else 0.0
+
+    # ---------------------------------------------------------------
+    # PERSISTENCE
+
+    @staticmethod
+    def save(groups):
+        """
+        Insert the groups and their memberships in one transaction. Each group needs
+        its own INSERT (its id is read back); the memberships of every group are
+        written with one bulk insert.
+
+        :param groups: list - Group objects from form(); their ids are set on success.
+        :return: tuple (bool, str) - (success, message)
+        """
+        def work(cursor):
+            ids = []
+            for group in groups:
+                cursor.execute("INSERT INTO `groups` (name, common_activity, dietary_needs) VALUES (%s, %s, %s)",
+                               (group.name, group.common_activity, group.dietary_needs))
+                ids.append(cursor.lastrowid)
+            memberships = [(group_id, student_id) for group_id, group in zip(ids, groups)
+                           for student_id in group.members]
+            if memberships:
+                cursor.executemany(Group.ADD_MEMBER_QUERY, memberships)
+            return ids
+
+        if not groups:
+            return True, "No groups to save"
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            print(f"Error saving groups: {result}")
+            return False, result
+        for group, group_id in zip(groups, result):
+            group.id = group_id
+        members = sum(len(group.members) for group in groups)
+        return True, f"Saved {len(groups)} groups ({members} members)"
@@ -2,16 +2,31 @@ import tkinter as tk  # Importa la libreria base per la creazione di GUI in Pyth
 from tkinter import ttk, messagebox  # Importa widget avanzati (ttk) e finestre di messaggio (messagebox)
 from PythonExpenseApp.activity import Activity  # Importa la classe Activity dal tuo progetto
 from PythonExpenseApp.feedback import Feedback  # Importa la classe Feedback dal tuo progetto
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Esegue le query fuori dal thread Tk
+from PythonExpenseApp.service_client import ServiceClient  # Trasporto opzionale verso il servizio (thin client)
+from PythonExpenseApp.session import Session  # Identity map: ogni dato viene letto una volta per caricamento
 
-# Prova a importare matplotlib per i grafici, fallback su testo se non disponibile
-try:
-    import matplotlib.pyplot as plt  # Importa pyplot per creare grafici
-    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg  # Permette di integrare grafici matplotlib in Tkinter
-    import numpy as np  # Importa numpy per operazioni numeriche
-    MATPLOTLIB_AVAILABLE = True  # Flag che indica se matplotlib è disponibile
-except ImportError:
-    MATPLOTLIB_AVAILABLE = False  # Se matplotlib non è disponibile, imposta il flag a False
-    print("Matplotlib not available. Charts will be displayed as text.")  # Messaggio di fallback
+# matplotlib (con il backend TkAgg) è molto lento da importare: viene caricato
+# solo quando serve il primo grafico, non all'avvio dell'applicazione
+_matplotlib_modules = None  # (pyplot, FigureCanvasTkAgg) dopo il primo caricamento, False se non disponibile
+
+def load_matplotlib():
+    """
+    Importa matplotlib al primo utilizzo (le chiamate successive riusano i moduli già caricati).
+
+    Returns:
+        tuple or None: (pyplot, FigureCanvasTkAgg), oppure None se matplotlib non è installato.
+    """
+    global _matplotlib_modules
+    if _matplotlib_modules is None:
+        try:
+            import matplotlib.pyplot as plt  # Importa pyplot per creare grafici
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg  # Permette di integrare grafici matplotlib in Tkinter
+            _matplotlib_modules = (plt, FigureCanvasTkAgg)
+        except ImportError:
+            _matplotlib_modules = False  # Non riprovare ad ogni grafico
+            print("Matplotlib not available. Charts will be displayed as text.")  # Messaggio di fallback
+    return _matplotlib_modules or None
 
 class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei dettagli attività
     def __init__(self, root, activity_id, student=None, main_callback=None):  # Costruttore della classe
@@ -19,16 +34,63 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
         self.activity_id = activity_id  # Salva l'ID dell'attività da mostrare
         self.student = student  # Salva l'oggetto studente (se presente)
         self.main_callback = main_callback  # Salva la callback per tornare alla dashboard principale
-        self.activity = Activity.get_activity_by_id(activity_id)  # Carica l'attività dal database tramite ID
-        
-        if not self.activity:  # Se l'attività non viene trovata
-            messagebox.showerror("Error", "Activity not found")  # Mostra un messaggio di errore
-            root.destroy() # Chiude la finestra se non trova l'attività
-            return  # Esce dal costruttore
+        self.activity = None  # Caricata in background
+        self.is_registered = False  # True se lo studente è già iscritto
+        self.feedback_state = (False, "")  # (può lasciare feedback, motivo)
+        self.current_participants = 0  # Numero di partecipanti (aggiornato da load_activity_details)
+        
+        # Indicatore di caricamento finché l'attività non è pronta
+        self.loading_label = tk.Label(self.root, text="⏳ Loading activity...",  # Label temporanea
+                                      font=("Segoe UI", 14), bg='#f8fafc', fg='#64748b')
+        self.loading_label.pack(expand=True, pady=40)  # Posiziona la label
+        
+        student_id = self.student.id if self.student else None  # ID studente (se presente)
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'activity'),  # Chiave della richiesta
+            lambda: ActivityDetailsGUI.fetch_activity(activity_id, student_id),  # Query eseguite fuori dal thread Tk
+            on_success=self._on_activity_loaded,  # Costruisce l'interfaccia
+            on_error=self._on_activity_error)  # Mostra errore
+
+    @staticmethod
+    def fetch_activity(activity_id, student_id=None):
+        """
+        Carica l'attività, lo stato dei pulsanti azione per lo studente e i dettagli
+        (partecipanti, valutazioni, feedback) per il primo disegno della finestra.
+        Eseguito su un thread di lavoro: nessuna chiamata a Tkinter.
+        Restituisce (activity, is_registered, (can_feedback, message), details) oppure None se non trovata.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('activity_details.activity', activity_id=activity_id, student_id=student_id)
+        with Session():  # La lista dei partecipanti viene letta una sola volta
+            activity = Activity.get_activity_by_id(activity_id)  # Carica l'attività dal database tramite ID
+            if not activity:  # Se l'attività non viene trovata
+                return None
             
+            is_registered = False  # Stato iscrizione
+            feedback_state = (False, "")  # Stato feedback
+            if student_id is not None:  # Se è presente uno studente
+                participants = activity.get_participant_list()  # Ottiene la lista dei partecipanti
+                is_registered = any(p[0] == student_id for p in participants)  # Verifica se lo studente è già iscritto
+                feedback_state = activity.can_student_leave_feedback(student_id)  # Verifica permesso feedback
+            details = activity.get_comprehensive_details()  # Riusa la lista dei partecipanti già letta
+        return activity, is_registered, feedback_state, details
+
+    def _on_activity_loaded(self, result):  # Chiamato sul thread Tk quando l'attività è pronta
+        self.loading_label.destroy()  # Rimuove l'indicatore di caricamento
+        if not result:  # Se l'attività non viene trovata
+            messagebox.showerror("Error", "Activity not found")  # Mostra un messaggio di errore
+            self.root.destroy()  # Chiude la finestra se non trova l'attività
+            return
+        
+        self.activity, self.is_registered, self.feedback_state, details = result  # Salva i dati caricati
         self.setup_window()  # Imposta le proprietà della finestra
         self.create_interface()  # Crea la struttura grafica della finestra
-        self.load_activity_details()  # Carica e mostra i dati dell'attività
+        self._render_activity_details(details)  # Mostra i dati già caricati (i refresh usano load_activity_details)
+
+    def _on_activity_error(self, error):  # Chiamato sul thread Tk in caso di errore
+        messagebox.showerror("Error", f"Could not load activity: {error}")  # Mostra errore
+        self.root.destroy()  # Chiude la finestra
 
     def setup_window(self):  # Metodo per impostare la finestra principale
         self.root.title(f"Activity Details - {self.activity.name}")  # Imposta il titolo della finestra
@@ -209,18 +271,15 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
         button_frame.grid(row=2, column=0, columnspan=2, pady=20)  # Posiziona il frame
         
         if self.student:  # Se è presente uno studente
-            # Controlla se lo studente è già iscritto
-            participants = self.activity.get_participant_list()  # Ottiene la lista dei partecipanti
-            is_registered = any(p[0] == self.student.id for p in participants)  # Verifica se lo studente è già iscritto
-            
-            if not is_registered:  # Se non è iscritto
+            # Stato caricato in background da fetch_activity
+            if not self.is_registered:  # Se non è iscritto
                 register_btn = tk.Button(button_frame, text="Register for Activity",  # Crea il pulsante di iscrizione
                                         font=("Segoe UI", 12, "bold"), bg="#059669", fg="white",
                                         command=self.register_for_activity)
                 register_btn.pack(side=tk.LEFT, padx=10)  # Posiziona il pulsante
             
             # Controlla se può lasciare feedback
-            can_feedback, feedback_message = self.activity.can_student_leave_feedback(self.student.id)  # Verifica permesso
+            can_feedback, feedback_message = self.feedback_state  # Permesso caricato in background
             
             if can_feedback:  # Se può lasciare feedback
                 feedback_btn = tk.Button(button_frame, text="Leave Feedback",  # Crea il pulsante feedback
@@ -278,10 +337,17 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
         feedback_scrollbar.pack(side="right", fill="y", pady=10)  # Posiziona la scrollbar
 
     def load_activity_details(self):  # Metodo che carica e aggiorna tutti i dati dell'attività
-        details = self.activity.get_comprehensive_details()  # Ottieni tutti i dati dal modello Activity
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'details'),  # Refresh ripetuti vengono accorpati
+            self.activity.get_comprehensive_details,  # Ottieni tutti i dati dal modello Activity (fuori dal thread Tk)
+            on_success=self._render_activity_details,  # Aggiorna le sezioni
+            on_error=lambda e: messagebox.showerror("Error", f"Could not load activity details: {e}"))  # Mostra errore
+
+    def _render_activity_details(self, details):  # Aggiorna tutte le sezioni con i dati caricati
         if not details:  # Se non ci sono dettagli, esci
             return
         
+        self.current_participants = details['participation']['current_participants']  # Usato dal riepilogo feedback
         self.load_participation_info(details['participation'])  # Aggiorna la sezione partecipazione
         self.load_rating_summary(details['ratings'])            # Aggiorna la sezione rating
         self.load_detailed_ratings(details['ratings'])          # Aggiorna la sezione dettagli rating
@@ -389,12 +455,13 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
             return  # Esce dal metodo
         
         # Crea distribuzione rating (grafico se matplotlib disponibile, altrimenti testo)
-        if MATPLOTLIB_AVAILABLE:  # Se matplotlib disponibile
+        if load_matplotlib():  # Se matplotlib disponibile (importato qui la prima volta)
             self.create_rating_distribution_chart(ratings_data)  # Crea grafico
         else:
             self.create_rating_distribution_text(ratings_data)  # Altrimenti mostra testo
 
     def create_rating_distribution_chart(self, ratings_data):  # Metodo che crea il grafico distribuzione rating
+        plt, FigureCanvasTkAgg = load_matplotlib()  # Moduli già caricati da load_detailed_ratings
         try:
             # Crea figura matplotlib
             fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 5))
@@ -417,7 +484,7 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
                 if count > 0:
                     ax1.text(bar.get_x() + bar.get_width()/2, bar.get_height() + 0.1, 
                             str(count), ha='center', va='bottom', fontweight='bold')
-        """""
+            
             # Grafico a torta riepilogo rating
             non_zero_ratings = [(i, count) for i, count in enumerate(counts, 1) if count > 0]
             if non_zero_ratings:
@@ -447,7 +514,6 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
             
             # Aggiungi statistiche sotto il grafico
             self.create_rating_statistics_text(ratings_data)
-            """
             
         except Exception as e:
             print(f"Error creating chart: {e}")
@@ -565,29 +631,38 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
         negative_label.pack(anchor='w', pady=1)
 
     def register_for_activity(self):  # Metodo per registrare lo studente all'attività
-        # Implementazione per registrare lo studente all'attività
-        from PythonExpenseApp.db_connection import DbConnection  # Importa la connessione al DB
+        # Stessa transazione dell'iscrizione dal modulo attività (controlli, posti, ritentativi)
+        from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI  # Iscrizione senza Tk
         
-        connection = DbConnection.connect()  # Ottiene la connessione
-        if not connection:  # Se non riesce a connettersi
-            messagebox.showerror("Error", "Could not connect to database")  # Mostra errore
+        student_id, activity_id = self.student.id, self.activity_id  # Studente e attività correnti
+        worker = BackgroundWorker.for_root(self.root)  # Esecutore in background della finestra
+        if worker.is_busy((id(self), 'register')):  # Registrazione già in corso: ignora il doppio clic
             return
-        
-        try:
-            cursor = connection.cursor()  # Ottiene il cursore
-            cursor.execute("INSERT INTO student_activities (student_id, activity_id) VALUES (%s, %s)",
-                          (self.student.id, self.activity_id))  # Inserisce la registrazione
-            connection.commit()  # Conferma la transazione
+        worker.submit(
+            (id(self), 'register'),  # Chiave della richiesta
+            lambda: ActivityFormGUI.enroll(student_id, activity_id),  # Transazione fuori dal thread Tk
+            on_success=self._on_registered,  # Mostra l'esito
+            on_error=lambda e: messagebox.showerror("Error", f"Could not register for activity: {e}"))  # Mostra errore
+
+    def _on_registered(self, result):  # Esito della registrazione (thread Tk)
+        success, status, message = result  # Esito di ActivityFormGUI.enroll
+        if success:
             messagebox.showinfo("Success", "Successfully registered for activity!")  # Mostra successo
             self.load_activity_details()  # Aggiorna i dati
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not register for activity: {e}")  # Mostra errore
-        finally:
-            connection.close()  # Chiude la connessione
+        else:
+            messagebox.showerror("Error", f"Could not register for activity: {message}")  # Mostra errore
 
     def show_feedback_form(self):  # Metodo che mostra il modulo per lasciare feedback
-        # Valida permesso prima di mostrare il modulo
-        can_feedback, message = self.activity.can_student_leave_feedback(self.student.id)  # Controlla permesso
+        # Valida permesso prima di mostrare il modulo (controllo eseguito in background)
+        student_id = self.student.id  # ID dello studente corrente
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'feedback_permission'),  # Chiave della richiesta
+            lambda: self.activity.can_student_leave_feedback(student_id),  # Controlla permesso
+            on_success=self._open_feedback_form,  # Apre il modulo se permesso
+            on_error=lambda e: messagebox.showerror("Error", f"Could not check feedback permission: {e}"))  # Mostra errore
+
+    def _open_feedback_form(self, permission):  # Crea il modulo feedback (thread Tk)
+        can_feedback, message = permission  # Risultato di can_student_leave_feedback
         if not can_feedback:  # Se non può lasciare feedback
             messagebox.showerror("Cannot Leave Feedback", message)  # Mostra errore
             return
@@ -755,7 +830,7 @@ class ActivityDetailsGUI:  # Definisce la classe principale per la finestra dei
             summary_content = tk.Frame(summary_frame, bg='#e0f2fe')
             summary_content.pack(fill=tk.X, padx=15, pady=10)
             
-            total_participants = self.activity.get_current_participants()  # Numero totale partecipanti
+            total_participants = self.current_participants  # Numero totale partecipanti (già caricato)
             feedback_count = len(feedback_data)  # Numero feedback
             completion_rate = (feedback_count / total_participants * 100) if total_participants > 0 else 0  # Percentuale
             
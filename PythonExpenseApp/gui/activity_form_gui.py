@@ -1,8 +1,10 @@
 import tkinter as tk  # Importa la libreria base per la GUI
 from tkinter import messagebox  # Importa le finestre di messaggio standard di Tkinter
-from PIL import Image, ImageTk, ImageDraw, ImageFilter  # Importa PIL per la gestione delle immagini (non usato qui)
 from PythonExpenseApp.db_connection import DbConnection  # Importa la classe per la connessione al database
-import mysql.connector  # Importa il connettore MySQL (potrebbe non essere necessario se usi solo DbConnection)
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Esegue le query fuori dal thread Tk
+from PythonExpenseApp.gui.view_router import ViewRouter  # Notifica le altre schermate dei dati cambiati
+from PythonExpenseApp.gui.session_cache import SessionCache  # Dati precaricati dopo il login
+from PythonExpenseApp.service_client import ServiceClient  # Trasporto opzionale verso il servizio (thin client)
 
 class ActivityFormGUI:
     """
@@ -20,9 +22,10 @@ class ActivityFormGUI:
         self.root = root  # Salva la finestra principale
         self.student = student  # Salva l'oggetto studente
         self.main_callback = main_callback  # Callback per tornare alla dashboard principale
-        self.root.title("Activity Subscription")  # Imposta il titolo della finestra
-        self.root.geometry("1000x700")  # Imposta la dimensione della finestra
-        self.root.resizable(True, True)  # Rende la finestra ridimensionabile
+        self.window = root.winfo_toplevel()  # Finestra che contiene la GUI (root può essere un frame del ViewRouter)
+        self.window.title("Activity Subscription")  # Imposta il titolo della finestra
+        self.window.geometry("1000x700")  # Imposta la dimensione della finestra
+        self.window.resizable(True, True)  # Rende la finestra ridimensionabile
         self.root.configure(bg='#f8fafc')  # Imposta il colore di sfondo
         
         # Main container
@@ -67,12 +70,13 @@ class ActivityFormGUI:
         content_frame.grid_columnconfigure(0, weight=2)  # Prima colonna più larga
         content_frame.grid_columnconfigure(1, weight=1)  # Seconda colonna
         content_frame.grid_rowconfigure(0, weight=1)  # Riga espandibile
+        content_frame.grid_rowconfigure(1, weight=1)  # Riga dei consigli
         
         # Activities section
         activities_section = tk.LabelFrame(content_frame, text="Available Activities",  # Crea un frame con bordo e titolo
                                           font=("Segoe UI", 16, "bold"), bg="#ffffff", 
                                           fg="#1e293b", relief='solid', bd=2)
-        activities_section.grid(row=0, column=0, sticky="nsew", padx=(0, 10), pady=10)  # Posiziona il frame
+        activities_section.grid(row=0, column=0, rowspan=2, sticky="nsew", padx=(0, 10), pady=10)  # Posiziona il frame
         
         # Activities list container
         list_container = tk.Frame(activities_section, bg="#ffffff")  # Crea un frame per la lista
@@ -85,7 +89,8 @@ class ActivityFormGUI:
         self.activity_listbox = tk.Listbox(list_container, font=("Segoe UI", 11), bg="#ffffff",  # Crea la listbox delle attività
                                           fg="#374151", relief='solid', bd=1,
                                           yscrollcommand=activities_scrollbar.set,
-                                          selectbackground="#dbeafe", selectforeground="#1e40af")
+                                          selectbackground="#dbeafe", selectforeground="#1e40af",
+                                          exportselection=False)  # Mantiene la selezione quando si usa la lista dei consigli
         self.activity_listbox.pack(fill=tk.BOTH, expand=True)  # Posiziona la listbox
         activities_scrollbar.config(command=self.activity_listbox.yview)  # Collega la scrollbar
         
@@ -131,6 +136,20 @@ class ActivityFormGUI:
                                command=self.view_activity_details)
         details_btn.pack(fill=tk.X, pady=10, ipady=12)  # Posiziona il pulsante
         
+        # Recommended section
+        recommended_section = tk.LabelFrame(content_frame, text="⭐ Recommended for you",  # Frame dei consigli
+                                           font=("Segoe UI", 16, "bold"), bg="#ffffff",
+                                           fg="#1e293b", relief='solid', bd=2)
+        recommended_section.grid(row=1, column=1, sticky="nsew", padx=(10, 0), pady=10)  # Posiziona il frame
+        
+        self.recommended_listbox = tk.Listbox(recommended_section, font=("Segoe UI", 10), bg="#ffffff",  # Lista dei consigli
+                                             fg="#374151", relief='solid', bd=1, height=6,
+                                             selectbackground="#fef3c7", selectforeground="#92400e",
+                                             exportselection=False)
+        self.recommended_listbox.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)  # Posiziona la listbox
+        self.recommended_listbox.bind("<<ListboxSelect>>", self.on_recommendation_select)  # Seleziona l'attività nella lista
+        self.recommended_listbox.bind("<Double-Button-1>", lambda e: self.subscribe_to_activity())  # Doppio clic: iscrizione
+        
         # Feedback area
         feedback_frame = tk.Frame(main_container, bg='#ffffff', height=40)  # Frame per messaggi di feedback
         feedback_frame.pack(fill=tk.X, padx=30, pady=(0, 20))  # Posiziona il frame
@@ -144,83 +163,190 @@ class ActivityFormGUI:
         self.activities = []  # Lista delle attività caricate
         self.activity_ids = []  # Lista degli ID delle attività
         self.activity_days = []  # Lista di tuple (giorno, inizio, fine)
+        self.activity_rows = []  # Righe (attività, iscritti) mostrate nella listbox
+        self.recommended_ids = []  # ID delle attività consigliate
         self.load_activities()  # Carica le attività dal database
+        self.load_recommendations()  # Carica i consigli per lo studente
+
+    def refresh_data(self):
+        """
+        Ricarica le attività e i consigli (chiamato dal ViewRouter quando la schermata torna visibile con dati vecchi).
+        """
+        self.load_activities()
+        self.load_recommendations()
 
     def load_activities(self):
-        """Carica tutte le attività disponibili dal database"""
+        """Carica tutte le attività disponibili (dalla cache della sessione, poi riverificate in background)"""
+        SessionCache.for_root(self.root).load(
+            'activities',  # Catalogo precaricato dopo il login (ActivityFormGUI.fetch_activities)
+            request_key=(id(self), 'activities'),  # Refresh ripetuti vengono accorpati
+            on_success=self._render_activities,  # Popola la listbox
+            on_error=self._on_load_error,  # Mostra errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    @staticmethod
+    def fetch_activities():
+        """
+        Legge tutte le attività con il numero attuale di iscritti.
+        Eseguito su un thread di lavoro: nessuna chiamata a Tkinter.
+        Restituisce una lista di tuple (attività, iscritti).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('activity_form.activities')
+        connection = DbConnection.connect()  # Ottiene la connessione al database
+        if not connection:  # Se la connessione non è riuscita
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
+        try:
+            cursor = connection.cursor()  # Ottiene il cursore
+            # Attività e iscritti in una sola query (non una COUNT per attività)
+            cursor.execute("""SELECT a.id, a.name, a.day, a.start_time, a.finish_time, a.location,
+                            a.max_participants, COUNT(sa.id)
+                            FROM activities a
+                            LEFT JOIN student_activities sa ON sa.activity_id = a.id
+                            GROUP BY a.id, a.name, a.day, a.start_time, a.finish_time, a.location, a.max_participants
+                            ORDER BY a.day, a.start_time""")  # Query attività
+            return [(tuple(row[:7]), row[7]) for row in cursor.fetchall()]  # Lista di tuple (attività, iscritti)
+        finally:
+            connection.close()  # Chiude la connessione
+
+    def _render_activities(self, rows):
+        """Mostra nella listbox le attività restituite da fetch_activities"""
+        self.activity_rows = [(tuple(activity), count) for activity, count in rows]  # Per gli aggiornamenti locali
         self.activity_listbox.delete(0, tk.END)  # Svuota la listbox
         self.activities = []  # Svuota la lista delle attività
         self.activity_ids = []  # Svuota la lista degli ID
         self.activity_days = []  # Svuota la lista dei giorni
         
-        connection = DbConnection.connect()  # Ottiene la connessione al database
-        if connection:  # Se la connessione è riuscita
-            try:
-                cursor = connection.cursor()  # Ottiene il cursore
-                cursor.execute("""SELECT id, name, day, start_time, finish_time, location, 
-                                max_participants FROM activities ORDER BY day, start_time""")  # Query attività
-                activities = cursor.fetchall()  # Ottiene tutte le attività
-                
-                for activity in activities:  # Cicla su ogni attività
-                    id, name, day, start, finish, location, max_part = activity  # Estrae i dati
-                    
-                    # Ottieni il numero attuale di iscritti
-                    cursor.execute("SELECT COUNT(*) FROM student_activities WHERE activity_id=%s", (id,))
-                    current_count = cursor.fetchone()[0]
-                    
-                    # Formatta il testo da mostrare
-                    if max_part is not None:
-                        status = f"({current_count}/{max_part})"  # Mostra iscritti/max
-                        full = current_count >= max_part  # True se pieno
-                    else:
-                        status = f"({current_count})"  # Solo iscritti
-                        full = False
-                    start_str = normalize_time(start)  # Formatta orario inizio
-                    finish_str = normalize_time(finish)  # Formatta orario fine
-                    display_text = f"📅 {day} | ⏰ {start_str}-{finish_str}"  # Riga giorno/orario
-                    display_text += f"\n🎯 {name} @ {location} {status}"  # Riga nome/luogo
-                    display_text += f"\n{'🔴 FULL' if full else '🟢 Available'}"  # Stato
-                    
-                    self.activity_listbox.insert(tk.END, display_text)  # Inserisce il testo nella listbox
-                    self.activity_listbox.insert(tk.END, "")  # Riga vuota come separatore
-                    
-                    self.activities.append(activity)  # Salva l'attività
-                    self.activity_ids.append(id)  # Salva l'ID
-                    self.activity_days.append((day, start, finish))  # Salva giorno e orari
-                    
-                connection.close()  # Chiude la connessione
-            except Exception as e:
-                self.feedback_label.config(text=f"Error loading activities: {e}", fg="#dc2626")  # Mostra errore
+        for activity, current_count in rows:  # Cicla su ogni attività
+            id, name, day, start, finish, location, max_part = activity  # Estrae i dati
+            
+            # Formatta il testo da mostrare
+            if max_part is not None:
+                status = f"({current_count}/{max_part})"  # Mostra iscritti/max
+                full = current_count >= max_part  # True se pieno
+            else:
+                status = f"({current_count})"  # Solo iscritti
+                full = False
+            start_str = normalize_time(start)  # Formatta orario inizio
+            finish_str = normalize_time(finish)  # Formatta orario fine
+            display_text = f"📅 {day} | ⏰ {start_str}-{finish_str}"  # Riga giorno/orario
+            display_text += f"\n🎯 {name} @ {location} {status}"  # Riga nome/luogo
+            display_text += f"\n{'🔴 FULL' if full else '🟢 Available'}"  # Stato
+            
+            self.activity_listbox.insert(tk.END, display_text)  # Inserisce il testo nella listbox
+            self.activity_listbox.insert(tk.END, "")  # Riga vuota come separatore
+            
+            self.activities.append(activity)  # Salva l'attività
+            self.activity_ids.append(id)  # Salva l'ID
+            self.activity_days.append((day, start, finish))  # Salva giorno e orari
+
+    def load_recommendations(self):
+        """Carica le attività consigliate allo studente (in background)"""
+        student_id = self.student.id  # ID dello studente corrente
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'recommendations'),  # Refresh ripetuti vengono accorpati
+            lambda: ActivityFormGUI.fetch_recommendations(student_id),  # Query eseguita fuori dal thread Tk
+            on_success=self._render_recommendations,  # Popola la lista dei consigli
+            on_error=lambda e: self._render_recommendations([]))  # I consigli sono facoltativi: lista vuota
+
+    @staticmethod
+    def fetch_recommendations(student_id, limit=10):
+        """
+        Legge le attività consigliate allo studente: simili a quelle scelte, non piene
+        e senza sovrapposizioni di orario (una sola query, vedi ActivityRecommender).
+        Eseguito su un thread di lavoro: nessuna chiamata a Tkinter.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('activity_form.recommendations', student_id=student_id, limit=limit)
+        from PythonExpenseApp.recommendations import ActivityRecommender  # Motore dei consigli
+        success, rows = ActivityRecommender.recommend(student_id, limit)
+        if not success:
+            raise RuntimeError(rows)  # Gestito da on_error sul thread Tk
+        return rows
+
+    def _render_recommendations(self, rows):
+        """Mostra nella lista le attività restituite da fetch_recommendations"""
+        self.recommended_listbox.delete(0, tk.END)  # Svuota la lista
+        self.recommended_ids = []  # Svuota la lista degli ID
+        for id, name, day, start, finish, location, max_part, score, enrolled in rows:  # Cicla sui consigli
+            status = f"({enrolled}/{max_part})" if max_part is not None else f"({enrolled})"  # Posti occupati
+            self.recommended_listbox.insert(
+                tk.END, f"⭐ {name} | {day} {normalize_time(start)}-{normalize_time(finish)} {status}")
+            self.recommended_ids.append(id)  # Salva l'ID
+        if not rows:
+            self.recommended_listbox.insert(tk.END, "Subscribe to activities to get suggestions")  # Nessun consiglio
+
+    def on_recommendation_select(self, event=None):
+        """Seleziona nella lista principale l'attività scelta tra i consigli"""
+        selection = self.recommended_listbox.curselection()  # Selezione nella lista dei consigli
+        if not selection or selection[0] >= len(self.recommended_ids):  # Riga informativa o nulla selezionato
+            return
+        activity_id = self.recommended_ids[selection[0]]  # ID dell'attività consigliata
+        if activity_id not in self.activity_ids:  # Lista principale non ancora caricata
+            return
+        index = self.activity_ids.index(activity_id) * 2  # Ogni attività occupa due righe
+        self.activity_listbox.selection_clear(0, tk.END)  # Deseleziona le altre attività
+        self.activity_listbox.selection_set(index)  # Seleziona l'attività consigliata
+        self.activity_listbox.see(index)  # La rende visibile
+
+    def _on_load_error(self, error):
+        """Mostra un errore di caricamento nella label di feedback"""
+        if isinstance(error, ConnectionError):
+            self.feedback_label.config(text=str(error), fg="#dc2626")  # Errore connessione
         else:
-            self.feedback_label.config(text="Could not connect to database", fg="#dc2626")  # Errore connessione
+            self.feedback_label.config(text=f"Error loading activities: {error}", fg="#dc2626")  # Mostra errore
+
+    def _set_loading(self, is_loading):
+        """Mostra o nasconde l'indicatore di caricamento"""
+        if is_loading:
+            self.feedback_label.config(text="⏳ Loading activities...", fg="#64748b")  # Caricamento in corso
+        elif self.feedback_label.cget("text").startswith("⏳"):
+            self.feedback_label.config(text="")  # Rimuove l'indicatore senza cancellare altri messaggi
 
     def view_subscriptions(self):
         """Mostra le iscrizioni correnti dello studente"""
+        student_id = self.student.id  # ID dello studente corrente
+        SessionCache.for_root(self.root).load(
+            'subscriptions', student_id,  # Precaricate dopo il login (ActivityFormGUI.fetch_subscriptions)
+            request_key=(id(self), 'subscriptions'),  # Chiave della richiesta
+            stale_ok=False,  # Una sola finestra di messaggio: mai con dati vecchi
+            on_success=self._show_subscriptions,  # Mostra le iscrizioni
+            on_error=lambda e: messagebox.showerror("Error", f"Could not load subscriptions: {e}"))  # Mostra errore
+
+    @staticmethod
+    def fetch_subscriptions(student_id):
+        """Legge le iscrizioni dello studente (thread di lavoro, nessuna chiamata a Tkinter)"""
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('activity_form.subscriptions', student_id=student_id)
         connection = DbConnection.connect()  # Ottiene la connessione al database
-        if connection:
-            try:
-                cursor = connection.cursor()  # Ottiene il cursore
-                cursor.execute("""SELECT a.name, a.day, a.start_time, a.finish_time, a.location
-                                FROM student_activities sa 
-                                JOIN activities a ON sa.activity_id = a.id 
-                                WHERE sa.student_id = %s 
-                                ORDER BY a.day, a.start_time""", (self.student.id,))  # Query iscrizioni
-                subscriptions = cursor.fetchall()  # Ottiene tutte le iscrizioni
-                
-                if subscriptions:  # Se ci sono iscrizioni
-                    msg = "Your Current Activities:\n\n"  # Testo iniziale
-                    for name, day, start, finish, location in subscriptions:  # Cicla sulle iscrizioni
-                        start_str = normalize_time(start)  # Formatta orario inizio
-                        finish_str = normalize_time(finish)  # Formatta orario fine
-                        msg += f"📅 {day} | ⏰ {start_str}-{finish_str}\n"  # Riga giorno/orario
-                        msg += f"🎯 {name} @ {location}\n\n"  # Riga nome/luogo
-                    messagebox.showinfo("My Activities", msg)  # Mostra le iscrizioni
-                else:
-                    messagebox.showinfo("My Activities", "You are not subscribed to any activities yet.")  # Nessuna iscrizione
-                    
-                connection.close()  # Chiude la connessione
-            except Exception as e:
-                messagebox.showerror("Error", f"Could not load subscriptions: {e}")  # Mostra errore
+        if not connection:
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
+        try:
+            cursor = connection.cursor()  # Ottiene il cursore
+            cursor.execute("""SELECT a.name, a.day, a.start_time, a.finish_time, a.location
+                            FROM student_activities sa 
+                            JOIN activities a ON sa.activity_id = a.id 
+                            WHERE sa.student_id = %s 
+                            ORDER BY a.day, a.start_time""", (student_id,))  # Query iscrizioni
+            return cursor.fetchall()  # Ottiene tutte le iscrizioni
+        finally:
+            connection.close()  # Chiude la connessione
+
+    def _show_subscriptions(self, subscriptions):
+        """Mostra in una finestra di messaggio le iscrizioni caricate"""
+        if subscriptions:  # Se ci sono iscrizioni
+            msg = "Your Current Activities:\n\n"  # Testo iniziale
+            for name, day, start, finish, location in subscriptions:  # Cicla sulle iscrizioni
+                start_str = normalize_time(start)  # Formatta orario inizio
+                finish_str = normalize_time(finish)  # Formatta orario fine
+                msg += f"📅 {day} | ⏰ {start_str}-{finish_str}\n"  # Riga giorno/orario
+                msg += f"🎯 {name} @ {location}\n\n"  # Riga nome/luogo
+            messagebox.showinfo("My Activities", msg)  # Mostra le iscrizioni
+        else:
+            messagebox.showinfo("My Activities", "You are not subscribed to any activities yet.")  # Nessuna iscrizione
 
     def subscribe_to_activity(self):
         """Iscrive lo studente all'attività selezionata"""
@@ -238,61 +364,62 @@ class ActivityFormGUI:
             return
             
         activity_id = self.activity_ids[activity_index]  # Ottieni l'ID dell'attività
-        day, start_time, finish_time = self.activity_days[activity_index]  # Ottieni giorno e orari
-        
-        connection = DbConnection.connect()  # Ottieni la connessione al database
-        if not connection:
-            messagebox.showerror("Database Error", "Could not connect to the database.")  # Mostra errore
+        student_id = self.student.id  # ID dello studente corrente
+        worker = BackgroundWorker.for_root(self.root)  # Esecutore in background della finestra
+        if worker.is_busy((id(self), 'subscribe')):  # Iscrizione già in corso: ignora il doppio clic
             return
+        worker.submit(
+            (id(self), 'subscribe'),  # Chiave della richiesta
+            lambda: ActivityFormGUI.enroll(student_id, activity_id),  # Transazione fuori dal thread Tk (può essere ritentata)
+            on_success=lambda result: self._on_subscribe_result(result, activity_id),  # Mostra l'esito
+            on_error=lambda e: messagebox.showerror("Error", f"Could not subscribe: {e}"))  # Mostra errore
 
-        try:
-            cursor = connection.cursor()  # Ottieni il cursore
-            
-            # Controlla conflitti di orario
-            cursor.execute("""SELECT a.name, a.start_time, a.finish_time FROM student_activities sa
-                            JOIN activities a ON sa.activity_id = a.id
-                            WHERE sa.student_id=%s AND a.day=%s""", (self.student.id, day))
-            
-            for row in cursor.fetchall():  # Cicla sulle attività già iscritte nello stesso giorno
-                existing_start, existing_finish = row[1], row[2]
-                if not (finish_time <= existing_start or start_time >= existing_finish):  # Se c'è sovrapposizione
-                    messagebox.showerror("Time Conflict", 
-                                       f"You are already subscribed to '{row[0]}' at this time.")  # Mostra errore
-                    return
-            
-            # Controlla se già iscritto
-            cursor.execute("SELECT id FROM student_activities WHERE student_id=%s AND activity_id=%s", 
-                          (self.student.id, activity_id))
-            if cursor.fetchone():
-                messagebox.showinfo("Already Subscribed", "You are already subscribed to this activity.")  # Già iscritto
-                return
-            
-            # Controlla se l'attività è piena
-            cursor.execute("SELECT COUNT(*) FROM student_activities WHERE activity_id=%s", (activity_id,))
-            count = cursor.fetchone()[0]
-            cursor.execute("SELECT max_participants FROM activities WHERE id=%s", (activity_id,))
-            max_part = cursor.fetchone()[0]
-            
-            # Controlla se piena
-            if max_part is not None and count >= max_part:
-                messagebox.showerror("Full", "This activity is already full.")  # Mostra errore
-                return
-            
-            # Iscrivi lo studente
-            cursor.execute("INSERT INTO student_activities (student_id, activity_id) VALUES (%s, %s)", 
-                          (self.student.id, activity_id))
-            connection.commit()  # Conferma la transazione
-            
+    @staticmethod
+    def enroll(student_id, activity_id):
+        """
+        Iscrive lo studente all'attività (senza Tk: eseguito dal BackgroundWorker).
+        Returns:
+            tuple: (success, status, message), vedi Activity.enroll_student.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la transazione viene eseguita dal servizio
+            return client.call('activity_form.subscribe', student_id=student_id, activity_id=activity_id)
+        from PythonExpenseApp.activity import Activity  # Modello con la transazione di iscrizione
+        return Activity.enroll_student(student_id, activity_id)
+
+    def _on_subscribe_result(self, result, activity_id=None):
+        """Mostra l'esito dell'iscrizione (thread Tk)"""
+        success, status, message = result  # Esito di enroll
+        if success:
             self.feedback_label.config(text="Successfully subscribed to activity!", fg="#059669")  # Messaggio feedback
-            messagebox.showinfo("Success", "You have been subscribed to the activity.")  # Mostra successo
-            
-            # Aggiorna la lista per mostrare i nuovi conteggi
+            messagebox.showinfo("Success", message)  # Mostra successo
+            ViewRouter.notify_changed(self.root, 'enrollments')  # Le altre schermate aggiorneranno i conteggi
+            self._count_subscription(activity_id)  # Aggiorna il conteggio senza rileggere tutte le attività
+            self.load_recommendations()  # I consigli dipendono dalle iscrizioni
+        elif status == 'conflict':
+            messagebox.showerror("Time Conflict", message)  # Sovrapposizione di orario
+        elif status == 'already_subscribed':
+            messagebox.showinfo("Already Subscribed", message)  # Già iscritto
+        elif status == 'full':
+            messagebox.showerror("Full", message)  # Attività piena
+        else:
+            messagebox.showerror("Error", message)  # Attività inesistente o errore del database
+
+    def _count_subscription(self, activity_id):
+        """Aggiunge l'iscrizione al conteggio dell'attività nella lista (thread Tk)"""
+        if activity_id not in self.activity_ids:  # Lista non caricata: rilegge tutto
             self.load_activities()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not subscribe: {e}")  # Mostra errore
-        finally:
-            connection.close()  # Chiude la connessione
+            return
+        index = self.activity_ids.index(activity_id)  # Posizione dell'attività
+        rows = list(self.activity_rows)  # Copia delle righe mostrate
+        activity, count = rows[index]
+        rows[index] = (activity, count + 1)  # Un iscritto in più
+        top = self.activity_listbox.yview()[0]  # Posizione di scorrimento
+        selection = self.activity_listbox.curselection()  # Selezione corrente
+        self._render_activities(rows)  # Ridisegna la lista con il nuovo conteggio
+        self.activity_listbox.yview_moveto(top)  # Ripristina lo scorrimento
+        for selected in selection:
+            self.activity_listbox.selection_set(selected)  # Ripristina la selezione
 
     def view_activity_details(self):  # Metodo che mostra i dettagli dell'attività selezionata
         """Mostra i dettagli dell'attività selezionata"""
@@ -317,8 +444,7 @@ class ActivityFormGUI:
         ActivityDetailsGUI(details_window, activity_id, self.student)  # Mostra i dettagli dell'attività nella nuova finestra
 
     def go_back_to_main(self):  # Metodo per tornare alla dashboard principale
-        """Chiude questa finestra e torna alla dashboard principale"""
-        self.root.destroy()  # Chiude la finestra corrente
+        """Torna alla dashboard principale (la navigazione è gestita dalla callback)"""
         if self.main_callback:  # Se è stata fornita una callback
             self.main_callback()  # Chiama la callback per tornare indietro
 
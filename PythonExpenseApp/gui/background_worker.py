@@ -0,0 +1,343 @@
+# ===================================================================
+# BACKGROUND WORKER - OFF-MAIN-THREAD DATA LOADING FOR TKINTER GUIS
+# ===================================================================
+# Tkinter is single threaded: every widget call must happen on the thread
+# that runs mainloop(). Database queries executed there freeze the window
+# until they return. This module moves the slow part (the query) onto a
+# shared thread pool and hands the result back to the Tk thread through a
+# queue that is drained with root.after().
+#
+# KEY RESPONSIBILITIES:
+# 1. Shared thread pool used by every window of the application
+# 2. Result queue drained on the Tk thread (widgets are never touched
+#    from worker threads)
+# 3. Cancellation of stale requests (a newer request with the same key
+#    makes older results irrelevant)
+# 4. Coalescing of repeated refreshes (at most one running + one queued
+#    request per key)
+# 5. Loading indicators through an optional on_loading(bool) callback
+# 6. Debouncing of bursts of UI events (Debouncer, e.g. search boxes)
+# ===================================================================
+
+import itertools  # Generation counter for requests
+import logging  # Logging of unhandled background errors
+import queue  # Thread-safe queue between workers and the Tk thread
+import threading  # Lock for lazy executor creation
+from concurrent.futures import ThreadPoolExecutor  # Shared thread pool
+
+import tkinter as tk  # Only needed for TclError
+
+
+class _Request:
+    """
+    A single unit of background work submitted to a BackgroundWorker.
+
+    ATTRIBUTES:
+        key (hashable): Logical identity of the request (e.g. (id(view), 'debts'))
+        generation (int): Monotonic number used to detect stale results
+        task (callable): Function executed on the worker thread, no Tk calls allowed
+        on_success (callable): Called on the Tk thread with the task result
+        on_error (callable): Called on the Tk thread with the raised exception
+        on_loading (callable): Called on the Tk thread with True/False
+    """
+
+    __slots__ = ('key', 'generation', 'task', 'on_success', 'on_error', 'on_loading')
+
+    def __init__(self, key, generation, task, on_success, on_error, on_loading):
+        self.key = key
+        self.generation = generation
+        self.task = task
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_loading = on_loading
+
+
+class BackgroundWorker:
+    """
+    Runs blocking work (database queries) off the Tk thread and delivers the
+    results back on the Tk thread.
+
+    One BackgroundWorker exists per top-level window (see for_root), while the
+    underlying thread pool is shared by the whole application.
+
+    USAGE:
+        worker = BackgroundWorker.for_root(self.root)
+        worker.submit((id(self), 'debts'),
+                      lambda: ExpenseGUI.fetch_debts(student_id),
+                      on_success=self.render_debts,
+                      on_loading=self.set_loading)
+    """
+
+    # Maximum number of concurrent worker threads (shared by all windows)
+    MAX_WORKERS = 4
+    # How often (ms) the result queue is drained while requests are running
+    POLL_INTERVAL_MS = 30
+
+    # Shared thread pool, created lazily on first use
+    _executor = None
+    # Lock protecting the lazy executor creation
+    _executor_lock = threading.Lock()
+    # Counter used to number requests (shared so numbers never repeat)
+    _generation_counter = itertools.count(1)
+
+    def __init__(self, root):
+        """
+        Initialize a worker bound to a Tk window.
+
+        :param root: tk.Tk or tk.Toplevel - The window whose event loop receives the results.
+        """
+        self.root = root  # Window that owns this worker
+        self._results = queue.Queue()  # (request, ok, payload) tuples coming from worker threads
+        self._latest = {}  # key -> generation of the most recent submit (older results are stale)
+        self._running = {}  # key -> request currently executing on the pool
+        self._pending = {}  # key -> request waiting for the running one to finish (coalesced)
+        self._after_id = None  # Identifier of the scheduled drain callback
+        self._closed = False  # True once the window has been destroyed
+
+        # Stop delivering results once the window is gone
+        self.root.bind('<Destroy>', self._on_destroy, add='+')
+
+    @classmethod
+    def get_executor(cls):
+        """
+        Return the application-wide thread pool, creating it on first use.
+
+        :return: ThreadPoolExecutor
+        """
+        if cls._executor is None:
+            with cls._executor_lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(max_workers=cls.MAX_WORKERS,
+                                                       thread_name_prefix='trip-manager-worker')
+        return cls._executor
+
+    @classmethod
+    def for_root(cls, widget):
+        """
+        Return the BackgroundWorker of the window containing the given widget,
+        creating it if needed. Every view living in the same window shares it.
+
+        :param widget: Any Tk widget (the worker is attached to its top-level window).
+        :return: BackgroundWorker
+        """
+        window = widget.winfo_toplevel()
+        worker = getattr(window, '_background_worker', None)
+        if worker is None or worker._closed:
+            worker = cls(window)
+            window._background_worker = worker
+        return worker
+
+    def submit(self, key, task, on_success=None, on_error=None, on_loading=None):
+        """
+        Schedule a task on the shared pool.
+
+        If a request with the same key is already running, the new request is
+        queued behind it (replacing any request already queued) and the result
+        of the running one is discarded as stale. Repeated refreshes therefore
+        collapse into at most one extra query.
+
+        :param key: hashable - Logical identity of the request.
+        :param task: callable - Executed on a worker thread; must not touch Tk widgets.
+        :param on_success: callable(result), optional - Executed on the Tk thread.
+        :param on_error: callable(exception), optional - Executed on the Tk thread.
+        :param on_loading: callable(bool), optional - Loading indicator hook.
+        :return: int - Generation number of the request.
+        """
+        if self._closed:
+            return None
+
+        generation = next(self._generation_counter)
+        self._latest[key] = generation
+        request = _Request(key, generation, task, on_success, on_error, on_loading)
+
+        if key in self._running:
+            # Coalesce: run once more when the current request finishes
+            self._pending[key] = request
+        else:
+            self._start(request)
+        return generation
+
+    def cancel(self, key):
+        """
+        Cancel a request: its result (if any) is dropped and any queued
+        follow-up is discarded.
+
+        :param key: hashable - Key used in submit().
+        :return: None
+        """
+        self._latest.pop(key, None)
+        self._pending.pop(key, None)
+        running = self._running.get(key)
+        if running is not None:
+            self._notify_loading(running, False)
+
+    def cancel_all(self):
+        """
+        Cancel every running and queued request of this worker.
+
+        :return: None
+        """
+        for key in list(self._running) + list(self._pending):
+            self.cancel(key)
+
+    def is_busy(self, key=None):
+        """
+        Check whether requests are running.
+
+        :param key: hashable, optional - Restrict the check to one key.
+        :return: bool
+        """
+        if key is None:
+            return bool(self._running)
+        return key in self._running
+
+    def _start(self, request):
+        """Submit a request to the pool and make sure the queue is being drained."""
+        self._running[request.key] = request
+        self._notify_loading(request, True)
+        self.get_executor().submit(self._execute, request)
+        self._schedule_drain()
+
+    def _execute(self, request):
+        """Worker thread body: run the task and hand the outcome to the Tk thread."""
+        try:
+            result = request.task()
+        except Exception as e:  # Delivered to on_error on the Tk thread
+            self._results.put((request, False, e))
+        else:
+            self._results.put((request, True, result))
+
+    def _schedule_drain(self):
+        """Schedule the next drain of the result queue if not already scheduled."""
+        if self._after_id is None and not self._closed:
+            try:
+                self._after_id = self.root.after(self.POLL_INTERVAL_MS, self._drain)
+            except tk.TclError:
+                # The window is being destroyed
+                self._closed = True
+
+    def _drain(self):
+        """Tk thread: deliver every finished request, then reschedule if needed."""
+        self._after_id = None
+        if self._closed:
+            return
+
+        while True:
+            try:
+                request, ok, payload = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(request, ok, payload)
+            if self._closed:
+                return
+
+        if self._running:
+            self._schedule_drain()
+
+    def _finish(self, request, ok, payload):
+        """Tk thread: dispatch the outcome of a request and start its coalesced follow-up."""
+        if self._running.get(request.key) is request:
+            del self._running[request.key]
+
+        follow_up = self._pending.pop(request.key, None)
+        is_current = self._latest.get(request.key) == request.generation
+
+        if follow_up is not None:
+            self._start(follow_up)  # Loading indicator stays on
+        elif is_current:
+            self._notify_loading(request, False)
+
+        if not is_current:
+            return  # Stale or cancelled: drop the result
+
+        self._latest.pop(request.key, None)
+        try:
+            if ok:
+                if request.on_success:
+                    request.on_success(payload)
+            elif request.on_error:
+                request.on_error(payload)
+            else:
+                logging.error(f"Background task {request.key!r} failed: {payload}")
+        except tk.TclError as e:
+            # Widgets destroyed while the request was running
+            logging.warning(f"Could not deliver result of {request.key!r}: {e}")
+
+    def _notify_loading(self, request, is_loading):
+        """Invoke the loading indicator hook of a request, ignoring destroyed widgets."""
+        if request.on_loading:
+            try:
+                request.on_loading(is_loading)
+            except tk.TclError:
+                pass
+
+    def _on_destroy(self, event):
+        """Stop polling and drop every result once the window is destroyed."""
+        if event.widget is not self.root:
+            return  # <Destroy> also fires for every child widget
+        self._closed = True
+        self._running.clear()
+        self._pending.clear()
+        self._latest.clear()
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+
+class Debouncer:
+    """
+    Delays a callback until a burst of events is over.
+
+    Every call to trigger() restarts the timer, so while the user is typing
+    in a search box the callback runs once, DELAY_MS after the last key.
+
+    USAGE:
+        self.search_debouncer = Debouncer(self.root, self.apply_search)
+        entry.bind('<KeyRelease>', self.search_debouncer.trigger)
+    """
+
+    # Default quiet period (ms) before the callback runs
+    DELAY_MS = 150
+
+    def __init__(self, widget, callback, delay_ms=None):
+        """
+        Initialize the debouncer.
+
+        :param widget: Tk widget - Used to schedule the callback with after().
+        :param callback: callable() - Function to run once the events stop.
+        :param delay_ms: int, optional - Overrides DELAY_MS.
+        """
+        self.widget = widget
+        self.callback = callback
+        self.delay_ms = self.DELAY_MS if delay_ms is None else delay_ms
+        self._after_id = None
+
+    def trigger(self, *args):
+        """Restart the timer (accepts and ignores event/trace arguments)."""
+        self.cancel()
+        try:
+            self._after_id = self.widget.after(self.delay_ms, self._fire)
+        except tk.TclError:
+            self._after_id = None  # Widget destroyed
+
+    def flush(self):
+        """Run the pending callback immediately, if any."""
+        if self._after_id is not None:
+            self.cancel()
+            self.callback()
+
+    def cancel(self):
+        """Drop the pending callback, if any."""
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
+
+    def _fire(self):
+        self._after_id = None
+        self.callback()
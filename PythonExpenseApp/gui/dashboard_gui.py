@@ -1,29 +1,31 @@
 import tkinter as tk  # Importa la libreria base per la GUI
 from tkinter import messagebox  # Importa le finestre di messaggio standard di Tkinter
-from PIL import Image, ImageTk, ImageDraw, ImageFilter  # Importa PIL per la gestione delle immagini (non usato qui)
-from db_connection import DbConnection  # Importa la classe per la connessione al database
-from gui.expense_gui import ExpenseGUI  # Importa la GUI delle spese
-from gui.activity_form_gui import ActivityFormGUI  # Importa la GUI per le attività
-from gui.teacher_dashboard import TeacherDashboard  # Importa la dashboard insegnante
+from PythonExpenseApp.db_connection import DbConnection  # Importa la classe per la connessione al database
+from PythonExpenseApp.gui.session_cache import SessionCache  # Dati precaricati dopo il login
+from PythonExpenseApp.service_client import ServiceClient  # Trasporto opzionale verso il servizio (thin client)
 import datetime  # Importa il modulo datetime per gestire date e orari
 import sys  # Importa sys per l'uscita dal programma
 
 class DashboardGUI:  # Definisce la classe principale della dashboard
-    def __init__(self, root, student, expense_callback, activity_callback):  # Costruttore della dashboard
+    def __init__(self, root, student, expense_callback, activity_callback, admin_callback=None,
+                 sign_out_callback=None):  # Costruttore della dashboard
         self.root = root  # Salva la finestra principale
         self.student = student  # Oggetto studente (contiene anche il ruolo)
         self.expense_callback = expense_callback  # Callback per aprire la GUI delle spese
         self.activity_callback = activity_callback  # Callback per aprire la GUI delle attività
+        self.admin_callback = admin_callback  # Callback per aprire la dashboard insegnante (opzionale)
+        self.sign_out_callback = sign_out_callback  # Callback per uscire e tornare al login (opzionale)
         self.logged_in_student = student # Riferimento allo studente loggato
 
-        self.root.title("Trip Manager Dashboard")  # Imposta il titolo della finestra
-        self.root.geometry("1200x800")  # Imposta la dimensione della finestra
-        self.root.resizable(True, True)  # Rende la finestra ridimensionabile
+        self.window = root.winfo_toplevel()  # Finestra che contiene la dashboard (root può essere un frame del ViewRouter)
+        self.window.title("Trip Manager Dashboard")  # Imposta il titolo della finestra
+        self.window.geometry("1200x800")  # Imposta la dimensione della finestra
+        self.window.resizable(True, True)  # Rende la finestra ridimensionabile
         self.root.configure(bg='#f8fafc')  # Imposta il colore di sfondo
 
         # Prova a massimizzare la finestra su Windows
         try:
-            self.root.state('zoomed')  # Tenta di massimizzare la finestra (funziona su Windows)
+            self.window.state('zoomed')  # Tenta di massimizzare la finestra (funziona su Windows)
         except tk.TclError: # Se 'zoomed' non è disponibile (ad esempio su Linux)
             pass # Non fa nulla, la finestra resta della dimensione impostata
 
@@ -98,6 +100,13 @@ class DashboardGUI:  # Definisce la classe principale della dashboard
                                font=("Segoe UI", 10), bg="#e5e7eb", fg="#64748b")
         status_label.pack(side=tk.LEFT, padx=10, pady=5)  # Allinea a sinistra con padding
 
+        if self.sign_out_callback:  # Pulsante di uscita (dimentica anche la sessione salvata)
+            sign_out_btn = tk.Button(status_frame, text="Sign Out", font=("Segoe UI", 10, "bold"),
+                                     bg="#ef4444", fg="white", relief='flat', bd=0,
+                                     activebackground="#dc2626", cursor="hand2",
+                                     command=self.sign_out_callback)  # Torna alla schermata di login
+            sign_out_btn.pack(side=tk.RIGHT, padx=10, pady=3)  # Allinea a destra nella barra di stato
+
     def _create_action_button(self, parent, text, icon, description, command, bg_color="#3b82f6"):
         btn_frame = tk.Frame(parent, bg="#ffffff", relief='solid', bd=1)  # Crea un frame per il pulsante
         btn_frame.pack(fill=tk.X, padx=20, pady=15)
@@ -142,12 +151,12 @@ class DashboardGUI:  # Definisce la classe principale della dashboard
         # Pulsante per la gestione delle spese
         self._create_action_button(actions_frame, "Expense Tracker", "💰",
                                 "Track and manage all trip expenses",
-                                lambda: [self.root.destroy(), self.expense_callback()], "#3b82f6")
+                                self.open_expense_gui, "#3b82f6")
 
         # Pulsante per la gestione delle attività
         self._create_action_button(actions_frame, "Activity Manager", "🎯",
                                 "Subscribe to activities and manage schedule",
-                                lambda: [self.root.destroy(), self.activity_callback()], "#059669")
+                                self.open_activity_form, "#059669")
 
         # Se lo studente è un insegnante, mostra il pulsante admin
         if hasattr(self.student, 'role') and self.student.role == 'teacher':
@@ -156,7 +165,7 @@ class DashboardGUI:  # Definisce la classe principale della dashboard
                                      relief='flat', bd=0, activebackground="#7c3aed",
                                      cursor="hand2", command=self.open_teacher_admin_panel,
                                      width=20, height=2)
-            admin_button.grid(row=1, column=0, padx=10, pady=10, sticky="ew")
+            admin_button.pack(fill=tk.X, padx=20, pady=15)  # Stesso gestore di geometria (pack) degli altri pulsanti
 
     def _create_schedule_section(self, schedule_frame):
         # Contenitore per la lista orario
@@ -167,58 +176,78 @@ class DashboardGUI:  # Definisce la classe principale della dashboard
         schedule_scrollbar = tk.Scrollbar(schedule_container)
         schedule_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
-        schedule_list = tk.Listbox(schedule_container, font=("Segoe UI", 12), bg="#ffffff",
-                                  fg="#374151", relief='solid', bd=1,
-                                  yscrollcommand=schedule_scrollbar.set,
-                                  selectbackground="#dbeafe", selectforeground="#1e40af")
-        schedule_list.pack(fill=tk.BOTH, expand=True)
-        schedule_scrollbar.config(command=schedule_list.yview)
-
-        # Carica le attività del giorno corrente
+        self.schedule_list = tk.Listbox(schedule_container, font=("Segoe UI", 12), bg="#ffffff",
+                                        fg="#374151", relief='solid', bd=1,
+                                        yscrollcommand=schedule_scrollbar.set,
+                                        selectbackground="#dbeafe", selectforeground="#1e40af")
+        self.schedule_list.pack(fill=tk.BOTH, expand=True)
+        schedule_scrollbar.config(command=self.schedule_list.yview)
+
+        self.schedule_list.insert(tk.END, "⏳ Loading today's schedule...")
+        self.load_schedule()  # Carica le attività del giorno corrente
+
+    def load_schedule(self):
+        # Carica le attività del giorno corrente (precaricate dopo il login, poi riverificate in background)
+        SessionCache.for_root(self.root).load(
+            'today_schedule',
+            request_key=(id(self), 'schedule'),
+            on_success=lambda activities: self._render_schedule(self.schedule_list, activities),
+            on_error=lambda e: self._render_schedule(self.schedule_list, None))
+
+    def refresh_data(self):
+        # Chiamato dal ViewRouter quando la dashboard torna visibile con dati vecchi
+        self.load_schedule()
+
+    @staticmethod
+    def fetch_today_schedule():
+        # Legge le attività di oggi (thread di lavoro, nessuna chiamata a Tkinter)
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('dashboard.today_schedule')
         today = datetime.date.today().isoformat()
         connection = DbConnection.connect()
-        if connection:
+        if not connection:
+            raise ConnectionError("Could not connect to database")
+        try:
             cursor = connection.cursor()
             cursor.execute("SELECT name, start_time, finish_time, location FROM activities WHERE day=%s ORDER BY start_time", (today,))
-            activities = cursor.fetchall()
-            if not activities:
-                schedule_list.insert(tk.END, "📌 No activities scheduled for today")
-                schedule_list.insert(tk.END, "")
-                schedule_list.insert(tk.END, "✨ Enjoy your free day!")
-            else:
-                for name, start, finish, location in activities:
-                    schedule_list.insert(tk.END, f"🕐 {start}:00 - {finish}:00")
-                    schedule_list.insert(tk.END, f"📍 {name} @ {location}")
-                    schedule_list.insert(tk.END, "")
+            return cursor.fetchall()
+        finally:
             connection.close()
-        else:
+
+    def _render_schedule(self, schedule_list, activities):
+        # Mostra le attività di oggi nella lista (None = errore di caricamento)
+        schedule_list.delete(0, tk.END)
+        if activities is None:
             schedule_list.insert(tk.END, "❌ Could not load schedule")
+        elif not activities:
+            schedule_list.insert(tk.END, "📌 No activities scheduled for today")
+            schedule_list.insert(tk.END, "")
+            schedule_list.insert(tk.END, "✨ Enjoy your free day!")
+        else:
+            for name, start, finish, location in activities:
+                schedule_list.insert(tk.END, f"🕐 {start}:00 - {finish}:00")
+                schedule_list.insert(tk.END, f"📍 {name} @ {location}")
+                schedule_list.insert(tk.END, "")
 
     def open_expense_gui(self):
-        # Metodo per aprire la GUI delle spese
-        self.root.destroy()  # Chiude la dashboard
+        # Metodo per aprire la GUI delle spese (la callback gestisce la navigazione)
         self.expense_callback() # Chiama la callback per aprire ExpenseGUI
 
     def open_activity_form(self):
-        # Metodo per aprire la GUI delle attività
-        self.root.destroy()  # Chiude la dashboard
+        # Metodo per aprire la GUI delle attività (la callback gestisce la navigazione)
         self.activity_callback() # Chiama la callback per aprire ActivityFormGUI
 
     def open_teacher_admin_panel(self):
         """Apre la dashboard insegnante"""
-        self.root.destroy()  # Chiude la dashboard corrente
-        
-        # Crea una nuova finestra per la dashboard insegnante
-        teacher_root = tk.Tk()
-        teacher_dashboard = TeacherDashboard(teacher_root, self.student, self.show_main_dashboard)
-        teacher_root.mainloop()
+        if self.admin_callback:  # Navigazione gestita dal chiamante (ViewRouter)
+            self.admin_callback()
+            return
         
-    def show_main_dashboard(self):
-        """Callback per riaprire la dashboard principale"""
-        # Crea una nuova finestra e dashboard
-        new_root = tk.Tk()
-        dashboard = DashboardGUI(new_root, self.student, self.expense_callback, self.activity_callback)
-        new_root.mainloop()
+        # Senza callback apre la dashboard insegnante in una finestra separata
+        from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard  # Importata solo se serve
+        teacher_window = tk.Toplevel(self.root)
+        TeacherDashboard(teacher_window, self.student, teacher_window.destroy)
 
 if __name__ == '__main__':
     # Permette di testare la DashboardGUI direttamente
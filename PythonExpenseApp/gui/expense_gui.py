@@ -1,10 +1,24 @@
 from tkinter import messagebox, ttk  # Importa i moduli per messaggi e widget avanzati di Tkinter
 from PythonExpenseApp.db_connection import DbConnection  # Importa la classe per la connessione al database
 from PythonExpenseApp.expense import Expense  # Importa la classe Expense (gestione spese)
+from PythonExpenseApp.debt_balances import DebtBalances  # Saldi non pagati per coppia di studenti
 import tkinter as tk  # Importa la libreria base per la GUI
-import mysql.connector  # Importa il connettore MySQL
+from PythonExpenseApp.gui.background_worker import BackgroundWorker, Debouncer  # Esegue le query fuori dal thread Tk
+from PythonExpenseApp.search_index import SearchIndex  # Indice di ricerca degli studenti
+from PythonExpenseApp.gui.view_router import ViewRouter  # Notifica le altre schermate dei dati cambiati
+from PythonExpenseApp.gui.session_cache import SessionCache  # Dati precaricati dopo il login
+from PythonExpenseApp.service_client import ServiceClient  # Trasporto opzionale verso il servizio (thin client)
+from PythonExpenseApp.gui.virtual_table import KeysetSource, VirtualTreeview  # Tabella paginata dello storico
+from datetime import date  # Date dei filtri dello storico
 
 class ExpenseGUI:
+    # Campi ricercabili degli studenti (es. "mario", "class:4A ros")
+    STUDENT_SEARCH_FIELDS = {
+        'name': lambda student: student[1],
+        'surname': lambda student: student[2],
+        'class': lambda student: student[3],
+    }
+
     """
     Enhanced GUI for managing and recording expenses with multiple participants.
     """
@@ -12,11 +26,20 @@ class ExpenseGUI:
         self.root = root  # Salva la finestra principale
         self.current_student = current_student # Oggetto studente corrente (ha anche .role)
         self.main_callback = main_callback  # Callback per tornare alla dashboard principale
-        self.root.title("Advanced Expense Tracker")  # Imposta il titolo della finestra
-        self.root.geometry("1400x800")  # Imposta la dimensione della finestra
-        self.root.resizable(True, True)  # Rende la finestra ridimensionabile
+        self.window = root.winfo_toplevel()  # Finestra che contiene la GUI (root può essere un frame del ViewRouter)
+        self.window.title("Advanced Expense Tracker")  # Imposta il titolo della finestra
+        self.window.geometry("1400x800")  # Imposta la dimensione della finestra
+        self.window.resizable(True, True)  # Rende la finestra ridimensionabile
         self.root.configure(bg='#f8fafc')  # Imposta il colore di sfondo
         
+        self.all_students = []  # Studenti per la selezione del pagatore (caricati in background)
+        self.all_participants = []  # Studenti per la selezione dei partecipanti (caricati in background)
+        self.student_index = ExpenseGUI.build_student_index([])  # Indice di ricerca degli studenti
+        self.payer_results = self.student_index.all()  # Studenti mostrati nella listbox dei pagatori
+        self.available_results = self.student_index.all()  # Studenti mostrati nella listbox dei disponibili
+        self.student_names = {}  # id -> "nome cognome", per le righe dello storico
+        self.activity_names = {}  # id -> testo dell'attività, per le righe dello storico
+        
         # Main container
         main_container = tk.Frame(self.root, bg='#ffffff', relief='solid', bd=1)  # Crea un frame principale con bordo
         main_container.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)  # Posiziona il frame nella finestra
@@ -31,6 +54,7 @@ class ExpenseGUI:
         # Create tabs
         self.create_add_expense_tab()  # Crea il tab per aggiungere spese
         self.create_debt_tracker_tab()  # Crea il tab per tracciare i debiti
+        self.create_history_tab()  # Crea il tab dello storico di spese e debiti
         
         # Group management is now only available in the Teacher Dashboard
         
@@ -70,8 +94,7 @@ class ExpenseGUI:
             user_info.pack(side=tk.RIGHT, pady=10)  # Posiziona la label a destra
 
     def go_back_to_main(self):
-        """Close this window and return to main dashboard"""
-        self.root.destroy()  # Chiude la finestra corrente
+        """Return to main dashboard (navigation is handled by the callback)"""
         if self.main_callback:  # Se è stata fornita una callback
             self.main_callback()  # Chiama la callback per tornare indietro
 
@@ -149,6 +172,7 @@ class ExpenseGUI:
         
         self.payer_search_entry = tk.Entry(search_frame, font=("Segoe UI", 12))  # Campo di testo per la ricerca
         self.payer_search_entry.pack(fill=tk.X, pady=(0, 10), ipady=6)  # Posiziona il campo
+        self.payer_search_debouncer = Debouncer(self.root, self.apply_payer_search)  # Filtra quando si smette di digitare
         self.payer_search_entry.bind('<KeyRelease>', self.on_payer_search)  # Collega la ricerca al rilascio di un tasto
         
         # Payer listbox
@@ -180,6 +204,27 @@ class ExpenseGUI:
                                           fg="#1e293b", relief='solid', bd=2)
         participants_frame.grid(row=0, column=1, sticky="nsew", padx=5, pady=10)  # Posiziona il frame nella griglia
         
+        # Audience: the selected students or a whole group / class / activity
+        audience_frame = tk.Frame(participants_frame, bg="#ffffff")  # Crea un frame per la scelta dei partecipanti
+        audience_frame.pack(fill=tk.X, padx=15, pady=(15, 0))  # Posiziona il frame
+        
+        tk.Label(audience_frame, text="Split With:", font=("Segoe UI", 12, "bold"),  # Label per la scelta
+                bg="#ffffff", fg="#374151").pack(anchor='w', pady=(0, 5))
+        
+        self.audience_var = tk.StringVar(value="students")  # Modalità: studenti selezionati, gruppo, classe o attività
+        radio_frame = tk.Frame(audience_frame, bg="#ffffff")  # Frame per i pulsanti di scelta
+        radio_frame.pack(fill=tk.X)  # Posiziona il frame
+        for value, text in (("students", "Selected"), ("group", "Group"),
+                            ("class", "Class"), ("activity", "Activity")):
+            tk.Radiobutton(radio_frame, text=text, variable=self.audience_var, value=value,  # Pulsante per la modalità
+                          bg="#ffffff", font=("Segoe UI", 10),
+                          command=self.on_audience_change).pack(side=tk.LEFT, padx=(0, 5))
+        
+        self.audience_combo = ttk.Combobox(audience_frame, state="disabled", font=("Segoe UI", 11))  # Gruppo, classe o attività scelta
+        self.audience_combo.pack(fill=tk.X, pady=(5, 0))  # Posiziona il menu a tendina
+        self.audience_combo.bind('<<ComboboxSelected>>', self.update_summary)  # Aggiorna il riepilogo alla selezione
+        self.audience_options = {'group': [], 'class': [], 'activity': []}  # (id, testo) per ogni modalità, caricati in background
+        
         # Search frame
         search_frame = tk.Frame(participants_frame, bg="#ffffff")  # Crea un frame per la ricerca
         search_frame.pack(fill=tk.X, padx=15, pady=15)  # Posiziona il frame
@@ -189,6 +234,7 @@ class ExpenseGUI:
         
         self.participants_search_entry = tk.Entry(search_frame, font=("Segoe UI", 12))  # Campo di testo per la ricerca
         self.participants_search_entry.pack(fill=tk.X, pady=(0, 10), ipady=6)  # Posiziona il campo
+        self.participants_search_debouncer = Debouncer(self.root, self.apply_participants_search)  # Filtra quando si smette di digitare
         self.participants_search_entry.bind('<KeyRelease>', self.on_participants_search)  # Collega la ricerca al rilascio di un tasto
         
         # Available students listbox
@@ -230,8 +276,9 @@ class ExpenseGUI:
         selected_frame = tk.Frame(participants_frame, bg="#ffffff")  # Crea un frame per la lista dei partecipanti selezionati
         selected_frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=(0, 15))  # Posiziona il frame
         
-        tk.Label(selected_frame, text="Selected Participants:", font=("Segoe UI", 10, "bold"),  # Label sopra la lista
-                bg="#ffffff", fg="#374151").pack(anchor='w', pady=(0, 5))
+        self.selected_title_label = tk.Label(selected_frame, text="Selected Participants:",  # Label sopra la lista
+                                             font=("Segoe UI", 10, "bold"), bg="#ffffff", fg="#374151")
+        self.selected_title_label.pack(anchor='w', pady=(0, 5))  # Posiziona la label
         
         selected_list_frame = tk.Frame(selected_frame, bg="#ffffff")  # Frame per la listbox e scrollbar
         selected_list_frame.pack(fill=tk.BOTH, expand=True)  # Posiziona il frame
@@ -364,88 +411,272 @@ class ExpenseGUI:
         self.you_owe_listbox.pack(fill=tk.BOTH, expand=True)  # Posiziona la listbox
         you_owe_scrollbar.config(command=self.you_owe_listbox.yview)  # Collega la scrollbar
         
+        # Settle up (only for a logged-in student: the lists are relative to them)
+        settle_frame = tk.Frame(debt_frame, bg='#ffffff')  # Crea un frame per i pulsanti di saldo
+        settle_frame.pack(pady=(10, 0))  # Posiziona il frame sotto le liste
+        settle_state = "normal" if self.current_student else "disabled"  # Senza utente non ci sono coppie da saldare
+        
+        tk.Label(settle_frame, text="Amount (empty = all):", font=("Segoe UI", 11),  # Importo del saldo
+                 bg="#ffffff").pack(side=tk.LEFT, padx=(0, 5))
+        self.settle_amount_entry = tk.Entry(settle_frame, font=("Segoe UI", 11), width=10,  # Importo pagato (vuoto = tutto)
+                                            state=settle_state)
+        self.settle_amount_entry.pack(side=tk.LEFT, padx=(0, 10))  # Posiziona il campo
+        
+        for text, color, command in (("Mark Received", "#dc2626", lambda: self.settle_selected("owe_you")),
+                                     ("Pay Back Selected", "#059669", lambda: self.settle_selected("you_owe")),
+                                     ("Settle All My Debts", "#7c3aed", self.settle_all)):
+            tk.Button(settle_frame, text=text, font=("Segoe UI", 11, "bold"),  # Pulsante di saldo
+                      bg=color, fg="white", state=settle_state,
+                      command=command).pack(side=tk.LEFT, padx=5)
+        
         # Refresh button
         refresh_btn = tk.Button(debt_frame, text="Refresh Debts", font=("Segoe UI", 12, "bold"),  # Crea il pulsante per aggiornare i debiti
                                bg="#3b82f6", fg="white", command=self.load_debts)
         refresh_btn.pack(pady=20)  # Posiziona il pulsante con padding verticale
         
+        self.owe_you_ids = []  # id dello studente di ogni riga di "People Who Owe You Money"
+        self.you_owe_ids = []  # id dello studente di ogni riga di "People You Owe Money To"
+        
         # Load initial debt data
         self.load_debts()  # Carica i dati dei debiti all'avvio del tab
 
+    def create_history_tab(self):
+        """Create the paged history tab (expenses and debts, newest first)"""
+        history_frame = tk.Frame(self.notebook, bg='#ffffff')  # Crea un frame per il tab "History"
+        self.notebook.add(history_frame, text="History")  # Aggiunge il tab al notebook
+        self.history_frame = history_frame  # Usato per sapere quando il tab viene mostrato
+        
+        # Header
+        header_frame = tk.Frame(history_frame, bg='#ffffff', height=60)  # Crea un frame per l'header del tab
+        header_frame.pack(fill=tk.X, padx=20, pady=(20, 10))  # Posiziona il frame in alto
+        header_frame.pack_propagate(False)  # Impedisce il ridimensionamento automatico
+        
+        title_label = tk.Label(header_frame, text="🧾 History",  # Titolo del tab
+                              font=("Segoe UI", 24, "bold"), bg="#ffffff", fg="#1e293b")
+        title_label.pack(anchor='w')  # Allinea il titolo a sinistra
+        
+        # Filters
+        filter_frame = tk.Frame(history_frame, bg='#ffffff')  # Crea un frame per i filtri
+        filter_frame.pack(fill=tk.X, padx=20, pady=(0, 10))  # Posiziona il frame sotto l'header
+        
+        self.history_kind_var = tk.StringVar(value="expenses")  # Spese o debiti
+        for text, value in (("Expenses", "expenses"), ("Debts", "debts")):
+            tk.Radiobutton(filter_frame, text=text, variable=self.history_kind_var, value=value,  # Scelta dello storico
+                           font=("Segoe UI", 11), bg="#ffffff",
+                           command=self.load_history).pack(side=tk.LEFT, padx=(0, 10))
+        
+        tk.Label(filter_frame, text="From:", font=("Segoe UI", 11), bg="#ffffff").pack(side=tk.LEFT, padx=(10, 5))  # Data iniziale
+        self.history_from_entry = tk.Entry(filter_frame, font=("Segoe UI", 11), width=11)  # YYYY-MM-DD
+        self.history_from_entry.pack(side=tk.LEFT)  # Posiziona il campo
+        
+        tk.Label(filter_frame, text="To:", font=("Segoe UI", 11), bg="#ffffff").pack(side=tk.LEFT, padx=(10, 5))  # Data finale
+        self.history_to_entry = tk.Entry(filter_frame, font=("Segoe UI", 11), width=11)  # YYYY-MM-DD
+        self.history_to_entry.pack(side=tk.LEFT)  # Posiziona il campo
+        
+        tk.Label(filter_frame, text="Activity:", font=("Segoe UI", 11), bg="#ffffff").pack(side=tk.LEFT, padx=(10, 5))  # Attività
+        self.history_activity_combo = ttk.Combobox(filter_frame, state="readonly", width=30,  # Tutte le attività o una sola
+                                                   values=["All activities"])
+        self.history_activity_combo.current(0)  # Nessun filtro per attività
+        self.history_activity_combo.pack(side=tk.LEFT)  # Posiziona il menu a tendina
+        
+        self.history_mine_var = tk.BooleanVar(value=self.current_student is not None)  # Solo le righe dell'utente corrente
+        tk.Checkbutton(filter_frame, text="Only mine", variable=self.history_mine_var,  # Filtro per lo studente corrente
+                       font=("Segoe UI", 11), bg="#ffffff",  # Solo gli insegnanti vedono lo storico di tutti
+                       state="normal" if self._sees_all_history() else "disabled").pack(side=tk.LEFT, padx=10)
+        
+        tk.Button(filter_frame, text="Apply", font=("Segoe UI", 11, "bold"),  # Applica i filtri
+                  bg="#3b82f6", fg="white", command=self.load_history).pack(side=tk.LEFT, padx=10)
+        
+        # Paged table: only the visible rows are rendered, pages are appended while scrolling
+        self.history_table = VirtualTreeview(history_frame, columns=("date", "amount", "from", "to", "details"),
+                                             formatter=self.format_history_row)
+        self.history_table.heading("#0", text="Description")  # Intestazione della descrizione
+        self.history_table.column("#0", width=320)  # Larghezza della descrizione
+        for column, text, width in (("date", "Date", 100), ("amount", "Amount", 90), ("from", "From", 180),
+                                    ("to", "To", 180), ("details", "Details", 220)):
+            self.history_table.heading(column, text=text)  # Intestazione della colonna
+            self.history_table.column(column, width=width)  # Larghezza della colonna
+        self.history_table.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 5))  # Posiziona la tabella
+        
+        self.history_count_label = tk.Label(history_frame, text="", font=("Segoe UI", 10),  # Righe caricate
+                                            bg="#ffffff", fg="#64748b")
+        self.history_count_label.pack(anchor='w', padx=20, pady=(0, 10))  # Posiziona la label
+        
+        self.history_loaded = False  # Il primo caricamento avviene quando il tab viene aperto
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)  # Carica lo storico alla prima apertura
+
+    def refresh_data(self):
+        """Reload students and debts (called by the ViewRouter when the view is shown with stale data)"""
+        self.load_students_for_payer()  # Ricarica gli studenti per il pagatore
+        self.load_students_for_participants()  # Ricarica gli studenti per i partecipanti
+        self.load_debts()  # Ricarica i debiti
+        if self.history_loaded:
+            self.load_history()  # Ricarica la prima pagina dello storico
+
+    @staticmethod
+    def fetch_students():
+        """Load id, name, surname and class of every student (worker thread, no Tkinter calls)"""
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('expense_gui.students')
+        connection = DbConnection.connect()  # Stabilisce la connessione al database
+        if not connection:
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
+        try:
+            cursor = connection.cursor()  # Crea un cursore per eseguire le query
+            cursor.execute("SELECT id, name, surname, class FROM students ORDER BY name, surname")  # Seleziona tutti gli studenti
+            return cursor.fetchall()  # Recupera tutti i risultati
+        finally:
+            connection.close()  # Chiude la connessione al database
+
+    @staticmethod
+    def build_student_index(students):
+        """Build the search index of the students, with the listbox text pre-rendered (worker thread)"""
+        return SearchIndex(students, ExpenseGUI.STUDENT_SEARCH_FIELDS,
+                           default_fields=('name', 'surname'),
+                           display=lambda student: f"{student[1]} {student[2]}")  # Testo da visualizzare nella listbox
+
     def load_students_for_payer(self):
         """Load all students for payer selection"""
-        connection = DbConnection.connect()  # Stabilisce la connessione al database
-        if connection:
-            try:
-                cursor = connection.cursor()  # Crea un cursore per eseguire le query
-                cursor.execute("SELECT id, name, surname FROM students ORDER BY name, surname")  # Seleziona tutti gli studenti
-                students = cursor.fetchall()  # Recupera tutti i risultati
-                
-                self.payer_listbox.delete(0, tk.END)  # Pulisce la listbox dei pagatori
-                self.all_students = []  # Inizializza la lista di tutti gli studenti
-                
-                for student_id, name, surname in students:  # Cicla su ogni studente
-                    display_text = f"{name} {surname}"  # Testo da visualizzare nella listbox
-                    self.payer_listbox.insert(tk.END, display_text)  # Aggiunge lo studente alla listbox
-                    self.all_students.append((student_id, name, surname))  # Aggiunge lo studente alla lista completa
-                    
-                connection.close()  # Chiude la connessione al database
-            except Exception as e:
-                self.status_label.config(text=f"Error loading students: {e}")  # Mostra un messaggio di errore
+        SessionCache.for_root(self.root).load(
+            'students',  # Indice degli studenti precaricato dopo il login (query e indice fuori dal thread Tk)
+            request_key=(id(self), 'payer_students'),  # Chiave della richiesta
+            on_success=self._render_payer_students,  # Popola la listbox dei pagatori
+            on_error=lambda e: self.status_label.config(text=f"Error loading students: {e}"),  # Mostra un messaggio di errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    def _render_payer_students(self, student_index):
+        """Fill the payer listbox with the loaded students"""
+        self.student_index = student_index  # Indice di ricerca aggiornato
+        self.all_students = [student[:3] for student in student_index.records]  # (id, name, surname) di tutti gli studenti
+        self.student_names = {student[0]: f"{student[1]} {student[2]}" for student in student_index.records}  # Nomi per lo storico
+        self.apply_payer_search()  # Mostra gli studenti applicando la ricerca corrente
+        self.history_table.refresh()  # Le righe dello storico mostrano ora i nomi
 
     def load_students_for_participants(self):
         """Load all students for participants selection"""
-        connection = DbConnection.connect()  # Stabilisce la connessione al database
-        if connection:
-            try:
-                cursor = connection.cursor()  # Crea un cursore per eseguire le query
-                cursor.execute("SELECT id, name, surname FROM students ORDER BY name, surname")  # Seleziona tutti gli studenti
-                students = cursor.fetchall()  # Recupera tutti i risultati
-                
-                self.available_listbox.delete(0, tk.END)  # Pulisce la listbox degli studenti disponibili
-                self.all_participants = []  # Inizializza la lista di tutti i partecipanti
-                
-                for student_id, name, surname in students:  # Cicla su ogni studente
-                    display_text = f"{name} {surname}"  # Testo da visualizzare nella listbox
-                    self.available_listbox.insert(tk.END, display_text)  # Aggiunge lo studente alla listbox
-                    self.all_participants.append((student_id, name, surname))  # Aggiunge lo studente alla lista completa
-                    
-                connection.close()  # Chiude la connessione al database
-            except Exception as e:
-                self.status_label.config(text=f"Error loading students: {e}")  # Mostra un messaggio di errore
+        SessionCache.for_root(self.root).load(
+            'students',  # Stesso indice della lista dei pagatori: una sola query
+            request_key=(id(self), 'participant_students'),  # Chiave della richiesta
+            on_success=self._render_participant_students,  # Popola la listbox dei partecipanti
+            on_error=lambda e: self.status_label.config(text=f"Error loading students: {e}"),  # Mostra un messaggio di errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    def _render_participant_students(self, student_index):
+        """Fill the available participants listbox with the loaded students"""
+        self.student_index = student_index  # Indice di ricerca aggiornato
+        self.all_participants = [student[:3] for student in student_index.records]  # (id, name, surname) di tutti gli studenti
+        self.apply_participants_search()  # Mostra gli studenti applicando la ricerca corrente
+
+    @staticmethod
+    def fetch_audiences():
+        """
+        Load the groups, classes and activities an expense can be split with (worker thread, no Tkinter calls).
+
+        :return: dict - 'group', 'class', 'activity' -> lists of (id, text to display).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: le query vengono eseguite dal servizio
+            return client.call('expense_gui.audiences')
+        connection = DbConnection.connect(read_only=True)  # Sola lettura: può usare una replica
+        if not connection:
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
+        try:
+            cursor = connection.cursor()  # Crea un cursore per eseguire le query
+            cursor.execute("SELECT id, name FROM `groups` ORDER BY name")  # Tutti i gruppi
+            groups = [(group_id, name) for group_id, name in cursor.fetchall()]
+            cursor.execute("""SELECT DISTINCT class FROM students
+                              WHERE role = 'student' AND class IS NOT NULL ORDER BY class""")  # Tutte le classi
+            classes = [(class_, class_) for (class_,) in cursor.fetchall()]
+            cursor.execute("SELECT id, name, day FROM activities ORDER BY day, start_time")  # Tutte le attività
+            activities = [(activity_id, f"{name} ({day})") for activity_id, name, day in cursor.fetchall()]
+            return {'group': groups, 'class': classes, 'activity': activities}
+        finally:
+            connection.close()  # Chiude la connessione al database
+
+    def load_audiences(self):
+        """Load the groups, classes and activities for the audience selector"""
+        SessionCache.for_root(self.root).load(
+            'audiences',  # Precaricati dopo il login (ExpenseGUI.fetch_audiences)
+            request_key=(id(self), 'audiences'),  # Chiave della richiesta
+            on_success=self._render_audiences,  # Popola il menu a tendina
+            on_error=lambda e: self.status_label.config(text=f"Error loading groups: {e}"),  # Mostra un messaggio di errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    def _render_audiences(self, options):
+        """Store the loaded audiences and refresh the selector"""
+        self.audience_options = options  # (id, testo) per gruppo, classe e attività
+        self.on_audience_change()  # Aggiorna il menu a tendina della modalità corrente
+        self.activity_names = dict(options['activity'])  # id -> testo dell'attività
+        selected = self.history_activity_combo.get()  # Scelta corrente del filtro dello storico
+        values = ["All activities"] + [text for _, text in options['activity']]  # Voci del filtro
+        self.history_activity_combo.config(values=values)  # Aggiorna il menu a tendina
+        self.history_activity_combo.set(selected if selected in values else values[0])  # Mantiene la scelta
+        self.history_table.refresh()  # Le righe dello storico mostrano ora le attività
+
+    def on_audience_change(self):
+        """Switch between the selected students and a whole group / class / activity"""
+        mode = self.audience_var.get()  # Modalità scelta
+        if mode == "students":
+            self.audience_combo.set("")  # Nessun gruppo / classe / attività
+            self.audience_combo.config(state="disabled", values=[])  # Disabilita il menu a tendina
+            self.selected_title_label.config(text="Selected Participants:")  # La lista contiene chi deve pagare
+        else:
+            labels = [text for _, text in self.audience_options.get(mode, [])]  # Testi della modalità scelta
+            if self.audience_combo.get() not in labels:
+                self.audience_combo.set("")  # La scelta precedente era di un'altra modalità
+            self.audience_combo.config(state="readonly", values=labels)  # Abilita il menu a tendina
+            self.selected_title_label.config(text="Excluded Students:")  # La lista contiene chi non partecipa
+            if not any(self.audience_options.values()):
+                self.load_audiences()  # Primo utilizzo: carica gruppi, classi e attività
+        self.update_summary()  # Aggiorna il riepilogo
+
+    def selected_audience(self):
+        """Return (mode, id) of the chosen group / class / activity, or None"""
+        mode = self.audience_var.get()  # Modalità scelta
+        index = self.audience_combo.current()  # Posizione della scelta nel menu (-1 se nessuna)
+        options = self.audience_options.get(mode, [])
+        if mode == "students" or not 0 <= index < len(options):
+            return None
+        return mode, options[index][0]
+
+    def _set_loading(self, is_loading):
+        """Show or clear the loading indicator in the status bar"""
+        if not hasattr(self, 'status_label'):  # La barra di stato viene creata dopo i tab
+            return
+        if is_loading:
+            self.status_label.config(text="⏳ Loading...")  # Mostra l'indicatore di caricamento
+        elif not BackgroundWorker.for_root(self.root).is_busy():  # Nessun'altra richiesta in corso
+            self.status_label.config(text="Ready")  # Ripristina lo stato
 
     def on_payer_search(self, event):
-        """Handle payer search"""
-        search_term = self.payer_search_entry.get().lower()  # Ottiene il termine di ricerca dalla entry
+        """Handle payer search (debounced while typing)"""
+        self.payer_search_debouncer.trigger()  # La ricerca parte quando si smette di digitare
+
+    def apply_payer_search(self):
+        """Show the students matching the payer search box"""
+        self.payer_results = self.student_index.search(self.payer_search_entry.get())  # Studenti corrispondenti
         self.payer_listbox.delete(0, tk.END)  # Pulisce la listbox dei pagatori
-        
-        for i, (student_id, name, surname) in enumerate(self.all_students):  # Cicla su tutti gli studenti
-            if search_term in f"{name} {surname}".lower():  # Se il termine di ricerca è nel nome o cognome
-                display_text = f"{name} {surname}"  # Testo da visualizzare nella listbox
-                self.payer_listbox.insert(tk.END, display_text)  # Aggiunge lo studente alla listbox
+        self.payer_listbox.insert(tk.END, *self.payer_results.display_list())  # Inserisce tutte le righe in una sola chiamata
 
     def on_participants_search(self, event):
-        """Handle participants search"""
-        search_term = self.participants_search_entry.get().lower()  # Ottiene il termine di ricerca dalla entry
+        """Handle participants search (debounced while typing)"""
+        self.participants_search_debouncer.trigger()  # La ricerca parte quando si smette di digitare
+
+    def apply_participants_search(self):
+        """Show the students matching the participants search box"""
+        self.available_results = self.student_index.search(self.participants_search_entry.get())  # Studenti corrispondenti
         self.available_listbox.delete(0, tk.END)  # Pulisce la listbox degli studenti disponibili
-        
-        for i, (student_id, name, surname) in enumerate(self.all_participants):  # Cicla su tutti i partecipanti
-            if search_term in f"{name} {surname}".lower():  # Se il termine di ricerca è nel nome o cognome
-                display_text = f"{name} {surname}"  # Testo da visualizzare nella listbox
-                self.available_listbox.insert(tk.END, display_text)  # Aggiunge lo studente alla listbox
+        self.available_listbox.insert(tk.END, *self.available_results.display_list())  # Inserisce tutte le righe in una sola chiamata
 
     def add_participants(self):
         """Add selected participants to the selected list"""
         selections = self.available_listbox.curselection()  # Ottiene gli indici selezionati nella listbox
         for i in selections:  # Cicla sugli indici selezionati
-            participant_text = self.available_listbox.get(i)  # Ottiene il testo dell'elemento selezionato
-            # Find the corresponding student data
-            for student_id, name, surname in self.all_participants:  # Cerca lo studente corrispondente
-                if f"{name} {surname}" == participant_text:  # Se il testo corrisponde
-                    if (student_id, name, surname) not in self.selected_participants:  # Se non è già selezionato
-                        self.selected_participants.append((student_id, name, surname))  # Aggiunge il partecipante alla lista
-                        self.selected_listbox.insert(tk.END, participant_text)  # Aggiunge il partecipante alla listbox
-                    break
+            participant = self.available_results[i][:3]  # Studente mostrato in quella riga (id, name, surname)
+            if participant not in self.selected_participants:  # Se non è già selezionato
+                self.selected_participants.append(participant)  # Aggiunge il partecipante alla lista
+                self.selected_listbox.insert(tk.END, self.available_listbox.get(i))  # Aggiunge il partecipante alla listbox
         self.update_summary()  # Aggiorna il riepilogo
 
     def remove_participants(self):
@@ -475,11 +706,8 @@ class ExpenseGUI:
             payer_text = self.payer_listbox.get(payer_selection[0])  # Ottiene il testo del pagatore
             self.selected_payer_label.config(text=f"Selected: {payer_text}")  # Aggiorna la label del pagatore selezionato
             
-            # Find payer data
-            for student_id, name, surname in self.all_students:  # Cerca i dati del pagatore
-                if f"{name} {surname}" == payer_text:  # Se il testo corrisponde
-                    self.selected_payer = (student_id, name, surname)
-                    break
+            # Payer data of the selected row
+            self.selected_payer = self.payer_results[payer_selection[0]][:3]  # (id, name, surname)
         else:
             self.selected_payer = None  # Nessun pagatore selezionato
             self.selected_payer_label.config(text="Selected: None")  # Aggiorna la label
@@ -488,8 +716,18 @@ class ExpenseGUI:
         try:
             amount = float(self.amount_entry.get() or 0)  # Ottiene l'importo inserito
             num_participants = len(self.selected_participants)  # Ottiene il numero di partecipanti
+            mode = self.audience_var.get()  # Studenti selezionati oppure gruppo / classe / attività
             
-            if self.selected_payer and num_participants > 0 and amount > 0:  # Se pagatore e partecipanti sono selezionati e l'importo è valido
+            if mode != "students":
+                if self.selected_payer and self.selected_audience() and amount > 0:
+                    summary_text = f"Payer: {self.selected_payer[1]} {self.selected_payer[2]}\n"  # Riepilogo del pagatore
+                    summary_text += f"Total: €{amount:.2f}\n"  # Riepilogo dell'importo totale
+                    summary_text += f"Split with {mode}: {self.audience_combo.get()}\n"  # Gruppo, classe o attività
+                    summary_text += f"Excluded: {num_participants}\n"  # Studenti esclusi
+                    summary_text += "Shares are computed from the current members"  # Calcolate dal database
+                else:
+                    summary_text = f"Select payer, {mode}, and enter amount"  # Messaggio di avviso
+            elif self.selected_payer and num_participants > 0 and amount > 0:  # Se pagatore e partecipanti sono selezionati e l'importo è valido
                 per_person = amount / num_participants  # Calcola l'importo per persona
                 summary_text = f"Payer: {self.selected_payer[1]} {self.selected_payer[2]}\n"  # Riepilogo del pagatore
                 summary_text += f"Total: €{amount:.2f}\n"  # Riepilogo dell'importo totale
@@ -508,7 +746,12 @@ class ExpenseGUI:
             messagebox.showerror("Error", "Please select who paid for the expense.")  # Messaggio di errore
             return
             
-        if not self.selected_participants:  # Controlla se sono stati selezionati dei partecipanti
+        audience = self.selected_audience()  # Gruppo / classe / attività scelta, se in quella modalità
+        if self.audience_var.get() != "students" and not audience:
+            messagebox.showerror("Error", f"Please select the {self.audience_var.get()} to split with.")  # Messaggio di errore
+            return
+        
+        if not audience and not self.selected_participants:  # Controlla se sono stati selezionati dei partecipanti
             messagebox.showerror("Error", "Please select participants who owe money.")  # Messaggio di errore
             return
             
@@ -528,135 +771,332 @@ class ExpenseGUI:
             messagebox.showerror("Error", "Please enter a valid amount.")  # Messaggio di errore per importo non valido
             return
         
-        # Calculate split
-        per_person = amount / len(self.selected_participants)  # Calcola l'importo da pagare da ciascun partecipante
-        
-        # Save to database
-        connection = DbConnection.connect()  # Stabilisce la connessione al database
-        if not connection:
-            messagebox.showerror("Error", "Could not connect to database.")  # Messaggio di errore
+        payer_id = self.selected_payer[0]  # ID del pagatore
+        participant_ids = [participant[0] for participant in self.selected_participants]  # ID dei partecipanti
+        worker = BackgroundWorker.for_root(self.root)  # Esecutore in background della finestra
+        if worker.is_busy((id(self), 'add_expense')):  # Salvataggio già in corso: ignora il doppio clic
             return
-            
-        try:
-            cursor = connection.cursor()  # Crea un cursore per eseguire le query
-            
-            # Insert main expense record
-            cursor.execute("""INSERT INTO expenses (amount, description, date, id_giver, id_receiver, id_activity)
-                             VALUES (%s, %s, CURDATE(), %s, NULL, NULL)""",
-                          (amount, description, self.selected_payer[0]))  # Inserisce la spesa nel database
-            expense_id = cursor.lastrowid  # Ottiene l'ID dell'ultima spesa inserita
-            
-            # Insert debt records for each participant
-            for participant_id, name, surname in self.selected_participants:  # Cicla su ogni partecipante
-                cursor.execute("""INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id, date_created)
-                                 VALUES (%s, %s, %s, %s, %s, CURDATE())""",
-                              (self.selected_payer[0], participant_id, per_person, description, expense_id))  # Inserisce i debiti nel database
-            
-            connection.commit()  # Conferma le modifiche nel database
-            messagebox.showinfo("Success", f"Expense added successfully!\nEach participant owes €{per_person:.2f}")  # Messaggio di successo
-            
-            # Clear form
-            self.amount_entry.delete(0, tk.END)  # Pulisce il campo dell'importo
-            self.desc_entry.delete(0, tk.END)  # Pulisce il campo della descrizione
-            self.clear_participants()  # Pulisce la lista dei partecipanti selezionati
-            self.payer_listbox.selection_clear(0, tk.END)  # Deseleziona il pagatore
-            self.selected_payer = None  # Nessun pagatore selezionato
-            self.selected_payer_label.config(text="Selected: None")  # Aggiorna la label
-            
-            # Refresh debt tracker
-            self.load_debts()  # Aggiorna la visualizzazione dei debiti
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not save expense: {e}")  # Mostra un messaggio di errore
-        finally:
-            connection.close()  # Chiude la connessione al database
+        if audience:  # Tutto il gruppo / classe / attività, meno gli esclusi
+            mode, audience_id = audience
+            worker.submit(
+                (id(self), 'add_expense'),  # Chiave della richiesta
+                lambda: ExpenseGUI.save_audience_expense(payer_id, mode, audience_id, amount, description,
+                                                         participant_ids),  # Transazione fuori dal thread Tk
+                on_success=self._on_audience_expense_saved,  # Mostra l'esito e pulisce il modulo
+                on_error=lambda e: messagebox.showerror("Error", f"Could not save expense: {e}"),  # Mostra un messaggio di errore
+                on_loading=self._set_loading)  # Indicatore di caricamento
+            return
+        worker.submit(
+            (id(self), 'add_expense'),  # Chiave della richiesta
+            lambda: ExpenseGUI.save_split_expense(payer_id, participant_ids, amount, description),  # Transazione fuori dal thread Tk
+            on_success=self._on_expense_saved,  # Mostra l'esito e pulisce il modulo
+            on_error=lambda e: messagebox.showerror("Error", f"Could not save expense: {e}"),  # Mostra un messaggio di errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    @staticmethod
+    def save_split_expense(payer_id, participant_ids, amount, description):
+        """
+        Save an expense split equally among the participants (no Tk: runs on the BackgroundWorker).
+        Returns:
+            tuple: (success, per_person amount or error message), see Expense.record_split_expense.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la transazione viene eseguita dal servizio
+            return client.call('expense_gui.add_expense', payer_id=payer_id, participant_ids=participant_ids,
+                               amount=amount, description=description)
+        from PythonExpenseApp.expense import Expense  # Modello con la transazione spesa + debiti
+        return Expense.record_split_expense(payer_id, participant_ids, amount, description)
+
+    @staticmethod
+    def save_audience_expense(payer_id, audience, audience_id, amount, description, exclude_ids):
+        """
+        Save an expense split equally among a whole group, class or activity (no Tk: runs on the BackgroundWorker).
+        Returns:
+            tuple: (success, result dict or error message), see Expense.record_audience_expense.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la transazione viene eseguita dal servizio
+            return client.call('expense_gui.add_audience_expense', payer_id=payer_id, audience=audience,
+                               audience_id=audience_id, amount=amount, description=description,
+                               exclude_ids=exclude_ids)
+        from PythonExpenseApp.expense import Expense  # Modello con la transazione spesa + debiti
+        return Expense.record_audience_expense(payer_id, audience, audience_id, amount, description,
+                                               exclude_ids=exclude_ids)
+
+    def _on_expense_saved(self, result):
+        """Show the outcome of add_expense and reset the form (Tk thread)"""
+        success, detail = result  # Importo a testa oppure messaggio di errore
+        if not success:
+            messagebox.showerror("Error", f"Could not save expense: {detail}")  # Mostra un messaggio di errore
+            return
+        messagebox.showinfo("Success", f"Expense added successfully!\nEach participant owes €{detail:.2f}")  # Messaggio di successo
+        self._reset_expense_form()  # Pulisce il modulo e aggiorna i debiti
+
+    def _on_audience_expense_saved(self, result):
+        """Show the outcome of a group / class / activity expense and reset the form (Tk thread)"""
+        success, detail = result  # Riepilogo della suddivisione oppure messaggio di errore
+        if not success:
+            messagebox.showerror("Error", f"Could not save expense: {detail}")  # Mostra un messaggio di errore
+            return
+        messagebox.showinfo("Success", f"Expense added successfully!\n"  # Messaggio di successo
+                                       f"Split among {detail['participants']} students ({detail['debts']} debts)\n"
+                                       f"Each participant owes €{detail['per_person']:.2f}")
+        self._reset_expense_form()  # Pulisce il modulo e aggiorna i debiti
+
+    def _reset_expense_form(self):
+        """Clear the form after a saved expense and refresh the debts (Tk thread)"""
+        ViewRouter.notify_changed(self.root, 'expenses')  # Le altre schermate aggiorneranno i dati delle spese
+        
+        # Clear form
+        self.amount_entry.delete(0, tk.END)  # Pulisce il campo dell'importo
+        self.desc_entry.delete(0, tk.END)  # Pulisce il campo della descrizione
+        self.clear_participants()  # Pulisce la lista dei partecipanti selezionati
+        self.payer_listbox.selection_clear(0, tk.END)  # Deseleziona il pagatore
+        self.selected_payer = None  # Nessun pagatore selezionato
+        self.selected_payer_label.config(text="Selected: None")  # Aggiorna la label
+        
+        # Refresh debt tracker
+        self.load_debts()  # Aggiorna la visualizzazione dei debiti
+        if self.history_loaded:
+            self.load_history()  # La nuova spesa compare in cima allo storico
 
     def load_debts(self):
         """Load debt information for the current user"""
+        student_id = self.current_student.id if self.current_student else None  # Filtra per lo studente corrente, se presente
+        SessionCache.for_root(self.root).load(
+            'debts', student_id,  # Saldi precaricati dopo il login (ExpenseGUI.fetch_debts)
+            request_key=(id(self), 'debts'),  # Refresh ripetuti vengono accorpati
+            on_success=self._render_debts,  # Popola le liste dei debiti
+            on_error=lambda err: self.status_label.config(text=f"Error loading debts: {err}"),  # Mostra un messaggio di errore nella barra di stato
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    @staticmethod
+    def fetch_debts(student_id=None):
+        """
+        Load the unpaid debts grouped by person (worker thread, no Tkinter calls).
+
+        Both directions come from one query on the per-pair balances (debt_balances.py),
+        so the cost depends on the number of counterparties, not on the number of debts.
+
+        :param student_id: int or None - Restrict to debts of this student; None shows all debts.
+        :return: tuple (owed_to_you, you_owe) - Lists of (student_id, name, surname, total, count).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('expense_gui.debts', student_id=student_id)
         connection = DbConnection.connect()  # Stabilisce la connessione al database
         if not connection:
-            return  # Esce se la connessione fallisce
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
         try:
             cursor = connection.cursor()  # Crea un cursore per eseguire le query
-            
-            # Clear existing lists
-            self.owe_you_listbox.delete(0, tk.END)  # Pulisce la listbox di chi ti deve soldi
-            self.you_owe_listbox.delete(0, tk.END)  # Pulisce la listbox di chi devi pagare
-            
-            # If we have a current student, filter debts for them
-            if self.current_student:
-                # Get debts where others owe the current student money
-                cursor.execute("""SELECT s.name, s.surname, SUM(d.amount), COUNT(d.id)
-                                 FROM debts d
-                                 JOIN students s ON d.debtor_id = s.id
-                                 WHERE d.paid = FALSE AND d.payer_id = %s
-                                 GROUP BY d.debtor_id, s.name, s.surname
-                                 ORDER BY SUM(d.amount) DESC""", (self.current_student.id,))
-                
-                total_owed_to_you = 0  # Inizializza il totale che ti devono
-                for name, surname, amount, count in cursor.fetchall():  # Cicla su ogni persona che ti deve soldi
-                    self.owe_you_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
-                    total_owed_to_you += amount  # Aggiorna il totale
-                    
-                if total_owed_to_you > 0:  # Se qualcuno ti deve soldi
-                    self.owe_you_listbox.insert(tk.END, "")  # Riga vuota
-                    self.owe_you_listbox.insert(tk.END, f"TOTAL OWED TO YOU: €{total_owed_to_you:.2f}")  # Mostra il totale
-                
-                # Get debts where the current student owes others money
-                cursor.execute("""SELECT s.name, s.surname, SUM(d.amount), COUNT(d.id)
-                                 FROM debts d
-                                 JOIN students s ON d.payer_id = s.id
-                                 WHERE d.paid = FALSE AND d.debtor_id = %s
-                                 GROUP BY d.payer_id, s.name, s.surname
-                                 ORDER BY SUM(d.amount) DESC""", (self.current_student.id,))
-                
-                total_you_owe = 0  # Inizializza il totale che devi agli altri
-                for name, surname, amount, count in cursor.fetchall():  # Cicla su ogni persona a cui devi soldi
-                    self.you_owe_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
-                    total_you_owe += amount  # Aggiorna il totale
-                    
-                if total_you_owe > 0:  # Se devi soldi a qualcuno
-                    self.you_owe_listbox.insert(tk.END, "")  # Riga vuota
-                    self.you_owe_listbox.insert(tk.END, f"TOTAL YOU OWE: €{total_you_owe:.2f}")  # Mostra il totale
-            else:
-                # Show all debts if no specific user
-                # Get debts where others owe you money
-                cursor.execute("""SELECT s.name, s.surname, SUM(d.amount), COUNT(d.id)
-                                 FROM debts d
-                                 JOIN students s ON d.debtor_id = s.id
-                                 WHERE d.paid = FALSE
-                                 GROUP BY d.debtor_id, s.name, s.surname
-                                 ORDER BY SUM(d.amount) DESC""")
-                
-                total_owed_to_you = 0  # Inizializza il totale che ti devono
-                for name, surname, amount, count in cursor.fetchall():  # Cicla su ogni persona che ti deve soldi
-                    self.owe_you_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
-                    total_owed_to_you += amount  # Aggiorna il totale
-                    
-                if total_owed_to_you > 0:  # Se qualcuno ti deve soldi
-                    self.owe_you_listbox.insert(tk.END, "")  # Riga vuota
-                    self.owe_you_listbox.insert(tk.END, f"TOTAL OWED TO YOU: €{total_owed_to_you:.2f}")  # Mostra il totale
-                
-                # Get debts where you owe others money
-                cursor.execute("""SELECT s.name, s.surname, SUM(d.amount), COUNT(d.id)
-                                 FROM debts d
-                                 JOIN students s ON d.payer_id = s.id
-                                 WHERE d.paid = FALSE
-                                 GROUP BY d.payer_id, s.name, s.surname
-                                 ORDER BY SUM(d.amount) DESC""")
-                
-                total_you_owe = 0  # Inizializza il totale che devi agli altri
-                for name, surname, amount, count in cursor.fetchall():  # Cicla su ogni persona a cui devi soldi
-                    self.you_owe_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
-                    total_you_owe += amount  # Aggiorna il totale
-                    
-                if total_you_owe > 0:  # Se devi soldi a qualcuno
-                    self.you_owe_listbox.insert(tk.END, "")  # Riga vuota
-                    self.you_owe_listbox.insert(tk.END, f"TOTAL YOU OWE: €{total_you_owe:.2f}")  # Mostra il totale
-        except Exception as err:
-            self.status_label.config(text=f"Error loading debts: {err}")  # Mostra un messaggio di errore nella barra di stato
+            query, params = DebtBalances.query(student_id)  # Entrambe le direzioni, con un flag
+            cursor.execute(query, params)  # Una sola query per tutte e due le liste
+            owed_to_you, you_owe = [], []  # Persone che ti devono soldi / a cui devi soldi
+            for direction, *row in cursor.fetchall():
+                (owed_to_you if direction == DebtBalances.OWED_TO_STUDENT else you_owe).append(tuple(row))
+            return owed_to_you, you_owe
         finally:
             connection.close()  # Chiude la connessione al database in ogni caso (sia successo che errore)
 
+    def _render_debts(self, debts):
+        """Fill the debt tracker listboxes with the result of fetch_debts"""
+        owed_to_you, you_owe = debts  # Risultato di fetch_debts
+        
+        # Clear existing lists
+        self.owe_you_listbox.delete(0, tk.END)  # Pulisce la listbox di chi ti deve soldi
+        self.you_owe_listbox.delete(0, tk.END)  # Pulisce la listbox di chi devi pagare
+        
+        self.owe_you_ids = [row[0] for row in owed_to_you]  # Studente di ogni riga (le righe del totale non ne hanno)
+        self.you_owe_ids = [row[0] for row in you_owe]  # Studente di ogni riga
+        
+        total_owed_to_you = 0  # Inizializza il totale che ti devono
+        for _, name, surname, amount, count in owed_to_you:  # Cicla su ogni persona che ti deve soldi
+            self.owe_you_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
+            total_owed_to_you += amount  # Aggiorna il totale
+            
+        if total_owed_to_you > 0:  # Se qualcuno ti deve soldi
+            self.owe_you_listbox.insert(tk.END, "")  # Riga vuota
+            self.owe_you_listbox.insert(tk.END, f"TOTAL OWED TO YOU: €{total_owed_to_you:.2f}")  # Mostra il totale
+        
+        total_you_owe = 0  # Inizializza il totale che devi agli altri
+        for _, name, surname, amount, count in you_owe:  # Cicla su ogni persona a cui devi soldi
+            self.you_owe_listbox.insert(tk.END, f"{name} {surname}: €{amount:.2f} ({count} expenses)")  # Mostra la riga
+            total_you_owe += amount  # Aggiorna il totale
+            
+        if total_you_owe > 0:  # Se devi soldi a qualcuno
+            self.you_owe_listbox.insert(tk.END, "")  # Riga vuota
+            self.you_owe_listbox.insert(tk.END, f"TOTAL YOU OWE: €{total_you_owe:.2f}")  # Mostra il totale
+
+    def settle_amount(self):
+        """Read the settle amount: None pays everything; raises ValueError if it is not a positive number"""
+        text = self.settle_amount_entry.get().strip()  # Importo inserito (vuoto = tutto)
+        if not text:
+            return None
+        amount = float(text.replace(",", "."))  # ValueError se non è un numero
+        if amount <= 0:
+            raise ValueError("Amount must be greater than 0")
+        return amount
+
+    def settle_selected(self, direction):
+        """Settle the debts with the selected person ("owe_you": they paid you back, "you_owe": you pay them back)"""
+        listbox, ids = ((self.owe_you_listbox, self.owe_you_ids) if direction == "owe_you"
+                        else (self.you_owe_listbox, self.you_owe_ids))  # Lista scelta
+        selection = listbox.curselection()  # Riga selezionata
+        if not selection or selection[0] >= len(ids):  # Nessuna riga o riga del totale
+            messagebox.showerror("Error", "Please select a person in the list.")  # Messaggio di errore
+            return
+        try:
+            amount = self.settle_amount()  # Importo pagato (None = tutto)
+        except ValueError:
+            messagebox.showerror("Error", "Please enter a valid amount.")  # Messaggio di errore per importo non valido
+            return
+        other_id, me = ids[selection[0]], self.current_student.id  # L'altro studente e l'utente corrente
+        payer_id, debtor_id = (me, other_id) if direction == "owe_you" else (other_id, me)  # Chi riceve e chi paga
+        what = "everything" if amount is None else f"€{amount:.2f}"  # Testo della conferma
+        if not messagebox.askyesno("Confirm", f"Settle {what} between {listbox.get(selection[0]).split(':')[0]} and you?"):
+            return
+        self._submit_settlement(lambda: ExpenseGUI.save_settlement(payer_id, debtor_id, amount))
+
+    def settle_all(self):
+        """Pay back every debt of the current student"""
+        if not messagebox.askyesno("Confirm", "Mark all your debts as paid?"):
+            return
+        student_id = self.current_student.id  # Studente che salda tutti i debiti
+        self._submit_settlement(lambda: ExpenseGUI.save_settle_all(student_id))
+
+    def _submit_settlement(self, task):
+        """Run a settlement on the background worker (double clicks are ignored)"""
+        worker = BackgroundWorker.for_root(self.root)  # Esecutore in background della finestra
+        if worker.is_busy((id(self), 'settle')):  # Saldo già in corso
+            return
+        worker.submit(
+            (id(self), 'settle'),  # Chiave della richiesta
+            task,  # Transazione fuori dal thread Tk
+            on_success=self._on_settled,  # Mostra l'esito e aggiorna i debiti
+            on_error=lambda e: messagebox.showerror("Error", f"Could not settle debts: {e}"),  # Mostra un messaggio di errore
+            on_loading=self._set_loading)  # Indicatore di caricamento
+
+    @staticmethod
+    def save_settlement(payer_id, debtor_id, amount=None):
+        """
+        Settle the debts of one pair, oldest first (no Tk: runs on the BackgroundWorker).
+        Returns:
+            tuple: (success, result dict or error message), see Expense.settle_between.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la transazione viene eseguita dal servizio
+            return client.call('expense.settle_between', payer_id=payer_id, debtor_id=debtor_id,
+                               up_to_amount=amount)
+        return Expense.settle_between(payer_id, debtor_id, amount)
+
+    @staticmethod
+    def save_settle_all(student_id):
+        """
+        Settle every debt of a student (no Tk: runs on the BackgroundWorker).
+        Returns:
+            tuple: (success, result dict or error message), see Expense.settle_all_for.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la transazione viene eseguita dal servizio
+            return client.call('expense.settle_all_for', student_id=student_id)
+        return Expense.settle_all_for(student_id)
+
+    def _on_settled(self, result):
+        """Show the outcome of a settlement and refresh the debts once (Tk thread)"""
+        success, detail = result  # Riepilogo del saldo oppure messaggio di errore
+        if not success:
+            messagebox.showerror("Error", f"Could not settle debts: {detail}")  # Mostra un messaggio di errore
+            return
+        self.settle_amount_entry.delete(0, tk.END)  # Pulisce il campo dell'importo
+        ViewRouter.notify_changed(self.root, 'debts')  # Le altre schermate aggiorneranno i dati dei debiti
+        self.load_debts()  # Un solo aggiornamento dei debiti
+        if self.history_loaded:
+            self.load_history()  # I debiti saldati compaiono nello storico
+        messagebox.showinfo("Success", f"Settled {detail['debts']} debts (€{detail['amount']:.2f})")  # Messaggio di successo
+
+    def on_tab_changed(self, event):
+        """Load the history the first time its tab is shown"""
+        if self.history_loaded or self.notebook.select() != str(self.history_frame):
+            return
+        if not self.audience_options['activity']:
+            self.load_audiences()  # Attività per il filtro dello storico
+        self.load_history()  # Prima pagina dello storico
+
+    def history_filters(self):
+        """Read the history filters; raises ValueError for a malformed date"""
+        filters = {}
+        for key, entry in (('start_date', self.history_from_entry), ('end_date', self.history_to_entry)):
+            text = entry.get().strip()  # YYYY-MM-DD o vuoto
+            if text:
+                filters[key] = date.fromisoformat(text)  # ValueError se la data non è valida
+        activity = self.history_activity_combo.current()  # 0 = tutte le attività
+        if activity > 0:
+            filters['activity_id'] = self.audience_options['activity'][activity - 1][0]
+        if self.current_student and (self.history_mine_var.get() or not self._sees_all_history()):
+            filters['student_id'] = self.current_student.id  # Solo le righe dello studente corrente
+        return filters
+
+    def _sees_all_history(self):
+        """Only teachers may list the history of every student (the service checks it too)"""
+        return getattr(self.current_student, 'role', None) == 'teacher'
+
+    def load_history(self):
+        """Show the first page of the history with the current filters (later pages load while scrolling)"""
+        try:
+            filters = self.history_filters()  # Filtri scelti
+        except ValueError:
+            self.status_label.config(text="Dates must be written as YYYY-MM-DD")  # Data non valida
+            return
+        kind = self.history_kind_var.get()  # "expenses" o "debts"
+        self.history_loaded = True  # Da ora lo storico si aggiorna con gli altri dati
+        self.history_count_label.config(text="")  # Nessuna riga ancora caricata
+        self.history_table.set_source(KeysetSource(
+            lambda after, limit: ExpenseGUI.fetch_history_page(kind, after, limit, **filters),  # Eseguita fuori dal thread Tk
+            on_loaded=self._on_history_page))
+
+    def _on_history_page(self, source):
+        """Update the loaded rows counter after every page"""
+        more = "" if source.exhausted else " (scroll for more)"  # Altre pagine disponibili
+        self.history_count_label.config(text=f"{len(source)} rows loaded{more}")
+
+    @staticmethod
+    def fetch_history_page(kind, after=None, limit=None, student_id=None, start_date=None,
+                           end_date=None, activity_id=None):
+        """
+        Load one keyset page of the expense or debt history (worker thread, no Tkinter calls).
+
+        :param kind: str - "expenses" or "debts".
+        :param after: tuple (date, id) or None - Cursor of the previous page.
+        :param limit: int or None - Rows per page.
+        :return: tuple (rows, next_cursor) - See Expense.get_expense_page / Expense.get_debt_page.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('expense_gui.history_page', kind=kind, after=after, limit=limit,
+                               student_id=student_id, start_date=start_date, end_date=end_date,
+                               activity_id=activity_id)
+        page = Expense.get_debt_page if kind == "debts" else Expense.get_expense_page  # API paginata
+        return page(student_id=student_id, start_date=start_date, end_date=end_date,
+                    activity_id=activity_id, after=after, limit=limit)
+
+    def history_name(self, student_id):
+        """Name of a student in the history table (the id until the students are loaded)"""
+        if student_id is None:
+            return "—"  # Studente eliminato
+        return self.student_names.get(student_id, f"#{student_id}")
+
+    def format_history_row(self, row):
+        """Turn an expense or debt row into (description, values) for the history table"""
+        if len(row) == 9:  # Debito: (id, payer_id, debtor_id, amount, description, expense_id, paid, date_created, date_paid)
+            _, payer_id, debtor_id, amount, description, _, paid, date_created, date_paid = row
+            status = f"Paid {date_paid}" if paid else "Unpaid"  # Stato del debito
+            return description or "", (date_created, f"€{amount:.2f}", self.history_name(debtor_id),
+                                     self.history_name(payer_id), status)
+        # Spesa: (id, amount, description, date, id_giver, id_receiver, id_activity, created_at)
+        _, amount, description, day, giver_id, receiver_id, activity_id, _ = row
+        return description, (day, f"€{amount:.2f}", self.history_name(giver_id),
+                             self.history_name(receiver_id) if receiver_id else "Shared",
+                             self.activity_names.get(activity_id, ""))
+
 # End of ExpenseGUI class
 # All group management code has been removed. Teachers use the Teacher Dashboard for these features.
\ No newline at end of file
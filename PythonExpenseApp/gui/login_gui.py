@@ -1,7 +1,9 @@
 import tkinter as tk
 from tkinter import messagebox
-from db_connection import DbConnection
-from student import Student  # Assuming Student class can hold role
+from PythonExpenseApp.auth import Auth, SessionTokens  # Password hashing and session tokens
+from PythonExpenseApp.student import Student  # Assuming Student class can hold role
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Runs the credential lookup off the Tk thread
+from PythonExpenseApp.service_client import ServiceClient  # Optional thin-client transport
 
 
 class LoginGUI:
@@ -14,16 +16,18 @@ class LoginGUI:
             on_login_success (function): Callback function to be called after successful login, receives the current_user object.
         """
         self.root = root  # The main Tkinter window for the login GUI
-        self.root.title("Trip Manager - Login")  # Set the window title
-        self.root.geometry("650x800")  # Set the window size (width x height)
-        self.root.resizable(True, True)  # Allow window resizing in both directions
+        self.window = root.winfo_toplevel()  # Window hosting the form (root may be a ViewRouter frame)
+        self.window.title("Trip Manager - Login")  # Set the window title
+        self.window.geometry("650x800")  # Set the window size (width x height)
+        self.window.resizable(True, True)  # Allow window resizing in both directions
         self.root.configure(bg='#f8fafc')  # Set the background color of the window
         self.on_login_success = on_login_success  # Callback for successful login
         
         # Center the window on the screen
-        self.root.eval('tk::PlaceWindow . center')
+        self.window.eval('tk::PlaceWindow . center')
         
         self.create_widgets()  # Build and place all widgets in the window
+        self.resume_saved_session()  # Sign in again with the token of the last login, if any
 
     def create_widgets(self):
         """
@@ -42,7 +46,7 @@ class LoginGUI:
         exit_btn = tk.Button(header_frame, text="✕ Exit", 
                             font=("Segoe UI", 12, "bold"), bg="#dc2626", fg="white",
                             relief='flat', bd=0, activebackground="#b91c1c",
-                            cursor="hand2", command=self.root.quit)
+                            cursor="hand2", command=self.window.quit)
         exit_btn.pack(side=tk.RIGHT, anchor='ne', pady=10)
         
         # Main title label for the application
@@ -75,22 +79,30 @@ class LoginGUI:
         # Password entry field for user input (masked)
         self.password_entry = tk.Entry(form_frame, font=("Segoe UI", 16), bg="#ffffff", 
                                       fg="#1f2937", relief='solid', bd=1, show="*")
-        self.password_entry.pack(fill=tk.X, pady=(0, 25), ipady=10)  # Increased spacing and padding
+        self.password_entry.pack(fill=tk.X, pady=(0, 15), ipady=10)  # Increased spacing and padding
+
+        # Keep a signed session token so the next launch skips the password
+        # (off by default: the lab computers are shared)
+        self.remember_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(form_frame, text="Keep me signed in", variable=self.remember_var,
+                       font=("Segoe UI", 12), bg="#ffffff", fg="#374151",
+                       activebackground="#ffffff").pack(anchor='w', pady=(0, 10))
         
         # Login button to submit credentials
-        login_btn = tk.Button(form_frame, text="Sign In", font=("Segoe UI", 16, "bold"), 
+        self.login_btn = tk.Button(form_frame, text="Sign In", font=("Segoe UI", 16, "bold"), 
                              bg="#3b82f6", fg="#ffffff", relief='flat', bd=0,
                              activebackground="#2563eb", activeforeground="#ffffff", 
                              cursor="hand2", command=self.login)
-        login_btn.pack(fill=tk.X, pady=15, ipady=15)  # Increased button padding
+        self.login_btn.pack(fill=tk.X, pady=15, ipady=15)  # Increased button padding
         
         # Feedback label to display error or status messages
         self.feedback_label = tk.Label(form_frame, text="", font=("Segoe UI", 14), 
                                       bg="#ffffff", fg="#dc2626")
         self.feedback_label.pack(pady=(15, 0))
         
-        # Bind the Enter key to trigger the login function
-        self.root.bind('<Return>', lambda e: self.login())
+        # Bind the Enter key to trigger the login function (only on the form fields, the window is shared)
+        self.username_entry.bind('<Return>', lambda e: self.login())
+        self.password_entry.bind('<Return>', lambda e: self.login())
         # Focus on the username entry field by default
         self.username_entry.focus()
 
@@ -107,39 +119,150 @@ class LoginGUI:
             self.feedback_label.config(text="Please enter both username and password.")
             return
             
-        connection = DbConnection.connect()  # Establish a connection to the database
-        if connection:
-            try:
-                cursor = connection.cursor()  # Create a cursor for executing SQL queries
-                # Use plain text password comparison (for demonstration; not secure for production)
-                query = "SELECT id, name, surname, email, password, special_needs, role, class, age FROM students WHERE email = %s"
-                cursor.execute(query, (username,))  # Execute the query with the provided username (email)
-                result = cursor.fetchone()  # Fetch the first matching record
-                connection.close()
-
-                if result:
-                    user_id, name, surname, email, stored_password, special_needs, role, class_, age = result
-                    if stored_password == password:  # Controlla se la password inserita corrisponde a quella salvata nel database
-                        current_user = Student(name, surname, age, special_needs)  # Crea un oggetto Student con i dati dell'utente
-                        current_user.class_ = class_  # Assegna la classe all'oggetto Student
-                        current_user.id = user_id  # Assegna l'ID all'oggetto Student
-                        current_user.email = email  # Assegna l'email all'oggetto Student
-                        setattr(current_user, 'role', role)  # Imposta il ruolo (es. student, teacher) nell'oggetto Student
-
-                        # Show a success message and close the login window
-                        messagebox.showinfo("Login Successful", f"Welcome {name} {surname} ({role})!", parent=self.root)  # Mostra un messaggio di successo
-                        self.root.destroy()  # Chiude la finestra di login
-                        if self.on_login_success:  # Se è stata fornita una callback per il login
-                            self.on_login_success(current_user)  # Chiama la callback passando l'oggetto utente loggato
-                    else:
-                        # Show error if password does not match
-                        messagebox.showerror("Login Failed", "Invalid username or password.", parent=self.root)  # Mostra errore se la password non corrisponde
-                else:
-                    # Show error if no user is found with the given username
-                    messagebox.showerror("Login Failed", "Invalid username or password.", parent=self.root)  # Mostra errore se l'utente non esiste
-            except Exception as e:
-                # Show error if a database or query error occurs
-                messagebox.showerror("Login Error", f"An error occurred: {e}", parent=self.root)  # Mostra errore se c'è un problema con il database o la query
+        # Look the user up on the background worker so the window stays responsive
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'login'),  # Repeated Enter presses collapse into a single lookup
+            lambda: LoginGUI.fetch_user(username, password),  # Executed off the Tk thread
+            on_success=self._on_user_fetched,  # Complete the login on the Tk thread
+            on_error=self._on_login_error,  # Report database errors
+            on_loading=self._set_loading)  # Disable the form while the lookup runs
+
+    @staticmethod
+    def fetch_user(username, password):
+        """
+        Fetch the student matching the given credentials. Safe to call from a worker thread.
+        The password is checked here (Auth.login, the hash runs on the KDF pool), so the
+        stored hash never leaves this function (nor the service, in thin-client mode).
+
+        Args:
+            username (str): The email entered in the login form.
+            password (str): The password entered in the login form.
+        Returns:
+            tuple or None: (row, token) with row = (id, name, surname, email, special_needs,
+                           role, class, age) and the session token of the login,
+                           None if the email does not exist or the password is wrong.
+        Raises:
+            ConnectionError: If the database is not reachable.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: the service checks the credentials
+            return client.call('login.authenticate', username=username, password=password)
+        return Auth.login(username, password)
+
+    @staticmethod
+    def resume_session(token):
+        """
+        Sign in again with the session token of a previous login (no password hash).
+        Safe to call from a worker thread.
+
+        Args:
+            token (str): Token returned by fetch_user.
+        Returns:
+            tuple or None: Same as fetch_user (with a renewed token), None if the token
+                           expired, is not valid or the password changed since.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: the service signed the token
+            return client.call('login.resume', token=token)
+        return Auth.resume(token)
+
+    def resume_saved_session(self):
+        """
+        Submit the saved session token, if any, on the background worker.
+        The form stays usable meanwhile; a rejected token is deleted.
+        """
+        token = SessionTokens.load()
+        if not token:
+            return
+        self.remember_var.set(True)
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'login'),  # Replaced by a login typed meanwhile
+            lambda: LoginGUI.resume_session(token),
+            on_success=self._on_session_resumed,
+            on_error=lambda error: None)  # Offline: the user can still sign in with the password
+
+    def _on_session_resumed(self, result):
+        """
+        Complete the login from a saved token on the Tk thread (no welcome message).
+
+        Args:
+            result (tuple or None): Result of resume_session.
+        """
+        if not result:
+            SessionTokens.forget()  # Expired or revoked: ask for the password
+            return
+        row, token = result
+        SessionTokens.save(token)  # Renewed expiry
+        ServiceClient.set_session_token(token)  # Authenticates the service calls (thin client)
+        if self.on_login_success:
+            self.on_login_success(self._student_from_row(row))
+
+    @staticmethod
+    def _student_from_row(row):
+        """
+        Build the logged in Student from a row of fetch_user.
+
+        Args:
+            row (tuple): (id, name, surname, email, special_needs, role, class, age).
+        Returns:
+            Student: The student with id, email, class and role set.
+        """
+        user_id, name, surname, email, special_needs, role, class_, age = row
+        current_user = Student(name, surname, age, special_needs)  # Crea un oggetto Student con i dati dell'utente
+        current_user.class_ = class_  # Assegna la classe all'oggetto Student
+        current_user.id = user_id  # Assegna l'ID all'oggetto Student
+        current_user.email = email  # Assegna l'email all'oggetto Student
+        setattr(current_user, 'role', role)  # Imposta il ruolo (es. student, teacher) nell'oggetto Student
+        return current_user
+
+    def _on_user_fetched(self, result):
+        """
+        Complete the login on the Tk thread once the credentials have been checked.
+
+        Args:
+            result (tuple or None): (row, token) returned by fetch_user.
+        """
+        if result:
+            row, token = result
+            current_user = self._student_from_row(row)
+            name, surname, role = row[1], row[2], row[5]
+            ServiceClient.set_session_token(token)  # Authenticates the service calls (thin client)
+            if self.remember_var.get():
+                SessionTokens.save(token)  # The next launch skips the password
+            else:
+                SessionTokens.forget()
+
+            # Show a success message and hand over to the next screen
+            messagebox.showinfo("Login Successful", f"Welcome {name} {surname} ({role})!", parent=self.root)  # Mostra un messaggio di successo
+            if self.on_login_success:  # La callback sostituisce la schermata di login
+                self.on_login_success(current_user)  # Chiama la callback passando l'oggetto utente loggato
         else:
+            # Show error if no user is found or the password does not match
+            messagebox.showerror("Login Failed", "Invalid username or password.", parent=self.root)  # Mostra errore se l'utente non esiste o la password è errata
+
+    def _on_login_error(self, error):
+        """
+        Report a failed lookup on the Tk thread.
+
+        Args:
+            error (Exception): The exception raised by fetch_user.
+        """
+        if isinstance(error, ConnectionError):
             # Show error if the database connection fails
-            messagebox.showerror("Database Error", "Could not connect to the database.", parent=self.root)  # Mostra errore se la connessione al database fallisce
+            messagebox.showerror("Database Error", str(error), parent=self.root)  # Mostra errore se la connessione al database fallisce
+        else:
+            # Show error if a database or query error occurs
+            messagebox.showerror("Login Error", f"An error occurred: {error}", parent=self.root)  # Mostra errore se c'è un problema con il database o la query
+
+    def _set_loading(self, is_loading):
+        """
+        Loading indicator: disable the Sign In button while credentials are being checked.
+
+        Args:
+            is_loading (bool): True while the lookup is running.
+        """
+        if is_loading:
+            self.login_btn.config(state='disabled', text="Signing in...")
+            self.feedback_label.config(text="")
+        else:
+            self.login_btn.config(state='normal', text="Sign In")
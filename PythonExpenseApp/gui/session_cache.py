@@ -0,0 +1,277 @@
+# ===================================================================
+# SESSION CACHE - POST-LOGIN PREFETCH SHARED BY THE VIEWS
+# ===================================================================
+# Every screen used to load its data when it was first shown, so each
+# navigation after the login waited for cold queries. The SessionCache of
+# the window keeps the datasets of the logged in user (one entry per
+# dataset and arguments) and prefetch() loads the working set of the
+# user's role on the background worker as soon as the login succeeds:
+#
+#   student   today's schedule, activity catalogue, own enrollments,
+#             own debt balances, student list and expense audiences
+#   teacher   teacher dashboard (rosters, counts, search indexes)
+#
+# Views load through load(): a cached value is rendered immediately, then
+# revalidated in the background when it is older than FRESH_SECONDS or a
+# topic it depends on changed (the ViewRouter topic versions, bumped by
+# ViewRouter.notify_changed after a write); the view renders again only
+# if the value changed. A load while the same dataset is being fetched
+# (e.g. the prefetch) waits for that fetch instead of querying again,
+# unless a topic changed since that fetch started: the load then starts a
+# new fetch, which replaces the running one (BackgroundWorker.submit).
+#
+# Everything runs on the Tk thread except the loaders (the static fetch_*
+# methods of the views, on the BackgroundWorker). Cached values are shared
+# by the views: they must not be modified in place.
+#
+# KEY RESPONSIBILITIES:
+# 1. Prefetch the role-specific working set after the login
+# 2. Serve cached datasets immediately and revalidate stale ones
+# 3. Collapse concurrent loads of the same dataset into one query
+#
+# USAGE:
+#   SessionCache.for_root(root).prefetch(student)       # main.on_login_success
+#   SessionCache.for_root(self.root).load(
+#       'debts', student_id, request_key=(id(self), 'debts'),
+#       on_success=self._render_debts, on_loading=self._set_loading)
+# ===================================================================
+
+import logging  # Results delivered to destroyed views
+import time  # Age of the cached datasets
+
+import tkinter as tk  # Only needed for TclError
+
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Runs the loaders off the Tk thread
+from PythonExpenseApp.gui.view_router import ViewRouter  # Topic versions of the window
+
+
+def _today_schedule():
+    from PythonExpenseApp.gui.dashboard_gui import DashboardGUI
+    return DashboardGUI.fetch_today_schedule()
+
+
+def _activities():
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_activities()
+
+
+def _subscriptions(student_id):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_subscriptions(student_id)
+
+
+def _debts(student_id):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_debts(student_id)
+
+
+def _students():
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.build_student_index(ExpenseGUI.fetch_students())
+
+
+def _audiences():
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_audiences()
+
+
+def _teacher_dashboard():
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.build_search_indexes(TeacherDashboard.fetch_dashboard_data())
+
+
+# Dataset -> (loader(*args), topics the data depends on)
+DATASETS = {
+    'today_schedule': (_today_schedule, ('activities',)),
+    'activities': (_activities, ('activities', 'enrollments')),
+    'subscriptions': (_subscriptions, ('activities', 'enrollments')),
+    'debts': (_debts, ('expenses', 'debts')),
+    'students': (_students, ('students',)),
+    'audiences': (_audiences, ('students', 'activities')),
+    'teacher_dashboard': (_teacher_dashboard, ('activities', 'students', 'enrollments', 'expenses')),
+}
+
+
+class _Entry:
+    """
+    A cached dataset.
+
+    ATTRIBUTES:
+        value (object): Last loaded value (meaningful when loaded is True)
+        loaded (bool): A value has been loaded
+        loaded_at (float): time.monotonic() of the last load
+        versions (dict): Topic versions when the last load started
+        fetching (bool): A load is running
+        fetch_versions (dict): Topic versions when the running load started
+        waiters (dict): request_key -> (on_success, on_error, on_loading, rendered value)
+    """
+
+    __slots__ = ('value', 'loaded', 'loaded_at', 'versions', 'fetching', 'fetch_versions', 'waiters')
+
+    def __init__(self):
+        self.value = None
+        self.loaded = False
+        self.loaded_at = 0.0
+        self.versions = {}
+        self.fetching = False
+        self.fetch_versions = {}
+        self.waiters = {}
+
+
+# Marks a waiter that has not rendered any value yet
+_NOTHING = object()
+
+
+class SessionCache:
+    """
+    Datasets of the logged in user, shared by the views of one window.
+    Only used from the Tk thread.
+    """
+
+    # Seconds a loaded dataset is served without revalidation
+    FRESH_SECONDS = 30
+
+    def __init__(self, window):
+        """
+        :param window: tk.Tk - Window the cache belongs to (see for_root).
+        """
+        self.window = window
+        self._entries = {}  # (dataset, *args) -> _Entry
+        self._generation = 0  # Bumped by clear(): loads started before are dropped
+
+    @classmethod
+    def for_root(cls, widget):
+        """
+        Return the SessionCache of the window containing the widget, creating it if needed.
+
+        :param widget: Any Tk widget.
+        :return: SessionCache
+        """
+        window = widget.winfo_toplevel()
+        cache = getattr(window, '_session_cache', None)
+        if cache is None:
+            cache = cls(window)
+            window._session_cache = cache
+        return cache
+
+    @staticmethod
+    def working_set(student):
+        """
+        :param student: Student - The logged in user (role attribute optional).
+        :return: list - (dataset, *args) to prefetch, the landing screen's first.
+        """
+        if getattr(student, 'role', 'student') == 'teacher':
+            return [('teacher_dashboard',)]
+        return [('today_schedule',), ('activities',), ('debts', student.id),
+                ('subscriptions', student.id), ('students',), ('audiences',)]
+
+    def clear(self):
+        """Forget every dataset (another user logged in)."""
+        self._entries.clear()
+        self._generation += 1
+
+    def prefetch(self, student):
+        """
+        Start loading the working set of the user in the background.
+
+        :param student: Student - The user who just logged in.
+        :return: None
+        """
+        self.clear()
+        for name, *args in self.working_set(student):
+            self._fetch(name, tuple(args))
+
+    def load(self, name, *args, request_key, on_success, on_error=None, on_loading=None,
+             force=False, stale_ok=True):
+        """
+        Deliver a dataset to a view: the cached value immediately (if any), then the
+        revalidated value when the cached one is stale and the new one differs.
+
+        :param name: str - Key of DATASETS.
+        :param args: Arguments of the loader (e.g. the student id).
+        :param request_key: hashable - Identity of the view's request (a newer load with
+                            the same key replaces the callbacks of the older one).
+        :param on_success: callable(value) - Render the data (Tk thread).
+        :param on_error: callable(exception), optional - Called when nothing could be rendered.
+        :param on_loading: callable(bool), optional - Loading indicator, only while nothing is rendered.
+        :param force: bool - Revalidate even a fresh value.
+        :param stale_ok: bool - Render a stale value before revalidating it (False: wait for
+                         the new value, e.g. views that render once, like a message box).
+        :return: None
+        """
+        topics = DATASETS[name][1]
+        entry = self._entries.get((name, *args))
+        rendered = _NOTHING
+        if entry is not None and entry.loaded:
+            stale = force or self._is_stale(entry, topics)
+            if not stale or stale_ok:
+                on_success(entry.value)
+                if not stale:
+                    return
+                rendered = entry.value
+        if rendered is _NOTHING and on_loading is not None:
+            on_loading(True)
+        # Join a running fetch only if no write happened since it started (its data would predate it)
+        joinable = entry is not None and entry.fetching and entry.fetch_versions == self._versions(topics)
+        entry = self._fetch(name, args, start=force or not joinable)
+        entry.waiters[request_key] = (on_success, on_error, on_loading, rendered)
+
+    def _versions(self, topics):
+        router = ViewRouter.of(self.window)
+        return router.topic_versions(topics) if router is not None else {}
+
+    def _is_stale(self, entry, topics):
+        return (time.monotonic() - entry.loaded_at > self.FRESH_SECONDS
+                or entry.versions != self._versions(topics))
+
+    def _fetch(self, name, args, start=True):
+        """Submit the loader of a dataset (unless start is False); returns its entry."""
+        key = (name, *args)
+        entry = self._entries.setdefault(key, _Entry())
+        if not start:
+            return entry
+        loader, topics = DATASETS[name]
+        generation = self._generation
+        versions = self._versions(topics)  # A write during the load leaves the result stale
+        entry.fetching, entry.fetch_versions = True, versions
+        BackgroundWorker.for_root(self.window).submit(
+            ('session_cache', key),  # One running load per dataset, repeated loads are coalesced
+            lambda: loader(*args),
+            on_success=lambda value: self._deliver(key, generation, versions, value),
+            on_error=lambda error: self._fail(key, generation, error))
+        return entry
+
+    def _deliver(self, key, generation, versions, value):
+        entry = self._entries.get(key)
+        if generation != self._generation or entry is None:
+            return
+        entry.value, entry.loaded, entry.loaded_at = value, True, time.monotonic()
+        entry.versions, entry.fetching = versions, False
+        waiters, entry.waiters = entry.waiters, {}
+        for on_success, _, on_loading, rendered in waiters.values():
+            if on_loading is not None and rendered is _NOTHING:
+                self._call(key, on_loading, False)
+            if rendered is _NOTHING or rendered != value:
+                self._call(key, on_success, value)
+
+    def _fail(self, key, generation, error):
+        entry = self._entries.get(key)
+        if generation != self._generation or entry is None:
+            return
+        entry.fetching = False
+        waiters, entry.waiters = entry.waiters, {}
+        for _, on_error, on_loading, rendered in waiters.values():
+            if rendered is not _NOTHING:
+                continue  # The cached value stays on screen
+            if on_loading is not None:
+                self._call(key, on_loading, False)
+            if on_error is not None:
+                self._call(key, on_error, error)
+
+    @staticmethod
+    def _call(key, callback, *args):
+        """Invoke a view callback; a view destroyed meanwhile does not stop the other waiters."""
+        try:
+            callback(*args)
+        except tk.TclError as e:
+            logging.warning(f"Could not deliver {key!r}: {e}")
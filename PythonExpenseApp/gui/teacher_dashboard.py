@@ -1,32 +1,79 @@
 import tkinter as tk  # Importa la libreria base per la GUI
 from tkinter import ttk, messagebox  # Importa widget avanzati e finestre di messaggio di Tkinter
-from db_connection import DbConnection  # Importa la classe per la connessione al database
+from PythonExpenseApp.db_connection import DbConnection  # Importa la classe per la connessione al database
+from PythonExpenseApp.gui.background_worker import BackgroundWorker, Debouncer  # Esegue le query fuori dal thread Tk
+from PythonExpenseApp.gui.session_cache import SessionCache  # Dati precaricati dopo il login
+from PythonExpenseApp.gui.virtual_table import VirtualTreeview, PagedQuerySource  # Tabelle che disegnano solo le righe visibili
+from PythonExpenseApp.search_index import SearchIndex  # Indice di ricerca costruito una volta per caricamento
+from PythonExpenseApp.service_client import ServiceClient  # Trasporto opzionale verso il servizio (thin client)
 import datetime  # Importa il modulo datetime per gestire date e orari
 from collections import defaultdict  # Importa defaultdict per strutture dati avanzate
 
 class TeacherDashboard:  # Definisce la classe principale della dashboard insegnante
-    def __init__(self, root, teacher, main_dashboard_callback):  # Costruttore della dashboard
+    # Oltre questo numero di studenti la tabella legge le righe a pagine dal database invece di caricarle tutte
+    STUDENT_ROWS_BUDGET = 20000
+
+    # Query degli studenti (condivisa tra caricamento completo e caricamento a pagine)
+    STUDENTS_SELECT = """
+        SELECT s.id, s.name, s.surname, s.class, s.email, s.age, 
+               s.special_needs, 
+               (SELECT COUNT(*) FROM student_activities sa WHERE sa.student_id = s.id) as activity_count
+        FROM students s
+        WHERE s.role = 'student'"""
+    STUDENTS_ORDER = " ORDER BY s.class, s.surname, s.name, s.id"
+
+    # Campi ricercabili (es. "name:gita location:museo", "class:4A rossi")
+    ACTIVITY_SEARCH_FIELDS = {
+        'name': lambda activity: activity[1],
+        'location': lambda activity: activity[5],
+        'day': lambda activity: activity[2].strftime("%Y-%m-%d") if activity[2] else "N/A",
+        'description': lambda activity: activity[7],
+    }
+    STUDENT_SEARCH_FIELDS = {
+        'name': lambda student: student[1],
+        'surname': lambda student: student[2],
+        'class': lambda student: student[3],
+        'email': lambda student: student[4],
+    }
+
+    def __init__(self, root, teacher, main_dashboard_callback, sign_out_callback=None):  # Costruttore della dashboard
         """
         Initialize the TeacherDashboard window and set up the UI for the teacher's dashboard.
         Args:
             root (tk.Tk): The main Tkinter window instance.
             teacher (object): The teacher object (should have name, surname, role attributes).
             main_dashboard_callback (function): Callback to return to the main dashboard.
+            sign_out_callback (function, optional): Callback to sign out and return to the login.
         """
         self.root = root  # Salva la finestra principale Tkinter
         self.teacher = teacher  # Salva l'oggetto insegnante (contiene nome, cognome, ruolo)
         self.main_dashboard_callback = main_dashboard_callback  # Callback per tornare alla dashboard principale
+        self.sign_out_callback = sign_out_callback  # Callback per uscire e tornare al login (opzionale)
         
-        self.root.title("Teacher Dashboard - Trip Manager")  # Imposta il titolo della finestra
-        self.root.geometry("1400x900")  # Imposta la dimensione della finestra
+        self.window = root.winfo_toplevel()  # Finestra che contiene la dashboard (root può essere un frame del ViewRouter)
+        self.window.title("Teacher Dashboard - Trip Manager")  # Imposta il titolo della finestra
+        self.window.geometry("1400x900")  # Imposta la dimensione della finestra
         self.root.configure(bg='#f8fafc')  # Imposta il colore di sfondo
         
         # Prova a massimizzare la finestra (dipende dal sistema operativo)
         try:
-            self.root.state('zoomed')  # Tenta di massimizzare la finestra
+            self.window.state('zoomed')  # Tenta di massimizzare la finestra
         except tk.TclError:
             pass  # Se non funziona, ignora l'errore
-        
+
+        # Dati vuoti finché il caricamento in background non termina (i filtri possono scattare prima)
+        self.activities_data = []  # Tuple con dati attività
+        self.students_data = []  # Tuple con dati studenti
+        self.students_total = 0  # Numero totale di studenti (anche quando letti a pagine)
+        self.students_paged = False  # True se gli studenti superano STUDENT_ROWS_BUDGET
+        self.unique_days = []  # Giorni unici per i filtri
+        self.unique_classes = []  # Classi uniche per i filtri
+        self.popular_activities = []  # Attività più popolari (tab analytics)
+        self.activity_index = SearchIndex([], TeacherDashboard.ACTIVITY_SEARCH_FIELDS,
+                                          exact_fields=('day',))  # Indice di ricerca attività (stessi filtri di quello caricato)
+        self.student_index = SearchIndex([], TeacherDashboard.STUDENT_SEARCH_FIELDS,
+                                         exact_fields=('class',))  # Indice di ricerca studenti
+
         self.setup_ui()  # Costruisce e posiziona tutti i widget
         self.load_data()  # Carica tutti i dati dal database
 
@@ -98,7 +145,8 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         
         # Variables for search and filter
         self.activity_search_var = tk.StringVar()  # Variabile per il termine di ricerca attività
-        self.activity_search_var.trace('w', self.filter_activities)  # Aggiorna filtro quando cambia
+        self.activity_search_debouncer = Debouncer(self.root, self.filter_activities)  # Filtra solo quando si smette di digitare
+        self.activity_search_var.trace('w', self.activity_search_debouncer.trigger)  # Aggiorna filtro quando cambia
         search_entry = tk.Entry(search_frame, textvariable=self.activity_search_var,
                                font=("Segoe UI", 11), width=30)  # Campo di testo ricerca
         search_entry.pack(side=tk.LEFT, padx=(0, 20))  # Posiziona il campo
@@ -113,31 +161,14 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         self.day_filter.pack(side=tk.LEFT)  # Posiziona la combobox
         self.day_filter.bind('<<ComboboxSelected>>', self.filter_activities)  # Aggiorna filtro al cambio
         
-        # Activities treeview
-        tree_frame = tk.Frame(activities_frame)  # Frame per la treeview attività
+        # Activities table (virtualizzata: solo le righe visibili sono disegnate)
+        tree_frame = tk.Frame(activities_frame)  # Frame per la tabella attività
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)  # Occupa tutto lo spazio
         
-        # Scrollbars
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")  # Scrollbar verticale
-        h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal")  # Scrollbar orizzontale
-        
-        self.activities_tree = ttk.Treeview(tree_frame, 
-                                           columns=("day", "time", "location", "participants", "max_participants", "description"),
-                                           show="tree headings",
-                                           yscrollcommand=v_scrollbar.set,
-                                           xscrollcommand=h_scrollbar.set)  # Treeview con colonne personalizzate
-        
-        # Configure scrollbars
-        v_scrollbar.config(command=self.activities_tree.yview)  # Collega scrollbar verticale
-        h_scrollbar.config(command=self.activities_tree.xview)  # Collega scrollbar orizzontale
-        
-        # Grid layout for treeview and scrollbars
-        self.activities_tree.grid(row=0, column=0, sticky="nsew")  # Posiziona la treeview nella griglia
-        v_scrollbar.grid(row=0, column=1, sticky="ns")  # Posiziona la scrollbar verticale
-        h_scrollbar.grid(row=1, column=0, sticky="ew")  # Posiziona la scrollbar orizzontale
-        
-        tree_frame.grid_rowconfigure(0, weight=1)  # Permette espansione verticale
-        tree_frame.grid_columnconfigure(0, weight=1)  # Permette espansione orizzontale
+        self.activities_tree = VirtualTreeview(tree_frame,
+                                               columns=("day", "time", "location", "participants", "max_participants", "description"),
+                                               formatter=self.format_activity_row)  # Tabella con colonne personalizzate e scrollbar
+        self.activities_tree.pack(fill=tk.BOTH, expand=True)  # Posiziona la tabella
         
         # Configure columns
         self.activities_tree.heading("#0", text="Activity Name", anchor="w")  # Intestazione colonna nome attività
@@ -158,7 +189,7 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         self.activities_tree.column("description", width=300, minwidth=200)  # Larghezza colonna descrizione
         
         # Bind double-click to show participants
-        self.activities_tree.bind("<Double-1>", self.show_activity_participants)  # Doppio click per mostrare partecipanti
+        self.activities_tree.tree.bind("<Double-1>", self.show_activity_participants)  # Doppio click per mostrare partecipanti
 
     def create_participants_tab(self):
         """
@@ -177,7 +208,8 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         
         # Variables for search and filter
         self.student_search_var = tk.StringVar()  # Variabile per il termine di ricerca studenti
-        self.student_search_var.trace('w', self.filter_students)  # Aggiorna filtro quando cambia
+        self.student_search_debouncer = Debouncer(self.root, self.filter_students)  # Filtra solo quando si smette di digitare
+        self.student_search_var.trace('w', self.student_search_debouncer.trigger)  # Aggiorna filtro quando cambia
         search_entry = tk.Entry(search_frame, textvariable=self.student_search_var,
                                font=("Segoe UI", 11), width=30)  # Campo di testo ricerca
         search_entry.pack(side=tk.LEFT, padx=(0, 20))  # Posiziona il campo
@@ -192,28 +224,14 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         self.class_filter.pack(side=tk.LEFT)  # Posiziona la combobox
         self.class_filter.bind('<<ComboboxSelected>>', self.filter_students)  # Aggiorna filtro al cambio
         
-        # Students treeview
-        tree_frame = tk.Frame(participants_frame)  # Frame per la treeview studenti
+        # Students table (virtualizzata: solo le righe visibili sono disegnate)
+        tree_frame = tk.Frame(participants_frame)  # Frame per la tabella studenti
         tree_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)  # Occupa tutto lo spazio
         
-        v_scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")  # Scrollbar verticale
-        h_scrollbar = ttk.Scrollbar(tree_frame, orient="horizontal")  # Scrollbar orizzontale
-        
-        self.students_tree = ttk.Treeview(tree_frame,
-                                         columns=("class", "email", "age", "activities_count", "special_needs"),
-                                         show="tree headings",
-                                         yscrollcommand=v_scrollbar.set,
-                                         xscrollcommand=h_scrollbar.set)  # Treeview con colonne personalizzate
-        
-        v_scrollbar.config(command=self.students_tree.yview)  # Collega scrollbar verticale
-        h_scrollbar.config(command=self.students_tree.xview)  # Collega scrollbar orizzontale
-        
-        self.students_tree.grid(row=0, column=0, sticky="nsew")  # Posiziona la treeview nella griglia
-        v_scrollbar.grid(row=0, column=1, sticky="ns")  # Posiziona la scrollbar verticale
-        h_scrollbar.grid(row=1, column=0, sticky="ew")  # Posiziona la scrollbar orizzontale
-        
-        tree_frame.grid_rowconfigure(0, weight=1)  # Permette espansione verticale
-        tree_frame.grid_columnconfigure(0, weight=1)  # Permette espansione orizzontale
+        self.students_tree = VirtualTreeview(tree_frame,
+                                             columns=("class", "email", "age", "activities_count", "special_needs"),
+                                             formatter=self.format_student_row)  # Tabella con colonne personalizzate e scrollbar
+        self.students_tree.pack(fill=tk.BOTH, expand=True)  # Posiziona la tabella
         
         # Configure columns
         self.students_tree.heading("#0", text="Student Name", anchor="w")  # Intestazione colonna nome studente
@@ -232,7 +250,7 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         self.students_tree.column("special_needs", width=300, minwidth=200)  # Larghezza colonna bisogni speciali
         
         # Bind double-click to show student activities
-        self.students_tree.bind("<Double-1>", self.show_student_activities)  # Doppio click per mostrare attività studente
+        self.students_tree.tree.bind("<Double-1>", self.show_student_activities)  # Doppio click per mostrare attività studente
 
     def create_schedule_tab(self):
         """
@@ -330,23 +348,56 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
                             relief='flat', bd=0, activebackground="#4b5563",
                             cursor="hand2", command=self.go_back)  # Pulsante per tornare alla dashboard principale
         back_btn.pack(side=tk.LEFT, padx=20, pady=15)  # Posiziona il pulsante a sinistra
+
+        if self.sign_out_callback:  # Pulsante di uscita (dimentica anche la sessione salvata)
+            sign_out_btn = tk.Button(footer_frame, text="Sign Out",
+                                     font=("Segoe UI", 12, "bold"), bg="#ef4444", fg="white",
+                                     relief='flat', bd=0, activebackground="#dc2626",
+                                     cursor="hand2", command=self.sign_out_callback)  # Torna alla schermata di login
+            sign_out_btn.pack(side=tk.LEFT, padx=(0, 20), pady=15)  # Accanto al pulsante indietro
         
         # Status label for messages
         self.status_label = tk.Label(footer_frame, text="Ready",
                                     font=("Segoe UI", 10), bg="#e5e7eb", fg="#64748b")  # Label di stato
         self.status_label.pack(side=tk.RIGHT, padx=20, pady=15)  # Posiziona la label a destra
 
+    def refresh_data(self):
+        """
+        Reload every dataset (called by the ViewRouter when the dashboard is shown with stale data).
+        """
+        self.load_data()
+
     def load_data(self):
         """
         Load all activities, students, unique days, and classes from the database.
-        Populates the UI with the loaded data and sets up filters and analytics.
+        The data prefetched after the login is shown at once and revalidated on the
+        background worker (see session_cache.py); the UI is populated in _on_data_loaded.
         """
-        self.update_status("Loading data...")  # Mostra stato di caricamento
-        
-        connection = DbConnection.connect()  # Connessione al database
+        SessionCache.for_root(self.root).load(
+            'teacher_dashboard',  # Precaricati dopo il login (fetch_dashboard_data + build_search_indexes)
+            request_key=(id(self), 'data'),  # Chiave della richiesta (refresh ripetuti vengono accorpati)
+            on_success=self._on_data_loaded,  # Popola la UI con i dati caricati
+            on_error=self._on_data_error,  # Mostra l'errore
+            on_loading=lambda loading: loading and self.update_status("Loading data..."))  # Indicatore di caricamento
+
+    @staticmethod
+    def fetch_dashboard_data():
+        """
+        Run every query needed by the dashboard. Safe to call from a worker thread
+        (no Tkinter calls).
+
+        Returns:
+            dict: activities, students (None when paged), students_total, unique_days,
+                  unique_classes, popular_activities
+        Raises:
+            ConnectionError: If the database is not reachable.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('teacher_dashboard.data')
+        connection = DbConnection.connect(read_only=True)  # Connessione al database (può essere una replica)
         if not connection:
-            messagebox.showerror("Database Error", "Could not connect to database")  # Mostra errore se la connessione fallisce
-            return
+            raise ConnectionError("Could not connect to database")  # Gestito da on_error sul thread Tk
         
         try:
             cursor = connection.cursor()  # Crea un cursore per le query
@@ -358,78 +409,152 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
                 FROM activities a
                 ORDER BY a.day, a.start_time
             """)  # Query per tutte le attività con conteggio partecipanti
-            self.activities_data = cursor.fetchall()  # Lista di tuple con dati attività
+            activities = cursor.fetchall()  # Lista di tuple con dati attività
             
-            # Load all students with activity counts
-            cursor.execute("""
-                SELECT s.id, s.name, s.surname, s.class, s.email, s.age, 
-                       s.special_needs, 
-                       (SELECT COUNT(*) FROM student_activities sa WHERE sa.student_id = s.id) as activity_count
-                FROM students s
-                WHERE s.role = 'student'
-                ORDER BY s.class, s.surname, s.name
-            """)  # Query per tutti gli studenti con conteggio attività
-            self.students_data = cursor.fetchall()  # Lista di tuple con dati studenti
+            # Load all students with activity counts (unless they exceed the memory budget)
+            cursor.execute("SELECT COUNT(*) FROM students WHERE role = 'student'")  # Numero totale di studenti
+            students_total = cursor.fetchone()[0]
+            if students_total > TeacherDashboard.STUDENT_ROWS_BUDGET:
+                students = None  # Troppi studenti: la tabella li leggerà a pagine
+            else:
+                cursor.execute(TeacherDashboard.STUDENTS_SELECT + TeacherDashboard.STUDENTS_ORDER)  # Query per tutti gli studenti con conteggio attività
+                students = cursor.fetchall()  # Lista di tuple con dati studenti
             
             # Load unique days and classes for filters
             cursor.execute("SELECT DISTINCT day FROM activities ORDER BY day")  # Giorni unici per filtro
-            self.unique_days = [row[0] for row in cursor.fetchall()]  # Lista di giorni unici
+            unique_days = [row[0] for row in cursor.fetchall()]  # Lista di giorni unici
             
             cursor.execute("SELECT DISTINCT class FROM students WHERE role = 'student' ORDER BY class")  # Classi uniche per filtro
-            self.unique_classes = [row[0] for row in cursor.fetchall()]  # Lista di classi uniche
-            
-            connection.close()  # Chiude la connessione
+            unique_classes = [row[0] for row in cursor.fetchall()]  # Lista di classi uniche
             
-            # Populate UI with loaded data
-            self.populate_activities()  # Popola la treeview attività
-            self.populate_students()  # Popola la treeview studenti
-            self.setup_filters()  # Imposta i valori dei filtri
-            self.load_analytics()  # Carica i dati analytics
-            self.setup_schedule_dates()  # Imposta le date disponibili per l'orario
-            self.update_quick_stats()  # Aggiorna le statistiche rapide
-            
-            self.update_status("Data loaded successfully")  # Mostra stato di successo
-            
-        except Exception as e:
-            connection.close()  # Chiude la connessione in caso di errore
-            messagebox.showerror("Error", f"Error loading data: {str(e)}")  # Mostra errore
-            self.update_status("Error loading data")  # Aggiorna stato
+            # Get popular activities (analytics tab)
+            cursor.execute("""
+                SELECT a.name, COUNT(sa.student_id) as participant_count
+                FROM activities a
+                LEFT JOIN student_activities sa ON a.id = sa.activity_id
+                GROUP BY a.id
+                ORDER BY participant_count DESC, a.name
+                LIMIT 10
+            """)
+            popular_activities = cursor.fetchall()  # Le 10 attività più popolari
+        finally:
+            connection.close()  # Chiude sempre la connessione
+        
+        return {
+            'activities': activities,
+            'students': students,
+            'students_total': students_total,
+            'unique_days': unique_days,
+            'unique_classes': unique_classes,
+            'popular_activities': popular_activities,
+        }
+
+    @staticmethod
+    def build_search_indexes(data):
+        """
+        Build the search indexes (with pre-rendered rows) for the loaded data.
+        Runs on the worker thread right after fetch_dashboard_data.
+
+        Args:
+            data (dict): Result of fetch_dashboard_data.
+        Returns:
+            dict: The same dict with activity_index and student_index added.
+        """
+        data['activity_index'] = SearchIndex(data['activities'], TeacherDashboard.ACTIVITY_SEARCH_FIELDS,
+                                             default_fields=('name', 'location'),
+                                             display=TeacherDashboard.format_activity_row,
+                                             exact_fields=('day',))  # Indice attività
+        data['student_index'] = SearchIndex(data['students'] or [], TeacherDashboard.STUDENT_SEARCH_FIELDS,
+                                            default_fields=('name', 'surname', 'email'),
+                                            display=TeacherDashboard.format_student_row,
+                                            exact_fields=('class',))  # Indice studenti (vuoto se letti a pagine)
+        return data
+
+    def _on_data_loaded(self, data):
+        """
+        Populate the UI with the data returned by fetch_dashboard_data (Tk thread).
+        Args:
+            data (dict): Result of fetch_dashboard_data.
+        """
+        self.activities_data = data['activities']  # Lista di tuple con dati attività
+        self.students_paged = data['students'] is None  # Gli studenti verranno letti a pagine
+        self.students_data = data['students'] or []  # Lista di tuple con dati studenti
+        self.students_total = data['students_total']  # Numero totale di studenti
+        self.unique_days = data['unique_days']  # Lista di giorni unici
+        self.unique_classes = data['unique_classes']  # Lista di classi uniche
+        self.popular_activities = data['popular_activities']  # Attività più popolari
+        self.activity_index = data['activity_index']  # Indice di ricerca attività
+        self.student_index = data['student_index']  # Indice di ricerca studenti
+        
+        # Populate UI with loaded data
+        self.populate_activities()  # Popola la treeview attività
+        self.populate_students()  # Popola la treeview studenti
+        self.setup_filters()  # Imposta i valori dei filtri
+        self.load_analytics()  # Carica i dati analytics
+        self.setup_schedule_dates()  # Imposta le date disponibili per l'orario
+        self.update_quick_stats()  # Aggiorna le statistiche rapide
+        
+        self.update_status("Data loaded successfully")  # Mostra stato di successo
+
+    def _on_data_error(self, error):
+        """
+        Report a failed dashboard load (Tk thread).
+        Args:
+            error (Exception): The exception raised by fetch_dashboard_data.
+        """
+        if isinstance(error, ConnectionError):
+            messagebox.showerror("Database Error", str(error))  # Mostra errore se la connessione fallisce
+        else:
+            messagebox.showerror("Error", f"Error loading data: {str(error)}")  # Mostra errore
+        self.update_status("Error loading data")  # Aggiorna stato
 
     def populate_activities(self):
         """
-        Populate the activities treeview with activity data.
-        """
-        # Clear existing items
-        for item in self.activities_tree.get_children():  # Cicla su tutti gli elementi attuali della treeview
-            self.activities_tree.delete(item)  # Elimina ogni elemento dalla treeview
-        for activity in self.activities_data:  # Cicla su tutte le attività caricate dal database
-            activity_id, name, day, start_time, finish_time, location, max_participants, description, participant_count = activity  # Estrae i dati dell'attività
-            start_hour = start_time // 60  # Calcola l'ora di inizio
-            start_min = start_time % 60  # Calcola i minuti di inizio
-            finish_hour = finish_time // 60  # Calcola l'ora di fine
-            finish_min = finish_time % 60  # Calcola i minuti di fine
-            time_str = f"{start_hour:02d}:{start_min:02d} - {finish_hour:02d}:{finish_min:02d}"  # Crea la stringa orario
-            max_str = str(max_participants) if max_participants else "∞"  # Mostra il massimo partecipanti o infinito
-            day_str = day.strftime("%Y-%m-%d") if hasattr(day, 'strftime') else str(day)  # Formatta la data
-            self.activities_tree.insert("", "end", text=name,  # Inserisce la riga nella treeview
-                                       values=(day_str, time_str, location, 
-                                              participant_count, max_str, description or ""))
+        Populate the activities table with activity data (current filters are kept).
+        """
+        self.filter_activities()  # Mostra le attività applicando i filtri correnti
 
     def populate_students(self):
         """
-        Populate the students treeview with student data.
+        Populate the students table with student data (current filters are kept).
+        """
+        self.filter_students()  # Mostra gli studenti applicando i filtri correnti
+
+    @staticmethod
+    def format_activity_row(activity):
+        """
+        Convert an activity row into the text and values shown by the activities table.
+        Called once per row when the search index is built.
+        Args:
+            activity (tuple): Activity row from fetch_dashboard_data.
+        Returns:
+            tuple: (text, values) for the Treeview item.
         """
-        # Clear existing items
-        for item in self.students_tree.get_children():  # Cicla su tutti gli elementi attuali della treeview
-            self.students_tree.delete(item)  # Elimina ogni elemento dalla treeview
-        for student in self.students_data:  # Cicla su tutti gli studenti caricati dal database
-            student_id, name, surname, class_name, email, age, special_needs, activity_count = student  # Estrae i dati dello studente
-            full_name = f"{name} {surname}"  # Crea la stringa nome completo
-            age_str = str(age) if age else "N/A"  # Mostra l'età o N/A
-            special_needs_str = special_needs or "None"  # Mostra bisogni speciali o None
-            self.students_tree.insert("", "end", text=full_name,  # Inserisce la riga nella treeview
-                                     values=(class_name, email, age_str, 
-                                            activity_count, special_needs_str))
+        activity_id, name, day, start_time, finish_time, location, max_participants, description, participant_count = activity  # Estrae i dati dell'attività
+        start_hour = start_time // 60  # Calcola l'ora di inizio
+        start_min = start_time % 60  # Calcola i minuti di inizio
+        finish_hour = finish_time // 60  # Calcola l'ora di fine
+        finish_min = finish_time % 60  # Calcola i minuti di fine
+        time_str = f"{start_hour:02d}:{start_min:02d} - {finish_hour:02d}:{finish_min:02d}"  # Crea la stringa orario
+        max_str = str(max_participants) if max_participants else "∞"  # Mostra il massimo partecipanti o infinito
+        day_str = day.strftime("%Y-%m-%d") if hasattr(day, 'strftime') else str(day)  # Formatta la data
+        return name, (day_str, time_str, location, participant_count, max_str, description or "")
+
+    @staticmethod
+    def format_student_row(student):
+        """
+        Convert a student row into the text and values shown by the students table.
+        Called once per row when the search index is built (or per visible row when paged).
+        Args:
+            student (tuple): Student row from fetch_dashboard_data or a database page.
+        Returns:
+            tuple: (text, values) for the Treeview item.
+        """
+        student_id, name, surname, class_name, email, age, special_needs, activity_count = student  # Estrae i dati dello studente
+        full_name = f"{name} {surname}"  # Crea la stringa nome completo
+        age_str = str(age) if age else "N/A"  # Mostra l'età o N/A
+        special_needs_str = special_needs or "None"  # Mostra bisogni speciali o None
+        return full_name, (class_name, email, age_str, activity_count, special_needs_str)
 
     def setup_filters(self):
         """
@@ -461,76 +586,108 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
 
     def filter_activities(self, *args):
         """
-        Filter the activities treeview based on the search term and selected day filter.
+        Filter the activities table based on the search query and selected day filter.
+        The query may use field prefixes: name:, location:, day:, description:.
         Args:
             *args: Required for Tkinter trace compatibility.
         """
-        search_term = self.activity_search_var.get().lower()  # Ottiene il termine di ricerca
+        query = self.activity_search_var.get()  # Ottiene il testo di ricerca
         day_filter = self.day_filter_var.get()  # Ottiene il filtro giorno selezionato
-        
-        # Clear existing items
-        for item in self.activities_tree.get_children():  # Elimina tutti gli elementi attuali
-            self.activities_tree.delete(item)
-            
-        for activity in self.activities_data:  # Cicla su tutte le attività
-            activity_id, name, day, start_time, finish_time, location, max_participants, description, participant_count = activity  # Estrae i dati
-            
-            # Check search term
-            if search_term and search_term not in name.lower() and search_term not in location.lower():  # Se il termine non è nel nome o luogo
-                continue  # Salta questa attività
-                
-            # Check day filter
-            day_str = day.strftime("%Y-%m-%d") if day else "N/A"  # Formatta la data
-            if day_filter != "All Days" and day_filter != day_str:  # Se il filtro giorno non corrisponde
-                continue  # Salta questa attività
-                
-            # Add item
-            start_hour = start_time // 60  # Calcola ora di inizio
-            start_min = start_time % 60  # Calcola minuti di inizio
-            finish_hour = finish_time // 60  # Calcola l'ora di fine
-            finish_min = finish_time % 60  # Calcola minuti di fine
-            time_str = f"{start_hour:02d}:{start_min:02d} - {finish_hour:02d}:{finish_min:02d}"  # Crea la stringa orario
-            
-            max_str = str(max_participants) if max_participants else "∞"  # Mostra max partecipanti o infinito
-            
-            self.activities_tree.insert("", "end", text=name,  # Inserisce la riga filtrata
-                                       values=(day_str, time_str, location,
-                                              participant_count, max_str, description or ""))
+        exact = {'day': day_filter if day_filter != "All Days" else None}  # Filtro esatto sul giorno
+        self.activities_tree.set_source(self.activity_index.search(query, exact=exact))  # Righe già formattate
 
     def filter_students(self, *args):
         """
-        Filter the students treeview based on the search term and selected class filter.
+        Filter the students table based on the search query and selected class filter.
+        The query may use field prefixes: name:, surname:, class:, email:. When students
+        are paged from the database the filter becomes part of the query.
         Args:
             *args: Required for Tkinter trace compatibility.
         """
-        search_term = self.student_search_var.get().lower()  # Ottiene il termine di ricerca
         class_filter = self.class_filter_var.get()  # Ottiene il filtro classe selezionato
         
-        # Clear existing items
-        for item in self.students_tree.get_children():  # Elimina tutti gli elementi attuali
-            self.students_tree.delete(item)
-            
-        for student in self.students_data:  # Cicla su tutti gli studenti
-            student_id, name, surname, class_name, email, age, special_needs, activity_count = student  # Estrae i dati
-            
-            full_name = f"{name} {surname}"  # Crea la stringa nome completo
-            
-            # Check search term
-            if search_term and (search_term not in full_name.lower() and 
-                               search_term not in email.lower()):  # Se il termine non è nel nome o email
-                continue  # Salta questo studente
-                
-            # Check class filter
-            if class_filter != "All Classes" and class_filter != class_name:  # Se il filtro classe non corrisponde
-                continue  # Salta questo studente
-                
-            # Add item
-            age_str = str(age) if age else "N/A"  # Mostra età o N/A
-            special_needs_str = special_needs or "None"  # Mostra bisogni speciali o None
-            
-            self.students_tree.insert("", "end", text=full_name,  # Inserisce la riga filtrata
-                                     values=(class_name, email, age_str,
-                                            activity_count, special_needs_str))
+        if self.students_paged:
+            search_term = self.student_search_var.get().lower()  # Ottiene il termine di ricerca
+            self.students_tree.set_source(self.build_paged_students_source(search_term, class_filter))  # Righe lette a pagine
+            return
+        
+        query = self.student_search_var.get()  # Ottiene il testo di ricerca
+        exact = {'class': class_filter if class_filter != "All Classes" else None}  # Filtro esatto sulla classe
+        self.students_tree.set_source(self.student_index.search(query, exact=exact))  # Righe già formattate
+
+    def build_paged_students_source(self, search_term, class_filter):
+        """
+        Build a database-backed source for the students table, used when the students
+        do not fit in STUDENT_ROWS_BUDGET.
+        Args:
+            search_term (str): Lowercase text searched in the full name and email.
+            class_filter (str): Selected class or "All Classes".
+        Returns:
+            PagedQuerySource: Source loading the matching students one page at a time.
+        """
+        return PagedQuerySource(
+            fetch_count=lambda: TeacherDashboard.fetch_students_count(search_term, class_filter),  # Totale degli studenti filtrati
+            fetch_page=lambda limit, offset: TeacherDashboard.fetch_students_page(search_term, class_filter,
+                                                                                  limit, offset))  # Una pagina di studenti
+
+    @staticmethod
+    def fetch_students_count(search_term, class_filter):
+        """
+        Count the students matching the filters (worker thread, no Tkinter calls).
+        Args:
+            search_term (str): Lowercase text searched in the full name and email.
+            class_filter (str): Selected class or "All Classes".
+        Returns:
+            int: Number of matching students.
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene costruita ed eseguita dal servizio
+            return client.call('teacher_dashboard.students_count', search_term=search_term,
+                               class_filter=class_filter)
+        _, count_sql, params = TeacherDashboard.students_page_queries(search_term, class_filter)
+        return PagedQuerySource.fetch_count(count_sql, tuple(params))
+
+    @staticmethod
+    def fetch_students_page(search_term, class_filter, limit, offset):
+        """
+        Load one page of the students matching the filters (worker thread, no Tkinter calls).
+        Args:
+            search_term (str): Lowercase text searched in the full name and email.
+            class_filter (str): Selected class or "All Classes".
+            limit (int): Rows of the page.
+            offset (int): Rows before the page.
+        Returns:
+            list: Student rows (see STUDENTS_SELECT).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene costruita ed eseguita dal servizio
+            return client.call('teacher_dashboard.students_page', search_term=search_term,
+                               class_filter=class_filter, limit=limit, offset=offset)
+        select_sql, _, params = TeacherDashboard.students_page_queries(search_term, class_filter)
+        return PagedQuerySource.fetch_page(select_sql, tuple(params), limit, offset)
+
+    @staticmethod
+    def students_page_queries(search_term, class_filter):
+        """
+        Build the paged students queries.
+        Args:
+            search_term (str): Lowercase text searched in the full name and email.
+            class_filter (str): Selected class or "All Classes".
+        Returns:
+            tuple: (select_sql, count_sql, params)
+        """
+        conditions = ""  # Condizioni aggiuntive della clausola WHERE
+        params = []  # Parametri delle condizioni
+        if search_term:
+            conditions += " AND (LOWER(CONCAT(s.name, ' ', s.surname)) LIKE %s OR LOWER(s.email) LIKE %s)"
+            params += [f"%{search_term}%", f"%{search_term}%"]
+        if class_filter != "All Classes":
+            conditions += " AND s.class = %s"
+            params.append(class_filter)
+        
+        return (TeacherDashboard.STUDENTS_SELECT + conditions + TeacherDashboard.STUDENTS_ORDER,
+                "SELECT COUNT(*) FROM students s WHERE s.role = 'student'" + conditions,
+                params)
 
     def show_activity_participants(self, event):
         """
@@ -538,28 +695,34 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         Args:
             event: The Tkinter event object (from double-click).
         """
-        selection = self.activities_tree.selection()  # Ottiene la selezione nella treeview
-        if not selection:  # Se non c'è selezione
-            return  # Esce dalla funzione
-            
-        item = selection[0]  # Ottiene il primo elemento selezionato
-        activity_name = self.activities_tree.item(item, "text")  # Ottiene il nome dell'attività
-        
-        # Find activity in data
-        activity_data = None  # Inizializza la variabile
-        for activity in self.activities_data:  # Cerca l'attività nei dati
-            if activity[1] == activity_name:  # name is at index 1
-                activity_data = activity
-                break
-                
-        if not activity_data:  # Se non trova l'attività
+        activity_data = self.activities_tree.selected_row()  # Riga dati dell'attività selezionata
+        if not activity_data:  # Se non c'è selezione (o la riga non è ancora caricata)
             return  # Esce dalla funzione
+        activity_name = activity_data[1]  # name is at index 1
             
-        # Get participants from database
-        connection = DbConnection.connect()  # Connessione al database
+        # Get participants from database (background worker)
+        activity_id = activity_data[0]  # activity_id is at index 0
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'participants'),  # Un solo popup in caricamento alla volta
+            lambda: TeacherDashboard.fetch_activity_participants(activity_id),
+            on_success=lambda participants: self.show_participants_window(activity_name, participants),  # Mostra la finestra popup con i partecipanti
+            on_error=lambda e: messagebox.showerror("Error", f"Error loading participants: {str(e)}"))  # Mostra errore
+
+    @staticmethod
+    def fetch_activity_participants(activity_id):
+        """
+        Load the participants of an activity (worker thread, no Tkinter calls).
+        Args:
+            activity_id (int): The activity ID.
+        Returns:
+            list: Tuples (name, surname, class, email).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('teacher_dashboard.activity_participants', activity_id=activity_id)
+        connection = DbConnection.connect(read_only=True)  # Connessione al database (può essere una replica)
         if not connection:
-            return  # Esce se la connessione fallisce
-            
+            raise ConnectionError("Could not connect to database")
         try:
             cursor = connection.cursor()  # Crea un cursore
             cursor.execute("""
@@ -568,17 +731,10 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
                 JOIN student_activities sa ON s.id = sa.student_id
                 WHERE sa.activity_id = %s
                 ORDER BY s.class, s.surname, s.name
-            """, (activity_data[0],))  # activity_id is at index 0
-            
-            participants = cursor.fetchall()  # Ottiene la lista dei partecipanti
+            """, (activity_id,))
+            return cursor.fetchall()  # Ottiene la lista dei partecipanti
+        finally:
             connection.close()  # Chiude la connessione
-            
-            # Show participants window
-            self.show_participants_window(activity_name, participants)  # Mostra la finestra popup con i partecipanti
-            
-        except Exception as e:
-            connection.close()  # Chiude la connessione in caso di errore
-            messagebox.showerror("Error", f"Error loading participants: {str(e)}")  # Mostra errore
 
     def show_student_activities(self, event):
         """
@@ -586,29 +742,34 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         Args:
             event: The Tkinter event object (from double-click).
         """
-        selection = self.students_tree.selection()  # Ottiene la selezione nella treeview
-        if not selection:  # Se non c'è selezione
-            return  # Esce dalla funzione
-            
-        item = selection[0]  # Ottiene il primo elemento selezionato
-        student_name = self.students_tree.item(item, "text")  # Ottiene il nome dello studente
-        
-        # Find student in data
-        student_data = None  # Inizializza la variabile
-        for student in self.students_data:  # Cerca lo studente nei dati
-            full_name = f"{student[1]} {student[2]}"  # name and surname
-            if full_name == student_name:
-                student_data = student
-                break
-                
-        if not student_data:  # Se non trova lo studente
+        student_data = self.students_tree.selected_row()  # Riga dati dello studente selezionato
+        if not student_data:  # Se non c'è selezione (o la riga non è ancora caricata)
             return  # Esce dalla funzione
+        student_name = f"{student_data[1]} {student_data[2]}"  # name and surname
             
-        # Get activities from database
-        connection = DbConnection.connect()  # Connessione al database
+        # Get activities from database (background worker)
+        student_id = student_data[0]  # student_id is at index 0
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'student_activities'),  # Un solo popup in caricamento alla volta
+            lambda: TeacherDashboard.fetch_student_activities(student_id),
+            on_success=lambda activities: self.show_student_activities_window(student_name, activities),  # Mostra la finestra popup con le attività
+            on_error=lambda e: messagebox.showerror("Error", f"Error loading student activities: {str(e)}"))  # Mostra errore
+
+    @staticmethod
+    def fetch_student_activities(student_id):
+        """
+        Load the activities of a student (worker thread, no Tkinter calls).
+        Args:
+            student_id (int): The student ID.
+        Returns:
+            list: Tuples (name, day, start_time, finish_time, location).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('teacher_dashboard.student_activities', student_id=student_id)
+        connection = DbConnection.connect(read_only=True)  # Connessione al database (può essere una replica)
         if not connection:
-            return  # Esce se la connessione fallisce
-            
+            raise ConnectionError("Could not connect to database")
         try:
             cursor = connection.cursor()  # Crea un cursore
             cursor.execute("""
@@ -617,17 +778,10 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
                 JOIN student_activities sa ON a.id = sa.activity_id
                 WHERE sa.student_id = %s
                 ORDER BY a.day, a.start_time
-            """, (student_data[0],))  # student_id is at index 0
-            
-            activities = cursor.fetchall()  # Ottiene la lista delle attività
+            """, (student_id,))
+            return cursor.fetchall()  # Ottiene la lista delle attività
+        finally:
             connection.close()  # Chiude la connessione
-            
-            # Show activities window
-            self.show_student_activities_window(student_name, activities)  # Mostra la finestra popup con le attività
-            
-        except Exception as e:
-            connection.close()  # Chiude la connessione in caso di errore
-            messagebox.showerror("Error", f"Error loading student activities: {str(e)}")  # Mostra errore
 
     def show_participants_window(self, activity_name, participants):
         """
@@ -726,15 +880,28 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
         if not selected_date: # If no date is selected
             return # Exit the function
             
-        # Clear existing schedule
-        for widget in self.schedule_display_frame.winfo_children(): # Clear all widgets in the schedule display frame
-            widget.destroy() # Destroy each widget to refresh the display
-            
-        # Get activities for selected date
-        connection = DbConnection.connect() # Connect to the database
+        BackgroundWorker.for_root(self.root).submit(
+            (id(self), 'daily_schedule'), # Rapid date changes: only the latest request is rendered
+            lambda: TeacherDashboard.fetch_daily_schedule(selected_date),
+            on_success=self._render_daily_schedule, # Render the schedule on the Tk thread
+            on_error=self._render_schedule_error, # Show the error in the schedule frame
+            on_loading=lambda loading: self.update_status(f"Loading schedule for {selected_date}..." if loading else "Ready")) # Loading indicator
+
+    @staticmethod
+    def fetch_daily_schedule(selected_date):
+        """
+        Load the activities of a given date (worker thread, no Tkinter calls).
+        Args:
+            selected_date (str): Date in YYYY-MM-DD format.
+        Returns:
+            list: Tuples (name, start_time, finish_time, location, description, participant_count, max_participants).
+        """
+        client = ServiceClient.from_environment()
+        if client:  # Thin client: la query viene eseguita dal servizio
+            return client.call('teacher_dashboard.daily_schedule', selected_date=selected_date)
+        connection = DbConnection.connect(read_only=True) # Connect to the database (a read replica when configured)
         if not connection: # If connection fails
-            return # Exit the function
-            
+            raise ConnectionError("Could not connect to database")
         try:
             cursor = connection.cursor() # Create a cursor for executing queries
             cursor.execute("""
@@ -746,85 +913,105 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
                 GROUP BY a.id
                 ORDER BY a.start_time
             """, (selected_date,)) # Query to get activities for the selected date
-            
-            daily_activities = cursor.fetchall() # Fetch all activities for the selected date
+            return cursor.fetchall() # Fetch all activities for the selected date
+        finally:
             connection.close() # Close the database connection
+
+    def _clear_schedule_display(self):
+        """
+        Remove every widget from the schedule display frame.
+        """
+        for widget in self.schedule_display_frame.winfo_children(): # Clear all widgets in the schedule display frame
+            widget.destroy() # Destroy each widget to refresh the display
+
+    def _render_daily_schedule(self, daily_activities):
+        """
+        Display the schedule returned by fetch_daily_schedule (Tk thread).
+        Args:
+            daily_activities (list): Rows returned by fetch_daily_schedule.
+        """
+        self._clear_schedule_display() # Clear existing schedule
+        if not daily_activities: # If no activities found for the selected date
+            no_activities_label = tk.Label(self.schedule_display_frame, # Create a label for no activities
+                                          text="No activities scheduled for this date",  # Message text
+                                          font=("Segoe UI", 16), bg='#ffffff', fg='#64748b') # Set font and colors
+            no_activities_label.pack(expand=True) # Add the label to the schedule display frame
+            return
             
-            if not daily_activities: # If no activities found for the selected date
-                no_activities_label = tk.Label(self.schedule_display_frame, # Create a label for no activities
-                                              text="No activities scheduled for this date",  # Message text
-                                              font=("Segoe UI", 16), bg='#ffffff', fg='#64748b') # Set font and colors
-                no_activities_label.pack(expand=True) # Add the label to the schedule display frame
-                return
-                
-            # Create schedule display
-            canvas = tk.Canvas(self.schedule_display_frame, bg='#ffffff') # Create a canvas for the schedule display
-            scrollbar = ttk.Scrollbar(self.schedule_display_frame, orient="vertical", command=canvas.yview) # Create a vertical scrollbar
-            scrollable_frame = ttk.Frame(canvas) # Create a frame to hold the scrollable content
+        # Create schedule display
+        canvas = tk.Canvas(self.schedule_display_frame, bg='#ffffff') # Create a canvas for the schedule display
+        scrollbar = ttk.Scrollbar(self.schedule_display_frame, orient="vertical", command=canvas.yview) # Create a vertical scrollbar
+        scrollable_frame = ttk.Frame(canvas) # Create a frame to hold the scrollable content
+        
+        scrollable_frame.bind( # Bind the frame to the canvas for scrolling
+            "<Configure>", # Configure event to update scroll region
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all")) # Update scroll region to encompass the scrollable frame
+        )
+        
+        canvas.create_window((0, 0), window=scrollable_frame, anchor="nw") # Create a window in the canvas to hold the scrollable frame
+        canvas.configure(yscrollcommand=scrollbar.set) # Set the scrollbar to control the canvas vertical scrolling
+        
+        # Add activities to schedule
+        for i, activity in enumerate(daily_activities): # Loop through each activity for the selected date
+            name, start_time, finish_time, location, description, participant_count, max_participants = activity # Unpack activity data
             
-            scrollable_frame.bind( # Bind the frame to the canvas for scrolling
-                "<Configure>", # Configure event to update scroll region
-                lambda e: canvas.configure(scrollregion=canvas.bbox("all")) # Update scroll region to encompass the scrollable frame
-            )
+            # Create activity card
+            card_frame = tk.Frame(scrollable_frame, bg='#f8fafc', relief='solid', bd=1) # Create a frame for the activity card
+            card_frame.pack(fill=tk.X, padx=10, pady=5) # Add padding around the card frame
             
-            canvas.create_window((0, 0), window=scrollable_frame, anchor="nw") # Create a window in the canvas to hold the scrollable frame
-            canvas.configure(yscrollcommand=scrollbar.set) # Set the scrollbar to control the canvas vertical scrolling
+            # Time and title
+            start_hour = start_time // 60 # Calculate start hour
+            start_min = start_time % 60 # Calculate start minutes
+            finish_hour = finish_time // 60 # Calculate finish hour
+            finish_min = finish_time % 60 # Calculate finish minutes
+            time_str = f"{start_hour:02d}:{start_min:02d} - {finish_hour:02d}:{finish_min:02d}" # Format the time string
             
-            # Add activities to schedule
-            for i, activity in enumerate(daily_activities): # Loop through each activity for the selected date
-                name, start_time, finish_time, location, description, participant_count, max_participants = activity # Unpack activity data
-                
-                # Create activity card
-                card_frame = tk.Frame(scrollable_frame, bg='#f8fafc', relief='solid', bd=1) # Create a frame for the activity card
-                card_frame.pack(fill=tk.X, padx=10, pady=5) # Add padding around the card frame
-                
-                # Time and title
-                start_hour = start_time // 60 # Calculate start hour
-                start_min = start_time % 60 # Calculate start minutes
-                finish_hour = finish_time // 60 # Calculate finish hour
-                finish_min = finish_time % 60 # Calculate finish minutes
-                time_str = f"{start_hour:02d}:{start_min:02d} - {finish_hour:02d}:{finish_min:02d}" # Format the time string
-                
-                header_frame = tk.Frame(card_frame, bg='#f8fafc') # Create a frame for the header of the activity card
-                header_frame.pack(fill=tk.X, padx=15, pady=10) # Add padding around the header frame
-                
-                time_label = tk.Label(header_frame, text=time_str, # Format the time label
-                                     font=("Segoe UI", 14, "bold"), bg='#f8fafc', fg='#3b82f6') # Set font and colors for the time label
-                time_label.pack(side=tk.LEFT) # Add the time label to the left side of the header frame
-                
-                title_label = tk.Label(header_frame, text=name, # Create a label for the activity title
-                                      font=("Segoe UI", 16, "bold"), bg='#f8fafc', fg='#1e293b') # Set font and colors for the title label
-                title_label.pack(side=tk.LEFT, padx=(20, 0)) # Add padding to the left of the title label
-                
-                # Participants count
-                max_str = str(max_participants) if max_participants else "∞" # Show max participants or infinity
-                participants_label = tk.Label(header_frame, text=f"👥 {participant_count}/{max_str}",  #Create a label for participants count
-                                             font=("Segoe UI", 12), bg='#f8fafc', fg='#059669') # Set font and colors for the participants label
-                participants_label.pack(side=tk.RIGHT) # Add the participants label to the right side of the header frame
-                
-                # Location and description
-                details_frame = tk.Frame(card_frame, bg='#f8fafc') # Create a frame for the details of the activity card
-                details_frame.pack(fill=tk.X, padx=15, pady=(0, 10)) # Add padding around the details frame
-                
-                location_label = tk.Label(details_frame, text=f"📍 {location}", #Create a label for the location
-                                         font=("Segoe UI", 12), bg='#f8fafc', fg='#64748b') # Set font and colors for the location label
-                location_label.pack(anchor='w') # Add the location label to the left side of the details frame
-                
-                if description:
-                    desc_label = tk.Label(details_frame, text=f"ℹ️ {description}", # Create a label for the description
-                                         font=("Segoe UI", 11), bg='#f8fafc', fg='#64748b',    # Set font and colors for the description label
-                                         wraplength=600, justify='left') # Set wrap length and justification for the description label
-                    desc_label.pack(anchor='w', pady=(5, 0)) # Add the description label to the left side of the details frame
+            header_frame = tk.Frame(card_frame, bg='#f8fafc') # Create a frame for the header of the activity card
+            header_frame.pack(fill=tk.X, padx=15, pady=10) # Add padding around the header frame
+            
+            time_label = tk.Label(header_frame, text=time_str, # Format the time label
+                                 font=("Segoe UI", 14, "bold"), bg='#f8fafc', fg='#3b82f6') # Set font and colors for the time label
+            time_label.pack(side=tk.LEFT) # Add the time label to the left side of the header frame
             
-            canvas.pack(side="left", fill="both", expand=True) # Add the canvas to the schedule display frame
-            scrollbar.pack(side="right", fill="y") # Add the scrollbar to the right side of the schedule display frame
+            title_label = tk.Label(header_frame, text=name, # Create a label for the activity title
+                                  font=("Segoe UI", 16, "bold"), bg='#f8fafc', fg='#1e293b') # Set font and colors for the title label
+            title_label.pack(side=tk.LEFT, padx=(20, 0)) # Add padding to the left of the title label
             
-        except Exception as e: # Handle any exceptions that occur while loading the schedule
-            connection.close() # Close the database connection if it was opened
-            error_label = tk.Label(self.schedule_display_frame, # Create a label to show the error message
-                                  text=f"Error loading schedule: {str(e)}", # Set the error message text
-                                  font=("Segoe UI", 12), bg='#ffffff', fg='#dc2626') # Set font and colors for the error label
-            error_label.pack(expand=True) # Add the error label to the schedule display frame
+            # Participants count
+            max_str = str(max_participants) if max_participants else "∞" # Show max participants or infinity
+            participants_label = tk.Label(header_frame, text=f"👥 {participant_count}/{max_str}",  #Create a label for participants count
+                                         font=("Segoe UI", 12), bg='#f8fafc', fg='#059669') # Set font and colors for the participants label
+            participants_label.pack(side=tk.RIGHT) # Add the participants label to the right side of the header frame
+            
+            # Location and description
+            details_frame = tk.Frame(card_frame, bg='#f8fafc') # Create a frame for the details of the activity card
+            details_frame.pack(fill=tk.X, padx=15, pady=(0, 10)) # Add padding around the details frame
+            
+            location_label = tk.Label(details_frame, text=f"📍 {location}", #Create a label for the location
+                                     font=("Segoe UI", 12), bg='#f8fafc', fg='#64748b') # Set font and colors for the location label
+            location_label.pack(anchor='w') # Add the location label to the left side of the details frame
+            
+            if description:
+                desc_label = tk.Label(details_frame, text=f"ℹ️ {description}", # Create a label for the description
+                                     font=("Segoe UI", 11), bg='#f8fafc', fg='#64748b',    # Set font and colors for the description label
+                                     wraplength=600, justify='left') # Set wrap length and justification for the description label
+                desc_label.pack(anchor='w', pady=(5, 0)) # Add the description label to the left side of the details frame
+        
+        canvas.pack(side="left", fill="both", expand=True) # Add the canvas to the schedule display frame
+        scrollbar.pack(side="right", fill="y") # Add the scrollbar to the right side of the schedule display frame
+        
+    def _render_schedule_error(self, error):
+        """
+        Display an error in the schedule tab (Tk thread).
+        Args:
+            error (Exception): The exception raised by fetch_daily_schedule.
+        """
+        self._clear_schedule_display() # Clear existing schedule
+        self.update_status("Error loading schedule") # Update the status bar
+        error_label = tk.Label(self.schedule_display_frame, # Create a label to show the error message
+                              text=f"Error loading schedule: {str(error)}", # Set the error message text
+                              font=("Segoe UI", 12), bg='#ffffff', fg='#dc2626') # Set font and colors for the error label
+        error_label.pack(expand=True) # Add the error label to the schedule display frame
 
     def select_today(self): # Set the schedule date selection to today and load today's schedule.
         """
@@ -835,47 +1022,21 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
             self.selected_date_var.set(today) # Set the selected date to today
             self.load_daily_schedule() # Load the schedule for today
 
-    def load_analytics(self): # Load analytics data (e.g., most popular activities) from the database and update the analytics tab.
+    def load_analytics(self): # Update the analytics tab with the data loaded by fetch_dashboard_data.
         """
-        Load analytics data (e.g., most popular activities) from the database and update the analytics tab.
+        Update the analytics tab (e.g., most popular activities) with the data loaded by fetch_dashboard_data.
         """
-        connection = DbConnection.connect() # Connect to the database
-        if not connection: # If connection fails
-            return # Exit the function
-            
-        try:
-            cursor = connection.cursor() # Create a cursor for executing queries
-            
-            # Get popular activities
-            cursor.execute("""
-                SELECT a.name, COUNT(sa.student_id) as participant_count
-                FROM activities a
-                LEFT JOIN student_activities sa ON a.id = sa.activity_id
-                GROUP BY a.id
-                ORDER BY participant_count DESC, a.name
-                LIMIT 10
-            """)
-            
-            popular_activities = cursor.fetchall() # Fetch the top 10 most popular activities
-            
-            # Clear and populate popular activities list
-            self.popular_activities_list.delete(0, tk.END) # Clear existing items in the listbox
-            for i, (name, count) in enumerate(popular_activities, 1): # Loop through the popular activities
-                self.popular_activities_list.insert(tk.END, f"{i}. {name} ({count} participants)") # Format the activity name and participant count
-                
-            connection.close() # Close the database connection
-            
-        except Exception as e: # Handle any exceptions that occur while loading analytics
-            connection.close() # Close the connection in case of error
-            self.popular_activities_list.delete(0, tk.END) # Clear existing items in the listbox
-            self.popular_activities_list.insert(tk.END, f"Error loading analytics: {str(e)}") # Show error message in the listbox
+        # Clear and populate popular activities list
+        self.popular_activities_list.delete(0, tk.END) # Clear existing items in the listbox
+        for i, (name, count) in enumerate(self.popular_activities, 1): # Loop through the popular activities
+            self.popular_activities_list.insert(tk.END, f"{i}. {name} ({count} participants)") # Format the activity name and participant count
 
     def update_quick_stats(self): # Update the quick statistics in the header (total activities, students, enrollments).
         """""
         Update the quick statistics in the header (total activities, students, enrollments). 
         """
         total_activities = len(self.activities_data)  # Conta il numero totale di attività caricate
-        total_students = len(self.students_data)  # Conta il numero totale di studenti caricati
+        total_students = self.students_total  # Numero totale di studenti (anche se letti a pagine)
         total_enrollments = sum(activity[8] for activity in self.activities_data)  # Somma il numero totale di iscrizioni (participant_count)
 
         # Trova il frame delle statistiche nella tab Analytics
@@ -913,9 +1074,8 @@ class TeacherDashboard:  # Definisce la classe principale della dashboard insegn
 
     def go_back(self):
         """
-        Destroy the dashboard window and return to the main dashboard via callback.
+        Return to the main dashboard via callback (navigation is handled by the callback).
         """
-        self.root.destroy()  # Chiude la finestra della dashboard insegnante
         self.main_dashboard_callback()  # Chiama la funzione di callback per tornare alla dashboard principale
 
 if __name__ == "__main__":  # Esegue questo blocco solo se il file è eseguito direttamente (non importato)
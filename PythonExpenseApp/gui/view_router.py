@@ -0,0 +1,245 @@
+# ===================================================================
+# VIEW ROUTER - SINGLE-WINDOW NAVIGATION WITH CACHED VIEWS
+# ===================================================================
+# The application used to destroy the Tk root and create a new one for
+# every screen change, rebuilding every widget and re-running every query.
+# The ViewRouter keeps one Tk window for the whole session: each screen
+# (view) is built once inside its own frame, and navigating only swaps
+# which frame is packed.
+#
+# KEY RESPONSIBILITIES:
+# 1. Build views lazily from registered factories
+# 2. Keep built views alive and swap their frames on navigation
+# 3. Refresh a cached view on show only when its data is stale
+#    (a topic it depends on changed, or it is older than max_age)
+# 4. Cap the memory used by the cache (number of views and widgets),
+#    evicting the least recently used views first
+#
+# VIEW CONTRACT:
+# A view is any object built by factory(frame) that places its widgets in
+# `frame`. Window-level calls (title, geometry) go to frame.winfo_toplevel().
+# Optionally it implements refresh_data(), called when shown while stale.
+# ===================================================================
+
+import time  # Age of cached views
+import tkinter as tk  # Frames hosting the views
+from collections import OrderedDict  # LRU order of cached views
+
+
+class _CachedView:
+    """
+    A built view and its bookkeeping.
+
+    ATTRIBUTES:
+        frame (tk.Frame): Frame hosting the view widgets
+        view (object): Object returned by the factory
+        title (str): Window title to restore when the view is shown again
+        versions (dict): Topic versions the view data corresponds to
+        loaded_at (float): time.monotonic() of the last build/refresh
+        widget_count (int): Number of widgets of the view (measured when hidden)
+    """
+
+    __slots__ = ('frame', 'view', 'title', 'versions', 'loaded_at', 'widget_count')
+
+    def __init__(self, frame, view, title, versions):
+        self.frame = frame
+        self.view = view
+        self.title = title
+        self.versions = versions
+        self.loaded_at = time.monotonic()
+        self.widget_count = 0
+
+
+class ViewRouter:
+    """
+    Shows one view at a time inside a single Tk window and caches the others.
+
+    USAGE:
+        router = ViewRouter(root)
+        router.register('expenses', lambda frame: ExpenseGUI(frame, student, back),
+                        topics=('students', 'expenses'))
+        router.show('expenses')
+        ViewRouter.notify_changed(widget, 'expenses')  # after a write
+    """
+
+    # Maximum number of views kept alive (the visible one included)
+    MAX_CACHED_VIEWS = 6
+    # Maximum number of widgets kept alive by hidden views
+    MAX_CACHED_WIDGETS = 6000
+
+    def __init__(self, window):
+        """
+        Initialize the router on the application window.
+
+        :param window: tk.Tk - The single window of the application.
+        """
+        self.window = window  # Window shared by every view
+        self.current = None  # Name of the visible view
+        self._routes = {}  # name -> (factory, topics, max_age, cache)
+        self._views = OrderedDict()  # name -> _CachedView, least recently shown first
+        self._versions = {}  # topic -> version, incremented by mark_stale
+        window._view_router = self
+
+    @classmethod
+    def of(cls, widget):
+        """
+        Return the router of the window containing the widget, or None.
+
+        :param widget: Any Tk widget.
+        :return: ViewRouter or None
+        """
+        return getattr(widget.winfo_toplevel(), '_view_router', None)
+
+    @classmethod
+    def notify_changed(cls, widget, *topics):
+        """
+        Tell the router of the widget's window that data of the given topics changed.
+        Does nothing when the widget is not hosted by a router.
+
+        :param widget: Any Tk widget of the view that made the change.
+        :param topics: str - Changed topics (e.g. 'expenses', 'enrollments').
+        :return: None
+        """
+        router = cls.of(widget)
+        if router is not None:
+            router.mark_stale(*topics)
+
+    def register(self, name, factory, topics=(), max_age=None, cache=True):
+        """
+        Register a view.
+
+        :param name: str - Route name.
+        :param factory: callable(frame) - Builds the view inside the given frame.
+        :param topics: tuple - Data topics the view displays.
+        :param max_age: float, optional - Seconds after which a cached view is refreshed on show.
+        :param cache: bool - False for views that must be rebuilt every time (e.g. login).
+        :return: None
+        """
+        self._routes[name] = (factory, tuple(topics), max_age, cache)
+
+    def show(self, name):
+        """
+        Show a view, building it the first time and refreshing it if stale.
+
+        :param name: str - Route name.
+        :return: object - The view instance.
+        """
+        factory, topics, max_age, cache = self._routes[name]
+        entry = self._views.get(name)
+        if entry is not None and not entry.frame.winfo_exists():
+            del self._views[name]  # Destroyed by someone else
+            entry = None
+
+        if self.current == name and entry is not None:
+            return entry.view
+
+        self._hide_current()
+
+        if entry is None:
+            frame = tk.Frame(self.window, bg='#f8fafc')
+            frame.pack(fill=tk.BOTH, expand=True)
+            view = factory(frame)
+            entry = _CachedView(frame, view, self.window.title(), self._snapshot(topics))
+            self._views[name] = entry
+        else:
+            entry.frame.pack(fill=tk.BOTH, expand=True)
+            self.window.title(entry.title)
+            if self._is_stale(entry, topics, max_age):
+                refresh = getattr(entry.view, 'refresh_data', None)
+                if refresh is not None:
+                    refresh()
+                entry.versions = self._snapshot(topics)
+                entry.loaded_at = time.monotonic()
+
+        self.current = name
+        self._views.move_to_end(name)
+        self._enforce_cap()
+        return entry.view
+
+    def discard(self, name):
+        """
+        Destroy a cached view (it will be rebuilt on the next show).
+
+        :param name: str - Route name.
+        :return: None
+        """
+        entry = self._views.pop(name, None)
+        if entry is not None:
+            if entry.frame.winfo_exists():
+                entry.frame.destroy()
+            if self.current == name:
+                self.current = None
+
+    def clear(self):
+        """Destroy every cached view (e.g. when another user logs in)."""
+        for name in list(self._views):
+            self.discard(name)
+
+    def mark_stale(self, *topics):
+        """
+        Record that data of the given topics changed. Hidden views depending on
+        them refresh the next time they are shown; the visible view is assumed
+        to have updated itself.
+
+        :param topics: str - Changed topics.
+        :return: None
+        """
+        for topic in topics:
+            self._versions[topic] = self._versions.get(topic, 0) + 1
+        current = self._views.get(self.current)
+        if current is not None:
+            for topic in topics:
+                if topic in current.versions:
+                    current.versions[topic] = self._versions[topic]
+
+    def topic_versions(self, topics):
+        """
+        Current versions of the given topics (data loaded now corresponds to them).
+
+        :param topics: tuple - Topic names.
+        :return: dict - topic -> version
+        """
+        return self._snapshot(topics)
+
+    def _snapshot(self, topics):
+        return {topic: self._versions.get(topic, 0) for topic in topics}
+
+    def _is_stale(self, entry, topics, max_age):
+        if max_age is not None and time.monotonic() - entry.loaded_at > max_age:
+            return True
+        return any(entry.versions.get(topic) != self._versions.get(topic, 0) for topic in topics)
+
+    def _hide_current(self):
+        """Unpack the visible view, or destroy it if it must not be cached."""
+        entry = self._views.get(self.current)
+        if entry is None:
+            return
+        if not self._routes[self.current][3]:
+            self.discard(self.current)
+            return
+        entry.title = self.window.title()
+        entry.widget_count = self._count_widgets(entry.frame)
+        entry.frame.pack_forget()
+        self.current = None
+
+    def _enforce_cap(self):
+        """Evict least recently shown views while the cache is over its limits."""
+        for name in list(self._views):
+            if name == self.current:
+                continue
+            hidden_widgets = sum(entry.widget_count for view_name, entry in self._views.items()
+                                 if view_name != self.current)
+            if len(self._views) <= self.MAX_CACHED_VIEWS and hidden_widgets <= self.MAX_CACHED_WIDGETS:
+                break
+            self.discard(name)
+
+    @staticmethod
+    def _count_widgets(widget):
+        """Count a widget and all its descendants."""
+        count = 1
+        pending = widget.winfo_children()
+        while pending:
+            child = pending.pop()
+            count += 1
+            pending.extend(child.winfo_children())
+        return count
@@ -0,0 +1,473 @@
+# ===================================================================
+# VIRTUAL TABLE - TREEVIEW THAT ONLY RENDERS THE VISIBLE ROWS
+# ===================================================================
+# A ttk.Treeview creates one Tk item per inserted row. With thousands of
+# students every refresh (and every keystroke of a filter) deletes and
+# re-inserts thousands of items. VirtualTreeview keeps a fixed set of
+# item "slots" (as many as fit in the window) and fills them with the rows
+# of the current scroll window, so rendering cost depends only on the
+# number of visible rows.
+#
+# KEY RESPONSIBILITIES:
+# 1. Render only the visible window of an in-memory row model
+# 2. Own vertical scrolling (scrollbar, mouse wheel, keyboard)
+# 3. Map the selected slot back to the underlying data row
+# 4. Lazy paging from the database when the model does not fit in memory
+#    (PagedQuerySource, pages loaded on the background worker; in thin-client
+#    mode the view passes fetchers calling a service operation that builds
+#    the query on the server)
+# 5. Append-only keyset paging for newest-first histories (KeysetSource)
+#
+# ROW SOURCES:
+# Any object with __len__ and __getitem__ can be shown (a plain list works).
+# Sources may also implement:
+#   ensure(start, stop)  - prepare rows of the visible window
+#   attach(view)         - called when shown by a view
+#   detach()             - called when replaced by another source
+#   display(index)       - pre-rendered (text, values) of a row, used instead
+#                          of the formatter (e.g. search_index.SearchResults)
+# __getitem__ may return None for rows that are not loaded yet; a
+# placeholder is rendered and the source calls view.refresh() later.
+# ===================================================================
+
+import tkinter as tk  # Base Tkinter widgets
+from tkinter import ttk  # Treeview and scrollbars
+from collections import OrderedDict  # LRU cache of database pages
+
+from PythonExpenseApp.db_connection import DbConnection  # Database access for paged sources
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Loads pages off the Tk thread
+
+
+class PagedQuerySource:
+    """
+    Row source backed by a SELECT statement, loaded one page at a time.
+
+    Used when the full result does not fit the memory budget of a view:
+    only the pages around the visible window are kept (LRU), and missing
+    pages are fetched with LIMIT/OFFSET on the background worker. Instead of
+    the SQL, fetch_count() and fetch_page(limit, offset) callables can load
+    the rows (e.g. through a service operation).
+    """
+
+    # Rows per page
+    PAGE_SIZE = 200
+    # Pages kept in memory (older pages are evicted first)
+    MAX_PAGES = 25
+
+    def __init__(self, select_sql=None, params=(), count_sql=None, page_size=None, max_pages=None,
+                 fetch_count=None, fetch_page=None):
+        """
+        Initialize a paged source.
+
+        :param select_sql: str - SELECT statement with a deterministic ORDER BY (no LIMIT).
+        :param params: tuple - Parameters of select_sql (and of count_sql).
+        :param count_sql: str, optional - Query returning the total number of rows.
+        :param page_size: int, optional - Overrides PAGE_SIZE.
+        :param max_pages: int, optional - Overrides MAX_PAGES.
+        :param fetch_count: callable() -> int, optional - Used instead of count_sql (worker thread).
+        :param fetch_page: callable(limit, offset) -> list, optional - Used instead of select_sql (worker thread).
+        """
+        self.select_sql = select_sql
+        self.params = tuple(params)
+        self.count_sql = count_sql or f"SELECT COUNT(*) FROM ({select_sql}) AS paged_rows"
+        if fetch_count is None:
+            fetch_count = lambda: PagedQuerySource.fetch_count(self.count_sql, self.params)
+        if fetch_page is None:
+            fetch_page = lambda limit, offset: PagedQuerySource.fetch_page(self.select_sql, self.params,
+                                                                           limit, offset)
+        self._fetch_count = fetch_count
+        self._fetch_page = fetch_page
+        self.page_size = page_size or self.PAGE_SIZE
+        self.max_pages = max_pages or self.MAX_PAGES
+        self.total = 0  # Total number of rows (known once the count query returns)
+        self._pages = OrderedDict()  # page number -> list of rows, most recently used last
+        self._requested = {}  # page number -> worker key of the running request
+        self._view = None  # View currently showing this source
+        self._worker = None  # BackgroundWorker of the view's window
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        page_number, offset = divmod(index, self.page_size)
+        rows = self._pages.get(page_number)
+        if rows is None:
+            self._request_page(page_number)
+            return None  # Rendered as a placeholder until the page arrives
+        self._pages.move_to_end(page_number)
+        return rows[offset] if offset < len(rows) else None
+
+    def ensure(self, start, stop):
+        """Request the pages of the visible window and drop requests that scrolled away."""
+        if stop <= start:
+            return
+        first = start // self.page_size
+        last = (stop - 1) // self.page_size
+        for page_number in list(self._requested):
+            if page_number < first - 1 or page_number > last + 1:
+                self._worker.cancel(self._requested.pop(page_number))
+        for page_number in range(first, last + 1):
+            if page_number not in self._pages:
+                self._request_page(page_number)
+
+    def attach(self, view):
+        """Bind to a view and load the total row count."""
+        self._view = view
+        self._worker = BackgroundWorker.for_root(view)
+        self._worker.submit((id(self), 'count'),
+                            self._fetch_count,
+                            on_success=self._on_count_loaded,
+                            on_error=self._on_error)
+
+    def detach(self):
+        """Cancel every pending request of this source."""
+        if self._worker is not None:
+            self._worker.cancel((id(self), 'count'))
+            for key in self._requested.values():
+                self._worker.cancel(key)
+        self._requested.clear()
+        self._view = None
+
+    def _request_page(self, page_number):
+        if self._worker is None or page_number in self._requested:
+            return
+        key = (id(self), 'page', page_number)
+        self._requested[page_number] = key
+        fetch_page, limit, offset = self._fetch_page, self.page_size, page_number * self.page_size
+        self._worker.submit(key,
+                            lambda: fetch_page(limit, offset),
+                            on_success=lambda rows: self._on_page_loaded(page_number, rows),
+                            on_error=self._on_error)
+
+    def _on_count_loaded(self, total):
+        self.total = total
+        if self._view is not None:
+            self._view.refresh()
+
+    def _on_page_loaded(self, page_number, rows):
+        self._requested.pop(page_number, None)
+        self._pages[page_number] = rows
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)  # Evict the least recently used page
+        if self._view is not None:
+            self._view.refresh()
+
+    def _on_error(self, error):
+        print(f"Error loading rows: {error}")
+
+    @staticmethod
+    def fetch_count(count_sql, params):
+        """
+        Count the rows of the query (worker thread, no Tkinter calls).
+
+        :return: int
+        :raises ConnectionError: If the query fails.
+        """
+        success, result = DbConnection.execute_query(count_sql, params, fetch_one=True)
+        if not success:
+            raise ConnectionError(result)
+        return result[0] if result else 0
+
+    @staticmethod
+    def fetch_page(select_sql, params, limit, offset):
+        """
+        Load one page of rows (worker thread, no Tkinter calls).
+
+        :return: list - Rows of the page.
+        :raises ConnectionError: If the query fails.
+        """
+        success, result = DbConnection.execute_query(f"{select_sql} LIMIT %s OFFSET %s",
+                                                     params + (limit, offset), fetch_all=True)
+        if not success:
+            raise ConnectionError(result)
+        return result or []
+
+
+class KeysetSource:
+    """
+    Row source that appends the pages of a keyset-paginated query as the view
+    scrolls towards the end of the loaded rows.
+
+    fetch_page(after, limit) runs on the background worker and returns
+    (rows, cursor of the next page or None). Unlike PagedQuerySource no count
+    query and no OFFSET are needed: the first page costs the same however long
+    the history is. Loaded rows are kept, so scrolling back is free.
+    """
+
+    # Rows per page
+    PAGE_SIZE = 100
+
+    def __init__(self, fetch_page, page_size=None, on_loaded=None):
+        """
+        Initialize a keyset source.
+
+        :param fetch_page: callable(after, limit) -> (rows, next_cursor) - Called on the worker thread.
+        :param page_size: int, optional - Overrides PAGE_SIZE.
+        :param on_loaded: callable(source), optional - Called on the Tk thread after every page.
+        """
+        self.fetch_page = fetch_page
+        self.page_size = page_size or self.PAGE_SIZE
+        self.on_loaded = on_loaded
+        self.rows = []  # Rows loaded so far, in query order
+        self.cursor = None  # Cursor of the next page
+        self.exhausted = False  # True once the last page has been loaded
+        self._loading = False  # A page request is running
+        self._view = None  # View currently showing this source
+        self._worker = None  # BackgroundWorker of the view's window
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        return self.rows[index] if index < len(self.rows) else None
+
+    def ensure(self, start, stop):
+        """Load the next page when the visible window gets within half a page of the end."""
+        if stop + self.page_size // 2 >= len(self.rows):
+            self._request_next()
+
+    def attach(self, view):
+        """Bind to a view and load the first page."""
+        self._view = view
+        self._worker = BackgroundWorker.for_root(view)
+        self._request_next()
+
+    def detach(self):
+        """Cancel the pending page request."""
+        if self._worker is not None:
+            self._worker.cancel((id(self), 'next'))
+        self._loading = False
+        self._view = None
+
+    def _request_next(self):
+        if self._worker is None or self._loading or self.exhausted:
+            return
+        self._loading = True
+        fetch_page, after, limit = self.fetch_page, self.cursor, self.page_size
+        self._worker.submit((id(self), 'next'),
+                            lambda: fetch_page(after, limit),
+                            on_success=self._on_page_loaded,
+                            on_error=self._on_error)
+
+    def _on_page_loaded(self, page):
+        rows, cursor = page
+        self._loading = False
+        self.rows.extend(rows)
+        self.cursor = cursor
+        self.exhausted = cursor is None
+        if self.on_loaded is not None:
+            self.on_loaded(self)
+        if self._view is not None:
+            self._view.refresh()
+
+    def _on_error(self, error):
+        self._loading = False  # The next scroll tries again
+        print(f"Error loading rows: {error}")
+
+
+class VirtualTreeview(tk.Frame):
+    """
+    Table widget that renders only the rows visible in the window.
+
+    The inner ttk.Treeview never holds more items than fit on screen; the
+    widget keeps its own scroll offset into the row source and rewrites the
+    text/values of those items when scrolling or when the source changes.
+
+    USAGE:
+        table = VirtualTreeview(parent, columns=("class", "email"),
+                                formatter=lambda row: (row[1], (row[2], row[3])))
+        table.heading("#0", text="Name")
+        table.set_source(rows)
+        row = table.selected_row()
+    """
+
+    # Text shown in rows that are still being loaded
+    PLACEHOLDER = "Loading..."
+
+    def __init__(self, parent, columns, formatter, height=20, **tree_options):
+        """
+        Initialize the table.
+
+        :param parent: Tk widget - Container of the table.
+        :param columns: tuple - Column identifiers of the Treeview.
+        :param formatter: callable(row) -> (text, values) - Converts a data row into Treeview content.
+        :param height: int - Rows rendered before the real size of the widget is known.
+        :param tree_options: Extra options passed to ttk.Treeview.
+        """
+        super().__init__(parent)
+        self.formatter = formatter  # Row -> (text, values)
+        self.source = []  # Current row source
+        self.offset = 0  # Index of the first visible row
+        self._slots = height  # Number of rows that fit in the window
+        self._items = []  # Treeview item ids, one per visible row
+        self._selected = None  # Index (in source) of the selected row
+
+        tree_options.setdefault('show', "tree headings")
+        self.tree = ttk.Treeview(self, columns=columns, height=height, selectmode="browse", **tree_options)
+        self.v_scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.h_scrollbar = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.h_scrollbar.set)
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.h_scrollbar.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        # Scrolling is handled here: the Treeview itself never scrolls vertically
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._slots))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._slots))
+        self.tree.bind("<Home>", lambda e: self._select_index(0))
+        self.tree.bind("<End>", lambda e: self._select_index(len(self.source) - 1))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+
+    def heading(self, column, **options):
+        """Configure a column heading (same options as ttk.Treeview.heading)."""
+        return self.tree.heading(column, **options)
+
+    def column(self, column, **options):
+        """Configure a column (same options as ttk.Treeview.column)."""
+        return self.tree.column(column, **options)
+
+    def set_source(self, source):
+        """
+        Show a new row source (list, SearchResults, PagedQuerySource, KeysetSource...).
+
+        :param source: Row source.
+        :return: None
+        """
+        detach = getattr(self.source, 'detach', None)
+        if detach is not None:
+            detach()
+        self.source = source
+        self.offset = 0
+        self._selected = None
+        attach = getattr(source, 'attach', None)
+        if attach is not None:
+            attach(self)
+        self.refresh()
+
+    def refresh(self):
+        """Re-render the visible window (e.g. after the source changed or loaded rows)."""
+        source = self.source
+        total = len(source)
+        self.offset = max(0, min(self.offset, total - self._slots))
+
+        ensure = getattr(source, 'ensure', None)
+        if ensure is not None:
+            ensure(self.offset, min(total, self.offset + self._slots))
+            total = len(source)  # Lazy sources may have grown
+        stop = min(total, self.offset + self._slots)
+        count = max(0, stop - self.offset)
+
+        # Keep exactly one Treeview item per visible row
+        while len(self._items) < count:
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > count:
+            self.tree.delete(self._items.pop())
+
+        display = getattr(source, 'display', None)
+        for slot, item in enumerate(self._items):
+            if display is not None:
+                text, values = display(self.offset + slot)
+            else:
+                row = source[self.offset + slot]
+                if row is None:
+                    text, values = self.PLACEHOLDER, ()
+                else:
+                    text, values = self.formatter(row)
+            self.tree.item(item, text=text, values=values)
+
+        # Selection follows the data row, not the slot
+        selected_slot = None if self._selected is None else self._selected - self.offset
+        if selected_slot is not None and 0 <= selected_slot < count:
+            item = self._items[selected_slot]
+            if self.tree.selection() != (item,):
+                self.tree.selection_set(item)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        if total:
+            self.v_scrollbar.set(self.offset / total, stop / total)
+        else:
+            self.v_scrollbar.set(0, 1)
+
+    def selected_row(self):
+        """
+        Return the data row of the current selection.
+
+        :return: row or None
+        """
+        if self._selected is None or self._selected >= len(self.source):
+            return None
+        return self.source[self._selected]
+
+    def yview(self, *args):
+        """Scrollbar command: handles 'moveto' and 'scroll' like a Tk scrollable widget."""
+        if not args:
+            return
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.source))
+            self.refresh()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= max(1, self._slots - 1)
+            self._scroll_by(amount)
+
+    def _scroll_by(self, rows):
+        self.offset += rows
+        self.refresh()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-3 * step)
+
+    def _on_resize(self, event):
+        """Recompute how many rows fit when the widget is resized."""
+        row_height, header_height = 20, 25
+        if self._items:
+            bbox = self.tree.bbox(self._items[0])
+            if bbox:
+                header_height, row_height = bbox[1], bbox[3]
+        else:
+            style_height = ttk.Style().lookup("Treeview", "rowheight")
+            if style_height:
+                row_height = int(style_height)
+        slots = max(1, (event.height - header_height) // max(1, row_height))
+        if slots != self._slots:
+            self._slots = slots
+            self.refresh()
+
+    def _on_select(self, event):
+        selection = self.tree.selection()
+        if selection and selection[0] in self._items:
+            self._selected = self.offset + self._items.index(selection[0])
+
+    def _move_selection(self, delta):
+        current = self._selected if self._selected is not None else self.offset - 1
+        return self._select_index(current + delta)
+
+    def _select_index(self, index):
+        """Select a row by index, scrolling it into view."""
+        total = len(self.source)
+        if not total:
+            return "break"
+        index = max(0, min(index, total - 1))
+        self._selected = index
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + self._slots:
+            self.offset = index - self._slots + 1
+        self.refresh()
+        if self._items:
+            self.tree.focus(self._items[self._selected - self.offset])
+        return "break"
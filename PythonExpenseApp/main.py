@@ -13,95 +13,170 @@ if _project_root_directory not in sys.path:  # Controlla se la root del progetto
 
 import tkinter as tk  # Importa la libreria Tkinter per la GUI
 from tkinter import messagebox  # Importa il modulo messagebox per mostrare messaggi popup
-from gui.expense_gui import ExpenseGUI  # Importa la GUI delle spese
-from gui.activity_form_gui import ActivityFormGUI  # Importa la GUI per iscrizione attività
-from gui.login_gui import LoginGUI  # Importa la GUI di login
-from gui.dashboard_gui import DashboardGUI  # Importa la dashboard per studenti
-from gui.teacher_dashboard import TeacherDashboard  # Importa la dashboard per insegnanti
-from db_connection import DbConnection  # Importa la classe per la connessione al database
+# Only what the login screen needs is imported at startup: the other screens
+# (and their heavy dependencies) are imported the first time they are shown.
+from PythonExpenseApp.gui.login_gui import LoginGUI  # Importa la GUI di login
+from PythonExpenseApp.auth import SessionTokens  # Token della sessione salvata ("Keep me signed in")
+from PythonExpenseApp.gui.view_router import ViewRouter  # Navigazione tra schermate nella stessa finestra
+from PythonExpenseApp.gui.background_worker import BackgroundWorker  # Prepara il database in background
+from PythonExpenseApp.db_connection import DbConnection  # Importa la classe per la connessione al database
+from PythonExpenseApp.service_client import ServiceClient  # Modalità thin client (TRIP_MANAGER_SERVICE_URL)
 
 # Global variable to store the currently logged-in student object.
 # This variable is updated after a successful login and is used throughout the session.
 logged_in_student = None  # Variabile globale che contiene l'utente loggato
 
+# Router that shows every screen inside the single application window.
+# Screens are built once and kept alive, so moving between them is instant.
+router = None  # Creato all'avvio insieme alla finestra principale
+
+def create_router(root):
+    """
+    Creates the ViewRouter for the application window and registers every screen.
+
+    :param root: tk.Tk - The single application window.
+    :return: ViewRouter - The configured router.
+    """
+    view_router = ViewRouter(root)  # Router legato alla finestra principale
+    # The login screen is rebuilt every time (it must start empty).
+    view_router.register('login', lambda frame: LoginGUI(frame, on_login_success), cache=False)
+    # Student screens: refreshed on show only if the data they display changed.
+    view_router.register('dashboard', build_dashboard,
+                         max_age=300)  # L'orario di oggi viene ricaricato al massimo ogni 5 minuti
+    view_router.register('expenses', build_expense_gui, topics=('students', 'expenses'))
+    view_router.register('activities', build_activity_form, topics=('activities', 'enrollments'))
+    view_router.register('teacher', build_teacher_dashboard,
+                         topics=('activities', 'students', 'enrollments', 'expenses'))
+    return view_router
+
+def build_dashboard(frame):
+    """Builds the student dashboard inside the router frame (module imported on first use)."""
+    from PythonExpenseApp.gui.dashboard_gui import DashboardGUI  # Importa la dashboard per studenti
+    return DashboardGUI(frame, logged_in_student, show_expense_gui, show_activity_form, show_teacher_dashboard,
+                        sign_out)
+
+def build_expense_gui(frame):
+    """Builds the Expense GUI inside the router frame (module imported on first use)."""
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI  # Importa la GUI delle spese
+    return ExpenseGUI(frame, logged_in_student, show_main_dashboard)
+
+def build_activity_form(frame):
+    """Builds the Activity Subscription GUI inside the router frame (module imported on first use)."""
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI  # Importa la GUI per iscrizione attività
+    return ActivityFormGUI(frame, logged_in_student, show_main_dashboard)
+
+def build_teacher_dashboard(frame):
+    """Builds the Teacher Dashboard inside the router frame (module imported on first use)."""
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard  # Importa la dashboard per insegnanti
+    return TeacherDashboard(frame, logged_in_student, show_main_dashboard, sign_out)
+
+def warm_up_database(root):
+    """
+    Opens the database connection pool in the background while the login screen
+    is already visible, instead of blocking the startup. In thin-client mode the
+    service is checked instead. If the database is not reachable an error is shown
+    and the application exits.
+
+    :param root: tk.Tk - The application window.
+    """
+    def on_result(result):
+        success, message = result  # Risultato di DbConnection.test_connection
+        if not success:  # Se la connessione fallisce
+            messagebox.showerror(
+                "Database Error",
+                "Could not connect to the database. Please check your connection settings.",
+                parent=root
+            )  # Mostra un messaggio di errore
+            root.destroy()  # Chiude la finestra
+            sys.exit(1)  # Esce dal programma con errore
+
+    client = ServiceClient.from_environment()  # In modalità thin client si verifica il servizio
+    check = client.ping if client else DbConnection.test_connection
+    BackgroundWorker.for_root(root).submit('database_warm_up', check, on_success=on_result)
+
 def show_main_dashboard():
     """
-    Displays the main dashboard window.
-    If a student is already logged in, it calls on_login_success to show the appropriate dashboard.
-    Otherwise, it launches the login window.
+    Displays the main dashboard.
+    If a student is already logged in, it shows the student dashboard.
+    Otherwise, it shows the login screen.
     """
-    global logged_in_student  # Usa la variabile globale
     if logged_in_student:  # Se c'è già uno studente loggato
-        on_login_success(logged_in_student)  # Mostra la dashboard appropriata
+        router.show('dashboard')  # Mostra la dashboard (già costruita se visitata prima)
     else:
-        # If no logged in student, show login window.
-        root = tk.Tk()  # Crea la finestra principale Tkinter
-        login = LoginGUI(root, on_login_success)  # Crea la finestra di login e passa la callback
-        root.mainloop()  # Avvia il ciclo principale della GUI
+        router.show('login')  # Mostra la schermata di login
 
 def show_expense_gui():
     """
-    Launches the Expense GUI window for the logged-in student.
-    This window allows the student to manage and view their expenses.
+    Shows the Expense GUI for the logged-in student.
+    This screen allows the student to manage and view their expenses.
     """
-    root = tk.Tk()  # Crea una nuova finestra Tkinter
-    app = ExpenseGUI(root, logged_in_student, show_main_dashboard)  # Avvia la GUI delle spese
-    root.mainloop()  # Avvia il ciclo principale della GUI
+    router.show('expenses')  # Mostra la GUI delle spese
 
 def show_activity_form():
     """
-    Launches the Activity Subscription GUI window for the logged-in student.
-    This window allows the student to subscribe to or manage activities.
+    Shows the Activity Subscription GUI for the logged-in student.
+    This screen allows the student to subscribe to or manage activities.
     """
-    global logged_in_student  # Usa la variabile globale
-    root = tk.Tk()  # Crea una nuova finestra Tkinter
-    app = ActivityFormGUI(root, logged_in_student, show_main_dashboard)  # Avvia la GUI delle attività
-    root.mainloop()  # Avvia il ciclo principale della GUI
+    router.show('activities')  # Mostra la GUI delle attività
+
+def show_teacher_dashboard():
+    """
+    Shows the Teacher Dashboard (reachable from the main dashboard by teachers).
+    """
+    router.show('teacher')  # Mostra la dashboard insegnante
 
 def on_login_success(student):
     """
     Callback function called after a successful login.
-    Sets the global logged_in_student variable and launches the appropriate dashboard
+    Sets the global logged_in_student variable, starts the background prefetch of the
+    user's data (session_cache.py) and shows the appropriate dashboard
     based on the user's role (student or teacher).
 
     :param student: Student object - The student who has logged in.
     """
     global logged_in_student  # Usa la variabile globale
     logged_in_student = student  # Aggiorna la variabile con l'utente loggato
+    router.clear()  # Elimina le schermate dell'utente precedente e quella di login
+    # Load the working set of the role in the background: the screens render from it at once
+    from PythonExpenseApp.gui.session_cache import SessionCache  # Cache dei dati condivisa dalle schermate
+    SessionCache.for_root(router.window).prefetch(student)  # Avvia il precaricamento prima della dashboard
 
     # Check if user is a teacher and redirect to teacher dashboard
     if hasattr(student, 'role') and student.role == 'teacher':  # Se l'utente è un insegnante
-        # Launch the teacher dashboard GUI for users with the 'teacher' role.
-        root = tk.Tk()  # Crea una nuova finestra Tkinter
-        teacher_dashboard = TeacherDashboard(root, student, show_main_dashboard)  # Avvia la dashboard insegnante
-        root.mainloop()  # Avvia il ciclo principale della GUI
+        show_teacher_dashboard()  # Mostra la dashboard insegnante
     else:
-        # Launch the regular student dashboard GUI for students.
-        root = tk.Tk()  # Crea una nuova finestra Tkinter
-        # Pass the callbacks for showing other GUIs (expenses, activities).
-        dashboard = DashboardGUI(root, student, show_expense_gui, show_activity_form)  # Avvia la dashboard studente
-        root.mainloop()  # Avvia il ciclo principale della GUI
+        show_main_dashboard()  # Mostra la dashboard studente
+
+def sign_out():
+    """
+    Signs the user out: forgets the saved session token (the next launch asks for the
+    password again), revokes it on the service (thin client), drops the screens and the
+    cached data of the user and shows the login.
+    """
+    global logged_in_student  # Usa la variabile globale
+    token = ServiceClient.session_token()  # Token della sessione che si chiude
+    client = ServiceClient.from_environment()  # In modalità thin client il servizio rifiuterà il token
+    if client and token:
+        BackgroundWorker.for_root(router.window).submit(
+            'sign_out', lambda: client.call('login.sign_out', token=token))  # Un errore viene solo registrato
+    SessionTokens.forget()  # Cancella il token salvato su questo computer
+    ServiceClient.set_session_token(None)  # Le chiamate al servizio non sono più autenticate
+    logged_in_student = None  # Nessun utente loggato
+    router.clear()  # Elimina le schermate dell'utente
+    from PythonExpenseApp.gui.session_cache import SessionCache  # Cache dei dati condivisa dalle schermate
+    SessionCache.for_root(router.window).clear()  # Dimentica i dati precaricati dell'utente
+    router.show('login')  # Mostra la schermata di login
 
 # Main entry point for the application
 if __name__ == "__main__":  # Esegue questo blocco solo se il file è eseguito direttamente (non importato)
-    # Check database connection before starting the GUI.
+    # Show login screen first, then keep the same window for the whole session.
+    root = tk.Tk()  # Crea l'unica finestra principale Tkinter
+    router = create_router(root)  # Registra tutte le schermate
+    router.show('login')  # Mostra la schermata di login
+    # Check the database connection while the user types the credentials.
     # If the connection fails, show an error message and exit.
-    connection = DbConnection.connect()  # Tenta di connettersi al database
-    if not connection:  # Se la connessione fallisce
-        temp_root = tk.Tk()  # Crea una finestra Tkinter temporanea
-        temp_root.withdraw()  # Nasconde la finestra
-        messagebox.showerror(
-            "Database Error",
-            "Could not connect to the database. Please check your connection settings.",
-            parent=temp_root
-        )  # Mostra un messaggio di errore
-        temp_root.destroy()  # Distrugge la finestra temporanea
-        sys.exit(1)  # Esce dal programma con errore
-    # Show login window first.
-    root = tk.Tk()  # Crea la finestra principale Tkinter
-    login = LoginGUI(root, on_login_success)  # Avvia la finestra di login
+    warm_up_database(root)  # Inizializza il pool di connessioni in parallelo
     root.mainloop()  # Avvia il ciclo principale della GUI
 
-# No changes needed in this file based on the current request,
-# as the student object passed around will implicitly carry the role.
+# The student object passed around carries the role.
 # The logic for handling the role is within the individual GUI classes.
\ No newline at end of file
@@ -0,0 +1,313 @@
+# ===================================================================
+# RECOMMENDATIONS - CO-ENROLLMENT ACTIVITY RECOMMENDATIONS
+# ===================================================================
+# Students choose activities from one flat list ordered by day. This module
+# suggests the activities taken by students with similar choices:
+#
+# - item-item similarity: cosine similarity between the enrollment vectors
+#   of two activities (one weight per student). A rating in feedback scales
+#   the weight of that enrollment (5 stars counts more than 1 star).
+# - the TOP_K most similar activities of each activity are precomputed in
+#   the activity_neighbors table.
+# - ActivityRecommender keeps the dot products in memory and refresh()
+#   applies only the enrollments and ratings inserted since the last run
+#   (higher ids), rewriting the neighbours of the affected activities.
+#   When enrollments were deleted it rebuilds everything: the count and the
+#   sum of the ids read so far must match the table up to the last id read
+#   (a deletion followed by a new enrollment keeps the count, not the sum).
+# - recommend() reads the suggestions of a student in one indexed query
+#   (the student's enrollments joined to activity_neighbors), already
+#   filtered to activities that are not full and do not overlap the
+#   student's schedule.
+#
+# KEY RESPONSIBILITIES:
+# 1. Compute and store the top-k neighbours of every activity
+# 2. Keep them current with incremental refreshes
+# 3. Serve the recommendations of a student without further queries
+#
+# USAGE:
+#   recommender = ActivityRecommender()
+#   recommender.rebuild()                          # Full computation
+#   recommender.refresh()                          # Later: only new enrollments / ratings
+#   success, rows = ActivityRecommender.recommend(student_id, limit=10)
+#
+#   python -m PythonExpenseApp.recommendations --watch 60
+# ===================================================================
+
+import argparse  # Command line options
+import heapq  # Top-k neighbours
+import math  # Norms
+import time  # Refresh interval
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class ActivityRecommender:
+    """
+    Incremental item-item similarity over student_activities and feedback.
+
+    ATTRIBUTES:
+        top_k (int): Neighbours stored per activity
+        stats (dict): enrollments, ratings, activities, neighbors, rebuilds, refreshes, last_seconds
+    """
+
+    TOP_K = 20
+    RATING_WEIGHT = 0.5  # Weight of a 5-star enrollment is 1 + RATING_WEIGHT, of a 1-star one 1 - RATING_WEIGHT
+    MIN_WEIGHT = 0.1
+    WRITE_CHUNK = 500  # Activities per DELETE ... IN (...)
+
+    ENROLLMENTS_QUERY = """SELECT id, student_id, activity_id FROM student_activities
+                           WHERE id > %s ORDER BY id"""
+    RATINGS_QUERY = """SELECT id, student_id, activity_id, rating FROM feedback
+                       WHERE id > %s AND rating IS NOT NULL ORDER BY id"""
+    # Fingerprint of the enrollments read so far (see refresh)
+    FINGERPRINT_QUERY = "SELECT COUNT(*), COALESCE(SUM(id), 0) FROM student_activities WHERE id <= %s"
+    INSERT_NEIGHBOR_QUERY = "INSERT INTO activity_neighbors (activity_id, neighbor_id, score) VALUES (%s, %s, %s)"
+
+    # Suggestions of a student: neighbours of the activities they chose, summed,
+    # without the activities they already have, overlapping ones and full ones
+    RECOMMENDATIONS_QUERY = """
+        SELECT a.id, a.name, a.day, a.start_time, a.finish_time, a.location, a.max_participants,
+               SUM(n.score) AS score,
+               (SELECT COUNT(*) FROM student_activities c WHERE c.activity_id = a.id) AS enrolled
+        FROM student_activities mine
+        JOIN activity_neighbors n ON n.activity_id = mine.activity_id
+        JOIN activities a ON a.id = n.neighbor_id
+        WHERE mine.student_id = %s
+          AND NOT EXISTS (SELECT 1 FROM student_activities own
+                          WHERE own.student_id = %s AND own.activity_id = a.id)
+          AND NOT EXISTS (SELECT 1 FROM student_activities own
+                          JOIN activities b ON b.id = own.activity_id
+                          WHERE own.student_id = %s AND b.day = a.day
+                            AND a.start_time < b.finish_time AND a.finish_time > b.start_time)
+        GROUP BY a.id, a.name, a.day, a.start_time, a.finish_time, a.location, a.max_participants
+        HAVING a.max_participants IS NULL OR enrolled < a.max_participants
+        ORDER BY score DESC, a.day, a.start_time
+        LIMIT %s"""
+
+    def __init__(self, top_k=None):
+        """
+        :param top_k: int, optional - Neighbours stored per activity (default: TOP_K).
+        """
+        self.top_k = top_k or self.TOP_K
+        self.stats = {'enrollments': 0, 'ratings': 0, 'activities': 0, 'neighbors': 0,
+                      'rebuilds': 0, 'refreshes': 0, 'last_seconds': 0.0}
+        self._reset()
+
+    def _reset(self):
+        self._weights = {}  # student -> {activity: weight}
+        self._ratings = {}  # (student, activity) -> rating
+        self._dots = {}  # activity -> {activity: dot product}
+        self._norms = {}  # activity -> squared norm
+        self._neighbors = {}  # activity -> [(neighbor, score), ...], best first
+        self._last_enrollment_id = 0
+        self._last_rating_id = 0
+        self._enrollment_fingerprint = (0, 0)  # (rows, sum of ids) read from student_activities
+        self._loaded = False
+
+    # ---------------------------------------------------------------
+    # SIMILARITY
+
+    def weight(self, rating):
+        """
+        :param rating: int or None - Rating (1-5) the student gave the activity.
+        :return: float - Weight of the enrollment in the similarity.
+        """
+        if rating is None:
+            return 1.0
+        return max(self.MIN_WEIGHT, 1.0 + self.RATING_WEIGHT * (rating - 3) / 2)
+
+    def _add_enrollment(self, student_id, activity_id):
+        """Add one enrollment to the dot products; returns the activities whose scores changed."""
+        chosen = self._weights.setdefault(student_id, {})
+        if activity_id in chosen:
+            return set()
+        weight = self.weight(self._ratings.get((student_id, activity_id)))
+        dots = self._dots.setdefault(activity_id, {})
+        for other, other_weight in chosen.items():
+            dots[other] = dots.get(other, 0.0) + weight * other_weight
+            other_dots = self._dots.setdefault(other, {})
+            other_dots[activity_id] = other_dots.get(activity_id, 0.0) + weight * other_weight
+        chosen[activity_id] = weight
+        self._norms[activity_id] = self._norms.get(activity_id, 0.0) + weight * weight
+        return {activity_id, *dots}
+
+    def _add_rating(self, student_id, activity_id, rating):
+        """Apply a rating to the weight of its enrollment; returns the activities whose scores changed."""
+        self._ratings[(student_id, activity_id)] = rating
+        chosen = self._weights.get(student_id, {})
+        if activity_id not in chosen:
+            return set()  # Not enrolled (yet): used when the enrollment arrives
+        old, new = chosen[activity_id], self.weight(rating)
+        if old == new:
+            return set()
+        dots = self._dots.setdefault(activity_id, {})
+        for other, other_weight in chosen.items():
+            if other != activity_id:
+                delta = (new - old) * other_weight
+                dots[other] = dots.get(other, 0.0) + delta
+                self._dots[other][activity_id] = self._dots[other].get(activity_id, 0.0) + delta
+        chosen[activity_id] = new
+        self._norms[activity_id] += new * new - old * old
+        return {activity_id, *dots}
+
+    def _compute(self, activity_id):
+        """Top-k neighbours of one activity from the dot products."""
+        norm = math.sqrt(self._norms.get(activity_id, 0.0))
+        if not norm:
+            return []
+        scores = ((other, dot / (norm * math.sqrt(self._norms[other])))
+                  for other, dot in self._dots.get(activity_id, {}).items()
+                  if dot > 0 and self._norms.get(other))
+        return heapq.nlargest(self.top_k, scores, key=lambda item: item[1])
+
+    def neighbors(self, activity_id):
+        """
+        :param activity_id: int - Activity.
+        :return: list - [(neighbor_id, score), ...], most similar first (as stored).
+        """
+        return list(self._neighbors.get(activity_id, ()))
+
+    # ---------------------------------------------------------------
+    # LOADING AND STORAGE
+
+    def _read(self, query, last_id):
+        success, rows = DbConnection.execute_query(query, (last_id,), fetch_all=True)
+        if not success:
+            raise RuntimeError(rows)
+        return rows
+
+    def _apply_new_rows(self):
+        """Read the ratings and enrollments after the watermarks; returns the changed activities."""
+        ratings = self._read(self.RATINGS_QUERY, self._last_rating_id)
+        enrollments = self._read(self.ENROLLMENTS_QUERY, self._last_enrollment_id)
+        changed = set()
+        for row_id, student_id, activity_id, rating in ratings:
+            changed |= self._add_rating(student_id, activity_id, rating)
+            self._last_rating_id = row_id
+        rows, id_sum = self._enrollment_fingerprint
+        for row_id, student_id, activity_id in enrollments:
+            changed |= self._add_enrollment(student_id, activity_id)
+            self._last_enrollment_id = row_id
+        self._enrollment_fingerprint = (rows + len(enrollments),
+                                        id_sum + sum(row_id for row_id, _, _ in enrollments))
+        self.stats['ratings'] += len(ratings)
+        self.stats['enrollments'] += len(enrollments)
+        return changed
+
+    def _store(self, activity_ids, replace_all=False):
+        """Recompute the neighbours of the given activities and rewrite them in one transaction."""
+        for activity_id in activity_ids:
+            self._neighbors[activity_id] = self._compute(activity_id)
+        rows = [(activity_id, neighbor_id, score) for activity_id in activity_ids
+                for neighbor_id, score in self._neighbors[activity_id]]
+        ids = list(activity_ids)
+
+        def work(cursor):
+            if replace_all:
+                cursor.execute("DELETE FROM activity_neighbors")
+            else:
+                for start in range(0, len(ids), self.WRITE_CHUNK):
+                    chunk = ids[start:start + self.WRITE_CHUNK]
+                    cursor.execute(f"DELETE FROM activity_neighbors WHERE activity_id IN "
+                                   f"({', '.join(['%s'] * len(chunk))})", tuple(chunk))
+            if rows:
+                cursor.executemany(self.INSERT_NEIGHBOR_QUERY, rows)
+            return len(rows)
+
+        success, result = DbConnection.run_transaction(work)
+        if not success:
+            raise RuntimeError(result)
+        self.stats['activities'] = len(self._neighbors)
+        self.stats['neighbors'] = sum(len(neighbors) for neighbors in self._neighbors.values())
+        return result
+
+    def rebuild(self):
+        """
+        Compute the neighbours of every activity from scratch and replace the table.
+
+        :return: tuple (bool, str) - (success, message)
+        """
+        started = time.perf_counter()
+        self._reset()
+        try:
+            self._apply_new_rows()
+            written = self._store(list(self._dots), replace_all=True)
+        except RuntimeError as e:
+            print(f"Error rebuilding recommendations: {e}")
+            self._reset()
+            return False, str(e)
+        self._loaded = True
+        self.stats['rebuilds'] += 1
+        self.stats['last_seconds'] = time.perf_counter() - started
+        return True, f"Stored {written} neighbours of {len(self._neighbors)} activities"
+
+    def refresh(self):
+        """
+        Apply the enrollments and ratings inserted since the last run and rewrite only the
+        neighbours of the activities they affect. Rebuilds everything on the first call
+        or when enrollments were deleted.
+
+        :return: tuple (bool, str) - (success, message)
+        """
+        if not self._loaded:
+            return self.rebuild()
+        started = time.perf_counter()
+        try:
+            changed = self._apply_new_rows()
+            success, result = DbConnection.execute_query(self.FINGERPRINT_QUERY, (self._last_enrollment_id,),
+                                                         fetch_one=True)
+            if not success:
+                raise RuntimeError(result)
+            if tuple(map(int, result)) != self._enrollment_fingerprint:
+                return self.rebuild()  # Enrollments were deleted: the dot products are stale
+            written = self._store(changed) if changed else 0
+        except RuntimeError as e:
+            print(f"Error refreshing recommendations: {e}")
+            self._loaded = False  # The next call rebuilds
+            return False, str(e)
+        self.stats['refreshes'] += 1
+        self.stats['last_seconds'] = time.perf_counter() - started
+        return True, f"Updated {len(changed)} activities ({written} neighbours)"
+
+    # ---------------------------------------------------------------
+    # RECOMMENDATIONS
+
+    @staticmethod
+    def recommend(student_id, limit=10):
+        """
+        Activities recommended to a student: similar to the ones they chose, not full
+        and not overlapping their schedule.
+
+        :param student_id: int - Student.
+        :param limit: int - Maximum number of suggestions.
+        :return: tuple (bool, list) - (success, rows or error message); rows are
+                 (id, name, day, start_time, finish_time, location, max_participants, score, enrolled).
+        """
+        return DbConnection.execute_query(ActivityRecommender.RECOMMENDATIONS_QUERY,
+                                          (student_id, student_id, student_id, limit), fetch_all=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the activity recommendations.")
+    parser.add_argument("--top-k", type=int, default=ActivityRecommender.TOP_K,
+                        help=f"neighbours stored per activity (default: {ActivityRecommender.TOP_K})")
+    parser.add_argument("--watch", type=float, default=None, metavar="SECONDS",
+                        help="keep running and refresh incrementally every SECONDS")
+    args = parser.parse_args(argv)
+
+    recommender = ActivityRecommender(args.top_k)
+    success, message = recommender.rebuild()
+    print(message)
+    try:
+        while success and args.watch:
+            time.sleep(args.watch)
+            success, message = recommender.refresh()
+            print(message)
+    except KeyboardInterrupt:
+        pass
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,266 @@
+# ===================================================================
+# ROLLUPS - HOURLY AND DAILY AGGREGATES FOR TREND ANALYTICS
+# ===================================================================
+# Statistics answers with all-time totals computed from the raw tables.
+# Trends (spending per day, per class, per activity, enrollment velocity
+# during the registration window) would scan expenses, debts,
+# student_activities and feedback for every chart. The rollup tables keep
+# one row per (metric, time bucket, class, activity) instead:
+#
+# - rollup_hourly: buckets of one hour (DATETIME at the start of the hour)
+# - rollup_daily: buckets of one day (DATE)
+#
+# Each row counts the events of the bucket and the sum of their value:
+#
+#   metric        event                     time                 class of   value
+#   expenses      expense inserted          expense date         payer      amount
+#   debts         debt row inserted         created_at           debtor     amount
+#   debts_paid    debt marked as paid       date_paid            debtor     amount
+#   enrollments   student_activities row    registration_date    student    1
+#   feedback      feedback inserted         created_at           student    rating
+#
+# expenses and debts_paid are bucketed on the day the money moved (a DATE,
+# so their hourly buckets are at midnight), not on when the row was
+# written or last touched; paid rows without date_paid (older data) fall
+# back to updated_at.
+#
+# activity_id is the activity of the event (0 when there is none) and
+# class is '' for students without a class. A debt paid in part is split
+# into two rows (see Expense._write_settlements): the paid part counts as
+# a debts event and its amount moves out of the original row's total, so
+# the live rollups match what backfill() computes from the rows.
+#
+# The write paths (Expense, Activity.enroll_student, Feedback) call
+# record() with the cursor of their own transaction, so the aggregates are
+# committed or rolled back with the rows they count. backfill() rebuilds a
+# metric from the raw rows, archived ones included (first installation,
+# deleted rows, data imported with plain SQL); run it while nobody is writing.
+#
+# KEY RESPONSIBILITIES:
+# 1. Upsert the aggregates of the rows a transaction just wrote
+# 2. Rebuild the aggregates from the raw tables
+# 3. Read trend series (a few hundred rows) for charts and Statistics
+#
+# USAGE:
+#   Rollups.record(cursor, 'enrollments', 'id', [enrollment_id])   # Inside a write transaction
+#   Rollups.adjust(cursor, 'debts', 'id', [debt_id], -paid)          # A recorded row's value changed
+#   Rollups.series('expenses', 'day', group_by='class')             # [(day, class, count, total), ...]
+#   Rollups.enrollment_velocity('hour', start, end)                 # [(hour, enrollments, cumulative), ...]
+#
+#   python -m PythonExpenseApp.rollups --backfill
+# ===================================================================
+
+import argparse  # Command line options
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class Rollups:
+    """Pre-aggregated time buckets of the trip's writes (all methods are static)."""
+
+    # Granularity -> (table, bucket expression of the event time src.ts)
+    GRANULARITIES = {
+        'hour': ('rollup_hourly', "TIMESTAMP(DATE(src.ts), MAKETIME(HOUR(src.ts), 0, 0))"),
+        'day': ('rollup_daily', "DATE(src.ts)"),
+    }
+
+    # Metric -> (rows as ts, class, activity_id, value; condition or None; filter name -> column).
+    # {expenses} / {debts} are the live tables for record() and the history views
+    # (live + archived rows, see archival.py) for backfill().
+    METRICS = {
+        'expenses': ("""SELECT e.date AS ts, COALESCE(s.class, '') AS class,
+                               COALESCE(e.id_activity, 0) AS activity_id, e.amount AS value
+                        FROM {expenses} e LEFT JOIN students s ON s.id = e.id_giver""",
+                     None, {'id': 'e.id'}),
+        'debts': ("""SELECT d.created_at AS ts, COALESCE(s.class, '') AS class,
+                            COALESCE(e.id_activity, 0) AS activity_id, d.amount AS value
+                     FROM {debts} d LEFT JOIN students s ON s.id = d.debtor_id
+                     LEFT JOIN {expenses} e ON e.id = d.expense_id""",
+                  None, {'id': 'd.id', 'expense': 'd.expense_id'}),
+        'debts_paid': ("""SELECT COALESCE(d.date_paid, d.updated_at) AS ts, COALESCE(s.class, '') AS class,
+                                 COALESCE(e.id_activity, 0) AS activity_id, d.amount AS value
+                          FROM {debts} d LEFT JOIN students s ON s.id = d.debtor_id
+                          LEFT JOIN {expenses} e ON e.id = d.expense_id""",
+                       "d.paid = TRUE", {'id': 'd.id'}),
+        'enrollments': ("""SELECT sa.registration_date AS ts, COALESCE(s.class, '') AS class,
+                                  sa.activity_id AS activity_id, 1 AS value
+                           FROM student_activities sa LEFT JOIN students s ON s.id = sa.student_id""",
+                        None, {'id': 'sa.id'}),
+        'feedback': ("""SELECT f.created_at AS ts, COALESCE(s.class, '') AS class,
+                               f.activity_id AS activity_id, f.rating AS value
+                        FROM feedback f LEFT JOIN students s ON s.id = f.student_id""",
+                     None, {'id': 'f.id'}),
+    }
+
+    # Columns a series can be split by
+    GROUP_COLUMNS = {'class': 'class', 'activity': 'activity_id'}
+
+    @staticmethod
+    def statements(metric, by=None, values=(), amount=None):
+        """
+        Build the upserts adding rows of a metric to the hourly and daily tables.
+
+        :param metric: str - Key of METRICS.
+        :param by: str, optional - Filter name of the metric ('id', 'expense'); None aggregates every row.
+        :param values: iterable - Values of the filter column (ids of the rows just written).
+        :param amount: number, optional - Add this to the total of each row's bucket instead
+                       of counting the rows (no events, see adjust()).
+        :return: list - [(query, params), ...], one per granularity.
+        """
+        source, condition, filters = Rollups.METRICS[metric]
+        tables = ('expenses', 'debts') if by is not None else ('expenses_history', 'debts_history')
+        source = source.format(expenses=tables[0], debts=tables[1])
+        conditions = [condition] if condition else []
+        params = []
+        if by is not None:
+            values = list(values)
+            conditions.append(f"{filters[by]} IN ({', '.join(['%s'] * len(values))})")
+            params = values
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        if amount is None:
+            aggregates, head = "COUNT(*) AS events, COALESCE(SUM(src.value), 0) AS total", (metric,)
+        else:
+            aggregates, head = "0 AS events, COUNT(*) * %s AS total", (metric, amount)
+        statements = []
+        for table, bucket in Rollups.GRANULARITIES.values():
+            # Derived table instead of VALUES() in the update (deprecated since MySQL 8.0.20,
+            # warning 1287, which raise_on_warnings turns into an error)
+            query = f"""INSERT INTO {table} (metric, bucket, class, activity_id, events, total)
+                        SELECT * FROM (
+                            SELECT %s AS metric, {bucket} AS rollup_bucket, src.class, src.activity_id,
+                                   {aggregates}
+                            FROM ({source}{where}) src
+                            GROUP BY rollup_bucket, src.class, src.activity_id) AS agg
+                        ON DUPLICATE KEY UPDATE events = {table}.events + agg.events,
+                                                total = {table}.total + agg.total"""
+            statements.append((query, (*head, *params)))
+        return statements
+
+    @staticmethod
+    def record(cursor, metric, by, values):
+        """
+        Add the rows a transaction just wrote to the rollups, through the cursor of that
+        transaction (DbConnection.run_transaction), so both commit or roll back together.
+
+        :param cursor: Cursor of the write transaction.
+        :param metric: str - Key of METRICS.
+        :param by: str - Filter name of the metric ('id', 'expense').
+        :param values: iterable - Ids of the rows to add.
+        :return: None
+        """
+        values = [value for value in values if value is not None]
+        if not values:
+            return
+        for query, params in Rollups.statements(metric, by, values):
+            cursor.execute(query, params)
+
+    @staticmethod
+    def adjust(cursor, metric, by, values, amount):
+        """
+        Change the total of the buckets of rows already recorded whose value changed
+        (e.g. the amount moved out of a debt paid in part), without counting events.
+
+        :param cursor: Cursor of the write transaction.
+        :param metric: str - Key of METRICS.
+        :param by: str - Filter name of the metric ('id', 'expense').
+        :param values: iterable - Ids of the changed rows.
+        :param amount: number - Added to the total once per row (negative to subtract).
+        :return: None
+        """
+        values = [value for value in values if value is not None]
+        if not values or not amount:
+            return
+        for query, params in Rollups.statements(metric, by, values, amount):
+            cursor.execute(query, params)
+
+    @staticmethod
+    def backfill(metrics=None):
+        """
+        Rebuild the rollups of the given metrics from the raw tables, one transaction per metric.
+
+        :param metrics: iterable, optional - Keys of METRICS (default: all).
+        :return: tuple (bool, str) - (success, message)
+        """
+        metrics = list(metrics or Rollups.METRICS)
+        for metric in metrics:
+            def work(cursor, metric=metric):
+                for table, _ in Rollups.GRANULARITIES.values():
+                    cursor.execute(f"DELETE FROM {table} WHERE metric = %s", (metric,))
+                for query, params in Rollups.statements(metric):
+                    cursor.execute(query, params)
+
+            success, result = DbConnection.run_transaction(work)
+            if not success:
+                print(f"Error backfilling rollups of {metric}: {result}")
+                return False, f"Backfill of {metric} failed: {result}"
+        return True, f"Rebuilt the rollups of {', '.join(metrics)}"
+
+    @staticmethod
+    def series(metric, granularity='day', start=None, end=None, group_by=None,
+               class_=None, activity_id=None):
+        """
+        Read a trend series from the rollups.
+
+        :param metric: str - Key of METRICS.
+        :param granularity: str - 'hour' or 'day'.
+        :param start: date/datetime, optional - First bucket included.
+        :param end: date/datetime, optional - Buckets before this one are included.
+        :param group_by: str, optional - 'class' or 'activity': one row per bucket and key.
+        :param class_: str, optional - Only this class.
+        :param activity_id: int, optional - Only this activity.
+        :return: list - [(bucket, events, total)] or [(bucket, key, events, total)], by bucket;
+                 empty on error.
+        """
+        table, _ = Rollups.GRANULARITIES[granularity]
+        conditions, params = ["metric = %s"], [metric]
+        for condition, value in (("bucket >= %s", start), ("bucket < %s", end),
+                                 ("class = %s", class_), ("activity_id = %s", activity_id)):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        keys = "bucket" + (f", {Rollups.GROUP_COLUMNS[group_by]}" if group_by else "")
+        query = f"""SELECT {keys}, SUM(events), SUM(total) FROM {table}
+                    WHERE {' AND '.join(conditions)}
+                    GROUP BY {keys} ORDER BY {keys}"""
+        success, rows = DbConnection.execute_query(query, tuple(params), fetch_all=True)
+        if not success:
+            print(f"Error reading the {metric} rollups: {rows}")
+            return []
+        return [(*row[:-2], int(row[-2]), float(row[-1])) for row in rows]
+
+    @staticmethod
+    def enrollment_velocity(granularity='hour', start=None, end=None, activity_id=None):
+        """
+        Enrollments per bucket during the registration window, with the running total.
+
+        :param granularity: str - 'hour' or 'day'.
+        :param start: date/datetime, optional - Opening of the window.
+        :param end: date/datetime, optional - Closing of the window.
+        :param activity_id: int, optional - Only this activity.
+        :return: list - [(bucket, enrollments, cumulative), ...]
+        """
+        cumulative = 0
+        velocity = []
+        for bucket, events, _ in Rollups.series('enrollments', granularity, start, end,
+                                                activity_id=activity_id):
+            cumulative += events
+            velocity.append((bucket, events, cumulative))
+        return velocity
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain the hourly and daily rollup tables.")
+    parser.add_argument("--backfill", action="store_true", help="rebuild the rollups from the raw tables")
+    parser.add_argument("--metric", action="append", choices=sorted(Rollups.METRICS),
+                        help="metric to rebuild (repeatable, default: all)")
+    args = parser.parse_args(argv)
+    if not args.backfill:
+        parser.print_help()
+        return 0
+    success, message = Rollups.backfill(args.metric)
+    print(message)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
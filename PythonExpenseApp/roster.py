@@ -0,0 +1,296 @@
+# ===================================================================
+# ROSTER - COMPACT READ-ONLY LISTINGS OF STUDENTS AND ACTIVITIES
+# ===================================================================
+# Student.get_all_students and Activity.get_all_activities build one full
+# model object per row: an instance __dict__, list attributes
+# (selected_activities, participants, ...) and one Python object per value.
+# With tens of thousands of students that is hundreds of MB for a list
+# nobody edits. The types below hold the same rows in a fraction of it:
+#
+# - StudentRecord / ActivityRecord: one __slots__ object per row (no __dict__)
+# - StudentRoster / ActivityRoster: columnar storage, one stdlib array per
+#   numeric column and dictionary-encoded columns for repeated values
+#   (class, location, day, ...), records built only while iterating
+#
+# A listing stays compact until a row has to be edited: promote() builds
+# the full Student / Activity through from_row (so inside a Session the
+# identity map instance is returned) and the usual model methods apply.
+#
+# KEY RESPONSIBILITIES:
+# 1. Load the same rows as the model listings (shared query constants)
+# 2. Store them without per-row dictionaries or per-value objects
+# 3. Promote single rows to full model objects on demand
+#
+# USAGE:
+#   roster = StudentRoster.load()
+#   for record in roster:                      # StudentRecord, read only
+#       print(record.surname, record.class_, record.balance)
+#   student = roster.promote(student_id)       # Full Student, only for edits
+#   student.balance -= 10
+#   student.update_in_database()
+# ===================================================================
+
+import sys  # String interning
+from array import array  # Typed numeric columns
+
+from PythonExpenseApp.activity import Activity
+from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.student import Student
+
+
+# ===================================================================
+# RECORDS
+# ===================================================================
+
+class _Record:
+    """One row as a __slots__ object. Subclasses list the model attribute names in row order."""
+
+    __slots__ = ()
+
+    MODEL = None
+
+    def __init__(self, *values):
+        for field, value in zip(self.__slots__, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        :param row: tuple - Database row in the layout of MODEL.from_row.
+        :return: _Record
+        """
+        return cls(*row)
+
+    def as_row(self):
+        """:return: tuple - The row in the layout of MODEL.from_row."""
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    def promote(self):
+        """
+        Build the full model object of this row (inside a Session, the instance
+        already loaded for the same id).
+
+        :return: Student or Activity
+        """
+        return self.MODEL.from_row(self.as_row())
+
+    def __repr__(self):
+        return f"{type(self).__name__}(id={self.id!r}, name={self.name!r})"
+
+
+class StudentRecord(_Record):
+    """Read-only student row (attribute names as in Student)."""
+
+    __slots__ = ('id', 'name', 'surname', 'username', 'class_', 'age', 'special_needs',
+                 'total_expenses', 'fee_share', 'balance')
+
+    MODEL = Student
+
+
+class ActivityRecord(_Record):
+    """Read-only activity row (attribute names as in Activity)."""
+
+    __slots__ = ('id', 'name', 'day', 'start', 'finish', 'location', 'maxpart', 'duration', 'description')
+
+    MODEL = Activity
+
+
+# ===================================================================
+# COLUMNS
+# ===================================================================
+
+class _IntColumn:
+    """Integers in a signed 64-bit array; NULL is kept as a sentinel."""
+
+    NULL = -2 ** 63
+
+    def __init__(self):
+        self._values = array('q')
+
+    def append(self, value):
+        self._values.append(self.NULL if value is None else int(value))
+
+    def __getitem__(self, index):
+        value = self._values[index]
+        return None if value == self.NULL else value
+
+
+class _FloatColumn:
+    """Amounts in a double array; NULL reads back as 0.0, as in the models."""
+
+    def __init__(self):
+        self._values = array('d')
+
+    def append(self, value):
+        self._values.append(float(value) if value else 0.0)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+
+class _TextColumn:
+    """Free text (names, descriptions); equal strings are stored once."""
+
+    def __init__(self):
+        self._values = []
+
+    def append(self, value):
+        self._values.append(sys.intern(value) if isinstance(value, str) else value)
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+
+class _CodedColumn:
+    """Few distinct values (class, location, day, times): one code per row, each value stored once."""
+
+    def __init__(self):
+        self._codes = array('I')
+        self._distinct = []  # Code -> value
+        self._code_of = {}  # Value -> code
+
+    def append(self, value):
+        code = self._code_of.get(value)
+        if code is None:
+            code = self._code_of[value] = len(self._distinct)
+            self._distinct.append(value)
+        self._codes.append(code)
+
+    def __getitem__(self, index):
+        return self._distinct[self._codes[index]]
+
+
+_COLUMN_TYPES = {'int': _IntColumn, 'float': _FloatColumn, 'text': _TextColumn, 'coded': _CodedColumn}
+
+
+# ===================================================================
+# ROSTERS
+# ===================================================================
+
+class _Roster:
+    """
+    Columnar storage of the rows of one listing.
+
+    Subclasses set RECORD (the record type, whose __slots__ name the columns),
+    QUERY (the listing query of the model) and KINDS (the column type of each field).
+    """
+
+    RECORD = None
+    QUERY = None
+    KINDS = ()
+
+    def __init__(self):
+        self._columns = [_COLUMN_TYPES[kind]() for kind in self.KINDS]
+        self._length = 0
+        self._positions = None  # id -> row index, built by the first lookup
+
+    @classmethod
+    def load(cls):
+        """
+        Load the listing from the database (same rows and order as the model listing).
+
+        :return: _Roster - Empty if the query fails.
+        """
+        success, result = DbConnection.execute_query(cls.QUERY, fetch_all=True)
+        if not success:
+            print(f"Error loading {cls.__name__}: {result}")
+            return cls()
+        return cls.from_rows(result)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        :param rows: iterable - Rows in the layout of the model's from_row.
+        :return: _Roster
+        """
+        roster = cls()
+        for row in rows:
+            roster.append(row)
+        return roster
+
+    def append(self, row):
+        """
+        Add a row at the end of the listing.
+
+        :param row: tuple - Row in the layout of the model's from_row.
+        """
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self._length += 1
+        if self._positions is not None:
+            self._positions[row[0]] = self._length - 1
+
+    def __len__(self):
+        return self._length
+
+    def row(self, index):
+        """
+        :param index: int - Position in the listing.
+        :return: tuple - The row in the layout of the model's from_row.
+        """
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError(f"{type(self).__name__} index out of range")
+        return tuple(column[index] for column in self._columns)
+
+    def __getitem__(self, index):
+        return self.RECORD(*self.row(index))
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self.RECORD(*self.row(index))
+
+    def values(self, field):
+        """
+        All the values of one column, e.g. for sorting or filtering a listing.
+
+        :param field: str - Attribute name (see the record __slots__).
+        :return: list
+        """
+        column = self._columns[self.RECORD.__slots__.index(field)]
+        return [column[index] for index in range(self._length)]
+
+    def index_of(self, object_id):
+        """
+        :param object_id: int - Database id.
+        :return: int or None - Position of the row in the listing.
+        """
+        if self._positions is None:
+            ids = self._columns[0]
+            self._positions = {ids[index]: index for index in range(self._length)}
+        return self._positions.get(object_id)
+
+    def find(self, object_id):
+        """
+        :param object_id: int - Database id.
+        :return: record or None
+        """
+        index = self.index_of(object_id)
+        return None if index is None else self[index]
+
+    def promote(self, object_id):
+        """
+        Build the full model object of a row, to edit it.
+
+        :param object_id: int - Database id.
+        :return: Student / Activity or None if the id is not in the listing.
+        """
+        index = self.index_of(object_id)
+        return None if index is None else self.RECORD.MODEL.from_row(self.row(index))
+
+
+class StudentRoster(_Roster):
+    """Compact listing of Student.get_all_students."""
+
+    RECORD = StudentRecord
+    QUERY = Student.ALL_STUDENTS_QUERY
+    KINDS = ('int', 'text', 'text', 'text', 'coded', 'int', 'coded', 'float', 'float', 'float')
+
+
+class ActivityRoster(_Roster):
+    """Compact listing of Activity.get_all_activities."""
+
+    RECORD = ActivityRecord
+    QUERY = Activity.ALL_ACTIVITIES_QUERY
+    KINDS = ('int', 'text', 'coded', 'coded', 'coded', 'coded', 'int', 'int', 'text')
@@ -0,0 +1,232 @@
+# ===================================================================
+# SEARCH INDEX - IN-MEMORY INDEX FOR INTERACTIVE LIST FILTERS
+# ===================================================================
+# The search boxes of the GUIs filter lists that are already in memory
+# (students, activities). Instead of lowercasing and scanning every row on
+# each keystroke, a SearchIndex is built once per data load:
+#
+# - every searchable field is normalized once (lowercase, accents removed)
+# - an n-gram index maps short substrings to the records containing them,
+#   so a query only verifies the records that can possibly match
+# - display rows are rendered once and reused by every search
+# - a query that extends the previous one (the user keeps typing) only
+#   re-checks the previous results
+#
+# QUERY SYNTAX:
+#   "mar ros"            every word must appear in one of the default fields
+#   "class:4A name:mar"  field-qualified words (any indexed field)
+#   exact={'day': '2025-06-10'} for values chosen from a combobox
+#
+# This module does not depend on Tkinter and can be used by any view.
+# ===================================================================
+
+import unicodedata  # Accent removal
+
+
+def normalize(text):
+    """
+    Normalize text for searching: lowercase (casefold) without accents.
+
+    :param text: any - Value to normalize (None becomes an empty string).
+    :return: str - Normalized text.
+    """
+    if text is None:
+        return ""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def parse_query(query, fields):
+    """
+    Split a query into (field, value) terms.
+
+    Words written as "field:value" are restricted to that field when it is one
+    of the indexed fields; every other word uses field None (default fields).
+
+    :param query: str - Text typed by the user.
+    :param fields: iterable - Names of the indexed fields.
+    :return: list - List of (field or None, normalized value) tuples.
+    """
+    terms = []
+    for word in normalize(query).split():
+        field, separator, value = word.partition(":")
+        if separator and field in fields:
+            if value:
+                terms.append((field, value))
+        else:
+            terms.append((None, word))
+    return terms
+
+
+class SearchResults:
+    """
+    Ordered result of a search: a sequence of records plus their pre-rendered display rows.
+
+    ATTRIBUTES:
+        index (SearchIndex): Index that produced the results
+        positions (list): Positions of the matching records in index.records
+    """
+
+    def __init__(self, index, positions):
+        self.index = index
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, i):
+        return self.index.records[self.positions[i]]
+
+    def display(self, i):
+        """Return the pre-rendered display row of the i-th result."""
+        return self.index.display_rows[self.positions[i]]
+
+    def display_list(self):
+        """Return the pre-rendered display rows of every result (e.g. for a Listbox)."""
+        display_rows = self.index.display_rows
+        return [display_rows[position] for position in self.positions]
+
+
+class SearchIndex:
+    """
+    N-gram search index over a list of records.
+
+    KEY RESPONSIBILITIES:
+        1. Normalize the searchable fields of every record once
+        2. Map 1..NGRAM-character substrings to the records containing them
+        3. Keep exact-value lookups for combobox filters (day, class...)
+        4. Pre-render the display row of every record
+        5. Narrow the previous result when the query is extended
+    """
+
+    # Longest substring stored in the n-gram index
+    NGRAM = 3
+
+    def __init__(self, records, fields, default_fields=None, display=None, exact_fields=()):
+        """
+        Build the index.
+
+        :param records: list - Records to index (tuples, objects...).
+        :param fields: dict - Field name -> callable(record) returning the field value.
+        :param default_fields: iterable, optional - Fields searched by unqualified words (all fields by default).
+        :param display: callable(record), optional - Renders the display row of a record.
+        :param exact_fields: iterable, optional - Fields that can be filtered by exact value.
+        """
+        self.records = records
+        self.fields = list(fields)
+        self.default_fields = list(default_fields or self.fields)
+        self.display_rows = [display(record) for record in records] if display else list(records)
+
+        # field -> list of normalized values (one per record)
+        self._texts = {field: [normalize(getter(record)) for record in records]
+                       for field, getter in fields.items()}
+        # field -> normalized value -> positions, for exact filters
+        self._exact = {}
+        for field in exact_fields:
+            values = {}
+            for position, value in enumerate(self._texts[field]):
+                values.setdefault(value, []).append(position)
+            self._exact[field] = values
+        # (field, gram) -> ascending positions of the records containing gram in field
+        self._grams = {}
+        for field in self.fields:
+            for position, text in enumerate(self._texts[field]):
+                for gram in self._record_grams(text):
+                    self._grams.setdefault((field, gram), []).append(position)
+
+        self._last_terms = None  # Terms of the previous search
+        self._last_exact = None  # Exact filters of the previous search
+        self._last_positions = None  # Result of the previous search
+
+    def _record_grams(self, text):
+        """Every distinct substring of length 1..NGRAM of a normalized text."""
+        grams = set()
+        for size in range(1, self.NGRAM + 1):
+            for start in range(len(text) - size + 1):
+                grams.add(text[start:start + size])
+        return grams
+
+    def all(self):
+        """
+        Return every record, in the original order.
+
+        :return: SearchResults
+        """
+        return SearchResults(self, list(range(len(self.records))))
+
+    def search(self, query="", exact=None):
+        """
+        Return the records matching every word of the query and every exact filter.
+
+        :param query: str - Text typed by the user (see QUERY SYNTAX).
+        :param exact: dict, optional - Field -> value that must match exactly (None values are ignored).
+        :return: SearchResults - Matching records in the original order.
+        """
+        terms = parse_query(query, self.fields)
+        exact = {field: normalize(value) for field, value in (exact or {}).items() if value is not None}
+
+        if not terms and not exact:
+            positions = list(range(len(self.records)))
+        else:
+            candidates = self._narrowed_candidates(terms, exact)
+            for field, value in exact.items():
+                exact_positions = self._exact[field].get(value, []) if field in self._exact else None
+                if exact_positions is not None and (candidates is None or len(exact_positions) < len(candidates)):
+                    candidates = exact_positions
+            for field, value in terms:
+                term_positions = self._term_candidates(field, value)
+                if candidates is None or len(term_positions) < len(candidates):
+                    candidates = term_positions
+            if candidates is None:  # Only exact filters on fields without an exact lookup
+                candidates = range(len(self.records))
+            positions = [position for position in candidates
+                         if self._matches(position, terms, exact)]
+
+        self._last_terms, self._last_exact, self._last_positions = terms, exact, positions
+        return SearchResults(self, positions)
+
+    def _narrowed_candidates(self, terms, exact):
+        """
+        Return the previous result when the new query can only match a subset of it:
+        same exact filters and every previous term still contained in the term at the
+        same position (the user kept typing), otherwise None.
+        """
+        if self._last_positions is None or exact != self._last_exact:
+            return None
+        if len(terms) < len(self._last_terms):
+            return None
+        for (old_field, old_value), (new_field, new_value) in zip(self._last_terms, terms):
+            if old_field != new_field or old_value not in new_value:
+                return None
+        return self._last_positions
+
+    def _term_candidates(self, field, value):
+        """Positions that may contain value, using the rarest n-gram of the value."""
+        fields = [field] if field else self.default_fields
+        if len(value) <= self.NGRAM:
+            grams = [value]
+        else:
+            grams = [value[start:start + self.NGRAM] for start in range(len(value) - self.NGRAM + 1)]
+
+        if len(fields) == 1:
+            return min((self._grams.get((fields[0], gram), []) for gram in grams), key=len)
+
+        # Several fields: union of the postings of the rarest gram in each field
+        merged = set()
+        for name in fields:
+            merged.update(min((self._grams.get((name, gram), []) for gram in grams), key=len))
+        return sorted(merged)
+
+    def _matches(self, position, terms, exact):
+        """Verify a candidate record against every term and exact filter."""
+        texts = self._texts
+        for field, value in exact.items():
+            if texts[field][position] != value:
+                return False
+        for field, value in terms:
+            if field:
+                if value not in texts[field][position]:
+                    return False
+            elif not any(value in texts[name][position] for name in self.default_fields):
+                return False
+        return True
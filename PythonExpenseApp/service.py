@@ -0,0 +1,811 @@
+# ===================================================================
+# TRIP MANAGER SERVICE - HTTP/JSON API OVER ONE SHARED CONNECTION POOL
+# ===================================================================
+# Every desktop client used to open its own pool of 10 MySQL connections.
+# With hundreds of students on the same trip the server runs out of
+# connections. In service mode one process owns the pool and the clients
+# (started with TRIP_MANAGER_SERVICE_URL set, see service_client.py) call
+# it over HTTP instead of querying MySQL directly.
+#
+# KEY RESPONSIBILITIES:
+# 1. Expose the model layer (Student, Activity, Expense, Feedback,
+#    Statistics, DailyProgram) and the GUI data loaders as named operations
+# 2. Serve many clients concurrently (one thread per request) while never
+#    running more database operations at once than the pool has connections
+# 3. Cache read results server side: per-operation TTL, invalidation by
+#    topic when a write operation succeeds, and a single database call for
+#    concurrent identical requests
+# 4. Authenticate every call but the logins with the signed session token
+#    of the login (auth.SessionTokens) and authorize it for the caller: the
+#    acting student is taken from the token, per-student data is served to
+#    its owner (or a teacher), and teacher-only reads check the token role.
+#    A token is re-checked against the stored user (password and role) at
+#    most every Caller.CHECK_SECONDS, and login.sign_out revokes it
+#
+# PROTOCOL:
+#   POST /api/<operation>   body {"params": {...}}
+#                           header "Authorization: Bearer <session token>"
+#   GET  /api/health        database check
+#   GET  /api/stats         cache, request and read/write routing counters (teachers)
+#   response {"ok": true, "result": ...} or {"ok": false, "error": "...", "type": "..."}
+#   (values are encoded with service_client.encode_value)
+#
+# USAGE:
+#   python -m PythonExpenseApp.service --host 0.0.0.0 --port 8765 --pool-size 24
+#   python -m PythonExpenseApp.service --pool-size 24 --replica db-replica1 --replica db-replica2:3307
+# ===================================================================
+
+import argparse  # Command line options
+import contextlib  # No pool slot for unpooled operations
+import inspect  # Operations receiving the caller
+import json  # Wire format
+import logging  # Request errors
+import threading  # Cache lock, pool slots
+import time  # Cache expiry
+from collections import OrderedDict  # LRU order of cached results
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # HTTP transport
+
+from PythonExpenseApp.auth import Auth, SessionTokens
+from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.service_client import ServiceClient, encode_value, decode_value
+from PythonExpenseApp.session import Session
+
+
+# Access levels of the operations
+PUBLIC = 'public'  # No session token (the logins)
+USER = 'user'  # Any logged in user
+TEACHER = 'teacher'  # Users with the teacher role
+
+
+class Caller:
+    """
+    The user making a request, taken from its session token.
+
+    A token is checked against the stored user (password fingerprint and role, see
+    Auth.check_session) at most once every CHECK_SECONDS; signed out tokens are
+    rejected until they expire.
+
+    ATTRIBUTES:
+        id (int): Id of the student (students.id)
+        role (str): 'student' or 'teacher'
+    """
+
+    __slots__ = ('id', 'role')
+
+    # Seconds a token checked against the database is trusted (password change, new role)
+    CHECK_SECONDS = 30
+    # Checked tokens kept before the expired ones are dropped
+    MAX_CHECKED = 4096
+
+    _checked = {}  # token -> (monotonic deadline, Caller)
+    _revoked = {}  # token -> time.time() after which the token is expired anyway
+    _lock = threading.Lock()
+
+    def __init__(self, user_id, role):
+        self.id = user_id
+        self.role = role
+
+    @property
+    def is_teacher(self):
+        return self.role == TEACHER
+
+    @classmethod
+    def from_token(cls, token):
+        """
+        :param token: str or None - Bearer token of the request.
+        :return: Caller
+        :raises PermissionError: If the token is missing, forged, expired, signed out,
+                                 or no longer matches its user.
+        :raises ConnectionError: If the user cannot be read.
+        """
+        now = time.monotonic()
+        with cls._lock:
+            if token in cls._revoked:
+                raise PermissionError("Sign in required")
+            checked = cls._checked.get(token)
+        if checked is not None and checked[0] > now:
+            return checked[1]
+        session = Auth.check_session(token)
+        if session is None:
+            with cls._lock:
+                cls._checked.pop(token, None)
+            raise PermissionError("Sign in required")
+        caller = cls(*session)
+        with cls._lock:
+            if len(cls._checked) >= cls.MAX_CHECKED:
+                for stale in [key for key, (deadline, _) in cls._checked.items() if deadline <= now]:
+                    del cls._checked[stale]
+            cls._checked[token] = (now + cls.CHECK_SECONDS, caller)
+        return caller
+
+    @classmethod
+    def is_revoked(cls, token):
+        """:return: bool - The token was signed out."""
+        with cls._lock:
+            return token in cls._revoked
+
+    @classmethod
+    def revoke(cls, token):
+        """
+        Reject a token from now on (sign-out), until it would have expired anyway.
+
+        :param token: str - Session token.
+        :return: bool - False if the token was not valid.
+        """
+        if SessionTokens.check(token) is None:
+            return False
+        now = time.time()
+        with cls._lock:
+            for stale in [key for key, expires in cls._revoked.items() if expires <= now]:
+                del cls._revoked[stale]
+            cls._revoked[token] = now + SessionTokens.TTL_SECONDS
+            cls._checked.pop(token, None)
+        return True
+
+
+class Operation:
+    """
+    A named service operation.
+
+    ATTRIBUTES:
+        name (str): Name used in the URL (e.g. "activity.comprehensive_details")
+        function (callable): Implementation, called with the request params
+        ttl (float): Seconds a result stays cached (0 = never cached, e.g. writes)
+        topics (tuple): Data the result depends on (cache invalidation)
+        invalidates (tuple): Topics changed by the operation when it succeeds
+        pooled (bool): Hold a pool slot for the whole call (False: the operation
+                       bounds its own database calls, e.g. the logins, see auth.py)
+        access (str): PUBLIC, USER or TEACHER
+        owner (str): Param holding the student the data belongs to: only that
+                     student or a teacher may call the operation (None: no owner)
+        takes_caller (bool): The function has a caller parameter (set from the token)
+    """
+
+    __slots__ = ('name', 'function', 'ttl', 'topics', 'invalidates', 'pooled', 'access', 'owner',
+                 'takes_caller')
+
+    def __init__(self, name, function, ttl, topics, invalidates, pooled=True, access=USER, owner=None):
+        self.name = name
+        self.function = function
+        self.ttl = ttl
+        self.topics = tuple(topics)
+        self.invalidates = tuple(invalidates)
+        self.pooled = pooled
+        self.access = access
+        self.owner = owner
+        self.takes_caller = 'caller' in inspect.signature(function).parameters
+
+    def authorize(self, token, params):
+        """
+        Check that the bearer of the token may run the operation with these params.
+        Runs before the result cache, so a cached result is never served to another user.
+
+        :param token: str or None - Session token of the request.
+        :param params: dict - Request params.
+        :return: Caller or None - The caller (None for PUBLIC operations).
+        :raises PermissionError: If the caller is not allowed.
+        """
+        if self.access == PUBLIC:
+            return None
+        caller = Caller.from_token(token)
+        if self.access == TEACHER and not caller.is_teacher:
+            raise PermissionError(f"{self.name} is reserved to teachers")
+        if self.owner is not None and not caller.is_teacher and params.get(self.owner) != caller.id:
+            raise PermissionError(f"{self.name} is only allowed on your own data")
+        return caller
+
+
+# Registered operations: name -> Operation
+OPERATIONS = {}
+
+
+def operation(name, ttl=0, topics=(), invalidates=(), pooled=True, access=USER, owner=None):
+    """
+    Register the decorated function as a service operation.
+
+    :param name: str - Operation name.
+    :param ttl: float - Cache lifetime of the result in seconds (0 = not cached).
+    :param topics: tuple - Topics the result depends on.
+    :param invalidates: tuple - Topics invalidated when the operation succeeds.
+    :param pooled: bool - Hold a pool slot for the whole call (see Operation).
+    :param access: str - PUBLIC, USER or TEACHER.
+    :param owner: str, optional - Param naming the student the data belongs to (see Operation).
+    :return: decorator
+    """
+    def register(function):
+        OPERATIONS[name] = Operation(name, function, ttl, topics, invalidates, pooled, access, owner)
+        return function
+    return register
+
+
+def _acting_student(caller, student_id=None):
+    """
+    :param caller: Caller - The user making the request.
+    :param student_id: int, optional - Student the client says it acts for.
+    :return: int - The caller's id (writes always act as the token's user).
+    :raises PermissionError: If the client asked to act for another student.
+    """
+    if student_id is not None and student_id != caller.id:
+        raise PermissionError("You can only act on your own behalf")
+    return caller.id
+
+
+class _Flight:
+    """A database call in progress, shared by concurrent identical requests."""
+
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class ResultCache:
+    """
+    Thread-safe TTL cache of encoded operation results.
+
+    Entries are invalidated by topic; a result computed while one of its topics
+    was invalidated is not stored, so a write is never hidden by a slower read.
+    """
+
+    # Maximum number of cached results (least recently used are evicted)
+    MAX_ENTRIES = 4096
+
+    def __init__(self, max_entries=None):
+        self.max_entries = max_entries or self.MAX_ENTRIES
+        self._entries = OrderedDict()  # key -> (expires_at, topics, encoded result)
+        self._flights = {}  # key -> _Flight
+        self._versions = {}  # topic -> version, incremented by invalidate
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, ttl, topics, compute):
+        """
+        Return the cached result of key, or compute it once (concurrent callers wait).
+
+        :param key: hashable - Operation name and encoded params.
+        :param ttl: float - Lifetime of the computed result.
+        :param topics: tuple - Topics of the result.
+        :param compute: callable() - Returns the encoded result.
+        :return: The encoded result.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                versions = [self._versions.get(topic, 0) for topic in topics]
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except Exception as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                unchanged = versions == [self._versions.get(topic, 0) for topic in topics]
+                if flight.error is None and unchanged:
+                    self._entries[key] = (time.monotonic() + ttl, topics, flight.result)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.event.set()
+        return flight.result
+
+    def invalidate(self, *topics):
+        """Drop every cached result depending on one of the topics."""
+        if not topics:
+            return
+        with self._lock:
+            for topic in topics:
+                self._versions[topic] = self._versions.get(topic, 0) + 1
+            for key in [key for key, entry in self._entries.items() if set(entry[1]) & set(topics)]:
+                del self._entries[key]
+
+    def stats(self):
+        """Return the cache counters."""
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+class TripManagerService:
+    """
+    Executes operations with caching and a bound on concurrent database work.
+
+    ATTRIBUTES:
+        cache (ResultCache): Server-side cache of read results
+        pool_size (int): Connections of the shared pool (= concurrent operations)
+    """
+
+    def __init__(self, pool_size):
+        self.pool_size = pool_size
+        self.cache = ResultCache()
+        # mysql.connector pools fail instead of waiting when exhausted:
+        # requests beyond the pool size queue here
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self.requests = 0
+        # The logins take a slot only around their queries, not while the password hash runs
+        from PythonExpenseApp.auth import Auth
+        Auth.use_database_gate(self._slots)
+
+    def execute(self, name, params, token=None):
+        """
+        Run an operation and return its JSON-encoded result.
+
+        :param name: str - Operation name.
+        :param params: dict - Decoded request params.
+        :param token: str, optional - Session token of the caller (required unless PUBLIC).
+        :return: str - JSON of the encoded result.
+        :raises KeyError: If the operation does not exist.
+        :raises PermissionError: If the caller may not run the operation.
+        """
+        op = OPERATIONS[name]
+        self.requests += 1
+        caller = op.authorize(token, params)
+        arguments = dict(params, caller=caller) if op.takes_caller else params
+
+        def compute():
+            slot = self._slots if op.pooled else contextlib.nullcontext()
+            with slot, Session():  # Request-scoped identity map; deferred writes commit here
+                result = op.function(**arguments)
+            return json.dumps(encode_value(result))
+
+        if op.ttl > 0:
+            key = (name, json.dumps(encode_value(params), sort_keys=True))
+            return self.cache.get_or_compute(key, op.ttl, op.topics, compute)
+        encoded = compute()
+        self.cache.invalidate(*op.invalidates)
+        return encoded
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end of a TripManagerService (set as server.service)."""
+
+    protocol_version = 'HTTP/1.1'  # Keep-alive between the client and the service
+
+    def do_GET(self):
+        if self.path == '/api/health':
+            success, message = DbConnection.test_connection()
+            self._send(200, json.dumps({'ok': True, 'result': [success, message]}))
+        elif self.path == '/api/stats':
+            try:
+                if not Caller.from_token(self._token()).is_teacher:
+                    raise PermissionError("Service statistics are reserved to teachers")
+            except PermissionError as error:
+                self._send_error(403, str(error), 'PermissionError')
+                return
+            stats = dict(self.server.service.cache.stats(), requests=self.server.service.requests,
+                         database=DbConnection.get_routing_stats(),
+                         transactions=DbConnection.get_transaction_stats(),
+                         statements=DbConnection.get_statement_cache_stats())
+            self._send(200, json.dumps({'ok': True, 'result': stats}))
+        else:
+            self._send_error(404, f"Unknown path {self.path}", 'KeyError')
+
+    def do_POST(self):
+        if not self.path.startswith('/api/'):
+            self._send_error(404, f"Unknown path {self.path}", 'KeyError')
+            return
+        name = self.path[len('/api/'):]
+        if name == 'health':
+            self.do_GET()
+            return
+        if name not in OPERATIONS:
+            self._send_error(404, f"Unknown operation {name}", 'KeyError')
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length) or b'{}')
+            params = decode_value(body.get('params') or {})
+        except ValueError as error:
+            self._send_error(400, f"Invalid request: {error}", 'ValueError')
+            return
+        try:
+            encoded = self.server.service.execute(name, params, self._token())
+        except TypeError as error:  # Wrong params for the operation
+            self._send_error(400, str(error), 'TypeError')
+        except PermissionError as error:
+            self._send_error(403, str(error), 'PermissionError')
+        except ConnectionError as error:
+            self._send_error(503, str(error), 'ConnectionError')
+        except Exception as error:
+            logging.exception(f"Service operation {name} failed")
+            self._send_error(500, str(error), type(error).__name__)
+        else:
+            self._send(200, '{"ok": true, "result": ' + encoded + '}')
+
+    def _token(self):
+        """:return: str or None - Bearer token of the Authorization header."""
+        scheme, _, token = (self.headers.get('Authorization') or '').partition(' ')
+        return token.strip() if scheme.lower() == 'bearer' else None
+
+    def _send_error(self, status, message, error_type):
+        self._send(status, json.dumps({'ok': False, 'error': message, 'type': error_type}))
+
+    def _send(self, status, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.debug("service: " + format, *args)
+
+
+def parse_replica(address):
+    """
+    Turn a --replica value into a DbConnection replica config.
+
+    :param address: str - 'host' or 'host:port'.
+    :return: dict - Keys overriding the primary config.
+    """
+    host, _, port = address.partition(':')
+    return {'host': host, 'port': int(port)} if port else {'host': host}
+
+
+def create_server(host='127.0.0.1', port=8765, pool_size=None, replicas=None):
+    """
+    Create the HTTP server (call serve_forever() on the result).
+
+    :param host: str - Interface to listen on.
+    :param port: int - TCP port.
+    :param pool_size: int, optional - Size of the shared MySQL pool (max 32 for mysql.connector).
+    :param replicas: list, optional - Read replica configs (see DbConnection.configure_replicas).
+    :return: ThreadingHTTPServer
+    """
+    ServiceClient.disable()  # The operations below query the database directly
+    if pool_size:
+        DbConnection.update_pool_config(pool_size=pool_size)
+    if replicas:
+        DbConnection.configure_replicas(replicas)
+    server = ThreadingHTTPServer((host, port), _RequestHandler)
+    server.daemon_threads = True
+    server.service = TripManagerService(DbConnection.get_pool_size())
+    return server
+
+
+# ===================================================================
+# MODEL LAYER OPERATIONS
+# ===================================================================
+
+def _student(student_id):
+    from PythonExpenseApp.student import Student
+    student = Student.__new__(Student)
+    student.id = student_id  # Only the id is needed by the per-student queries
+    return student
+
+
+@operation('student.all', ttl=30, topics=('students',), access=TEACHER)
+def student_all():
+    from PythonExpenseApp.student import Student
+    return Student.get_all_students()
+
+
+@operation('student.by_id', ttl=30, topics=('students',), owner='student_id')
+def student_by_id(student_id):
+    from PythonExpenseApp.student import Student
+    return Student.get_student_by_id(student_id)
+
+
+@operation('student.participated_activities', ttl=15, topics=('enrollments',), owner='student_id')
+def student_participated_activities(student_id):
+    return _student(student_id).get_participated_activities()
+
+
+@operation('activity.all', ttl=30, topics=('activities',))
+def activity_all():
+    from PythonExpenseApp.activity import Activity
+    return Activity.get_all_activities()
+
+
+@operation('activity.by_id', ttl=30, topics=('activities',))
+def activity_by_id(activity_id):
+    from PythonExpenseApp.activity import Activity
+    return Activity.get_activity_by_id(activity_id)
+
+
+@operation('activity.comprehensive_details', ttl=15, topics=('activities', 'enrollments', 'feedback'))
+def activity_comprehensive_details(activity_id):
+    from PythonExpenseApp.activity import Activity
+    activity = Activity.get_activity_by_id(activity_id)
+    return activity.get_comprehensive_details() if activity else None
+
+
+@operation('expense.all', ttl=10, topics=('expenses',), access=TEACHER)
+def expense_all():
+    from PythonExpenseApp.expense import Expense
+    return Expense.get_all_expenses()
+
+
+@operation('expense.by_student', ttl=10, topics=('expenses',), owner='student_id')
+def expense_by_student(student_id):
+    from PythonExpenseApp.expense import Expense
+    return Expense.get_expenses_by_student(student_id)
+
+
+@operation('expense.total', ttl=10, topics=('expenses',), access=TEACHER)
+def expense_total():
+    from PythonExpenseApp.expense import Expense
+    return Expense.get_total_expenses()
+
+
+def _require_party(caller, payer_id, debtor_id):
+    """Only the two students of a debt may settle it."""
+    if caller.id not in (payer_id, debtor_id):
+        raise PermissionError("You are not a party of this debt")
+
+
+@operation('expense.mark_debt_as_paid', invalidates=('debts',))
+def expense_mark_debt_as_paid(debt_id, caller):
+    from PythonExpenseApp.expense import Expense
+    success, row = DbConnection.execute_query("SELECT payer_id, debtor_id FROM debts WHERE id = %s",
+                                              (debt_id,), fetch_one=True)
+    if not success:
+        raise ConnectionError(f"Could not read the debt: {row}")
+    if not row:
+        return False
+    _require_party(caller, *row)
+    return Expense.mark_debt_as_paid(debt_id)
+
+
+@operation('expense.settle_between', invalidates=('debts',))
+def expense_settle_between(payer_id, debtor_id, caller, up_to_amount=None):
+    from PythonExpenseApp.expense import Expense
+    _require_party(caller, payer_id, debtor_id)
+    return Expense.settle_between(payer_id, debtor_id, up_to_amount)
+
+
+@operation('expense.settle_all_for', invalidates=('debts',))
+def expense_settle_all_for(caller, student_id=None):
+    from PythonExpenseApp.expense import Expense
+    return Expense.settle_all_for(_acting_student(caller, student_id))
+
+
+@operation('feedback.for_activity', ttl=15, topics=('feedback',))
+def feedback_for_activity(activity_id):
+    from PythonExpenseApp.feedback import Feedback
+    return Feedback.get_feedback_for_activity(activity_id)
+
+
+@operation('feedback.by_student', ttl=15, topics=('feedback',), owner='student_id')
+def feedback_by_student(student_id):
+    from PythonExpenseApp.feedback import Feedback
+    return Feedback.get_feedback_by_student(student_id)
+
+
+@operation('feedback.average_rating', ttl=15, topics=('feedback',))
+def feedback_average_rating(activity_id):
+    from PythonExpenseApp.feedback import Feedback
+    return Feedback.get_average_rating_for_activity(activity_id)
+
+
+@operation('feedback.save', invalidates=('feedback', 'activities'))
+def feedback_save(activity_id, rating, comment, caller, student_id=None):
+    from PythonExpenseApp.feedback import Feedback
+    return Feedback(_acting_student(caller, student_id), activity_id, rating, comment).save_to_database()
+
+
+@operation('statistics.summary', ttl=30,
+           topics=('activities', 'enrollments', 'feedback', 'expenses', 'debts'), access=TEACHER)
+def statistics_summary():
+    from PythonExpenseApp.statistics import Statistics
+    return Statistics().fetch_statistics_from_database()
+
+
+@operation('statistics.student', ttl=15, topics=('enrollments', 'feedback', 'expenses', 'debts'),
+           owner='student_id')
+def statistics_student(student_id):
+    from PythonExpenseApp.statistics import Statistics
+    return Statistics().get_student_statistics(student_id)
+
+
+@operation('statistics.trends', ttl=60, topics=('expenses', 'debts', 'enrollments', 'feedback'),
+           access=TEACHER)
+def statistics_trends(granularity='day', start=None, end=None):
+    from PythonExpenseApp.statistics import Statistics
+    return Statistics().get_trends(granularity, start, end)
+
+
+@operation('daily_program.schedule', ttl=30, topics=('activities', 'enrollments'))
+def daily_program_schedule(day, format_type="simple"):
+    from PythonExpenseApp.daily_program import DailyProgram
+    return DailyProgram(day).get_formatted_schedule(format_type)
+
+
+@operation('daily_program.statistics', ttl=30, topics=('activities', 'enrollments'), access=TEACHER)
+def daily_program_statistics(day):
+    from PythonExpenseApp.daily_program import DailyProgram
+    return DailyProgram(day).get_schedule_statistics()
+
+
+@operation('daily_program.student_conflicts', ttl=15, topics=('activities', 'enrollments'),
+           owner='student_id')
+def daily_program_student_conflicts(day, student_id):
+    from PythonExpenseApp.daily_program import DailyProgram
+    return DailyProgram(day).detect_student_conflicts(student_id)
+
+
+# ===================================================================
+# GUI DATA LOADERS (same results as the fetch_* methods of the views)
+# ===================================================================
+
+@operation('login.authenticate', pooled=False, access=PUBLIC)
+def login_authenticate(username, password):
+    from PythonExpenseApp.gui.login_gui import LoginGUI
+    return LoginGUI.fetch_user(username, password)
+
+
+@operation('login.resume', pooled=False, access=PUBLIC)
+def login_resume(token):
+    from PythonExpenseApp.gui.login_gui import LoginGUI
+    if Caller.is_revoked(token):
+        return None
+    return LoginGUI.resume_session(token)
+
+
+@operation('login.sign_out', pooled=False, access=PUBLIC)
+def login_sign_out(token):
+    return Caller.revoke(token)
+
+
+@operation('dashboard.today_schedule', ttl=30, topics=('activities',))
+def dashboard_today_schedule():
+    from PythonExpenseApp.gui.dashboard_gui import DashboardGUI
+    return DashboardGUI.fetch_today_schedule()
+
+
+@operation('teacher_dashboard.data', ttl=15, topics=('activities', 'students', 'enrollments'),
+           access=TEACHER)
+def teacher_dashboard_data():
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_dashboard_data()
+
+
+@operation('teacher_dashboard.daily_schedule', ttl=15, topics=('activities', 'enrollments'), access=TEACHER)
+def teacher_dashboard_daily_schedule(selected_date):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_daily_schedule(selected_date)
+
+
+@operation('teacher_dashboard.activity_participants', ttl=15, topics=('enrollments', 'students'),
+           access=TEACHER)
+def teacher_dashboard_activity_participants(activity_id):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_activity_participants(activity_id)
+
+
+@operation('teacher_dashboard.student_activities', ttl=15, topics=('enrollments', 'activities'),
+           access=TEACHER)
+def teacher_dashboard_student_activities(student_id):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_student_activities(student_id)
+
+
+@operation('teacher_dashboard.students_count', ttl=10, topics=('students', 'enrollments'), access=TEACHER)
+def teacher_dashboard_students_count(search_term, class_filter):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_students_count(search_term, class_filter)
+
+
+@operation('teacher_dashboard.students_page', ttl=10, topics=('students', 'enrollments'), access=TEACHER)
+def teacher_dashboard_students_page(search_term, class_filter, limit, offset):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.fetch_students_page(search_term, class_filter, limit, offset)
+
+
+@operation('expense_gui.students', ttl=30, topics=('students',))
+def expense_gui_students():
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_students()
+
+
+@operation('expense_gui.debts', ttl=10, topics=('debts', 'students'), owner='student_id')
+def expense_gui_debts(student_id=None):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_debts(student_id)
+
+
+@operation('expense_gui.add_expense', invalidates=('expenses', 'debts'))
+def expense_gui_add_expense(payer_id, participant_ids, amount, description, caller):
+    from PythonExpenseApp.expense import Expense
+    if not caller.is_teacher and caller.id != payer_id and caller.id not in participant_ids:
+        raise PermissionError("You can only record expenses you take part in")
+    return Expense.record_split_expense(payer_id, participant_ids, amount, description)
+
+
+@operation('expense_gui.audiences', ttl=30, topics=('students', 'activities'))
+def expense_gui_audiences():
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_audiences()
+
+
+@operation('expense_gui.add_audience_expense', invalidates=('expenses', 'debts'))
+def expense_gui_add_audience_expense(payer_id, audience, audience_id, amount, description, caller,
+                                     exclude_ids=()):
+    from PythonExpenseApp.expense import Expense
+    if not caller.is_teacher and caller.id != payer_id:
+        raise PermissionError("You can only record expenses you paid")
+    return Expense.record_audience_expense(payer_id, audience, audience_id, amount, description,
+                                           exclude_ids=exclude_ids)
+
+
+@operation('expense_gui.history_page', ttl=10, topics=('expenses', 'debts'), owner='student_id')
+def expense_gui_history_page(kind, after=None, limit=None, student_id=None, start_date=None,
+                             end_date=None, activity_id=None):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.fetch_history_page(kind, after, limit, student_id, start_date, end_date, activity_id)
+
+
+@operation('activity_form.activities', ttl=10, topics=('activities', 'enrollments'))
+def activity_form_activities():
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_activities()
+
+
+@operation('activity_form.subscriptions', ttl=10, topics=('enrollments', 'activities'), owner='student_id')
+def activity_form_subscriptions(student_id):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_subscriptions(student_id)
+
+
+@operation('activity_form.recommendations', ttl=30, topics=('enrollments', 'activities'),
+           owner='student_id')
+def activity_form_recommendations(student_id, limit=10):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_recommendations(student_id, limit)
+
+
+@operation('activity_form.subscribe', invalidates=('enrollments',))
+def activity_form_subscribe(activity_id, caller, student_id=None):
+    from PythonExpenseApp.activity import Activity
+    return Activity.enroll_student(_acting_student(caller, student_id), activity_id)
+
+
+@operation('activity_details.activity', ttl=10, topics=('activities', 'enrollments', 'feedback'),
+           owner='student_id')
+def activity_details_activity(activity_id, student_id=None):
+    from PythonExpenseApp.gui.activity_details_gui import ActivityDetailsGUI
+    return ActivityDetailsGUI.fetch_activity(activity_id, student_id)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Trip Manager HTTP/JSON service.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port (default: 8765)")
+    parser.add_argument("--pool-size", type=int, default=None,
+                        help="MySQL connections shared by every client (max 32)")
+    parser.add_argument("--replica", action="append", default=[], metavar="HOST[:PORT]",
+                        help="read replica serving the SELECT queries (repeatable)")
+    args = parser.parse_args(argv)
+
+    server = create_server(args.host, args.port, args.pool_size,
+                           [parse_replica(address) for address in args.replica])
+    print(f"Trip Manager service listening on http://{args.host}:{args.port} "
+          f"({server.service.pool_size} database connections)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+# ===================================================================
+# SERVICE CLIENT - THIN-CLIENT TRANSPORT TO THE TRIP MANAGER SERVICE
+# ===================================================================
+# When the environment variable TRIP_MANAGER_SERVICE_URL is set (e.g.
+# http://trip-server:8765), the GUI data loaders do not open their own
+# MySQL pool: they call the Trip Manager service (service.py), which runs
+# the same queries over one shared pool and caches the results.
+#
+# KEY RESPONSIBILITIES:
+# 1. Call service operations over HTTP/JSON (standard library only, so the
+#    client does not need the MySQL driver)
+# 2. Encode and decode the values the queries return (dates, Decimal,
+#    model objects) so loaders get the same types in both modes
+# 3. Report transport and server failures as exceptions the GUIs already
+#    handle (ConnectionError / RuntimeError)
+# 4. Send the session token of the logged in user with every call (the
+#    service derives the caller from it, see service.py)
+#
+# USAGE:
+#   ServiceClient.set_session_token(token)     # After the login (LoginGUI)
+#   client = ServiceClient.from_environment()  # None when not configured
+#   if client:
+#       rows = client.call('activity_form.activities')
+# ===================================================================
+
+import datetime  # Date and time values of the rows
+import decimal  # DECIMAL columns
+import json  # Wire format
+import os  # Environment variable
+import threading  # Shared client instance
+import urllib.error  # Transport errors
+import urllib.request  # HTTP requests
+
+# Environment variable enabling the thin-client mode
+SERVICE_URL_ENV = 'TRIP_MANAGER_SERVICE_URL'
+
+# Model classes that can travel as objects: tag -> (module, class name)
+MODEL_CLASSES = {
+    'Student': ('PythonExpenseApp.student', 'Student'),
+    'Activity': ('PythonExpenseApp.activity', 'Activity'),
+    'Expense': ('PythonExpenseApp.expense', 'Expense'),
+    'Feedback': ('PythonExpenseApp.feedback', 'Feedback'),
+    'Group': ('PythonExpenseApp.group', 'Group'),
+}
+
+
+def encode_value(value):
+    """
+    Convert a query result to JSON-compatible data, tagging the types JSON lacks.
+
+    :param value: any - Rows, dicts, dates, Decimal, model objects...
+    :return: JSON-compatible value.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [encode_value(item) for item in value]
+    if isinstance(value, dict):
+        if all(isinstance(key, str) for key in value):
+            return {key: encode_value(item) for key, item in value.items()}
+        return {'__items__': [[encode_value(key), encode_value(item)] for key, item in value.items()]}
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {'__date__': value.isoformat()}
+    if isinstance(value, datetime.timedelta):
+        return {'__timedelta__': value.total_seconds()}
+    if isinstance(value, decimal.Decimal):
+        return {'__decimal__': str(value)}
+    if isinstance(value, (set, frozenset)):
+        return [encode_value(item) for item in value]
+    if type(value).__name__ in MODEL_CLASSES:
+        return {'__model__': type(value).__name__, 'attributes': encode_value(vars(value))}
+    raise TypeError(f"Cannot encode {type(value).__name__} for the service")
+
+
+def decode_value(value):
+    """
+    Rebuild the values tagged by encode_value. Lists of rows come back as tuples,
+    like the rows returned by the database cursor.
+
+    :param value: JSON-decoded data.
+    :return: Decoded value.
+    """
+    if isinstance(value, list):
+        return [decode_row(item) for item in value]
+    if isinstance(value, dict):
+        if '__date__' in value:
+            return datetime.date.fromisoformat(value['__date__'])
+        if '__datetime__' in value:
+            return datetime.datetime.fromisoformat(value['__datetime__'])
+        if '__timedelta__' in value:
+            return datetime.timedelta(seconds=value['__timedelta__'])
+        if '__decimal__' in value:
+            return decimal.Decimal(value['__decimal__'])
+        if '__items__' in value:
+            return {_hashable(decode_value(key)): decode_value(item) for key, item in value['__items__']}
+        if '__model__' in value:
+            return _decode_model(value['__model__'], decode_value(value['attributes']))
+        return {key: decode_value(item) for key, item in value.items()}
+    return value
+
+
+def decode_row(value):
+    """Decode one element of a list: nested lists (rows) become tuples."""
+    if isinstance(value, list):
+        return tuple(decode_row(item) for item in value)
+    return decode_value(value)
+
+
+def _hashable(value):
+    return tuple(_hashable(item) for item in value) if isinstance(value, list) else value
+
+
+def _decode_model(tag, attributes):
+    """Rebuild a model object without running its constructor (no database access)."""
+    import importlib
+    module_name, class_name = MODEL_CLASSES[tag]
+    model_class = getattr(importlib.import_module(module_name), class_name)
+    instance = model_class.__new__(model_class)
+    instance.__dict__.update(attributes)
+    return instance
+
+
+class ServiceError(RuntimeError):
+    """An operation failed on the service (the message comes from the server)."""
+
+
+class ServiceClient:
+    """
+    Calls operations of the Trip Manager service.
+
+    ATTRIBUTES:
+        base_url (str): Service address, e.g. "http://trip-server:8765"
+        timeout (float): Seconds to wait for a response
+    """
+
+    # Seconds to wait for a response
+    TIMEOUT = 30
+
+    _instance = None  # Client shared by the whole process (from_environment)
+    _instance_lock = threading.Lock()
+    _disabled = False  # True inside the service process itself
+    _session_token = None  # Token of the logged in user, sent with every call
+
+    def __init__(self, base_url, timeout=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout or self.TIMEOUT
+
+    @classmethod
+    def from_environment(cls):
+        """
+        Return the shared client when TRIP_MANAGER_SERVICE_URL is set, otherwise None
+        (the caller then queries the database directly).
+
+        :return: ServiceClient or None
+        """
+        if cls._disabled:
+            return None
+        url = os.environ.get(SERVICE_URL_ENV)
+        if not url:
+            return None
+        if cls._instance is None or cls._instance.base_url != url.rstrip('/'):
+            with cls._instance_lock:
+                if cls._instance is None or cls._instance.base_url != url.rstrip('/'):
+                    cls._instance = cls(url)
+        return cls._instance
+
+    @classmethod
+    def disable(cls):
+        """Never use the transport in this process (called by the service itself)."""
+        cls._disabled = True
+
+    @classmethod
+    def set_session_token(cls, token):
+        """
+        :param token: str or None - Session token of the logged in user (None after the sign-out).
+        """
+        cls._session_token = token
+
+    @classmethod
+    def session_token(cls):
+        """:return: str or None - Session token sent with the calls."""
+        return cls._session_token
+
+    def call(self, operation, **params):
+        """
+        Run an operation on the service.
+
+        :param operation: str - Operation name (see service.py).
+        :param params: Keyword arguments of the operation.
+        :return: Decoded result.
+        :raises ConnectionError: If the service or its database is not reachable.
+        :raises ServiceError: If the operation failed on the service.
+        :raises PermissionError: If the session token is missing or does not allow the operation.
+        """
+        body = json.dumps({'params': encode_value(params)}).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        token = ServiceClient._session_token
+        if token:
+            headers['Authorization'] = f"Bearer {token}"
+        request = urllib.request.Request(f"{self.base_url}/api/{operation}", data=body, method='POST',
+                                         headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                payload = json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as error:
+            try:
+                payload = json.loads(error.read().decode('utf-8'))
+            except ValueError:
+                raise ServiceError(f"Service error {error.code} for {operation}") from None
+        except (urllib.error.URLError, OSError) as error:
+            raise ConnectionError(f"Could not reach the Trip Manager service: {error}") from None
+
+        if not payload.get('ok'):
+            message = payload.get('error', 'Unknown service error')
+            if payload.get('type') == 'ConnectionError':
+                raise ConnectionError(message)
+            if payload.get('type') == 'PermissionError':
+                raise PermissionError(message)
+            raise ServiceError(message)
+        return decode_value(payload.get('result'))
+
+    def ping(self):
+        """
+        Check that the service and its database are reachable.
+        Same contract as DbConnection.test_connection.
+
+        :return: tuple - (success, message)
+        """
+        try:
+            return tuple(self.call('health'))
+        except (ConnectionError, ServiceError) as error:
+            return False, str(error)
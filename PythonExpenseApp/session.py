@@ -0,0 +1,190 @@
+# ===================================================================
+# SESSION - IDENTITY MAP AND UNIT OF WORK FOR THE MODEL OBJECTS
+# ===================================================================
+# Outside a session every lookup (Activity.get_activity_by_id,
+# Student.get_student_by_id, DailyProgram schedules, ...) builds fresh
+# objects from a fresh query, and every save runs its own statement.
+# Inside a session (one screen load, one service request):
+#
+# - objects are kept in an identity map keyed by (class, id) with weak
+#   references, so repeat lookups of a live object are served from memory
+#   and every query returns the same instance for the same row
+# - collections loaded through Session.memo (e.g. the participant list of
+#   an activity) are read once per session
+# - Student.save_to_database / update_in_database and
+#   Activity.save_to_database only register the object; commit() writes
+#   every pending object in one transaction (DbConnection.execute_transaction)
+#
+# KEY RESPONSIBILITIES:
+# 1. Track the current session of the thread/task (contextvars)
+# 2. Identity map with weak references (objects nobody uses are dropped)
+# 3. Pending inserts and updates, flushed in order in one transaction
+#
+# USAGE:
+#   with Session():                       # Commits the pending writes on exit
+#       activity = Activity.get_activity_by_id(activity_id)
+#       details = activity.get_comprehensive_details()   # Participants read once
+#       student.balance -= 10
+#       student.update_in_database()      # Deferred to the end of the block
+# ===================================================================
+
+import contextvars  # Current session of the thread / asyncio task
+import threading  # The maps can be used from several worker threads
+import weakref  # Identity map entries do not keep objects alive
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class Session:
+    """
+    Identity map and unit of work for the model objects.
+
+    A participating model provides:
+        - an `id` attribute (None until inserted)
+        - insert_statement() -> (query, params), for save_to_database
+        - update_statement() -> (query, params), for update_in_database (optional)
+
+    ATTRIBUTES:
+        stats (dict): hits / misses of the identity map, memo_hits, committed statements
+    """
+
+    _current = contextvars.ContextVar('model_session', default=None)
+
+    def __init__(self):
+        self._identity_map = weakref.WeakValueDictionary()  # (class, id) -> object
+        self._pending = {}  # id(object) -> [object, 'insert' or 'update'], in registration order
+        self._memo = {}  # Key -> collection loaded once per session
+        self._lock = threading.RLock()
+        self._tokens = []  # contextvars tokens of the nested `with` blocks
+        self.stats = {'hits': 0, 'misses': 0, 'memo_hits': 0, 'committed': 0}
+
+    @classmethod
+    def current(cls):
+        """
+        :return: Session or None - The session of the running thread/task.
+        """
+        return cls._current.get()
+
+    def __enter__(self):
+        self._tokens.append(self._current.set(self))
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._current.reset(self._tokens.pop())
+        if self._tokens:
+            return False  # Nested block: the outermost one commits
+        if exc_type is not None:
+            self.discard()  # The block failed: nothing is written
+            return False
+        success, message = self.commit()
+        if not success:
+            raise RuntimeError(f"Session commit failed: {message}")
+        return False
+
+    # ---------------------------------------------------------------
+    # IDENTITY MAP
+
+    def get(self, cls, object_id):
+        """
+        Return the live object of a row, if this session already loaded it.
+
+        :param cls: type - Model class.
+        :param object_id: int - Database id.
+        :return: object or None
+        """
+        with self._lock:
+            obj = self._identity_map.get((cls, object_id))
+            self.stats['hits' if obj is not None else 'misses'] += 1
+            return obj
+
+    def identity(self, obj):
+        """
+        Register a freshly loaded object and return the canonical instance of its row
+        (the object already in the map, if any, so pending changes are never overwritten).
+
+        :param obj: Model object with an id.
+        :return: object - The instance to use.
+        """
+        if obj is None or obj.id is None:
+            return obj
+        with self._lock:
+            return self._identity_map.setdefault((type(obj), obj.id), obj)
+
+    def memo(self, key, loader):
+        """
+        Return a collection loaded once per session (cleared at commit).
+
+        :param key: hashable - e.g. ('participants', activity_id).
+        :param loader: callable - Loads the collection on the first call.
+        :return: The loaded value.
+        """
+        with self._lock:
+            if key in self._memo:
+                self.stats['memo_hits'] += 1
+                return self._memo[key]
+        value = loader()
+        with self._lock:
+            return self._memo.setdefault(key, value)
+
+    # ---------------------------------------------------------------
+    # UNIT OF WORK
+
+    def add(self, obj):
+        """
+        Schedule the insert of a new object (written by commit, which sets its id).
+
+        :param obj: Model object providing insert_statement().
+        """
+        with self._lock:
+            self._pending.setdefault(id(obj), [obj, 'insert'])
+
+    def mark_dirty(self, obj):
+        """
+        Schedule the update of a loaded object. An object still waiting for its insert
+        is simply inserted with its latest values.
+
+        :param obj: Model object providing update_statement().
+        """
+        with self._lock:
+            self._pending.setdefault(id(obj), [obj, 'update'])
+            self.identity(obj)
+
+    def has_pending(self):
+        """:return: bool - True if commit() has something to write."""
+        return bool(self._pending)
+
+    def commit(self):
+        """
+        Write every pending object in one transaction, in registration order.
+
+        :return: tuple (bool, str) - (success, message). On failure nothing is written
+                 and the objects stay pending.
+        """
+        with self._lock:
+            pending = list(self._pending.values())
+            if not pending:
+                return True, "Nothing to commit"
+            statements = [obj.insert_statement() if kind == 'insert' else obj.update_statement()
+                          for obj, kind in pending]
+            success, results = DbConnection.execute_transaction(statements)
+            if not success:
+                return False, results
+            for (obj, kind), result in zip(pending, results):
+                if kind == 'insert':
+                    obj.id = result  # lastrowid of the insert
+                    self.identity(obj)
+            self._pending.clear()
+            self._memo.clear()  # Collections may include what was just written
+            self.stats['committed'] += len(statements)
+            return True, f"Committed {len(statements)} changes"
+
+    def discard(self):
+        """Forget the pending writes (the objects keep their in-memory values)."""
+        with self._lock:
+            self._pending.clear()
+
+    def expire(self):
+        """Forget the loaded objects and collections: the next lookups query the database again."""
+        with self._lock:
+            self._identity_map.clear()
+            self._memo.clear()
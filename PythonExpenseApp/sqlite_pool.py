@@ -0,0 +1,113 @@
+# ===================================================================
+# SQLITE POOL - LOCAL STAND-IN FOR THE MYSQL POOLS
+# ===================================================================
+# DbConnection only needs pools with get_connection() and connections
+# with cursor()/commit()/rollback()/close()/is_connected(). SqlitePool
+# provides the same interface on top of SQLite files, so the read/write
+# routing (primary + replicas) can be exercised without any MySQL server.
+#
+# KEY RESPONSIBILITIES:
+# 1. Hand out SQLite connections with the mysql.connector method names
+# 2. Translate the %s placeholders used by the application to ?
+# 3. Install a primary file and N replica files in DbConnection
+#
+# Only the connection interface is emulated: queries using MySQL-only
+# SQL (CONCAT, AUTO_INCREMENT, ...) still need a MySQL server.
+#
+# USAGE:
+#   from PythonExpenseApp.sqlite_pool import install_sqlite_pools
+#   install_sqlite_pools('primary.db', ['replica1.db', 'replica2.db'])
+#   DbConnection.execute_query("SELECT COUNT(*) FROM students", fetch_one=True)  # Served by a replica
+# ===================================================================
+
+import sqlite3  # Standard library SQLite driver
+
+from PythonExpenseApp.db_connection import DbConnection
+
+
+class _SqliteCursor:
+    """sqlite3 cursor accepting the %s placeholders of mysql.connector."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, query, params=()):
+        self._cursor.execute(query.replace('%s', '?'), tuple(params or ()))
+
+    def executemany(self, query, seq_of_params):
+        self._cursor.executemany(query.replace('%s', '?'), [tuple(params) for params in seq_of_params])
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+
+class _SqliteConnection:
+    """sqlite3 connection with the mysql.connector method names used by DbConnection."""
+
+    def __init__(self, path, database):
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self.database = database
+
+    def is_connected(self):
+        return self._connection is not None
+
+    def cursor(self):
+        return _SqliteCursor(self._connection.cursor())
+
+    def commit(self):
+        self._connection.commit()
+
+    def rollback(self):
+        self._connection.rollback()
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+class SqlitePool:
+    """
+    Pool-like factory of SQLite connections on one database file.
+
+    SQLite connections are cheap to open, so every get_connection() opens a new
+    one and close() really closes it.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def get_connection(self):
+        """
+        :return: _SqliteConnection - Open connection on the file.
+        :raises sqlite3.Error: If the file cannot be opened.
+        """
+        return _SqliteConnection(self.path, self.path)
+
+
+def install_sqlite_pools(primary_path, replica_paths=()):
+    """
+    Route DbConnection to SQLite files: writes to primary_path, pure SELECT statements
+    to the replica files.
+
+    Replication is not emulated: copy the primary to the replicas (or write to them
+    directly) to prepare the data each one should serve.
+
+    :param primary_path: str - Primary database file.
+    :param replica_paths: iterable - Replica database files.
+    """
+    DbConnection.use_pools(SqlitePool(primary_path), [SqlitePool(path) for path in replica_paths])
@@ -1,6 +1,88 @@
 from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.rollups import Rollups
 
 class Statistics:
+    # Queries of fetch_statistics_from_database: (key, query, fetch_one, convert(result)).
+    # Kept as data so the async variant (async_models.AsyncStatistics) runs them concurrently.
+    SUMMARY_QUERIES = (
+        # Total participants across all activities (from student_activities table)
+        ('total_participants',
+         "SELECT COUNT(*) AS total_participants FROM student_activities",
+         True, lambda result: result[0]),
+        # Most popular activity (from activities and student_activities tables)
+        ('most_popular_activity',
+         """SELECT a.name, COUNT(sa.student_id) as participant_count
+                   FROM activities a
+                   LEFT JOIN student_activities sa ON a.id = sa.activity_id
+                   GROUP BY a.id, a.name
+                   ORDER BY participant_count DESC
+                   LIMIT 1""",
+         True, lambda result: {'name': result[0], 'participants': result[1]}),
+        # Activity participation statistics (from activities and student_activities tables)
+        ('activity_participation',
+         """SELECT a.name, COUNT(sa.student_id) as participants, a.max_participants
+                   FROM activities a
+                   LEFT JOIN student_activities sa ON a.id = sa.activity_id
+                   GROUP BY a.id, a.name, a.max_participants
+                   ORDER BY participants DESC""",
+         False, lambda result: result),
+        # Average rating per activity (from activities and feedback tables)
+        ('activity_ratings',
+         """SELECT a.name, AVG(f.rating) as avg_rating, COUNT(f.id) as feedback_count
+                   FROM activities a
+                   LEFT JOIN feedback f ON a.id = f.activity_id
+                   GROUP BY a.id, a.name
+                   HAVING feedback_count > 0
+                   ORDER BY avg_rating DESC""",
+         False, lambda result: result),
+        # Total expenses and debt statistics (live and archived expenses)
+        ('expense_summary',
+         """SELECT 
+                       SUM(amount) as total_expenses,
+                       COUNT(*) as expense_count,
+                       AVG(amount) as avg_expense
+                   FROM expenses_history""",
+         True, lambda result: {
+             'total': result[0] if result[0] else 0,
+             'count': result[1],
+             'average': result[2] if result[2] else 0
+         }),
+        # Outstanding debts summary (from the per-pair balances, see debt_balances.py)
+        ('debt_summary',
+         """SELECT 
+                       SUM(total) as total_outstanding,
+                       SUM(debts) as debt_count
+                   FROM debt_balances""",
+         True, lambda result: {
+             'total_outstanding': result[0] if result[0] else 0,
+             'count': int(result[1] or 0)
+         }),
+    )
+
+    # Queries of get_student_statistics: (key, query, convert(result)), every %s is the student id
+    STUDENT_QUERIES = (
+        # Student's activities count (from student_activities table)
+        ('activities_count',
+         "SELECT COUNT(*) FROM student_activities WHERE student_id = %s",
+         lambda result: result[0]),
+        # Student's expenses (as payer) - count and total amount (live and archived expenses)
+        ('expenses_paid',
+         "SELECT COUNT(*), SUM(amount) FROM expenses_history WHERE id_giver = %s",
+         lambda result: {'count': result[0], 'total': result[1] if result[1] else 0}),
+        # Money owed to student (from the per-pair balances)
+        ('money_owed_to_student',
+         "SELECT SUM(total) FROM debt_balances WHERE payer_id = %s",
+         lambda result: result[0] if result[0] else 0),
+        # Money student owes (from the per-pair balances)
+        ('money_student_owes',
+         "SELECT SUM(total) FROM debt_balances WHERE debtor_id = %s",
+         lambda result: result[0] if result[0] else 0),
+        # Student's feedback count (from feedback table)
+        ('feedback_given',
+         "SELECT COUNT(*) FROM feedback WHERE student_id = %s",
+         lambda result: result[0]),
+    )
+
     def __init__(self, activities=None, feedbacks=None):
         """
         Initializes the Statistics object with optional activities and feedbacks data.
@@ -57,73 +139,20 @@ class Statistics:
         :return: dict - A dictionary containing various statistics.
         """
         stats = {}
-        
-        # Total participants across all activities (from student_activities table)
-        query = "SELECT COUNT(*) AS total_participants FROM student_activities"
-        success, result = DbConnection.execute_query(query, fetch_one=True)
-        if success and result:
-            stats['total_participants'] = result[0]
-        
-        # Most popular activity (from activities and student_activities tables)
-        query = """SELECT a.name, COUNT(sa.student_id) as participant_count
-                   FROM activities a
-                   LEFT JOIN student_activities sa ON a.id = sa.activity_id
-                   GROUP BY a.id, a.name
-                   ORDER BY participant_count DESC
-                   LIMIT 1"""
-        success, result = DbConnection.execute_query(query, fetch_one=True)
-        if success and result:
-            stats['most_popular_activity'] = {'name': result[0], 'participants': result[1]}
-        
-        # Activity participation statistics (from activities and student_activities tables)
-        query = """SELECT a.name, COUNT(sa.student_id) as participants, a.max_participants
-                   FROM activities a
-                   LEFT JOIN student_activities sa ON a.id = sa.activity_id
-                   GROUP BY a.id, a.name, a.max_participants
-                   ORDER BY participants DESC"""
-        success, result = DbConnection.execute_query(query, fetch_all=True)
-        if success:
-            stats['activity_participation'] = result
-        
-        # Average rating per activity (from activities and feedback tables)
-        query = """SELECT a.name, AVG(f.rating) as avg_rating, COUNT(f.id) as feedback_count
-                   FROM activities a
-                   LEFT JOIN feedback f ON a.id = f.activity_id
-                   GROUP BY a.id, a.name
-                   HAVING feedback_count > 0
-                   ORDER BY avg_rating DESC"""
-        success, result = DbConnection.execute_query(query, fetch_all=True)
-        if success:
-            stats['activity_ratings'] = result
-        
-        # Total expenses and debt statistics (from expenses and debts tables)
-        query = """SELECT 
-                       SUM(amount) as total_expenses,
-                       COUNT(*) as expense_count,
-                       AVG(amount) as avg_expense
-                   FROM expenses"""
-        success, result = DbConnection.execute_query(query, fetch_one=True)
-        if success and result:
-            stats['expense_summary'] = {
-                'total': result[0] if result[0] else 0,
-                'count': result[1],
-                'average': result[2] if result[2] else 0
-            }
-        
-        # Outstanding debts summary (from debts table)
-        query = """SELECT 
-                       SUM(amount) as total_outstanding,
-                       COUNT(*) as debt_count
-                   FROM debts WHERE paid = FALSE"""
-        success, result = DbConnection.execute_query(query, fetch_one=True)
-        if success and result:
-            stats['debt_summary'] = {
-                'total_outstanding': result[0] if result[0] else 0,
-                'count': result[1]
-            }
-        
+        for key, query, fetch_one, convert in self.SUMMARY_QUERIES:
+            success, result = DbConnection.execute_query(query, fetch_one=fetch_one, fetch_all=not fetch_one)
+            self._store(stats, key, success, result, fetch_one, convert)
         return stats
 
+    @staticmethod
+    def _store(stats, key, success, result, fetch_one, convert):
+        """
+        Store the converted result of one statistics query. Single-row queries
+        are skipped when they return no row, list queries only on error.
+        """
+        if success and (result or not fetch_one):
+            stats[key] = convert(result)
+
     def get_student_statistics(self, student_id):
         """
         Get statistics for a specific student, including:
@@ -137,42 +166,36 @@ class Statistics:
         :return: dict - A dictionary containing various statistics for the student.
         """
         stats = {}
-        
-        # Student's activities count (from student_activities table)
-        query = """SELECT COUNT(*) FROM student_activities WHERE student_id = %s"""
-        success, result = DbConnection.execute_query(query, (student_id,), fetch_one=True)
-        if success and result:
-            stats['activities_count'] = result[0]
-        
-        # Student's expenses (as payer) - count and total amount (from expenses table)
-        query = """SELECT COUNT(*), SUM(amount) FROM expenses WHERE id_giver = %s"""
-        success, result = DbConnection.execute_query(query, (student_id,), fetch_one=True)
-        if success and result:
-            stats['expenses_paid'] = {
-                'count': result[0],
-                'total': result[1] if result[1] else 0
-            }
-        
-        # Money owed to student (from debts table)
-        query = """SELECT SUM(amount) FROM debts WHERE payer_id = %s AND paid = FALSE"""
-        success, result = DbConnection.execute_query(query, (student_id,), fetch_one=True)
-        if success and result:
-            stats['money_owed_to_student'] = result[0] if result[0] else 0
-        
-        # Money student owes (from debts table)
-        query = """SELECT SUM(amount) FROM debts WHERE debtor_id = %s AND paid = FALSE"""
-        success, result = DbConnection.execute_query(query, (student_id,), fetch_one=True)
-        if success and result:
-            stats['money_student_owes'] = result[0] if result[0] else 0
-        
-        # Student's feedback count (from feedback table)
-        query = """SELECT COUNT(*) FROM feedback WHERE student_id = %s"""
-        success, result = DbConnection.execute_query(query, (student_id,), fetch_one=True)
-        if success and result:
-            stats['feedback_given'] = result[0]
-        
+        for key, query, convert in self.STUDENT_QUERIES:
+            params = (student_id,) * query.count('%s')
+            success, result = DbConnection.execute_query(query, params, fetch_one=True)
+            self._store(stats, key, success, result, True, convert)
         return stats
 
+    def get_trends(self, granularity='day', start=None, end=None):
+        """
+        Get the trend series of the trip from the rollup tables (a few hundred rows,
+        no scan of the raw tables), including:
+        - Spending per bucket, per class (payer) and per activity.
+        - Debts created and paid per bucket.
+        - Enrollment velocity (enrollments per bucket and running total).
+        - Feedback count and rating sum per bucket.
+
+        :param granularity: str - 'hour' or 'day'.
+        :param start: date/datetime, optional - First bucket included.
+        :param end: date/datetime, optional - Buckets before this one are included.
+        :return: dict - Series as returned by Rollups.series / Rollups.enrollment_velocity.
+        """
+        return {
+            'spending': Rollups.series('expenses', granularity, start, end),
+            'spending_by_class': Rollups.series('expenses', granularity, start, end, group_by='class'),
+            'spending_by_activity': Rollups.series('expenses', granularity, start, end, group_by='activity'),
+            'debts_created': Rollups.series('debts', granularity, start, end),
+            'debts_paid': Rollups.series('debts_paid', granularity, start, end),
+            'enrollment_velocity': Rollups.enrollment_velocity(granularity, start, end),
+            'feedback': Rollups.series('feedback', granularity, start, end),
+        }
+
     def __str__(self):
         """
         String representation of the Statistics object, displaying:
@@ -1,8 +1,15 @@
-from db_connection import DbConnection
+from PythonExpenseApp.db_connection import DbConnection
+from PythonExpenseApp.session import Session
+from PythonExpenseApp.auth import Auth
 
 class Student:
     # Student class represents a student with personal data, activities, and financial info
 
+    # Row layout of from_row, shared with the compact listings (roster.StudentRoster)
+    ALL_STUDENTS_QUERY = """SELECT id, name, surname, username, class, age, special_needs, 
+                          total_expenses, fee_share, balance 
+                   FROM students ORDER BY surname, name"""
+
     def __init__(self, name, surname, age, special_needs):
         """
         Initialize a new Student object with personal and default financial/activity data.
@@ -112,29 +119,44 @@ class Student:
         """
         return self.balance
 
-    def save_to_database(self):
+    def insert_statement(self):
         """
-        Saves the student to the database using the DbConnection class.
-        Requires the username to be set before calling.
-        Sets the student's ID after successful insertion.
+        Returns the INSERT statement of this student (used by save_to_database and Session.commit).
 
-        :return: bool - True if saved successfully, False otherwise.
+        :return: tuple - (query, params)
         """
-        if not self.username:
-            print("Error: Username is required to save student")
-            return False
-            
         query = """INSERT INTO students 
                    (name, surname, username, password, class, age, special_needs, 
                     total_expenses, fee_share, balance)
                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)"""
         
-        # Default password - should be changed in production
-        default_password = f"{self.surname.lower()}{self.age}"
+        # Default password - should be changed in production (stored hashed, see auth.py)
+        default_password = Auth.hash_password(f"{self.surname.lower()}{self.age}")
         
         params = (self.name, self.surname, self.username, default_password, 
                  getattr(self, 'class_', ''), self.age, self.special_needs,
                  self.total_expenses, self.fee_share, self.balance)
+        return query, params
+
+    def save_to_database(self):
+        """
+        Saves the student to the database using the DbConnection class.
+        Requires the username to be set before calling.
+        Sets the student's ID after successful insertion.
+        Inside a Session the insert is deferred to Session.commit (which sets the ID).
+
+        :return: bool - True if saved (or scheduled) successfully, False otherwise.
+        """
+        if not self.username:
+            print("Error: Username is required to save student")
+            return False
+        
+        session = Session.current()
+        if session is not None:
+            session.add(self)  # Written with the other pending changes at commit
+            return True
+        
+        query, params = self.insert_statement()
         
         # Execute the insert query and get the result
         success, result = DbConnection.execute_query(query, params)
@@ -147,17 +169,12 @@ class Student:
             print(f"Error saving student to database: {result}")
             return False
 
-    def update_in_database(self):
+    def update_statement(self):
         """
-        Updates the student's data in the database.
-        Requires the student to have a valid ID.
+        Returns the UPDATE statement of this student (used by update_in_database and Session.commit).
 
-        :return: bool - True if updated successfully, False otherwise.
+        :return: tuple - (query, params)
         """
-        if not self.id:
-            print("Error: Student ID is required to update")
-            return False
-            
         query = """UPDATE students 
                    SET name=%s, surname=%s, age=%s, special_needs=%s,
                        total_expenses=%s, fee_share=%s, balance=%s, class=%s
@@ -166,6 +183,26 @@ class Student:
         params = (self.name, self.surname, self.age, self.special_needs,
                  self.total_expenses, self.fee_share, self.balance,
                  getattr(self, 'class_', ''), self.id)
+        return query, params
+
+    def update_in_database(self):
+        """
+        Updates the student's data in the database.
+        Requires the student to have a valid ID.
+        Inside a Session the update is deferred to Session.commit.
+
+        :return: bool - True if updated (or scheduled) successfully, False otherwise.
+        """
+        if not self.id:
+            print("Error: Student ID is required to update")
+            return False
+        
+        session = Session.current()
+        if session is not None:
+            session.mark_dirty(self)  # Written with the other pending changes at commit
+            return True
+        
+        query, params = self.update_statement()
         
         # Execute the update query and get the result
         success, result = DbConnection.execute_query(query, params)
@@ -176,6 +213,30 @@ class Student:
             print(f"Error updating student in database: {result}")
             return False
 
+    @staticmethod
+    def from_row(row):
+        """
+        Builds a Student from a row (id, name, surname, username, class, age, special_needs,
+        total_expenses, fee_share, balance). Inside a Session the instance already loaded
+        for the same id is returned instead.
+
+        :param row: tuple - Database row.
+        :return: Student
+        """
+        session = Session.current()
+        if session is not None:
+            existing = session.get(Student, row[0])
+            if existing is not None:
+                return existing
+        student = Student(row[1], row[2], row[5], row[6])
+        student.id = row[0]
+        student.username = row[3]
+        student.class_ = row[4]
+        student.total_expenses = float(row[7]) if row[7] else 0.0
+        student.fee_share = float(row[8]) if row[8] else 0.0
+        student.balance = float(row[9]) if row[9] else 0.0
+        return session.identity(student) if session is not None else student
+
     @staticmethod
     def get_all_students():
         """
@@ -184,29 +245,14 @@ class Student:
 
         :return: list - List of Student objects.
         """
-        query = """SELECT id, name, surname, username, class, age, special_needs, 
-                          total_expenses, fee_share, balance 
-                   FROM students ORDER BY surname, name"""
-        
         # Execute the select query to fetch all students
-        success, result = DbConnection.execute_query(query, fetch_all=True)
+        success, result = DbConnection.execute_query(Student.ALL_STUDENTS_QUERY, fetch_all=True)
         if not success:
             print(f"Error retrieving students: {result}")
             return []
             
-        students = []
-        for row in result:
-            # Create a Student object for each row and populate its fields
-            student = Student(row[1], row[2], row[5], row[6])
-            student.id = row[0]
-            student.username = row[3]
-            student.class_ = row[4]
-            student.total_expenses = float(row[7]) if row[7] else 0.0
-            student.fee_share = float(row[8]) if row[8] else 0.0
-            student.balance = float(row[9]) if row[9] else 0.0
-            students.append(student)
-            
-        return students
+        # Create a Student object for each row and populate its fields
+        return [Student.from_row(row) for row in result]
 
     @staticmethod
     def get_student_by_id(student_id):
@@ -217,6 +263,12 @@ class Student:
         :param student_id: int - The ID of the student to retrieve.
         :return: Student or None
         """
+        session = Session.current()
+        if session is not None:
+            student = session.get(Student, student_id)
+            if student is not None:
+                return student  # Already loaded in this session
+        
         query = """SELECT id, name, surname, username, class, age, special_needs, 
                           total_expenses, fee_share, balance 
                    FROM students WHERE id=%s"""
@@ -226,15 +278,7 @@ class Student:
         if not success or not result:
             return None
             
-        student = Student(result[1], result[2], result[5], result[6])
-        student.id = result[0]
-        student.username = result[3]
-        student.class_ = result[4]
-        student.total_expenses = float(result[7]) if result[7] else 0.0
-        student.fee_share = float(result[8]) if result[8] else 0.0
-        student.balance = float(result[9]) if result[9] else 0.0
-        
-        return student
+        return Student.from_row(result)
 
     @staticmethod
     def authenticate(email, password):
@@ -246,20 +290,22 @@ class Student:
         :param password: str - The password for the student.
         :return: Student or None
         """
-        query = """SELECT id, name, surname, email, class, age, special_needs, role 
-                   FROM students WHERE email=%s AND password=%s"""
-        
-        # Execute the select query to authenticate the student
-        success, result = DbConnection.execute_query(query, (email, password), fetch_one=True)
-        if not success or not result:
+        # The password is checked by Auth (hashed, plain text rows are migrated on success)
+        try:
+            result = Auth.login(email, password)
+        except ConnectionError as e:
+            print(f"Error authenticating student: {e}")
             return None
-            
-        student = Student(result[1], result[2], result[5], result[6])
-        student.id = result[0]
-        student.email = result[3]
-        student.class_ = result[4]
+        if not result:
+            return None
+
+        user_id, name, surname, email, special_needs, role, class_, age = result[0]
+        student = Student(name, surname, age, special_needs)
+        student.id = user_id
+        student.email = email
+        student.class_ = class_
         # Role is optional, default to 'student' if not present
-        student.role = result[7] if len(result) > 7 else 'student'
+        student.role = role or 'student'
         
         return student
 
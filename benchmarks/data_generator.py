@@ -0,0 +1,340 @@
+# ===================================================================
+# SYNTHETIC TRIP DATA GENERATOR
+# ===================================================================
+# The sample data in database_setup.sql (a few dozen rows) hides every
+# performance problem. This script fills the trip_manager database with a
+# realistic, reproducible data set at a chosen scale:
+#
+#   scale   students   activities   enrollments   expenses     debts   feedback
+#   1k         1 000          100        ~3 400      2 000    ~8 000     ~1 700
+#   10k       10 000        1 000       ~33 000     20 000   ~80 000    ~17 000
+#   100k     100 000       10 000      ~323 000    200 000  ~800 000   ~161 000
+#
+#   (plus one teacher every 50 students and groups of 8 within each class)
+#
+# KEY RESPONSIBILITIES:
+# 1. Generate every table (students, activities, student_activities,
+#    expenses, debts, feedback, groups, student_groups) from a seed, so
+#    the same seed always produces the same data set
+# 2. Keep the data consistent with the application rules: teachers are
+#    never enrolled, enrollments respect max_participants, feedback only
+#    for enrolled students, debts split the expense among classmates
+# 3. Load the rows in batches (executemany) inside one transaction per table
+#
+# USAGE:
+#   python benchmarks/data_generator.py --scale 10k --reset
+#   python benchmarks/data_generator.py --students 2500 --seed 7 --dry-run
+#
+# --reset empties the tables first; without it the rows are appended after
+# the existing ones (ids continue from the current maximum).
+# ===================================================================
+
+import argparse  # Command line options
+import os  # Paths
+import random  # Seeded data generation
+import sys  # Import path and exit status
+import time  # Load timing
+from datetime import date, timedelta  # Trip days
+
+# Make the PythonExpenseApp package importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Number of students of each named scale
+SCALES = {'1k': 1000, '10k': 10000, '100k': 100000}
+
+# Tables in insertion order (parents before children)
+TABLES = ('students', 'activities', 'student_activities', 'expenses', 'debts',
+          'feedback', 'groups', 'student_groups')
+
+# Columns inserted in each table (ids are explicit so children can reference them)
+COLUMNS = {
+    'students': ('id', 'name', 'surname', 'email', 'password', 'role', 'class', 'age',
+                 'special_needs', 'total_expenses', 'fee_share', 'balance'),
+    'activities': ('id', 'name', 'day', 'start_time', 'finish_time', 'location',
+                   'max_participants', 'duration', 'description'),
+    'student_activities': ('student_id', 'activity_id'),
+    'expenses': ('id', 'amount', 'description', 'date', 'id_giver', 'id_receiver', 'id_activity'),
+    'debts': ('payer_id', 'debtor_id', 'amount', 'description', 'expense_id', 'paid',
+              'date_created', 'date_paid'),
+    'feedback': ('student_id', 'activity_id', 'rating', 'comment'),
+    'groups': ('id', 'name', 'common_activity', 'dietary_needs'),
+    'student_groups': ('group_id', 'student_id'),
+}
+
+# Shape of the data set (per student unless stated otherwise)
+STUDENTS_PER_CLASS = 25
+STUDENTS_PER_TEACHER = 50
+ACTIVITIES_PER_STUDENT = 0.1     # 1 activity every 10 students
+ENROLLMENTS_PER_STUDENT = (2, 7)  # Inclusive range
+EXPENSES_PER_STUDENT = 2
+FEEDBACK_PROBABILITY = 0.5       # Share of enrollments with a feedback
+GROUP_SIZE = 8
+TRIP_DAYS = 5
+TRIP_START = date(2025, 6, 9)
+BATCH_SIZE = 1000
+
+FIRST_NAMES = ('Marco', 'Giulia', 'Alessandro', 'Sofia', 'Lorenzo', 'Chiara', 'Matteo', 'Francesca',
+               'Andrea', 'Sara', 'Luca', 'Martina', 'Davide', 'Elena', 'Simone', 'Alice', 'Federico',
+               'Giorgia', 'Riccardo', 'Aurora', 'Tommaso', 'Beatrice', 'Gabriele', 'Noemi', 'Niccolò')
+SURNAMES = ('Rossi', 'Bianchi', 'Ferrari', 'Romano', 'Conti', 'Ricci', 'Marino', 'Greco', 'Bruno',
+            'Gallo', 'Costa', 'Fontana', 'Esposito', 'Colombo', 'Rizzo', 'Lombardi', 'Moretti',
+            'Barbieri', 'Galli', 'Mancini', 'Leone', 'Longo', 'Gentile', 'Martinelli', 'Vitale')
+SPECIAL_NEEDS = ('', '', '', '', '', '', 'Vegetarian', 'Vegan', 'Gluten-free', 'Lactose intolerant')
+ACTIVITY_KINDS = ('Museum Tour', 'City Walk', 'Cooking Class', 'Boat Trip', 'Art Workshop',
+                  'Hiking', 'Theatre Show', 'Science Lab', 'Bike Tour', 'Historic Site Visit')
+LOCATIONS = ('Colosseum', 'Uffizi Gallery', 'Old Town', 'Harbour', 'City Park', 'Science Museum',
+             'Main Theatre', 'Botanical Garden', 'Cathedral Square', 'Riverside')
+EXPENSE_KINDS = ('Lunch', 'Dinner', 'Bus tickets', 'Museum tickets', 'Snacks', 'Souvenirs',
+                 'Taxi', 'Ice cream', 'Coffee', 'Train tickets')
+COMMENTS = ('Amazing experience!', 'Very interesting', 'A bit boring', 'Too long',
+            'Great guide', 'Loved it', 'Not worth it', 'Well organized', '', 'Would do it again')
+
+
+def scale_students(value):
+    """
+    Convert a --scale value ("1k", "10k", "100k" or a number) to a student count.
+
+    :param value: str - Named scale or number of students.
+    :return: int - Number of students.
+    """
+    if value in SCALES:
+        return SCALES[value]
+    try:
+        students = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"unknown scale {value!r} (use {', '.join(SCALES)} or a number)")
+    if students < 1:
+        raise argparse.ArgumentTypeError("the number of students must be positive")
+    return students
+
+
+def generate_dataset(students, seed=42, id_offsets=None):
+    """
+    Generate the rows of every table. Pure Python: no database access.
+
+    :param students: int - Number of students (teachers are added on top, one every STUDENTS_PER_TEACHER).
+    :param seed: int - Random seed; the same seed always produces the same rows.
+    :param id_offsets: dict, optional - Table -> current maximum id, to append after existing rows.
+    :return: dict - Table name -> list of row tuples (columns as in COLUMNS).
+    """
+    rng = random.Random(seed)
+    offsets = id_offsets or {}
+    data = {table: [] for table in TABLES}
+
+    # --- Students and teachers ---
+    student_base = offsets.get('students', 0)
+    class_count = max(1, students // STUDENTS_PER_CLASS)
+    classes = [f"{1 + index % 5}{chr(ord('A') + index // 5 % 26)}{'' if index < 130 else index // 130}"
+               for index in range(class_count)]
+    student_ids = []
+    class_members = {}
+    teacher_count = max(1, students // STUDENTS_PER_TEACHER)
+    for index in range(students + teacher_count):
+        row_id = student_base + index + 1
+        name, surname = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+        is_teacher = index >= students
+        age = rng.randint(30, 60) if is_teacher else rng.randint(14, 19)
+        class_ = None if is_teacher else classes[index % class_count]
+        data['students'].append((
+            row_id, name, surname, f"{name}.{surname}.{row_id}@bench.school.edu".lower(),
+            f"{surname.lower()}{age}", 'teacher' if is_teacher else 'student', class_, age,
+            rng.choice(SPECIAL_NEEDS), 0.00, 0.00, 0.00))
+        if not is_teacher:
+            student_ids.append(row_id)
+            class_members.setdefault(class_, []).append(row_id)
+
+    # --- Activities (8:00 - 20:00, 1 to 4 hours, spread over the trip days) ---
+    activity_base = offsets.get('activities', 0)
+    activity_count = max(1, int(students * ACTIVITIES_PER_STUDENT))
+    capacities = {}
+    for index in range(activity_count):
+        row_id = activity_base + index + 1
+        hours = rng.randint(1, 4)
+        start = rng.randint(8, 20 - hours) * 60 + rng.choice((0, 30))
+        location = rng.choice(LOCATIONS)
+        max_participants = rng.choice((None, 15, 20, 30, 40, 60))
+        capacities[row_id] = max_participants
+        data['activities'].append((
+            row_id, f"{rng.choice(ACTIVITY_KINDS)} #{row_id}",
+            TRIP_START + timedelta(days=index % TRIP_DAYS), start, start + hours * 60,
+            location, max_participants, hours, f"{rng.choice(ACTIVITY_KINDS)} at {location}"))
+    activity_ids = list(capacities)
+
+    # --- Enrollments (never over capacity) and feedback ---
+    enrolled = {activity_id: 0 for activity_id in activity_ids}
+    for student_id in student_ids:
+        wanted = rng.randint(*ENROLLMENTS_PER_STUDENT)
+        for activity_id in rng.sample(activity_ids, min(wanted, len(activity_ids))):
+            capacity = capacities[activity_id]
+            if capacity is not None and enrolled[activity_id] >= capacity:
+                continue
+            enrolled[activity_id] += 1
+            data['student_activities'].append((student_id, activity_id))
+            if rng.random() < FEEDBACK_PROBABILITY:
+                data['feedback'].append((student_id, activity_id, rng.randint(1, 5), rng.choice(COMMENTS)))
+
+    # --- Expenses split among classmates, with their debts ---
+    expense_base = offsets.get('expenses', 0)
+    classes_with_members = list(class_members)
+    totals = {}
+    for index in range(students * EXPENSES_PER_STUDENT):
+        row_id = expense_base + index + 1
+        members = class_members[rng.choice(classes_with_members)]
+        payer_id = rng.choice(members)
+        participants = rng.sample(members, min(len(members), rng.randint(2, 8)))
+        if payer_id not in participants:
+            participants[0] = payer_id
+        amount = round(rng.uniform(5, 150), 2)
+        kind = rng.choice(EXPENSE_KINDS)
+        expense_day = TRIP_START + timedelta(days=rng.randrange(TRIP_DAYS))
+        activity_id = rng.choice(activity_ids) if rng.random() < 0.3 else None
+        data['expenses'].append((row_id, amount, kind, expense_day, payer_id, None, activity_id))
+        totals[payer_id] = totals.get(payer_id, 0.0) + amount
+
+        share = round(amount / len(participants), 2)
+        for debtor_id in participants:
+            if debtor_id == payer_id:
+                continue
+            paid = rng.random() < 0.3
+            data['debts'].append((payer_id, debtor_id, share, kind, row_id, paid, expense_day,
+                                  expense_day + timedelta(days=1) if paid else None))
+
+    # Students' running totals, as the application maintains them
+    fee_share = 180.00
+    data['students'] = [
+        row[:9] + (round(totals.get(row[0], 0.0), 2), fee_share if row[5] == 'student' else 0.00,
+                   round(totals.get(row[0], 0.0) - fee_share, 2) if row[5] == 'student' else 0.00)
+        for row in data['students']]
+
+    # --- Groups within each class ---
+    group_base = offsets.get('groups', 0)
+    group_id = group_base
+    for class_, members in class_members.items():
+        for start in range(0, len(members), GROUP_SIZE):
+            group_id += 1
+            common_activity = rng.choice(data['activities'])[1]
+            data['groups'].append((group_id, f"{class_} Group {start // GROUP_SIZE + 1}", common_activity,
+                                   rng.choice(SPECIAL_NEEDS) or None))
+            for student_id in members[start:start + GROUP_SIZE]:
+                data['student_groups'].append((group_id, student_id))
+
+    return data
+
+
+def current_max_ids(cursor):
+    """
+    Read the current maximum id of the tables whose ids are generated explicitly.
+
+    :param cursor: Database cursor.
+    :return: dict - Table -> maximum id (0 when empty).
+    """
+    offsets = {}
+    for table in ('students', 'activities', 'expenses', 'groups'):
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM `{table}`")
+        offsets[table] = cursor.fetchone()[0]
+    return offsets
+
+
+def reset_tables(connection):
+    """
+    Empty every trip table (children first).
+
+    :param connection: Database connection.
+    :return: None
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+        for table in reversed(TABLES):
+            cursor.execute(f"TRUNCATE TABLE `{table}`")
+        cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+        connection.commit()
+    finally:
+        cursor.close()
+
+
+def load_dataset(connection, data, batch_size=BATCH_SIZE):
+    """
+    Insert the generated rows, one transaction per table, batch_size rows per executemany.
+
+    :param connection: Database connection.
+    :param data: dict - Output of generate_dataset.
+    :param batch_size: int - Rows per executemany call.
+    :return: dict - Table -> seconds spent loading it.
+    """
+    timings = {}
+    cursor = connection.cursor()
+    try:
+        for table in TABLES:
+            columns = COLUMNS[table]
+            query = (f"INSERT INTO `{table}` ({', '.join(columns)}) "
+                     f"VALUES ({', '.join(['%s'] * len(columns))})")
+            rows = data[table]
+            started = time.perf_counter()
+            try:
+                for start in range(0, len(rows), batch_size):
+                    cursor.executemany(query, rows[start:start + batch_size])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            timings[table] = time.perf_counter() - started
+    finally:
+        cursor.close()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fill the trip_manager database with synthetic data.")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", type=scale_students, default=SCALES['1k'],
+                      help=f"named scale ({', '.join(SCALES)}) or number of students (default: 1k)")
+    size.add_argument("--students", type=scale_students, dest="scale", help="number of students")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (default: 42)")
+    parser.add_argument("--reset", action="store_true", help="empty the tables before loading")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"rows per executemany call (default: {BATCH_SIZE})")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="generate the rows and print the counts without touching the database")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        started = time.perf_counter()
+        data = generate_dataset(args.scale, args.seed)
+        print(f"Generated in {time.perf_counter() - started:.2f} s (seed {args.seed}):")
+        for table in TABLES:
+            print(f"  {table:<20} {len(data[table]):>10,}")
+        return 0
+
+    from PythonExpenseApp.db_connection import DbConnection
+
+    connection = DbConnection.connect()
+    if not connection:
+        print("Could not connect to the database.", file=sys.stderr)
+        return 1
+    try:
+        if args.reset:
+            reset_tables(connection)
+            offsets = {}
+        else:
+            cursor = connection.cursor()
+            try:
+                offsets = current_max_ids(cursor)
+            finally:
+                cursor.close()
+
+        data = generate_dataset(args.scale, args.seed, offsets)
+        timings = load_dataset(connection, data, args.batch_size)
+    finally:
+        connection.close()
+
+    print(f"Loaded {args.scale:,} students (seed {args.seed}):")
+    for table in TABLES:
+        print(f"  {table:<20} {len(data[table]):>10,} rows  {timings[table]:7.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
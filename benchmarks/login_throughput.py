@@ -0,0 +1,136 @@
+# ===================================================================
+# LOGIN THROUGHPUT BENCHMARK - A CLASS SIGNING IN AT ONCE
+# ===================================================================
+# Simulates the start of a trip day: N logins submitted at the same time
+# by C clients (threads), through the same entry points as the login
+# window (LoginGUI.fetch_user / LoginGUI.resume_session, so with
+# TRIP_MANAGER_SERVICE_URL set the service is measured).
+#
+# KEY RESPONSIBILITIES:
+# 1. Time three passes: password logins on rows not migrated yet (plain
+#    text rows are rehashed and written back), password logins on hashed
+#    rows, and relaunches with the session tokens of the previous pass
+# 2. Report logins per second and the latency percentiles of each pass
+# 3. Without a database (--offline), time the KDF pool alone, to choose
+#    the hash cost (TRIP_MANAGER_KDF) and the number of KDF workers
+#
+# USAGE:
+#   python benchmarks/data_generator.py --scale 10k --reset
+#   python benchmarks/login_throughput.py --logins 300 --clients 50
+#   python benchmarks/login_throughput.py --offline --kdf scrypt:16384:8:1 --kdf-workers 8
+#
+# The students' passwords are the defaults of the test data (surname + age).
+# ===================================================================
+
+import argparse  # Command line options
+import os  # Paths
+import statistics  # Percentiles
+import sys  # Import path and exit status
+import time  # Wall time
+from concurrent.futures import ThreadPoolExecutor  # Concurrent clients
+
+# Make the PythonExpenseApp package importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PythonExpenseApp.auth import Auth, PasswordHasher, SessionTokens  # noqa: E402
+
+
+def run_pass(name, calls, clients):
+    """
+    Run the calls concurrently and print the throughput and latencies.
+
+    :param name: str - Label of the pass.
+    :param calls: list - Functions without arguments, each returning a truthy value on success.
+    :param clients: int - Number of concurrent clients.
+    :return: list - Results of the calls, in order.
+    """
+    def timed(call):
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception as error:  # Counted as a failure, the pass goes on
+            result = None
+            print(f"  error: {error}", file=sys.stderr)
+        return result, (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        outcomes = list(pool.map(timed, calls))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for _, latency in outcomes)
+    failures = sum(1 for result, _ in outcomes if not result)
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    print(f"{name:<28} {len(calls) / elapsed:9.1f} logins/s   p50 {percentiles[49]:8.1f} ms   "
+          f"p95 {percentiles[94]:8.1f} ms   max {latencies[-1]:8.1f} ms   failed {failures}")
+    return [result for result, _ in outcomes]
+
+
+def sample_credentials(count):
+    """
+    :param count: int - Number of logins.
+    :return: list - (email, password) of the students, repeated to reach count.
+    """
+    from PythonExpenseApp.db_connection import DbConnection
+    success, rows = DbConnection.execute_query(
+        "SELECT email, surname, age FROM students WHERE role = 'student' ORDER BY id LIMIT %s",
+        (count,), fetch_all=True)
+    if not success or not rows:
+        raise RuntimeError(f"Could not read the students: {rows}")
+    credentials = [(email, f"{surname.lower()}{age}") for email, surname, age in rows]
+    return [credentials[i % len(credentials)] for i in range(count)]
+
+
+def run_database(args):
+    from PythonExpenseApp.gui.login_gui import LoginGUI
+    credentials = sample_credentials(args.logins)
+    run_pass("password (first login)",
+             [lambda c=c: LoginGUI.fetch_user(*c) for c in credentials], args.clients)
+    results = run_pass("password (hashed rows)",
+                       [lambda c=c: LoginGUI.fetch_user(*c) for c in credentials], args.clients)
+    tokens = [result[1] for result in results if result]
+    run_pass("session token",
+             [lambda t=t: LoginGUI.resume_session(t) for t in tokens], args.clients)
+
+
+def run_offline(args):
+    passwords = [f"student{i}" for i in range(min(args.logins, 50))]
+    stored = [Auth.hash_password(password) for password in passwords]
+    pairs = [(passwords[i % len(passwords)], stored[i % len(stored)]) for i in range(args.logins)]
+    run_pass("verify (KDF pool)",
+             [lambda p=p: Auth.verify(*p) for p in pairs], args.clients)
+    tokens = [SessionTokens.issue(i, stored[i % len(stored)]) for i in range(args.logins)]
+    run_pass("token check", [lambda t=t: SessionTokens.check(t) for t in tokens], args.clients)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent login throughput of the Trip Manager.")
+    parser.add_argument("--logins", type=int, default=300, help="logins per pass (default: 300)")
+    parser.add_argument("--clients", type=int, default=50, help="concurrent clients (default: 50)")
+    parser.add_argument("--kdf", default=None, metavar="SETTING",
+                        help="hash cost, as TRIP_MANAGER_KDF (e.g. scrypt:16384:8:1, pbkdf2:600000)")
+    parser.add_argument("--kdf-workers", type=int, default=None,
+                        help=f"threads of the KDF pool (default: {Auth.KDF_WORKERS})")
+    parser.add_argument("--offline", action="store_true", help="time the KDF pool only, without a database")
+    args = parser.parse_args(argv)
+
+    if args.kdf:
+        os.environ['TRIP_MANAGER_KDF'] = args.kdf
+    Auth.configure(hasher=PasswordHasher.from_environment(), workers=args.kdf_workers)
+    print(f"{args.logins} logins per pass, {args.clients} clients, "
+          f"KDF {Auth.current_hasher().setting()} on {Auth.KDF_WORKERS} workers")
+    try:
+        if args.offline:
+            run_offline(args)
+        else:
+            run_database(args)
+    except RuntimeError as error:
+        print(f"Benchmark failed: {error}", file=sys.stderr)
+        return 2
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
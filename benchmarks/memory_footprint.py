@@ -0,0 +1,132 @@
+# ===================================================================
+# MEMORY FOOTPRINT BENCHMARK - MODEL OBJECTS VS COMPACT ROSTERS
+# ===================================================================
+# Builds the student and activity listings of a generated data set
+# (data_generator.generate_dataset, no database needed) in each
+# representation and measures the memory it keeps alive with tracemalloc:
+#
+# - rows: the tuples returned by the driver, kept as they are
+# - models: Student / Activity objects (get_all_students / get_all_activities)
+# - records: StudentRecord / ActivityRecord __slots__ objects
+# - roster: StudentRoster / ActivityRoster columnar storage
+#
+# KEY RESPONSIBILITIES:
+# 1. Give every row its own string objects, as a database driver does,
+#    and count everything each representation keeps alive
+# 2. Report the retained MB, bytes per row and build time of each representation
+# 3. Report the cost of promoting rows of a roster back to model objects
+#
+# USAGE:
+#   python benchmarks/memory_footprint.py
+#   python benchmarks/memory_footprint.py --scale 50000 --promote 100
+# ===================================================================
+
+import argparse  # Command line options
+import gc  # Collect before each measurement
+import os  # Paths
+import sys  # Import path and exit status
+import time  # Build time
+import tracemalloc  # Retained memory
+
+# Make the PythonExpenseApp package importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from data_generator import generate_dataset, scale_students  # noqa: E402
+
+
+def listing_rows(data):
+    """
+    Convert generated rows to the layout of the listing queries.
+
+    :param data: dict - Result of generate_dataset.
+    :return: tuple - (student rows, activity rows)
+    """
+    students = [row[:4] + row[6:] for row in data['students']]  # Without password and role
+    return students, list(data['activities'])
+
+
+def fetch(rows):
+    """
+    Copy rows with fresh string objects in every row: the generator shares them,
+    a database driver decodes each value anew.
+
+    :param rows: list - Rows to copy.
+    :return: list - New row tuples.
+    """
+    return [tuple(value.encode().decode() if isinstance(value, str) else value for value in row)
+            for row in rows]
+
+
+def measure(source, build):
+    """
+    Fetch a copy of the rows, build a representation from it, drop the rows and
+    measure the memory still allocated (the representation and what it keeps alive).
+
+    :param source: list - Rows of the listing.
+    :param build: callable(rows) - Returns the representation to measure.
+    :return: tuple - (result, retained bytes, build seconds)
+    """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    rows = fetch(source)
+    started = time.perf_counter()
+    result = build(rows)
+    elapsed = time.perf_counter() - started
+    del rows
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, retained, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the memory of model objects and compact rosters.")
+    parser.add_argument("--scale", type=scale_students, default=scale_students("10k"),
+                        help="1k, 10k, 100k or a number of students (default: 10k)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed of the generated rows")
+    parser.add_argument("--promote", type=int, default=100, help="roster rows promoted to model objects")
+    args = parser.parse_args(argv)
+
+    from PythonExpenseApp.activity import Activity
+    from PythonExpenseApp.roster import ActivityRecord, ActivityRoster, StudentRecord, StudentRoster
+    from PythonExpenseApp.student import Student
+
+    student_rows, activity_rows = listing_rows(generate_dataset(args.scale, args.seed))
+    listings = (
+        ('students', student_rows, Student, StudentRecord, StudentRoster),
+        ('activities', activity_rows, Activity, ActivityRecord, ActivityRoster),
+    )
+
+    print(f"{len(student_rows)} students, {len(activity_rows)} activities")
+    for name, source, model, record, roster_type in listings:
+        representations = (
+            ('rows', lambda rows: rows),
+            ('models', lambda rows: [model.from_row(row) for row in rows]),
+            ('records', lambda rows: [record.from_row(row) for row in rows]),
+            ('roster', roster_type.from_rows),
+        )
+        print()
+        print(f"  {name:<10} {'MB':>9} {'bytes/row':>10} {'build ms':>9} {'vs models':>10}")
+        models = 0
+        for label, build in representations:
+            result, retained, elapsed = measure(source, build)
+            models = retained if label == 'models' else models
+            ratio = f"{retained / models:.0%}" if models else "-"
+            print(f"  {label:<10} {retained / 2 ** 20:>9.2f} {retained / max(1, len(source)):>10.0f} "
+                  f"{elapsed * 1000:>9.1f} {ratio:>10}")
+        roster = result  # The last representation
+
+        ids = [row[0] for row in source[:args.promote]]
+        started = time.perf_counter()
+        promoted = [roster.promote(object_id) for object_id in ids]
+        elapsed = time.perf_counter() - started
+        print(f"  promote {len(promoted)} rows: {elapsed * 1000:.2f} ms "
+              f"({elapsed * 1e6 / max(1, len(promoted)):.1f} us per row, id index included)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
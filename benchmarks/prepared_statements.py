@@ -0,0 +1,188 @@
+# ===================================================================
+# PREPARED STATEMENT BENCHMARK - TEXT PROTOCOL VS CACHED STATEMENTS
+# ===================================================================
+# Runs the hot parameterised statements of the application (participant
+# COUNT(*), Student.authenticate, the feedback eligibility checks and,
+# optionally, the debt inserts) from several threads, first with the
+# prepared statement cache of DbConnection disabled (every call sends and
+# parses the full SQL text) and then enabled (each statement is parsed
+# once per pooled connection and executed by id afterwards).
+#
+# KEY RESPONSIBILITIES:
+# 1. Drive the same workload at high QPS in both modes
+# 2. Report throughput, median / p95 latency per call and the cache hits
+# 3. Report the server counters (Com_stmt_prepare, Com_stmt_execute,
+#    Com_select/Com_insert) showing how many statements were parsed
+#
+# USAGE:
+#   python benchmarks/prepared_statements.py
+#   python benchmarks/prepared_statements.py --threads 8 --seconds 10 --writes
+#
+# The debt inserts (--writes) run in transactions that are rolled back.
+# ===================================================================
+
+import argparse  # Command line options
+import os  # Paths
+import statistics  # Median latency
+import sys  # Import path and exit status
+import threading  # Concurrent clients
+import time  # Wall time
+
+# Make the PythonExpenseApp package importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PythonExpenseApp.db_connection import DbConnection  # noqa: E402
+from run_benchmarks import BenchmarkContext  # noqa: E402
+
+# Server counters compared before and after each mode
+SERVER_COUNTERS = ('Com_stmt_prepare', 'Com_stmt_execute', 'Com_select', 'Com_insert')
+
+# Debt rows inserted (and rolled back) by each write transaction
+DEBTS_PER_TRANSACTION = 5
+
+
+class _Rollback(Exception):
+    """Raised at the end of a benchmark transaction so that run_transaction rolls it back."""
+
+
+def build_workload(context, writes):
+    """
+    Build the list of hot calls, each a callable(i) cycling through the sampled ids.
+
+    :param context: BenchmarkContext - Sampled ids.
+    :param writes: bool - Include the (rolled back) debt insert transactions.
+    :return: list - (name, callable(i)) tuples.
+    """
+    from PythonExpenseApp.activity import Activity
+    from PythonExpenseApp.feedback import Feedback
+    from PythonExpenseApp.student import Student
+
+    activities = [Activity.get_activity_by_id(activity_id) for activity_id in context.activity_ids]
+    students, credentials = context.student_ids, context.credentials
+
+    workload = [
+        ("Activity.get_current_participants",
+         lambda i: activities[i % len(activities)].get_current_participants()),
+        ("Student.authenticate",
+         lambda i: Student.authenticate(*credentials[i % len(credentials)])),
+        ("Feedback.can_student_leave_feedback",
+         lambda i: Feedback.can_student_leave_feedback(students[i % len(students)],
+                                                       context.activity_ids[i % len(context.activity_ids)])),
+    ]
+    if writes:
+        payer, debtors = context.class_student_ids[0], context.class_student_ids[1:DEBTS_PER_TRANSACTION + 1]
+
+        def insert_debts(i):
+            def work(cursor):
+                for debtor in debtors:
+                    cursor.execute("""INSERT INTO debts (payer_id, debtor_id, amount, description, date_created)
+                                      VALUES (%s, %s, %s, %s, CURDATE())""",
+                                   (payer, debtor, 1.0, "Prepared statement benchmark"))
+                raise _Rollback()
+            return DbConnection.run_transaction(work)
+
+        workload.append(("debt inserts (rolled back)", insert_debts))
+    return workload
+
+
+def server_counters():
+    """
+    :return: dict - Current value of SERVER_COUNTERS (global status).
+    """
+    names = ", ".join(f"'{name}'" for name in SERVER_COUNTERS)  # Constants: no parameters, text protocol
+    success, rows = DbConnection.execute_query(f"SHOW GLOBAL STATUS WHERE Variable_name IN ({names})",
+                                               fetch_all=True)
+    return {name: int(value) for name, value in rows} if success else {}
+
+
+def run_mode(cache_size, workload, threads, seconds):
+    """
+    Run the workload from several threads for a fixed time with the given cache size.
+
+    :param cache_size: int - PREPARED_STATEMENT_CACHE_SIZE (0 = text protocol).
+    :param workload: list - See build_workload.
+    :param threads: int - Concurrent clients (keep it within the pool size).
+    :param seconds: float - Duration of the timed run.
+    :return: dict - calls, qps, median_ms, p95_ms, server counter deltas, cache stats.
+    """
+    DbConnection.PREPARED_STATEMENT_CACHE_SIZE = cache_size
+    DbConnection.update_pool_config()  # New pool: the session reset depends on the cache
+    for index, (_, call) in enumerate(workload * threads):  # Warm-up: connections and statements
+        call(index)
+
+    stats_before = DbConnection.get_statement_cache_stats()
+    counters_before = server_counters()
+    latencies = [[] for _ in range(threads)]
+    deadline = time.perf_counter() + seconds
+
+    def client(number):
+        i = number
+        while time.perf_counter() < deadline:
+            _, call = workload[i % len(workload)]
+            started = time.perf_counter()
+            call(i)
+            latencies[number].append((time.perf_counter() - started) * 1000)
+            i += 1
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=client, args=(number,)) for number in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    counters_after = server_counters()
+    stats_after = DbConnection.get_statement_cache_stats()
+    all_latencies = sorted(latency for client_latencies in latencies for latency in client_latencies)
+    return {
+        'calls': len(all_latencies),
+        'qps': len(all_latencies) / elapsed,
+        'median_ms': statistics.median(all_latencies) if all_latencies else 0.0,
+        'p95_ms': all_latencies[int(len(all_latencies) * 0.95)] if all_latencies else 0.0,
+        'counters': {name: counters_after.get(name, 0) - counters_before.get(name, 0) for name in SERVER_COUNTERS},
+        'hits': stats_after['hits'] - stats_before['hits'],
+        'prepares': stats_after['prepares'] - stats_before['prepares'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the text protocol with cached prepared statements.")
+    parser.add_argument("--threads", type=int, default=8, help="concurrent clients (default: 8, pool size 10)")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of each mode (default: 5)")
+    parser.add_argument("--cache-size", type=int, default=DbConnection.PREPARED_STATEMENT_CACHE_SIZE,
+                        help="statements cached per connection in the prepared mode")
+    parser.add_argument("--writes", action="store_true", help="include the debt insert transactions (rolled back)")
+    args = parser.parse_args(argv)
+
+    success, message = DbConnection.test_connection()
+    if not success:
+        print(f"Database not available: {message}", file=sys.stderr)
+        return 1
+
+    workload = build_workload(BenchmarkContext(), args.writes)
+    print(f"Workload: {', '.join(name for name, _ in workload)}")
+    print(f"{args.threads} threads, {args.seconds:g}s per mode")
+    results = {}
+    for mode, cache_size in (('text', 0), ('prepared', args.cache_size)):
+        results[mode] = run_mode(cache_size, workload, args.threads, args.seconds)
+
+    print()
+    print(f"  {'mode':<10} {'calls':>8} {'calls/s':>9} {'median ms':>10} {'p95 ms':>8} "
+          f"{'cache hits':>11} " + " ".join(f"{name:>17}" for name in SERVER_COUNTERS))
+    for mode, result in results.items():
+        print(f"  {mode:<10} {result['calls']:>8} {result['qps']:>9.0f} {result['median_ms']:>10.3f} "
+              f"{result['p95_ms']:>8.3f} {result['hits']:>11} "
+              + " ".join(f"{result['counters'][name]:>17}" for name in SERVER_COUNTERS))
+    text, prepared = results['text'], results['prepared']
+    if text['qps'] and text['median_ms']:
+        print()
+        print(f"Throughput {prepared['qps'] / text['qps'] - 1:+.1%}, "
+              f"median latency {prepared['median_ms'] / text['median_ms'] - 1:+.1%} with the cache")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,418 @@
+# ===================================================================
+# END-TO-END BENCHMARK RUNNER
+# ===================================================================
+# Times the model-layer entry points and the data loaders of the GUIs
+# against the configured trip_manager database, without opening any
+# window (the GUI loaders are the Tk-free static fetch_* methods that the
+# views run on the background worker).
+#
+# KEY RESPONSIBILITIES:
+# 1. Pick a deterministic sample of ids (activities, students, days) from
+#    the database, so successive runs time the same work
+# 2. Run every registered benchmark N times and record min / median /
+#    mean / max wall time and the size of the result
+# 3. Write the results as JSON (one file per run) and, when a previous
+#    result file is given, print the run-to-run comparison
+#
+# USAGE:
+#   python benchmarks/data_generator.py --scale 10k --reset
+#   python benchmarks/run_benchmarks.py --repeat 5
+#   python benchmarks/run_benchmarks.py --only gui. --compare benchmarks/results/old.json
+#
+# Write benchmarks (Expense.create_debt_records) clean up the rows they create.
+# ===================================================================
+
+import argparse  # Command line options
+import json  # Result files
+import os  # Paths
+import platform  # Environment description
+import statistics  # Median / mean
+import sys  # Import path and exit status
+import time  # Wall time
+from datetime import datetime  # Result file names
+
+# Make the PythonExpenseApp package importable when run as a script
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from PythonExpenseApp.db_connection import DbConnection  # noqa: E402
+
+# Directory of the JSON result files
+RESULTS_DIR = os.path.join(PROJECT_ROOT, 'benchmarks', 'results')
+
+# Number of ids sampled for the per-entity benchmarks
+SAMPLE_SIZE = 10
+
+# Participants of the expense split by the create_debt_records benchmark
+DEBT_SPLIT_PARTICIPANTS = 30
+
+# Registered benchmarks: list of (name, function(context))
+BENCHMARKS = []
+
+
+def benchmark(name):
+    """
+    Register a benchmark. The decorated function receives the BenchmarkContext
+    and returns the result of the timed call (its len() is recorded when available).
+
+    :param name: str - Benchmark name ("model." or "gui." prefix by convention).
+    :return: decorator
+    """
+    def register(function):
+        BENCHMARKS.append((name, function))
+        return function
+    return register
+
+
+class BenchmarkContext:
+    """
+    Ids sampled once from the database and shared by every benchmark.
+
+    ATTRIBUTES:
+        activity_ids (list): Sample of activity ids
+        student_ids (list): Sample of ids of students with enrollments
+        credentials (list): (email, password) of the sampled students
+        days (list): Every distinct activity day
+        class_student_ids (list): Students of one class (for expense splits)
+        table_rows (dict): Table -> number of rows (describes the data set)
+    """
+
+    TABLES = ('students', 'activities', 'student_activities', 'expenses', 'debts',
+              'feedback', 'groups', 'student_groups')
+
+    def __init__(self):
+        self.activity_ids = self._column("SELECT id FROM activities ORDER BY id LIMIT %s", (SAMPLE_SIZE,))
+        self.student_ids = self._column("""SELECT DISTINCT student_id FROM student_activities
+                                           ORDER BY student_id LIMIT %s""", (SAMPLE_SIZE,))
+        # Stored passwords are hashes once migrated: use the default password (surname + age)
+        success, rows = DbConnection.execute_query(
+            "SELECT email, surname, age FROM students WHERE role = 'student' ORDER BY id LIMIT %s",
+            (SAMPLE_SIZE,), fetch_all=True)
+        if not success:
+            raise RuntimeError(f"Could not sample benchmark data: {rows}")
+        self.credentials = [(email, f"{surname.lower()}{age}") for email, surname, age in rows]
+        self.days = self._column("SELECT DISTINCT day FROM activities ORDER BY day")
+        self.class_student_ids = self._column("""SELECT id FROM students
+                                                 WHERE class = (SELECT MIN(class) FROM students WHERE role = 'student')
+                                                 ORDER BY id LIMIT %s""", (DEBT_SPLIT_PARTICIPANTS,))
+        self.table_rows = {table: self._column(f"SELECT COUNT(*) FROM `{table}`")[0] for table in self.TABLES}
+
+    @staticmethod
+    def _column(query, params=None):
+        success, result = DbConnection.execute_query(query, params, fetch_all=True)
+        if not success:
+            raise RuntimeError(f"Could not sample benchmark data: {result}")
+        return [row[0] for row in result]
+
+
+# ===================================================================
+# MODEL LAYER
+# ===================================================================
+
+@benchmark("model.Statistics.fetch_statistics_from_database")
+def bench_statistics(context):
+    from PythonExpenseApp.statistics import Statistics
+    return Statistics().fetch_statistics_from_database()
+
+
+@benchmark("model.Activity.get_comprehensive_details")
+def bench_activity_details(context):
+    from PythonExpenseApp.activity import Activity
+    details = []
+    for activity_id in context.activity_ids:
+        activity = Activity.get_activity_by_id(activity_id)
+        if activity:
+            details.append(activity.get_comprehensive_details())
+    return details
+
+
+@benchmark("model.DailyProgram")
+def bench_daily_program(context):
+    from PythonExpenseApp.daily_program import DailyProgram
+    return [DailyProgram(day) for day in context.days]
+
+
+@benchmark("model.Expense.create_debt_records")
+def bench_create_debt_records(context, timer=None):
+    from PythonExpenseApp.expense import Expense
+    expense = Expense(DEBT_SPLIT_PARTICIPANTS * 10.0, "Benchmark split", None, context.class_student_ids[0])
+    success, message = expense.save_to_database()
+    if not success:
+        raise RuntimeError(message)
+    try:
+        with timer:  # Only the debt creation is timed
+            success, message = expense.create_debt_records(context.class_student_ids)
+        if not success:
+            raise RuntimeError(message)
+        return context.class_student_ids
+    finally:
+        DbConnection.execute_query("DELETE FROM expenses WHERE id = %s", (expense.id,))  # Debts cascade
+
+
+@benchmark("model.Student.get_all_students")
+def bench_all_students(context):
+    from PythonExpenseApp.student import Student
+    return Student.get_all_students()
+
+
+@benchmark("model.Group.get_groups_with_members")
+def bench_group_overview(context):
+    from PythonExpenseApp.group import Group
+    return Group.get_groups_with_members()
+
+
+@benchmark("model.GroupFormation.form")
+def bench_group_formation(context):
+    from PythonExpenseApp.group_formation import GroupFormation
+    return GroupFormation(per_class=False).load().form()  # Not saved
+
+
+@benchmark("analytics.EnrollmentMatrix")
+def bench_enrollment_analytics(context):
+    from PythonExpenseApp.enrollment_analytics import EnrollmentMatrix
+    matrix = EnrollmentMatrix().load()
+    return (matrix.co_enrollment(), matrix.utilization_by_day(), matrix.utilization_by_hour(),
+            matrix.class_activity_crosstab())
+
+
+@benchmark("recommendations.ActivityRecommender.rebuild")
+def bench_recommendations_rebuild(context):
+    from PythonExpenseApp.recommendations import ActivityRecommender
+    recommender = ActivityRecommender()
+    return recommender.rebuild()  # Rewrites activity_neighbors (derived data only)
+
+
+@benchmark("model.Statistics.get_trends")
+def bench_trends(context):
+    from PythonExpenseApp.statistics import Statistics
+    return Statistics().get_trends('hour')
+
+
+@benchmark("roster.StudentRoster.load")
+def bench_student_roster(context):
+    from PythonExpenseApp.roster import StudentRoster
+    return StudentRoster.load()
+
+
+# ===================================================================
+# GUI DATA LOADERS (headless: the Tk-free fetch_* of each view)
+# ===================================================================
+
+@benchmark("gui.LoginGUI.fetch_user")
+def bench_login(context):
+    from PythonExpenseApp.gui.login_gui import LoginGUI
+    return [LoginGUI.fetch_user(email, password) for email, password in context.credentials]
+
+
+@benchmark("gui.DashboardGUI.fetch_today_schedule")
+def bench_today_schedule(context):
+    from PythonExpenseApp.gui.dashboard_gui import DashboardGUI
+    return DashboardGUI.fetch_today_schedule()
+
+
+@benchmark("gui.TeacherDashboard.fetch_dashboard_data")
+def bench_teacher_dashboard(context):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return TeacherDashboard.build_search_indexes(TeacherDashboard.fetch_dashboard_data())['activities']
+
+
+@benchmark("gui.TeacherDashboard.fetch_daily_schedule")
+def bench_teacher_schedule(context):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return [TeacherDashboard.fetch_daily_schedule(str(day)) for day in context.days]
+
+
+@benchmark("gui.TeacherDashboard.fetch_student_activities")
+def bench_teacher_student_activities(context):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return [TeacherDashboard.fetch_student_activities(student_id) for student_id in context.student_ids]
+
+
+@benchmark("gui.TeacherDashboard.fetch_activity_participants")
+def bench_teacher_participants(context):
+    from PythonExpenseApp.gui.teacher_dashboard import TeacherDashboard
+    return [TeacherDashboard.fetch_activity_participants(activity_id) for activity_id in context.activity_ids]
+
+
+@benchmark("gui.ExpenseGUI.fetch_students")
+def bench_expense_students(context):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return ExpenseGUI.build_student_index(ExpenseGUI.fetch_students()).records
+
+
+@benchmark("gui.ExpenseGUI.fetch_debts")
+def bench_expense_debts(context):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return [ExpenseGUI.fetch_debts(student_id) for student_id in context.student_ids]
+
+
+@benchmark("gui.ExpenseGUI.fetch_history_page")
+def bench_expense_history(context):
+    from PythonExpenseApp.gui.expense_gui import ExpenseGUI
+    return [ExpenseGUI.fetch_history_page(kind, student_id=student_id)
+            for student_id in context.student_ids for kind in ("expenses", "debts")]
+
+
+@benchmark("gui.ActivityFormGUI.fetch_activities")
+def bench_activity_form(context):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return ActivityFormGUI.fetch_activities()
+
+
+@benchmark("gui.ActivityFormGUI.fetch_subscriptions")
+def bench_subscriptions(context):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return [ActivityFormGUI.fetch_subscriptions(student_id) for student_id in context.student_ids]
+
+
+@benchmark("gui.ActivityFormGUI.fetch_recommendations")
+def bench_recommendations(context):
+    from PythonExpenseApp.gui.activity_form_gui import ActivityFormGUI
+    return [ActivityFormGUI.fetch_recommendations(student_id) for student_id in context.student_ids]
+
+
+@benchmark("gui.ActivityDetailsGUI.fetch_activity")
+def bench_activity_details_gui(context):
+    from PythonExpenseApp.gui.activity_details_gui import ActivityDetailsGUI
+    student_id = context.student_ids[0] if context.student_ids else None
+    return [ActivityDetailsGUI.fetch_activity(activity_id, student_id) for activity_id in context.activity_ids]
+
+
+# ===================================================================
+# RUNNER
+# ===================================================================
+
+class _Timer:
+    """Context manager accumulating the wall time of the code it wraps."""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed += time.perf_counter() - self._started
+        return False
+
+
+def run_benchmark(function, context, repeat):
+    """
+    Run one benchmark `repeat` times (after one untimed warm-up run).
+
+    :param function: callable(context[, timer]) - Registered benchmark.
+    :param context: BenchmarkContext - Sampled ids.
+    :param repeat: int - Timed runs.
+    :return: dict - Timings in ms and size of the result.
+    """
+    uses_timer = 'timer' in function.__code__.co_varnames[:function.__code__.co_argcount]
+
+    def run_once():
+        if uses_timer:  # The benchmark times only part of its work
+            timer = _Timer()
+            result = function(context, timer=timer)
+            return timer.elapsed, result
+        started = time.perf_counter()
+        result = function(context)
+        return time.perf_counter() - started, result
+
+    run_once()  # Warm-up: connection pool, imports, MySQL caches
+    times, result = [], None
+    for _ in range(repeat):
+        elapsed, result = run_once()
+        times.append(elapsed * 1000)
+    try:
+        size = len(result)
+    except TypeError:
+        size = None
+    return {
+        'runs': repeat,
+        'min_ms': round(min(times), 3),
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.mean(times), 3),
+        'max_ms': round(max(times), 3),
+        'result_size': size,
+    }
+
+
+def print_comparison(results, previous_path):
+    """
+    Print the median of every benchmark next to the one of a previous run.
+
+    :param results: dict - Results of this run (as written to JSON).
+    :param previous_path: str - Path of a previous result file.
+    :return: None
+    """
+    with open(previous_path, encoding='utf-8') as previous_file:
+        previous = json.load(previous_file)
+    print()
+    print(f"Comparison with {previous_path} ({previous.get('timestamp', '?')}):")
+    print(f"  {'benchmark':<50} {'before ms':>11} {'after ms':>11} {'change':>8}")
+    for name, timing in results['benchmarks'].items():
+        before = previous.get('benchmarks', {}).get(name)
+        if not before or 'median_ms' not in before or 'median_ms' not in timing:
+            continue
+        after_ms, before_ms = timing['median_ms'], before['median_ms']
+        change = f"{(after_ms / before_ms - 1) * 100:+7.1f}%" if before_ms else "    n/a"
+        print(f"  {name:<50} {before_ms:>11.2f} {after_ms:>11.2f} {change}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the Trip Manager data access paths.")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark (default: 5)")
+    parser.add_argument("--only", action="append", default=[],
+                        help="run only benchmarks whose name contains this text (repeatable)")
+    parser.add_argument("--output", help="result file (default: benchmarks/results/benchmark-<timestamp>.json)")
+    parser.add_argument("--compare", help="previous result file to compare with")
+    parser.add_argument("--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    selected = [(name, function) for name, function in BENCHMARKS
+                if not args.only or any(text in name for text in args.only)]
+    if args.list:
+        for name, _ in selected:
+            print(name)
+        return 0
+
+    success, message = DbConnection.test_connection()
+    if not success:
+        print(f"Database not available: {message}", file=sys.stderr)
+        return 1
+
+    context = BenchmarkContext()
+    results = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'table_rows': context.table_rows,
+        'benchmarks': {},
+    }
+    print("Data set: " + ", ".join(f"{table}={rows:,}" for table, rows in context.table_rows.items()))
+    print(f"  {'benchmark':<50} {'median ms':>11} {'min ms':>11} {'rows':>8}")
+    for name, function in selected:
+        try:
+            timing = run_benchmark(function, context, max(1, args.repeat))
+        except Exception as error:  # Keep going: one broken path must not hide the others
+            results['benchmarks'][name] = {'error': str(error)}
+            print(f"  {name:<50} ERROR: {error}")
+            continue
+        results['benchmarks'][name] = timing
+        size = '' if timing['result_size'] is None else timing['result_size']
+        print(f"  {name:<50} {timing['median_ms']:>11.2f} {timing['min_ms']:>11.2f} {size:>8}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"benchmark-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as output_file:
+        json.dump(results, output_file, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        print_comparison(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
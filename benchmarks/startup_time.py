@@ -0,0 +1,127 @@
+# ===================================================================
+# STARTUP TIME BENCHMARK - COLD START OF THE GUI ENTRY POINT
+# ===================================================================
+# Measures how long a fresh interpreter takes to import the application
+# entry point (PythonExpenseApp.main) and, optionally, to show the login
+# window. Every run is a new process started with `python -X importtime`,
+# so nothing is cached between runs except the .pyc files on disk.
+#
+# KEY RESPONSIBILITIES:
+# 1. Time N cold starts and report the median wall time
+# 2. Parse the -X importtime report and list the slowest imports
+# 3. Check the median against a budget (exit status 1 when over budget),
+#    so a heavy import added back at module level is noticed immediately
+#
+# USAGE:
+#   python benchmarks/startup_time.py
+#   python benchmarks/startup_time.py --runs 10 --budget-ms 400 --top 15
+#   python benchmarks/startup_time.py --window   # up to the login window (needs a display)
+# ===================================================================
+
+import argparse  # Command line options
+import os  # Paths
+import statistics  # Median of the runs
+import subprocess  # One fresh interpreter per run
+import sys  # Current interpreter and exit status
+import time  # Wall time of each run
+
+# Repository root (the directory containing the PythonExpenseApp package)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Default budget for a cold start, in milliseconds
+DEFAULT_BUDGET_MS = 500
+
+# Code executed by each run: import only, or import and show the login window
+IMPORT_ONLY = "import PythonExpenseApp.main"
+UP_TO_LOGIN_WINDOW = (
+    "import tkinter as tk\n"
+    "import PythonExpenseApp.main as main\n"
+    "root = tk.Tk()\n"
+    "main.router = main.create_router(root)\n"
+    "main.router.show('login')\n"
+    "root.update()\n"
+    "root.destroy()\n"
+)
+
+
+def parse_importtime(stderr):
+    """
+    Parse the report written by `python -X importtime` on stderr.
+
+    :param stderr: str - Standard error of the process.
+    :return: list - (module, self_us, cumulative_us) tuples, in report order.
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # Header line ("self [us] | cumulative | imported package")
+        imports.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return imports
+
+
+def run_once(code):
+    """
+    Start a fresh interpreter that executes the given code.
+
+    :param code: str - Code passed to `python -c`.
+    :return: tuple - (wall time in ms, list of imports from parse_importtime).
+    :raises RuntimeError: If the process fails (e.g. a missing dependency).
+    """
+    started = time.perf_counter()
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             cwd=PROJECT_ROOT, capture_output=True, text=True)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if process.returncode != 0:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError("\n".join(errors) or f"exit status {process.returncode}")
+    return elapsed_ms, parse_importtime(process.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the Trip Manager GUI.")
+    parser.add_argument("--runs", type=int, default=5, help="number of cold starts (default: 5)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"maximum median start time in ms (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports listed (default: 10)")
+    parser.add_argument("--window", action="store_true",
+                        help="measure up to the login window being drawn (requires a display)")
+    args = parser.parse_args(argv)
+
+    code = UP_TO_LOGIN_WINDOW if args.window else IMPORT_ONLY
+    # The first run compiles the .pyc files: it is not a fair cold start
+    try:
+        run_once(code)
+        results = [run_once(code) for _ in range(max(1, args.runs))]
+    except RuntimeError as error:
+        print(f"Startup failed:\n{error}", file=sys.stderr)
+        return 2
+
+    times = [elapsed_ms for elapsed_ms, _ in results]
+    median_ms = statistics.median(times)
+    # Slowest imports of the median run
+    imports = sorted(results, key=lambda result: result[0])[len(results) // 2][1]
+    project_imports = [entry for entry in imports if entry[0].startswith("PythonExpenseApp")]
+
+    target = "login window" if args.window else "import of PythonExpenseApp.main"
+    print(f"Cold start ({target}), {len(times)} runs")
+    print(f"  median {median_ms:8.1f} ms   min {min(times):8.1f} ms   max {max(times):8.1f} ms")
+    print(f"  modules imported: {len(imports)} ({len(project_imports)} from the application)")
+    print()
+    print(f"Slowest imports (self time, top {args.top}):")
+    print(f"  {'self ms':>9} {'cumul. ms':>10}  module")
+    for module, self_us, cumulative_us in sorted(imports, key=lambda entry: entry[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:9.1f} {cumulative_us / 1000:10.1f}  {module}")
+    print()
+
+    if median_ms > args.budget_ms:
+        print(f"OVER BUDGET: {median_ms:.1f} ms > {args.budget_ms:.0f} ms")
+        return 1
+    print(f"Within budget: {median_ms:.1f} ms <= {args.budget_ms:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Shared fixtures: an SQLite database (sqlite_pool) with the tables the money paths use.
+
+The application writes MySQL SQL; the few MySQL-only constructs these paths use
+(CURDATE, FOR UPDATE, ON DUPLICATE KEY UPDATE over a derived table, the rollup
+bucket functions) are translated to SQLite by the cursor installed here.
+"""
+
+import decimal
+import re
+import sqlite3
+
+import pytest
+
+pytest.importorskip("mysql.connector")  # DbConnection imports the MySQL driver
+
+from PythonExpenseApp import sqlite_pool  # noqa: E402
+from PythonExpenseApp.db_connection import DbConnection  # noqa: E402
+
+TODAY = '2025-06-09'
+
+SCHEMA = """
+CREATE TABLE students (id INTEGER PRIMARY KEY, name TEXT, surname TEXT, class TEXT, role TEXT);
+CREATE TABLE activities (id INTEGER PRIMARY KEY, name TEXT, day TEXT);
+CREATE TABLE expenses (id INTEGER PRIMARY KEY, amount REAL, description TEXT, date TEXT,
+                       id_giver INT, id_receiver INT, id_activity INT,
+                       created_at TEXT DEFAULT '2025-06-01 10:00:00');
+CREATE TABLE debts (id INTEGER PRIMARY KEY, payer_id INT, debtor_id INT, amount REAL, description TEXT,
+                    expense_id INT, paid INT DEFAULT 0, date_created TEXT, date_paid TEXT,
+                    created_at TEXT DEFAULT '2025-06-01 10:00:00',
+                    updated_at TEXT DEFAULT '2025-06-01 10:00:00');
+CREATE TABLE expenses_archive (id INT PRIMARY KEY, amount REAL, description TEXT, date TEXT,
+                               id_giver INT, id_receiver INT, id_activity INT, created_at TEXT);
+CREATE TABLE debts_archive (id INT PRIMARY KEY, payer_id INT, debtor_id INT, amount REAL, description TEXT,
+                            expense_id INT, paid INT, date_created TEXT, date_paid TEXT,
+                            created_at TEXT, updated_at TEXT);
+CREATE VIEW expenses_history AS
+    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses
+    UNION ALL
+    SELECT id, amount, description, date, id_giver, id_receiver, id_activity, created_at FROM expenses_archive;
+CREATE VIEW debts_history AS
+    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid, date_created, date_paid,
+           created_at, updated_at FROM debts
+    UNION ALL
+    SELECT id, payer_id, debtor_id, amount, description, expense_id, paid, date_created, date_paid,
+           created_at, updated_at FROM debts_archive;
+CREATE TABLE settlements (id INTEGER PRIMARY KEY, payer_id INT, debtor_id INT, amount REAL, debts INT,
+                          created_at TEXT DEFAULT CURRENT_TIMESTAMP);
+CREATE TABLE settlement_debts (settlement_id INT, debt_id INT, amount REAL, PRIMARY KEY (settlement_id, debt_id));
+CREATE TABLE debt_balances (payer_id INT, debtor_id INT, total REAL DEFAULT 0, debts INT DEFAULT 0,
+                            PRIMARY KEY (payer_id, debtor_id));
+CREATE TABLE rollup_hourly (metric TEXT, bucket TEXT, class TEXT, activity_id INT, events INT, total REAL,
+                            PRIMARY KEY (metric, bucket, class, activity_id));
+CREATE TABLE rollup_daily (metric TEXT, bucket TEXT, class TEXT, activity_id INT, events INT, total REAL,
+                           PRIMARY KEY (metric, bucket, class, activity_id));
+"""
+
+
+def mysql_to_sqlite(query):
+    """Translate the MySQL-only SQL of the write paths to SQLite."""
+    query = query.replace(" FOR UPDATE", "")
+    if "ON DUPLICATE KEY UPDATE" in query:
+        head, tail = query.split("ON DUPLICATE KEY UPDATE")
+        # "... ) AS alias ON" would parse as a join constraint: close the SELECT with a WHERE
+        head = re.sub(r"\) AS (\w+)\s*$", r") AS \1 WHERE 1 ", head)
+        alias = re.search(r"\) AS (\w+) WHERE 1 $", head)
+        if alias:
+            tail = re.sub(rf"\b{alias.group(1)}\.(\w+)", r"excluded.\1", tail)
+        query = f"{head}ON CONFLICT DO UPDATE SET{tail}"
+    return query.replace("LEAST(", "MIN(").replace("GREATEST(", "MAX(")
+
+
+class _MysqlDialectCursor(sqlite_pool._SqliteCursor):
+    def execute(self, query, params=()):
+        super().execute(mysql_to_sqlite(query), params)
+
+    def executemany(self, query, seq_of_params):
+        super().executemany(mysql_to_sqlite(query), seq_of_params)
+
+
+class _MysqlDialectConnection(sqlite_pool._SqliteConnection):
+    def __init__(self, path, database):
+        super().__init__(path, database)
+        functions = self._connection.create_function
+        functions('CURDATE', 0, lambda: TODAY)
+        functions('TIMESTAMP', 2, lambda day, time: f"{day} {time}")
+        functions('MAKETIME', 3, lambda h, m, s: f"{h:02d}:{m:02d}:{s:02d}")
+        functions('HOUR', 1, lambda ts: int(ts[11:13] or 0))  # A DATE is at midnight
+
+    def cursor(self):
+        return _MysqlDialectCursor(self._connection.cursor())
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """
+    Route DbConnection to a fresh SQLite file with the money tables.
+
+    :return: sqlite3.Connection - Direct connection to the same file, to arrange and check rows.
+    """
+    sqlite3.register_adapter(decimal.Decimal, float)
+    path = str(tmp_path / 'trip.db')
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    connection.executemany("INSERT INTO students (id, name, surname, class, role) VALUES (?, ?, ?, ?, 'student')",
+                           [(i, f'n{i}', f's{i}', '4A' if i % 2 else '4B') for i in range(1, 7)])
+    connection.commit()
+
+    monkeypatch.setattr(sqlite_pool, '_SqliteConnection', _MysqlDialectConnection)
+    monkeypatch.setattr(DbConnection, 'PREPARED_STATEMENT_CACHE_SIZE', 0)
+    sqlite_pool.install_sqlite_pools(path)
+    yield connection
+    connection.close()
@@ -0,0 +1,73 @@
+"""Keyset pages of the expense history: Expense.get_expense_page / Expense._history_page."""
+
+import pytest
+
+from PythonExpenseApp.expense import Expense
+
+# (id, date, giver, receiver, archived): most rows share a date, so pages end inside a run of equal dates
+EXPENSES = [
+    (1, '2025-06-01', 1, 2, True),
+    (2, '2025-06-02', 2, 1, True),
+    (3, '2025-06-02', 3, 4, False),
+    (4, '2025-06-02', 1, 1, False),  # Matches both student columns: listed once
+    (5, '2025-06-02', 1, None, False),  # Shared expense without a receiver
+    (6, '2025-06-02', 2, 1, True),
+    (7, '2025-06-02', 4, 3, False),
+    (8, '2025-06-02', 1, 3, False),
+    (9, '2025-06-03', 3, 1, False),
+    (10, '2025-06-02', None, 1, False),  # Without a giver: found by the receiver column
+]
+
+
+@pytest.fixture
+def history(db):
+    for expense_id, date, giver, receiver, archived in EXPENSES:
+        table = 'expenses_archive' if archived else 'expenses'
+        db.execute(f"""INSERT INTO {table} (id, amount, description, date, id_giver, id_receiver, id_activity)
+                       VALUES (?, 10, 'x', ?, ?, ?, 0)""", (expense_id, date, giver, receiver))
+    db.commit()
+    return db
+
+
+def expected(student_id=None):
+    """Ids of the history, newest first, computed without pagination."""
+    rows = [(date, expense_id) for expense_id, date, giver, receiver, _ in EXPENSES
+            if student_id is None or student_id in (giver, receiver)]
+    return [expense_id for _, expense_id in sorted(rows, reverse=True)]
+
+
+def all_pages(limit, student_id=None):
+    ids, after, pages = [], None, 0
+    while True:
+        rows, after = Expense.get_expense_page(student_id=student_id, after=after, limit=limit)
+        assert len(rows) <= limit
+        ids.extend(row[0] for row in rows)
+        pages += 1
+        if after is None:
+            return ids, pages
+        assert pages <= len(EXPENSES), "the cursor does not advance"
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 4, len(EXPENSES)])
+def test_pages_cover_every_row_once(history, limit):
+    ids, pages = all_pages(limit)
+    assert ids == expected()
+    assert pages == max(1, -(-len(EXPENSES) // limit))  # No empty trailing page
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5])
+def test_student_pages_deduplicate_the_two_student_columns(history, limit):
+    ids, _ = all_pages(limit, student_id=1)
+    assert ids == expected(student_id=1)  # 4 (giver and receiver) once, 5 and 10 included
+
+
+def test_cursor_inside_equal_dates(history):
+    # First page ends on id 8 (2025-06-02): the next one starts with the lower ids of the same date
+    rows, after = Expense.get_expense_page(limit=3)
+    assert [row[0] for row in rows] == [9, 10, 8]
+    assert after == ('2025-06-02', 8)
+    rows, after = Expense.get_expense_page(after=after, limit=3)
+    assert [row[0] for row in rows] == [7, 6, 5]
+    rows, after = Expense.get_expense_page(after=after, limit=4)
+    assert [row[0] for row in rows] == [4, 3, 2, 1]
+    assert after is None
@@ -0,0 +1,127 @@
+"""Oldest-first settlements: Expense._plan_settlement and Expense.settle_between."""
+
+from decimal import Decimal
+
+import pytest
+
+from PythonExpenseApp.debt_balances import DebtBalances
+from PythonExpenseApp.expense import Expense
+from PythonExpenseApp.rollups import Rollups
+
+PAYER, DEBTOR = 1, 2
+
+# (id, amount) of three unpaid debts, oldest first
+DEBTS = [(11, 10), (12, 10), (13, 10)]
+
+
+@pytest.mark.parametrize("paid, full_ids, partial", [
+    (Decimal('4'), [], (11, Decimal('4'))),  # Less than the oldest debt
+    (Decimal('10'), [11], None),  # Exactly the oldest debt
+    (Decimal('20'), [11, 12], None),  # Exactly two debts
+    (Decimal('25'), [11, 12], (13, Decimal('5'))),  # Two debts and part of the third
+    (Decimal('30'), [11, 12, 13], None),  # The whole balance
+    (Decimal('100'), [11, 12, 13], None),  # More than the balance: nothing is overpaid
+    (None, [11, 12, 13], None),  # No amount: everything
+])
+def test_plan_settlement(paid, full_ids, partial):
+    assert Expense._plan_settlement(DEBTS, paid) == (full_ids, partial)
+
+
+def add_debts(db, amounts, payer_id=PAYER, debtor_id=DEBTOR):
+    """Insert one expense per debt, the first amount being the oldest debt; return the debt ids."""
+    ids = []
+    for day, amount in enumerate(amounts, start=1):
+        expense_id = db.execute("""INSERT INTO expenses (amount, description, date, id_giver, id_activity)
+                                   VALUES (?, 'dinner', ?, ?, 0)""",
+                                (amount * 2, f'2025-06-0{day}', payer_id)).lastrowid
+        ids.append(db.execute("""INSERT INTO debts (payer_id, debtor_id, amount, description, expense_id,
+                                                    date_created)
+                                 VALUES (?, ?, ?, 'dinner', ?, ?)""",
+                              (payer_id, debtor_id, amount, expense_id, f'2025-06-0{day}')).lastrowid)
+    db.commit()
+    assert DebtBalances.rebuild()[0]
+    assert Rollups.backfill(['debts', 'debts_paid'])[0]
+    return ids
+
+
+def unpaid(db):
+    return db.execute("""SELECT id, amount FROM debts WHERE payer_id = ? AND debtor_id = ? AND paid = 0
+                         ORDER BY date_created, id""", (PAYER, DEBTOR)).fetchall()
+
+
+def balance(db):
+    return db.execute("SELECT total, debts FROM debt_balances WHERE payer_id = ? AND debtor_id = ?",
+                      (PAYER, DEBTOR)).fetchone()
+
+
+def rollups(db):
+    return sorted(db.execute("SELECT metric, bucket, class, activity_id, events, ROUND(total, 2) "
+                             "FROM rollup_daily WHERE metric IN ('debts', 'debts_paid')").fetchall())
+
+
+def assert_rollups_match_backfill(db):
+    live = rollups(db)
+    assert Rollups.backfill(['debts', 'debts_paid'])[0]
+    assert live == rollups(db)
+
+
+def test_partial_payment_smaller_than_the_oldest_debt(db):
+    oldest, second = add_debts(db, [10, 10])
+
+    success, result = Expense.settle_between(PAYER, DEBTOR, 4)
+
+    assert success and result['amount'] == 4.0 and result['debts'] == 1
+    assert unpaid(db) == [(oldest, 6.0), (second, 10.0)]  # The oldest keeps the rest
+    part = db.execute("SELECT amount, paid, expense_id, date_created FROM debts WHERE id > ?",
+                      (second,)).fetchone()
+    assert part == (4.0, 1, 1, '2025-06-01')  # Paid part split from the oldest debt
+    assert balance(db) == (16.0, 2)
+    assert db.execute("SELECT SUM(amount) FROM debts WHERE expense_id = 1").fetchone() == (10.0,)
+    assert_rollups_match_backfill(db)
+
+
+def test_payment_equal_to_the_oldest_debts(db):
+    first, second, third = add_debts(db, [10, 10, 10])
+
+    success, result = Expense.settle_between(PAYER, DEBTOR, 20)
+
+    assert success and result['amount'] == 20.0 and result['debts'] == 2
+    assert unpaid(db) == [(third, 10.0)]
+    assert db.execute("SELECT COUNT(*) FROM debts").fetchone() == (3,)  # No row split
+    assert sorted(db.execute("SELECT debt_id, amount FROM settlement_debts")) == [(first, 10.0), (second, 10.0)]
+    assert balance(db) == (10.0, 1)
+    paid_buckets = db.execute("SELECT bucket, events FROM rollup_daily WHERE metric = 'debts_paid'").fetchall()
+    assert paid_buckets == [('2025-06-09', 2)]  # CURDATE() of the payment, not the day of the debts
+    assert_rollups_match_backfill(db)
+
+
+def test_payment_spanning_several_debts(db):
+    first, second, third = add_debts(db, [10, 7.5, 10])
+
+    success, result = Expense.settle_between(PAYER, DEBTOR, 20)
+
+    assert success and result['amount'] == 20.0 and result['debts'] == 3
+    assert unpaid(db) == [(third, 7.5)]  # 10 + 7.5 paid in full, 2.5 of the newest
+    settlement = db.execute("SELECT payer_id, debtor_id, amount, debts FROM settlements").fetchone()
+    assert settlement == (PAYER, DEBTOR, 20.0, 3)
+    assert balance(db) == (7.5, 1)
+    assert_rollups_match_backfill(db)
+
+
+def test_amount_larger_than_the_balance_settles_only_what_is_owed(db):
+    add_debts(db, [10, 5])
+
+    success, result = Expense.settle_between(PAYER, DEBTOR, 100)
+
+    assert success and result['amount'] == 15.0 and result['debts'] == 2
+    assert unpaid(db) == []
+    assert db.execute("SELECT amount FROM settlements").fetchone() == (15.0,)
+    assert balance(db) == (0.0, 0)
+    assert_rollups_match_backfill(db)
+
+
+def test_nothing_to_settle(db):
+    add_debts(db, [10], payer_id=3)
+
+    assert Expense.settle_between(PAYER, DEBTOR, 5) == (False, "No unpaid debts to settle")
+    assert Expense.settle_between(PAYER, DEBTOR, 0) == (False, "Settlement amount must be positive")